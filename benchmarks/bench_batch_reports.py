@@ -0,0 +1,86 @@
+"""
+Benchmark generating maintenance reports in bulk.
+
+Fills a scratch database with maintenance records for 1000 instruments,
+then times reading the report data with the two per-record queries the
+add maintenance dialog used against BatchReportService's single query,
+and rendering the PDFs in this process against worker processes.
+
+Usage:
+    python benchmarks/bench_batch_reports.py [--records 5000] [--reports 300] [--workers N]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_bulk_import import create_database
+from bench_bulk_export import fill_history
+from src.reports import BatchReportService
+
+RECORD_QUERY = """
+    SELECT mr.id, mr.maintenance_date, mr.notes, mt.name as maintenance_type,
+           i.name as instrument_name, i.model as instrument_model, i.serial_number,
+           i.location, i.brand, u1.username as performed_by, u2.username as responsible_user,
+           mr.instrument_id
+    FROM maintenance_records mr
+    JOIN maintenance_types mt ON mr.maintenance_type_id = mt.id
+    JOIN instruments i ON mr.instrument_id = i.id
+    JOIN users u1 ON mr.performed_by = u1.id
+    LEFT JOIN users u2 ON i.responsible_user_id = u2.id
+    WHERE mr.id = ?
+"""
+
+NEXT_QUERY = """
+    SELECT mt.name as maintenance_type, ims.period_weeks
+    FROM instrument_maintenance_schedule ims
+    JOIN maintenance_types mt ON mt.id = ims.maintenance_type_id
+    WHERE ims.instrument_id = ? AND ims.period_weeks IS NOT NULL
+    ORDER BY ims.period_weeks ASC
+    LIMIT 1
+"""
+
+
+def per_record(manager, record_ids):
+    for record_id in record_ids:
+        record = manager.get_single_row(RECORD_QUERY, (record_id,))
+        manager.get_single_row(NEXT_QUERY, (record['instrument_id'],))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--records', type=int, default=5000)
+    parser.add_argument('--reports', type=int, default=300)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        manager = create_database(os.path.join(tmp_dir, 'history.db'))
+        fill_history(manager, args.records)
+        record_ids = [row[0] for row in manager.iter_query("SELECT id FROM maintenance_records")]
+        print(f"\nReading the report data of {len(record_ids)} records")
+
+        started = time.perf_counter()
+        per_record(manager, record_ids)
+        print(f"{'two queries per record':<28} {time.perf_counter() - started:>8.3f} s")
+        started = time.perf_counter()
+        BatchReportService(manager, workers=1).fetch_report_data(record_ids)
+        print(f"{'one set-based query':<28} {time.perf_counter() - started:>8.3f} s")
+
+        print(f"\nRendering {args.reports} reports")
+        runs = [('in this process', 1)]
+        if args.workers > 1:
+            runs.append((f'{args.workers} worker processes', args.workers))
+        for label, workers in runs:
+            result = BatchReportService(manager, workers=workers).generate_reports(
+                os.path.join(tmp_dir, f'reports_{workers}'), record_ids[:args.reports]
+            )
+            print(f"{label:<28} {result.reports_per_second:>8.1f} reports/s")
+        manager.close()
+
+
+if __name__ == '__main__':
+    main()
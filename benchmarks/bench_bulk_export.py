@@ -0,0 +1,72 @@
+"""
+Benchmark exporting maintenance history.
+
+Fills a scratch database with maintenance records for 1000 instruments and
+exports them with BulkExporter in each format, then loads the same rows
+with execute_query for comparison. Reports rows per second, peak Python
+memory (tracemalloc) and file size.
+
+Usage:
+    python benchmarks/bench_bulk_export.py [--records 500000]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_bulk_import import TYPES, create_database
+from src.database import BulkExporter
+from src.database.bulk_export import EXPORT_QUERY
+
+
+def fill_history(manager, count):
+    rng = random.Random(19)
+    with manager.transaction() as conn:
+        conn.executemany(
+            "INSERT INTO maintenance_records (instrument_id, maintenance_type_id, maintenance_date, performed_by, notes) "
+            "VALUES (?, ?, ?, 1, ?)",
+            ((rng.randint(1, 1000), rng.randint(1, len(TYPES)),
+              f'20{rng.randint(10, 24)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}',
+              f'Routine check {n}') for n in range(count))
+        )
+
+
+def measure(run):
+    tracemalloc.start()
+    started = time.perf_counter()
+    rows = run()
+    seconds = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return rows, seconds, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--records', type=int, default=500000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        manager = create_database(os.path.join(tmp_dir, 'history.db'))
+        fill_history(manager, args.records)
+        print(f"\nExporting {args.records} maintenance records")
+
+        exporter = BulkExporter(manager)
+        for extension in ('csv', 'jsonl', 'labcol'):
+            path = os.path.join(tmp_dir, f'history.{extension}')
+            rows, seconds, peak = measure(lambda: exporter.export_maintenance_records(path).rows)
+            print(f"{'BulkExporter ' + extension:<24} {rows / seconds:>10,.0f} rows/s  "
+                  f"peak {peak / 2**20:>6.1f} MiB  file {os.path.getsize(path) / 2**20:>6.1f} MiB")
+
+        rows, seconds, peak = measure(lambda: len(manager.execute_query(EXPORT_QUERY)))
+        print(f"{'execute_query':<24} {rows / seconds:>10,.0f} rows/s  peak {peak / 2**20:>6.1f} MiB")
+        manager.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""
+Benchmark importing maintenance history.
+
+Writes a CSV file of maintenance records for 1000 instruments and imports
+it into scratch databases three ways: one create_maintenance_record call
+and commit per row, as the dialogs do (timed on a sample of the rows),
+BulkImporter validating in this process, and BulkImporter validating in
+worker processes. Reports rows per second for each.
+
+Usage:
+    python benchmarks/bench_bulk_import.py [--records 200000] [--workers N]
+"""
+import os
+import sys
+import csv
+import time
+import random
+import sqlite3
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from create_database import create_tables
+from src.database import BulkImporter, DatabaseManager, MaintenanceRepository
+
+TYPES = ['Cleaning', 'Calibration']
+ROW_BY_ROW_SAMPLE = 2000
+
+
+def create_database(db_path):
+    """Create a database with one user, the maintenance types and 1000 instruments"""
+    conn = sqlite3.connect(db_path)
+    create_tables(conn.cursor())
+    conn.execute("INSERT INTO users (username, email, password, is_admin) VALUES ('user1', 'u1@example.com', 'x', 0)")
+    conn.executemany("INSERT INTO maintenance_types (name) VALUES (?)", [(name,) for name in TYPES])
+    conn.executemany(
+        "INSERT INTO instruments (name, model, serial_number, location, status, brand, responsible_user_id, date_start_operating) "
+        "VALUES (?, 'M', ?, 'Lab 101', 'Operational', 'B', 1, '2000-01-01')",
+        [(f'Instrument {n}', f'SN-{n}') for n in range(1000)]
+    )
+    conn.commit()
+    conn.close()
+    manager = DatabaseManager(db_path)
+    # Give every instrument both plans so each record updates a status row
+    with manager.transaction() as conn:
+        conn.execute("""
+            INSERT INTO instrument_maintenance_schedule (instrument_id, maintenance_type_id, period_weeks, position)
+            SELECT i.id, t.id, 13, t.id FROM instruments i, maintenance_types t
+        """)
+    return manager
+
+
+def write_history(path, count):
+    rng = random.Random(18)
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['serial_number', 'maintenance_type', 'maintenance_date', 'performed_by', 'notes'])
+        for n in range(count):
+            writer.writerow([
+                f'SN-{rng.randrange(1000)}', rng.choice(TYPES),
+                f'20{rng.randint(10, 24)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}',
+                'user1', f'Routine check {n}'
+            ])
+
+
+def row_by_row(manager, path, count):
+    """Insert like AddMaintenanceDialog: one repository call and commit per row"""
+    repository = MaintenanceRepository(manager)
+    instruments = dict(manager.iter_query("SELECT serial_number, id FROM instruments"))
+    types = dict(manager.iter_query("SELECT name, id FROM maintenance_types"))
+    with open(path, newline='') as f:
+        rows = csv.DictReader(f)
+        started = time.perf_counter()
+        for row in (next(rows) for _ in range(count)):
+            repository.create_maintenance_record(
+                instruments[row['serial_number']], types[row['maintenance_type']],
+                row['maintenance_date'], 1, row['notes']
+            )
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--records', type=int, default=200000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'history.csv')
+        write_history(path, args.records)
+        print(f"\nImporting {args.records} maintenance records")
+
+        sample = min(ROW_BY_ROW_SAMPLE, args.records)
+        manager = create_database(os.path.join(tmp_dir, 'row_by_row.db'))
+        seconds = row_by_row(manager, path, sample)
+        manager.close()
+        print(f"{'row by row':<28} {sample / seconds:>10,.0f} rows/s  ({sample} row sample)")
+
+        runs = [('BulkImporter, 1 process', 1)]
+        if args.workers > 1:
+            runs.append((f'BulkImporter, {args.workers} workers', args.workers))
+        for label, workers in runs:
+            manager = create_database(os.path.join(tmp_dir, f'bulk_{workers}.db'))
+            result = BulkImporter(manager, workers=workers).import_maintenance_records(path)
+            manager.close()
+            print(f"{label:<28} {result.rows_per_second:>10,.0f} rows/s  ({result.seconds:.1f} s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark opening InstrumentDetailsDialog.
+
+Opens the dialog repeatedly against a freshly created database, once with
+the shared session the application uses and once with a new Database per
+dialog (the old behaviour), and reports p50/p99 latency. Then gives one
+instrument a long maintenance history and times opening it.
+
+Usage:
+    python benchmarks/bench_details_dialog.py [--runs 100] [--history 10000]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt6.QtWidgets import QApplication
+from create_database import create_database
+from database import Database
+from src.ui.dialogs.instrument_details_dialog import InstrumentDetailsDialog
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of samples"""
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def time_opens(runs, make_db, instrument_ids=range(1, 21)):
+    """Open and close the dialog runs times, returning latencies in milliseconds"""
+    samples = []
+    for n in range(runs):
+        started = time.perf_counter()
+        dialog = InstrumentDetailsDialog(instrument_ids[n % len(instrument_ids)], 1, True, db=make_db())
+        QApplication.processEvents()
+        samples.append((time.perf_counter() - started) * 1000)
+        dialog.deleteLater()
+    return samples
+
+
+def report(label, samples):
+    print(f"{label:<22} p50 {percentile(samples, 50):8.2f} ms   "
+          f"p99 {percentile(samples, 99):8.2f} ms   "
+          f"mean {statistics.mean(samples):8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=100)
+    parser.add_argument('--history', type=int, default=10000)
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, 'lab_instruments.db')
+        create_database(db_path)
+
+        shared = Database(db_path)
+        # Warm up Qt styles and the connection before measuring
+        time_opens(5, lambda: shared)
+
+        print(f"\nOpening InstrumentDetailsDialog {args.runs} times")
+        report('shared session', time_opens(args.runs, lambda: shared))
+        report('new Database per open', time_opens(args.runs, lambda: Database(db_path)))
+
+        shared.execute_many("""
+            INSERT INTO maintenance_records (instrument_id, maintenance_type_id, maintenance_date, performed_by, notes)
+            VALUES (1, 1, date('2000-01-01', ? || ' days'), 1, 'Routine maintenance')
+        """, [(n,) for n in range(args.history)])
+        print(f"\nOpening an instrument with {args.history} maintenance records {args.runs} times")
+        report('paged history', time_opens(args.runs, lambda: shared, [1]))
+        shared.close()
+
+
+if __name__ == '__main__':
+    main()
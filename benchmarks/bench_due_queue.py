@@ -0,0 +1,113 @@
+"""
+Benchmark finding the next maintenance to become due.
+
+Fills a scratch database with a fleet of instruments with three maintenance
+plans each, then compares the full status scan a reminder check ran before
+(the due query plus a status for every row) with a DueQueue: building it
+once, asking for the next change, applying one new maintenance record and
+collecting a day's status changes.
+
+Usage:
+    python benchmarks/bench_due_queue.py [--instruments 10000]
+"""
+import os
+import sys
+import time
+import random
+import sqlite3
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from create_database import create_tables
+from date_utils import get_maintenance_status_codes
+from src.database import DatabaseManager, MaintenanceRepository
+from src.scheduling import DueQueue
+
+TYPES = ['Cleaning', 'Calibration', 'Inspection']
+PERIODS = [4, 13, 26, 52]
+USERS = 20
+LOCATIONS = 40
+NOW = datetime(2025, 6, 1, 9, 0)
+SCAN_QUERY = """
+    SELECT ms.instrument_id, ms.maintenance_type_id, ms.next_due_day, i.responsible_user_id
+    FROM maintenance_status ms
+    JOIN instruments i ON i.id = ms.instrument_id
+    WHERE i.status = 'Operational'
+"""
+
+
+def fill_fleet(db_path, count):
+    """Create a database with count instruments, each with a plan and a last record for every type"""
+    rng = random.Random(23)
+    conn = sqlite3.connect(db_path)
+    create_tables(conn.cursor())
+    conn.executemany("INSERT INTO users (username, email, password, is_admin) VALUES (?, ?, 'x', 0)",
+                     [(f'user{n}', f'user{n}@example.com') for n in range(1, USERS + 1)])
+    conn.executemany("INSERT INTO maintenance_types (name) VALUES (?)", [(name,) for name in TYPES])
+    conn.executemany(
+        "INSERT INTO instruments (name, model, serial_number, location, status, brand, responsible_user_id, date_start_operating) "
+        "VALUES (?, 'M', ?, ?, 'Operational', 'B', ?, '2020-01-01')",
+        [(f'Instrument {n}', f'SN-{n}', f'Lab {n % LOCATIONS + 1}', rng.randint(1, USERS)) for n in range(count)]
+    )
+    conn.commit()
+    conn.close()
+    manager = DatabaseManager(db_path)
+    start = NOW.date() - timedelta(days=365)
+    with manager.transaction() as conn:
+        conn.executemany(
+            "INSERT INTO instrument_maintenance_schedule (instrument_id, maintenance_type_id, period_weeks, position) "
+            "VALUES (?, ?, ?, ?)",
+            [(instrument_id, type_id, rng.choice(PERIODS), type_id)
+             for instrument_id in range(1, count + 1) for type_id in range(1, len(TYPES) + 1)]
+        )
+        conn.executemany(
+            "INSERT INTO maintenance_records (instrument_id, maintenance_type_id, maintenance_date, performed_by) "
+            "VALUES (?, ?, ?, 1)",
+            [(instrument_id, type_id, (start + timedelta(days=rng.randint(0, 364))).isoformat())
+             for instrument_id in range(1, count + 1) for type_id in range(1, len(TYPES) + 1)]
+        )
+    return manager
+
+
+def timed(run, repeat=1):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = run()
+    return (time.perf_counter() - started) / repeat * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--instruments', type=int, default=10000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        manager = fill_fleet(os.path.join(tmp_dir, 'fleet.db'), args.instruments)
+        print(f"\n{args.instruments} instruments, {args.instruments * len(TYPES)} maintenance plans")
+
+        def scan():
+            rows = manager.execute_query(SCAN_QUERY)
+            return get_maintenance_status_codes([row['next_due_day'] for row in rows], NOW)
+
+        ms, _ = timed(scan, 5)
+        print(f"{'full status scan':<32} {ms:>9.2f} ms")
+        ms, queue = timed(lambda: DueQueue(manager, NOW))
+        print(f"{'build the due queue (once)':<32} {ms:>9.2f} ms")
+        ms, _ = timed(queue.next_change, 1000)
+        print(f"{'next change':<32} {ms:>9.4f} ms")
+        ms, _ = timed(lambda: queue.refresh(NOW), 1000)
+        print(f"{'refresh, nothing committed':<32} {ms:>9.4f} ms")
+
+        MaintenanceRepository(manager).create_maintenance_record(1, 1, '2025-06-01', 1, None)
+        ms, _ = timed(lambda: queue.refresh(NOW))
+        print(f"{'refresh after one record':<32} {ms:>9.2f} ms")
+        ms, changes = timed(lambda: queue.pop_changes(NOW + timedelta(days=1)))
+        print(f"{'next day status changes':<32} {ms:>9.2f} ms  ({len(changes)} changes)")
+        manager.close()
+
+
+if __name__ == '__main__':
+    main()
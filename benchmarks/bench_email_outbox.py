@@ -0,0 +1,81 @@
+"""
+Benchmark the email outbox.
+
+Queues one digest email per recipient in a scratch database and drains
+the outbox into a local SMTPSink that adds a delay to every round trip,
+with one worker connection and with several. Then interrupts a drain
+halfway and times resuming it against sending the whole run again.
+
+Usage:
+    python benchmarks/bench_email_outbox.py [--recipients 10000] [--latency-ms 1] [--workers 4]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_bulk_import import create_database
+from bench_reminders import digest_messages
+from src.notifications import EmailConfig, EmailOutbox, SMTPSink
+
+
+def requeue(manager):
+    with manager.transaction() as conn:
+        conn.execute("UPDATE email_outbox SET status = 'pending', attempts = 0, next_attempt_at = 0")
+
+
+def interrupt_halfway(manager, count, stop):
+    while manager.get_scalar("SELECT COUNT(*) FROM email_outbox WHERE status = 'sent'") < count // 2:
+        time.sleep(0.01)
+    stop.set()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--recipients', type=int, default=10000)
+    parser.add_argument('--latency-ms', type=float, default=1)
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir, SMTPSink(latency=args.latency_ms / 1000) as sink:
+        manager = create_database(os.path.join(tmp_dir, 'outbox.db'))
+        config = EmailConfig(sink.host, sink.port, sender='lab@example.com', use_tls=False)
+        messages = digest_messages(args.recipients, config)
+
+        print(f"\nQueuing and sending {args.recipients} digests, {args.latency_ms} ms per round trip")
+        outbox = EmailOutbox(manager, config)
+        started = time.perf_counter()
+        with manager.transaction() as conn:
+            for n, message in enumerate(messages):
+                outbox.enqueue(conn, message, message['To'], [f'{n}:1:2025-06-05:user{n}@example.com:overdue'])
+        print(f"{'enqueue, one transaction':<28} {time.perf_counter() - started:>8.2f} s")
+
+        for workers in sorted({1, args.workers}):
+            requeue(manager)
+            result = EmailOutbox(manager, config, workers=workers).drain()
+            assert result.sent == args.recipients
+            print(f"{f'drain, {workers} workers':<28} {result.seconds:>8.2f} s  "
+                  f"({result.sent / result.seconds:,.0f} messages/s)")
+
+        requeue(manager)
+        stop = threading.Event()
+        outbox = EmailOutbox(manager, config, workers=1)
+        watcher = threading.Thread(target=interrupt_halfway, args=(manager, args.recipients, stop))
+        watcher.start()
+        interrupted = outbox.drain(stop=stop)
+        watcher.join()
+        resumed = outbox.drain()
+        print(f"\nInterrupted after {interrupted.sent} messages")
+        print(f"{'resume from the outbox':<28} {resumed.seconds:>8.2f} s  ({resumed.sent} messages)")
+        requeue(manager)
+        rerun = outbox.drain()
+        print(f"{'send the whole run again':<28} {rerun.seconds:>8.2f} s  ({rerun.sent} messages)")
+        manager.close()
+
+
+if __name__ == '__main__':
+    main()
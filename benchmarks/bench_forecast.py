@@ -0,0 +1,73 @@
+"""
+Benchmark the maintenance forecast.
+
+Fills a scratch database with a fleet of instruments with three maintenance
+plans each and forecasts every occurrence over the next months: stepping
+each plan with calculate_next_maintenance, against forecast_maintenance with
+NumPy and with its pure Python fallback. Also times the weekly per-user
+aggregation.
+
+Usage:
+    python benchmarks/bench_forecast.py [--instruments 10000] [--months 12]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_due_queue import NOW, fill_fleet
+from date_utils import calculate_next_maintenance, from_day_number
+import src.scheduling.forecast as forecast_module
+from src.scheduling import add_months, forecast_maintenance
+from src.scheduling.forecast import FORECAST_QUERY
+
+
+def step_each_plan(manager, months):
+    """Expand every plan one date at a time with the scalar date helpers"""
+    today = NOW.strftime('%Y-%m-%d')
+    end = add_months(NOW.date(), months).strftime('%Y-%m-%d')
+    occurrences = []
+    for instrument_id, type_id, period_weeks, next_day, user_id, location in manager.iter_query(FORECAST_QUERY):
+        day = max(from_day_number(next_day), today)
+        while day < end:
+            occurrences.append((instrument_id, type_id, day))
+            day = calculate_next_maintenance(day, period_weeks, now=NOW)
+    return occurrences
+
+
+def timed(run):
+    started = time.perf_counter()
+    result = run()
+    return (time.perf_counter() - started) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--instruments', type=int, default=10000)
+    parser.add_argument('--months', type=int, default=12)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        manager = fill_fleet(os.path.join(tmp_dir, 'fleet.db'), args.instruments)
+        print(f"\nForecasting {args.months} months for {args.instruments} instruments with 3 plans each")
+        ms, occurrences = timed(lambda: step_each_plan(manager, args.months))
+        print(f"{'calculate_next_maintenance loop':<32} {ms:>8.1f} ms  ({len(occurrences):,} occurrences)")
+
+        runs = [('forecast, pure Python', None)]
+        if forecast_module.np is not None:
+            runs.insert(0, ('forecast, NumPy', forecast_module.np))
+        for label, np in runs:
+            forecast_module.np = np
+            ms, forecast = timed(lambda: forecast_maintenance(manager, args.months, NOW))
+            assert len(forecast) == len(occurrences)
+            print(f"{label:<32} {ms:>8.1f} ms")
+            ms, _ = timed(lambda: forecast.weekly('user'))
+            print(f"{'  weekly load per user':<32} {ms:>8.1f} ms")
+        manager.close()
+
+
+if __name__ == '__main__':
+    main()
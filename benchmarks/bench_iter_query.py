@@ -0,0 +1,76 @@
+"""
+Benchmark reading the whole maintenance history.
+
+Fills a scratch database with maintenance records and reads the joined
+history back three ways: execute_query (a list of dicts, the old path),
+iter_query yielding tuples and iter_query yielding records. Reports time
+and the peak memory traced by tracemalloc for each.
+
+Usage:
+    python benchmarks/bench_iter_query.py [--records 1000000]
+"""
+import os
+import sys
+import time
+import sqlite3
+import argparse
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from create_database import create_tables
+from src.database import DatabaseManager, MaintenanceRepository
+
+
+def fill(db_path, count):
+    """Create a database with count maintenance records over 100 instruments"""
+    conn = sqlite3.connect(db_path)
+    create_tables(conn.cursor())
+    conn.execute("INSERT INTO users (username, email, password, is_admin) VALUES ('user1', 'u1@example.com', 'x', 0)")
+    conn.execute("INSERT INTO maintenance_types (name) VALUES ('Cleaning')")
+    conn.executemany(
+        "INSERT INTO instruments (name, model, serial_number, location, status, brand, responsible_user_id, date_start_operating) "
+        "VALUES (?, 'M', ?, 'Lab 101', 'Operational', 'B', 1, '2000-01-01')",
+        [(f'Instrument {n}', f'SN-{n}') for n in range(100)]
+    )
+    conn.executemany(
+        "INSERT INTO maintenance_records (instrument_id, maintenance_type_id, maintenance_date, performed_by, notes) "
+        "VALUES (?, 1, date('2000-01-01', ? || ' days'), 1, 'Routine maintenance')",
+        ((n % 100 + 1, n // 100) for n in range(count))
+    )
+    conn.commit()
+    conn.close()
+
+
+def measure(label, read):
+    """Run read under tracemalloc and print its time and peak memory"""
+    tracemalloc.start()
+    started = time.perf_counter()
+    rows = read()
+    seconds = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{label:<24} {rows:>9} rows {seconds:8.2f} s   peak {peak / 2**20:9.1f} MiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--records', type=int, default=1000000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, 'lab_instruments.db')
+        fill(db_path, args.records)
+        manager = DatabaseManager(db_path)
+        repository = MaintenanceRepository(manager)
+
+        print(f"\nReading {args.records} maintenance records")
+        measure('execute_query (dicts)', lambda: len(repository.get_all_maintenance_records()))
+        measure('iter_query (tuples)', lambda: sum(1 for _ in manager.iter_query(repository.ALL_RECORDS_QUERY)))
+        measure('iter_query (records)', lambda: sum(1 for _ in repository.iter_maintenance_records()))
+        manager.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmark next-maintenance and status computation over the whole fleet.
+
+Computes next due dates and status codes for a synthetic set of schedule
+rows three ways: calling the scalar date_utils functions per row, the batch
+functions with NumPy, and the batch functions' plain Python fallback (what
+the packaged application uses, since it is built without NumPy).
+
+Usage:
+    python benchmarks/bench_next_maintenance.py [--rows 1000000]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import date_utils
+from date_utils import (
+    calculate_next_maintenance,
+    get_maintenance_status,
+    calculate_next_maintenance_days,
+    get_maintenance_status_codes,
+    to_day_number
+)
+
+
+def make_rows(count, seed=1):
+    """Random (last date, period weeks, start date) rows, some never maintained"""
+    rng = random.Random(seed)
+    base = datetime(2025, 6, 1)
+    dates = [(base + timedelta(days=n)).strftime('%Y-%m-%d') for n in range(-730, 1)]
+    periods = [1, 2, 4, 13, 26, 52]
+    rows = []
+    for _ in range(count):
+        last = None if rng.random() < 0.1 else rng.choice(dates)
+        rows.append((last, rng.choice(periods), rng.choice(dates)))
+    return rows
+
+
+def run_scalar(rows, now):
+    for last, period, start in rows:
+        get_maintenance_status(calculate_next_maintenance(last, period, start, now=now), now=now)
+
+
+def run_batch(columns, now):
+    last_days, periods, start_days = columns
+    next_days = calculate_next_maintenance_days(last_days, periods, start_days, now=now)
+    get_maintenance_status_codes(next_days, now=now)
+
+
+def timed(label, func, *args):
+    started = time.perf_counter()
+    func(*args)
+    elapsed = time.perf_counter() - started
+    print(f"{label:<24} {elapsed * 1000:10.1f} ms")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000000)
+    args = parser.parse_args()
+
+    now = datetime(2025, 6, 1, 12)
+    rows = make_rows(args.rows)
+    columns = (
+        [to_day_number(last) for last, _, _ in rows],
+        [period for _, period, _ in rows],
+        [to_day_number(start) for _, _, start in rows]
+    )
+
+    print(f"\nNext maintenance and status for {args.rows} schedule rows")
+    scalar = timed('scalar per row', run_scalar, rows, now)
+
+    numpy = date_utils.np
+    if numpy is not None:
+        arrays = tuple(numpy.array(column, dtype='float64') for column in columns)
+        batch = timed('batch, NumPy', run_batch, arrays, now)
+        print(f"{'':<24} {scalar / batch:10.1f}x faster than scalar")
+    else:
+        print('batch, NumPy             skipped (NumPy is not installed)')
+
+    date_utils.np = None
+    try:
+        fallback = timed('batch, plain Python', run_batch, columns, now)
+        print(f"{'':<24} {scalar / fallback:10.1f}x faster than scalar")
+    finally:
+        date_utils.np = numpy
+
+
+if __name__ == '__main__':
+    main()
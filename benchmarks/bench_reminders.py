@@ -0,0 +1,73 @@
+"""
+Benchmark sending reminder digests.
+
+Builds one digest email per recipient and sends them to a local SMTPSink
+that adds a delay to every round trip, as a real server across a network
+does. Compares a new connection per message (as test_email_config.py
+does) with SMTPMailer reusing one connection, with and without
+pipelining.
+
+Usage:
+    python benchmarks/bench_reminders.py [--recipients 10000] [--latency-ms 1]
+"""
+import os
+import sys
+import time
+import smtplib
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.notifications import Digest, EmailConfig, SMTPMailer, SMTPSink, build_message
+
+NEW_CONNECTION_SAMPLE = 500
+
+
+def digest_messages(count, config):
+    messages = []
+    for n in range(count):
+        digest = Digest(n, f'user{n}', f'user{n}@example.com')
+        digest.items = [{'instrument_name': f'Instrument {n}-{k}', 'serial_number': f'SN-{n}-{k}',
+                         'location': 'Lab 101', 'maintenance_type': 'Calibration', 'next_due': '2025-06-05',
+                         'last_date': '2025-05-08', 'overdue': k == 0} for k in range(3)]
+        messages.append(build_message(digest, config))
+    return messages
+
+
+def new_connection_per_message(config, messages):
+    for message in messages:
+        server = smtplib.SMTP(config.server, config.port)
+        server.send_message(message)
+        server.quit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--recipients', type=int, default=10000)
+    parser.add_argument('--latency-ms', type=float, default=1)
+    args = parser.parse_args()
+
+    print(f"\nSending {args.recipients} digests, {args.latency_ms} ms per round trip")
+    with SMTPSink(latency=args.latency_ms / 1000) as sink:
+        config = EmailConfig(sink.host, sink.port, sender='lab@example.com', use_tls=False)
+        messages = digest_messages(args.recipients, config)
+
+        sample = messages[:NEW_CONNECTION_SAMPLE]
+        started = time.perf_counter()
+        new_connection_per_message(config, sample)
+        seconds = time.perf_counter() - started
+        print(f"{'connection per message':<28} {len(sample) / seconds:>8,.0f} messages/s  ({len(sample)} message sample)")
+
+        for label, pipelining in (('one connection', False), ('one connection, pipelined', True)):
+            trips = sink.round_trips
+            started = time.perf_counter()
+            with SMTPMailer(config, pipelining=pipelining) as mailer:
+                errors = mailer.send_messages(messages)
+            seconds = time.perf_counter() - started
+            assert not any(errors)
+            print(f"{label:<28} {len(messages) / seconds:>8,.0f} messages/s  "
+                  f"({(sink.round_trips - trips) / len(messages):.1f} round trips per message)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""
+Benchmark searching maintenance notes.
+
+Fills a scratch database with maintenance records whose notes are drawn
+from a small vocabulary, plus a few rare phrases, and times the FTS5 search
+behind the search boxes against the LIKE '%...%' scan it replaces, for
+terms matching few, some and many records. Each time is the median of
+several runs returning the first page of results. The LIKE page is
+unranked, so it stops early on common words; with rare ones it scans the
+whole table.
+
+Usage:
+    python benchmarks/bench_search.py [--records 1000000]
+"""
+import os
+import sys
+import time
+import random
+import sqlite3
+import argparse
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from create_database import create_tables
+from src.database import DatabaseManager, MaintenanceRepository, fts_query
+
+WORDS = [
+    'routine', 'check', 'calibration', 'cleaned', 'filter', 'replaced', 'rotor',
+    'lamp', 'pump', 'seal', 'gasket', 'sensor', 'drift', 'adjusted', 'tested',
+    'passed', 'failed', 'noise', 'vibration', 'temperature', 'pressure', 'door',
+    'alarm', 'display', 'firmware', 'updated', 'cable', 'fan', 'motor', 'belt',
+]
+RARE_NOTES = ['Battery leak in the lamp housing', 'Cracked viewport glass']
+SEARCHES = ['battery leak', 'calib drift', 'routine']
+RUNS = 5
+
+
+def fill(db_path, count):
+    """Create a database with count maintenance records over 1000 instruments"""
+    rng = random.Random(17)
+    conn = sqlite3.connect(db_path)
+    create_tables(conn.cursor())
+    conn.execute("INSERT INTO users (username, email, password, is_admin) VALUES ('user1', 'u1@example.com', 'x', 0)")
+    conn.execute("INSERT INTO maintenance_types (name) VALUES ('Cleaning')")
+    conn.executemany(
+        "INSERT INTO instruments (name, model, serial_number, location, status, brand, responsible_user_id, date_start_operating) "
+        "VALUES (?, 'M', ?, 'Lab 101', 'Operational', 'B', 1, '2000-01-01')",
+        [(f'Instrument {n}', f'SN-{n}') for n in range(1000)]
+    )
+
+    def note(n):
+        if n % 50000 == 0:
+            return RARE_NOTES[n // 50000 % len(RARE_NOTES)]
+        return ' '.join(rng.sample(WORDS, rng.randint(3, 8)))
+
+    conn.executemany(
+        "INSERT INTO maintenance_records (instrument_id, maintenance_type_id, maintenance_date, performed_by, notes) "
+        "VALUES (?, 1, date('2000-01-01', ? || ' days'), 1, ?)",
+        ((n % 1000 + 1, n // 1000, note(n)) for n in range(count))
+    )
+    conn.commit()
+    conn.close()
+
+
+def median_ms(search):
+    """Run search RUNS times and return the median milliseconds and the result"""
+    times = []
+    for _ in range(RUNS):
+        started = time.perf_counter()
+        result = search()
+        times.append((time.perf_counter() - started) * 1000)
+    return statistics.median(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--records', type=int, default=1000000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, 'lab_instruments.db')
+        fill(db_path, args.records)
+
+        # Opening migrates the database, which builds the search indexes
+        started = time.perf_counter()
+        manager = DatabaseManager(db_path)
+        print(f"\nIndexed {args.records} maintenance notes in {time.perf_counter() - started:.1f} s")
+        repository = MaintenanceRepository(manager)
+        limit = repository.PAGE_SIZE
+
+        print(f"{'search':<16} {'matches':>9} {'FTS5 ms':>9} {'LIKE ms':>9}")
+        for text in SEARCHES:
+            matches = manager.execute_query(
+                "SELECT COUNT(*) AS n FROM maintenance_notes_fts WHERE maintenance_notes_fts MATCH ?",
+                (fts_query(text),)
+            )[0]['n']
+            fts_ms, _ = median_ms(lambda: repository.search_notes(text))
+            # LIKE cannot use an index, and prefix-matching every word
+            # anywhere in the note means one unanchored pattern per word
+            like_where = ' AND '.join('notes LIKE ?' for _ in text.split())
+            like_ms, _ = median_ms(lambda: manager.execute_query(
+                f"SELECT * FROM maintenance_records WHERE {like_where} LIMIT ?",
+                tuple(f'%{word}%' for word in text.split()) + (limit,)
+            ))
+            print(f"{text:<16} {matches:>9} {fts_ms:>9.1f} {like_ms:>9.1f}")
+        manager.close()
+
+
+if __name__ == '__main__':
+    main()
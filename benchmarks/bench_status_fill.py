@@ -0,0 +1,104 @@
+"""
+Benchmark filling a status-colored table.
+
+Fills a table with 20k maintenance rows where half are overdue and paints
+it once, comparing the old per-row highlighting of a QTableWidget (items
+recreated, scrolled to and repainted for every highlighted row) with
+BaseTable's status codes painted by a delegate.
+
+Usage:
+    python benchmarks/bench_status_fill.py [--rows 20000]
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt6.QtWidgets import QApplication, QTableWidget, QTableWidgetItem
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QColor
+from date_utils import STATUS_ON_SCHEDULE, STATUS_OVERDUE, STATUS_VALUES
+from src.ui.base.base_table import BaseTable
+
+HEADERS = [
+    'Instrument', 'Brand', 'Model', 'Serial Number', 'Location',
+    'Maintenance Type', 'Performed By', 'Last Maintenance',
+    'Next Maintenance', 'Notes'
+]
+
+
+def make_rows(count):
+    """Rows shaped like MaintenanceWindow's, every other one overdue"""
+    rows = [
+        [f'Instrument {n}', 'Brand', 'Model', f'SN-{n:06d}', f'Lab {n % 40}',
+         'Calibration', 'user1', '01-01-2025', '01-04-2025', '']
+        for n in range(count)
+    ]
+    statuses = [STATUS_OVERDUE if n % 2 else STATUS_ON_SCHEDULE for n in range(count)]
+    return rows, list(range(count)), statuses
+
+
+def fill_highlighting_items(table, rows, row_ids, statuses):
+    """The old QTableWidget fill followed by a highlight_row call per row"""
+    table.setRowCount(0)
+    for row_id, data in zip(row_ids, rows):
+        row = table.rowCount()
+        table.insertRow(row)
+        for col, value in enumerate(data):
+            item = QTableWidgetItem(str(value))
+            item.setData(Qt.ItemDataRole.UserRole, row_id)
+            table.setItem(row, col, item)
+
+    for row, status in enumerate(statuses):
+        color = STATUS_VALUES[status][1]
+        if not color:
+            continue
+        for col in range(table.columnCount()):
+            item = table.item(row, col)
+            new_item = QTableWidgetItem(item.text())
+            new_item.setData(Qt.ItemDataRole.UserRole, item.data(Qt.ItemDataRole.UserRole))
+            new_item.setBackground(QColor('#ff0000'))
+            table.setItem(row, col, new_item)
+        table.scrollToItem(table.item(row, 0))
+        table.viewport().update()
+
+
+def time_fill(table, fill):
+    """Fill the shown table and paint it once, returning seconds"""
+    started = time.perf_counter()
+    fill()
+    table.viewport().repaint()
+    QApplication.processEvents()
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=20000)
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    rows, row_ids, statuses = make_rows(args.rows)
+    print(f"\nFilling {args.rows} rows, {statuses.count(STATUS_OVERDUE)} overdue")
+
+    widget = QTableWidget(0, len(HEADERS))
+    widget.setHorizontalHeaderLabels(HEADERS)
+    widget.resize(1200, 800)
+    widget.show()
+    seconds = time_fill(widget, lambda: fill_highlighting_items(widget, rows, row_ids, statuses))
+    print(f"{'item highlighting':<22} {seconds:8.3f} s")
+
+    table = BaseTable()
+    table.set_headers(HEADERS)
+    table.set_status_colors({code: color for code, (status, color) in enumerate(STATUS_VALUES) if color})
+    table.resize(1200, 800)
+    table.show()
+    seconds = time_fill(table, lambda: table.set_rows(rows, row_ids, statuses))
+    print(f"{'status role':<22} {seconds:8.3f} s")
+
+
+if __name__ == '__main__':
+    main()
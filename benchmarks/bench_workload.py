@@ -0,0 +1,45 @@
+"""
+Benchmark balancing the maintenance workload.
+
+Fills a scratch database with a fleet of instruments with three maintenance
+plans each, then suggests reassignments over the coming weeks with several
+due-date tolerances, reporting the busiest week of one user before and
+after, and times applying the last plan in one transaction.
+
+Usage:
+    python benchmarks/bench_workload.py [--instruments 10000] [--weeks 12]
+"""
+import os
+import sys
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_due_queue import NOW, fill_fleet, timed
+from src.scheduling import WorkloadBalancer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--instruments', type=int, default=10000)
+    parser.add_argument('--weeks', type=int, default=12)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        manager = fill_fleet(os.path.join(tmp_dir, 'fleet.db'), args.instruments)
+        print(f"\nBalancing {args.weeks} weeks for {args.instruments} instruments with 3 plans each")
+        for tolerance in (0, 3, 7):
+            balancer = WorkloadBalancer(manager, args.weeks, tolerance)
+            ms, plan = timed(lambda: balancer.suggest(NOW))
+            print(f"{f'suggest, tolerance {tolerance} days':<32} {ms:>8.1f} ms  "
+                  f"(peak {plan.peak_before} -> {plan.peak_after}, {len(plan.reassignments):,} reassignments)")
+        ms, count = timed(lambda: balancer.apply(plan.reassignments, NOW))
+        print(f"{'apply in one transaction':<32} {ms:>8.1f} ms  ({count:,} assignments)")
+        ms, plan = timed(lambda: balancer.suggest(NOW))
+        print(f"{'suggest again after applying':<32} {ms:>8.1f} ms  ({len(plan.reassignments):,} reassignments)")
+        manager.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -4,27 +4,10 @@ import os
 import sys
 from datetime import datetime
 from src.utils.path_utils import get_database_directory, get_database_path
+from src.database.migrations import migrate
 
-def create_database():
-    # Get database directory using the new path utility
-    app_data_dir = get_database_directory()
-    
-    # Set database path
-    db_path = get_database_path()
-    print(f"Creating database at: {db_path}")
-    
-    # Remove existing database if it exists
-    if os.path.exists(db_path):
-        os.remove(db_path)
-        print(f"Removed existing database at {db_path}")
-    
-    # Create new database
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
-    
-    # Create tables
-    print("Creating database tables...")
+def create_tables(cursor):
+    """Create the base (version 0) tables. Later changes are applied by migrations."""
     cursor.execute('''
     CREATE TABLE IF NOT EXISTS users (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -81,6 +64,28 @@ def create_database():
     )
     ''')
 
+def create_database(db_path=None):
+    # Get database directory using the new path utility
+    app_data_dir = get_database_directory()
+    
+    # Set database path
+    db_path = db_path or get_database_path()
+    print(f"Creating database at: {db_path}")
+    
+    # Remove existing database if it exists
+    if os.path.exists(db_path):
+        os.remove(db_path)
+        print(f"Removed existing database at {db_path}")
+    
+    # Create new database
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    cursor = conn.cursor()
+    
+    # Create tables
+    print("Creating database tables...")
+    create_tables(cursor)
+
     # Add default users
     default_users = [
         ('admin1', 'admin1@example.com', bcrypt.hashpw('admin111'.encode('utf-8'), bcrypt.gensalt()), True),
@@ -112,26 +117,26 @@ def create_database():
 
     # Add dummy instruments
     dummy_instruments = [
-        ('Microscope Olympus BX53', 'BX53', 'OLY-2023-001', 'Lab 101', 'Operational', 'Olympus', 3, '01-01-2025', 1, 13, None, None, None, None),
-        ('Centrifuge Eppendorf 5810R', '5810R', 'EPP-2023-002', 'Lab 101', 'Operational', 'Eppendorf', 3, '10-01-2025', 1, 4, 2, 13, 3, 52),
-        ('PCR Machine Bio-Rad T100', 'T100', 'BIO-2023-003', 'Lab 102', 'Operational', 'Bio-Rad', 3, '20-01-2025', 1, 13, None, None, None, None),
-        ('Autoclave Tuttnauer 2540M', '2540M', 'TUT-2023-004', 'Lab 103', 'Operational', 'Tuttnauer', 3, '30-01-2025', 2, 13, None, None, None, None),
-        ('pH Meter Mettler Toledo', 'SevenCompact', 'MET-2023-005', 'Lab 101', 'Operational', 'Mettler Toledo', 3, '01-02-2025', 2, 13, None, None, None, None),
-        ('Incubator Memmert IN55', 'IN55', 'MEM-2023-006', 'Lab 102', 'Operational', 'Memmert', 3, '10-02-2025', 2, 13, None, None, None, None),
-        ('Spectrophotometer Thermo Scientific', 'GENESYS 150', 'THE-2023-007', 'Lab 103', 'Operational', 'Thermo Scientific', 4, '20-02-2025', 1, 4, 2, 13, 3, 52),
-        ('Water Purification System Milli-Q', 'Advantage A10', 'MIL-2023-008', 'Lab 101', 'Operational', 'Merck', 4, '01-03-2025', 2, 13, None, None, None, None),
-        ('Freezer -80°C Thermo Scientific', 'ULT-1386-3-V', 'THE-2023-009', 'Lab 104', 'Operational', 'Thermo Scientific', 4, '10-03-2025', 2, 13, None, None, None, None),
-        ('Laminar Flow Hood Esco', 'Airstream AC2-4S1', 'ESC-2023-010', 'Lab 102', 'Operational', 'Esco', 4, '20-03-2025', 2, 13, 3, 52, None, None),
-        ('Vortex Mixer IKA', 'MS 3 digital', 'IKA-2023-011', 'Lab 101', 'Operational', 'IKA', 4, '30-03-2025', 2, 13, 3, 52, None, None),
-        ('Magnetic Stirrer IKA', 'RCT basic', 'IKA-2023-012', 'Lab 101', 'Operational', 'IKA', 4, '01-04-2025', 2, 13, None, None, None, None),
-        ('Hot Plate Corning', 'PC-420D', 'COR-2023-013', 'Lab 102', 'Operational', 'Corning', 5, '10-04-2025', 2, 13, None, None, None, None),
-        ('Microplate Reader BioTek', 'Synergy H1', 'BIO-2023-014', 'Lab 103', 'Operational', 'BioTek', 5, '20-04-2025', 1, 4, 2, 13, 3, 52),
-        ('Gel Documentation System Bio-Rad', 'ChemiDoc MP', 'BIO-2023-015', 'Lab 102', 'Operational', 'Bio-Rad', 5, '30-04-2025', 1, 4, 2, 13, 3, 52),
-        ('CO2 Incubator Thermo Scientific', 'Heracell 150i', 'THE-2023-016', 'Lab 104', 'Operational', 'Thermo Scientific', 5, '01-05-2025', 2, 13, None, None, None, None),
-        ('Shaker Incubator New Brunswick', 'Innova 42', 'NEW-2023-017', 'Lab 102', 'Operational', 'New Brunswick', 5, '10-05-2025', 2, 13, None, None, None, None),
-        ('Ultrasonic Cleaner Branson', 'CPXH', 'BRA-2023-018', 'Lab 103', 'Operational', 'Branson', 5, '10-05-2025', 2, 52, None, None, None, None),
-        ('Microbalance Mettler Toledo', 'XS205', 'MET-2023-019', 'Lab 101', 'Operational', 'Mettler Toledo', 5, '20-05-2025', 2, 52, None, None, None, None),
-        ('Refrigerator Thermo Scientific', 'TSX400', 'THE-2023-020', 'Lab 104', 'Operational', 'Thermo Scientific', 5, '20-05-2025', 2, 13, None, None, None, None)
+        ('Microscope Olympus BX53', 'BX53', 'OLY-2023-001', 'Lab 101', 'Operational', 'Olympus', 3, '2025-01-01', 1, 13, None, None, None, None),
+        ('Centrifuge Eppendorf 5810R', '5810R', 'EPP-2023-002', 'Lab 101', 'Operational', 'Eppendorf', 3, '2025-01-10', 1, 4, 2, 13, 3, 52),
+        ('PCR Machine Bio-Rad T100', 'T100', 'BIO-2023-003', 'Lab 102', 'Operational', 'Bio-Rad', 3, '2025-01-20', 1, 13, None, None, None, None),
+        ('Autoclave Tuttnauer 2540M', '2540M', 'TUT-2023-004', 'Lab 103', 'Operational', 'Tuttnauer', 3, '2025-01-30', 2, 13, None, None, None, None),
+        ('pH Meter Mettler Toledo', 'SevenCompact', 'MET-2023-005', 'Lab 101', 'Operational', 'Mettler Toledo', 3, '2025-02-01', 2, 13, None, None, None, None),
+        ('Incubator Memmert IN55', 'IN55', 'MEM-2023-006', 'Lab 102', 'Operational', 'Memmert', 3, '2025-02-10', 2, 13, None, None, None, None),
+        ('Spectrophotometer Thermo Scientific', 'GENESYS 150', 'THE-2023-007', 'Lab 103', 'Operational', 'Thermo Scientific', 4, '2025-02-20', 1, 4, 2, 13, 3, 52),
+        ('Water Purification System Milli-Q', 'Advantage A10', 'MIL-2023-008', 'Lab 101', 'Operational', 'Merck', 4, '2025-03-01', 2, 13, None, None, None, None),
+        ('Freezer -80°C Thermo Scientific', 'ULT-1386-3-V', 'THE-2023-009', 'Lab 104', 'Operational', 'Thermo Scientific', 4, '2025-03-10', 2, 13, None, None, None, None),
+        ('Laminar Flow Hood Esco', 'Airstream AC2-4S1', 'ESC-2023-010', 'Lab 102', 'Operational', 'Esco', 4, '2025-03-20', 2, 13, 3, 52, None, None),
+        ('Vortex Mixer IKA', 'MS 3 digital', 'IKA-2023-011', 'Lab 101', 'Operational', 'IKA', 4, '2025-03-30', 2, 13, 3, 52, None, None),
+        ('Magnetic Stirrer IKA', 'RCT basic', 'IKA-2023-012', 'Lab 101', 'Operational', 'IKA', 4, '2025-04-01', 2, 13, None, None, None, None),
+        ('Hot Plate Corning', 'PC-420D', 'COR-2023-013', 'Lab 102', 'Operational', 'Corning', 5, '2025-04-10', 2, 13, None, None, None, None),
+        ('Microplate Reader BioTek', 'Synergy H1', 'BIO-2023-014', 'Lab 103', 'Operational', 'BioTek', 5, '2025-04-20', 1, 4, 2, 13, 3, 52),
+        ('Gel Documentation System Bio-Rad', 'ChemiDoc MP', 'BIO-2023-015', 'Lab 102', 'Operational', 'Bio-Rad', 5, '2025-04-30', 1, 4, 2, 13, 3, 52),
+        ('CO2 Incubator Thermo Scientific', 'Heracell 150i', 'THE-2023-016', 'Lab 104', 'Operational', 'Thermo Scientific', 5, '2025-05-01', 2, 13, None, None, None, None),
+        ('Shaker Incubator New Brunswick', 'Innova 42', 'NEW-2023-017', 'Lab 102', 'Operational', 'New Brunswick', 5, '2025-05-10', 2, 13, None, None, None, None),
+        ('Ultrasonic Cleaner Branson', 'CPXH', 'BRA-2023-018', 'Lab 103', 'Operational', 'Branson', 5, '2025-05-10', 2, 52, None, None, None, None),
+        ('Microbalance Mettler Toledo', 'XS205', 'MET-2023-019', 'Lab 101', 'Operational', 'Mettler Toledo', 5, '2025-05-20', 2, 52, None, None, None, None),
+        ('Refrigerator Thermo Scientific', 'TSX400', 'THE-2023-020', 'Lab 104', 'Operational', 'Thermo Scientific', 5, '2025-05-20', 2, 13, None, None, None, None)
     ]
     
     cursor.executemany(
@@ -176,6 +181,9 @@ def create_database():
                   instrument['responsible_user_id'], 'The device functions properly'))
 
     conn.commit()
+
+    # Bring the new database up to the current schema version
+    migrate(conn)
     conn.close()
     print(f"Database created successfully at {db_path}")
 
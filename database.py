@@ -1,39 +1,48 @@
-import sqlite3
 import bcrypt
-from datetime import datetime, timedelta
 import os
-import json
-import socket
-import time
-from pathlib import Path
-import sys
-import signal
-from PyQt6.QtWidgets import QMessageBox
+import logging
+import threading
 from src.utils.path_utils import get_database_directory, get_database_path
+from src.database.database_manager import DatabaseManager
+from date_utils import today_day_number
 
-class Database:
-    def __init__(self):
+logger = logging.getLogger(__name__)
+
+class Database(DatabaseManager):
+    """Application database: the pooled DatabaseManager plus domain queries"""
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    @classmethod
+    def shared(cls):
+        """
+        Return the application-wide database session, opening it on first use.
+
+        Windows and dialogs receive this session from their parent instead of
+        opening their own, so the path checks and the first connection are
+        paid once per process.
+        """
+        with cls._shared_lock:
+            if cls._shared is None or cls._shared._closed:
+                cls._shared = cls()
+            return cls._shared
+
+    def __init__(self, db_path=None, pool_size=None):
         # Get database directory using the new path utility
         app_data_dir = get_database_directory()
         
         # Set database path
-        self.db_path = get_database_path()
-        self.lock_file = os.path.join(app_data_dir, 'db.lock')
-        self.lock_timeout = 30  # seconds
-        
-        # Register signal handlers for graceful shutdown
-        signal.signal(signal.SIGINT, self._signal_handler)
-        signal.signal(signal.SIGTERM, self._signal_handler)
+        db_path = db_path or get_database_path()
         
         # Check if database exists
-        if not os.path.exists(self.db_path):
+        if not os.path.exists(db_path):
             raise FileNotFoundError(
                 "Database file not found. Please ensure 'lab_instruments.db' exists in:\n" + 
-                app_data_dir
+                os.path.dirname(os.path.abspath(db_path))
             )
         
-        print(f"Database path: {self.db_path}")
-        print(f"Lock file path: {self.lock_file}")
+        print(f"Database path: {db_path}")
         
         # Ensure we can write to the directory
         try:
@@ -44,137 +53,37 @@ class Database:
             print("Write permissions verified")
         except Exception as e:
             print(f"Warning: Cannot write to directory: {e}")
-            
-        self.acquire_lock()
-        self.conn = sqlite3.connect(self.db_path)
-        self.conn.row_factory = sqlite3.Row
-        self.has_unsaved_changes = False
 
-    def _signal_handler(self, signum, frame):
-        """Handle system signals for graceful shutdown"""
-        print(f"Received signal {signum}, cleaning up...")
-        self.release_lock()
-        if hasattr(self, 'conn'):
-            self.conn.close()
-        sys.exit(0)
-
-    def acquire_lock(self):
-        """Try to acquire a lock on the database file"""
-        print(f"Attempting to acquire lock...")
-        start_time = time.time()
-        
-        # First, try to remove any existing lock file
-        try:
-            if os.path.exists(self.lock_file):
-                print(f"Found existing lock file, attempting to remove...")
-                os.remove(self.lock_file)
-                print("Existing lock file removed")
-        except Exception as e:
-            print(f"Warning: Could not remove existing lock file: {e}")
-        
-        while time.time() - start_time < self.lock_timeout:
-            try:
-                if os.path.exists(self.lock_file):
-                    print(f"Lock file exists at: {self.lock_file}")
-                    try:
-                        with open(self.lock_file, 'r') as f:
-                            lock_data = json.load(f)
-                            current_user = lock_data.get('username', 'Unknown')
-                            hostname = lock_data.get('hostname', 'Unknown')
-                            timestamp = lock_data.get('timestamp', '')
-                            print(f"Lock file contents: {lock_data}")
-                            
-                            # Check if the lock is stale (older than 1 minute)
-                            if timestamp:
-                                lock_time = datetime.fromisoformat(timestamp)
-                                if (datetime.now() - lock_time).total_seconds() > 60:  # 1 minute
-                                    print(f"Removing stale lock from {current_user} on {hostname}")
-                                    os.remove(self.lock_file)
-                                    continue
-                    except Exception as e:
-                        print(f"Error reading lock file: {e}")
-                        # If we can't read the lock file, try to remove it
-                        try:
-                            os.remove(self.lock_file)
-                            print("Removed unreadable lock file")
-                            continue
-                        except:
-                            pass
-                        
-                    raise Exception(
-                        f"The database is currently in use by {current_user} on {hostname}.\n\n"
-                        "Please wait until they finish or ask them to close the application.\n"
-                        "If you believe this is an error, you can delete the 'db.lock' file."
-                    )
-                
-                # Create lock file with current user info
-                lock_data = {
-                    'username': os.getenv('USERNAME', 'Unknown'),
-                    'hostname': socket.gethostname(),
-                    'timestamp': datetime.now().isoformat()
-                }
-                print(f"Creating new lock file with data: {lock_data}")
-                with open(self.lock_file, 'w') as f:
-                    json.dump(lock_data, f)
-                print("Lock acquired successfully")
-                return True
-            except Exception as e:
-                if "The database is currently in use" in str(e):
-                    raise e
-                print(f"Error during lock acquisition: {e}")
-                time.sleep(1)
-        raise Exception("Could not acquire database lock after timeout")
-
-    def release_lock(self):
-        """Release the lock on the database file"""
-        try:
-            if os.path.exists(self.lock_file):
-                print(f"Releasing lock file: {self.lock_file}")
-                os.remove(self.lock_file)
-                print("Lock released successfully")
-        except Exception as e:
-            print(f"Error releasing lock: {e}")
+        super().__init__(db_path, pool_size)
 
     def verify_user(self, username, password):
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT id, password, is_admin FROM users WHERE username = ?", (username,))
-        user = cursor.fetchone()
+        user = self.get_single_row("SELECT id, password, is_admin FROM users WHERE username = ?", (username,))
         
         if user and bcrypt.checkpw(password.encode('utf-8'), user['password']):
             return {'id': user['id'], 'is_admin': bool(user['is_admin'])}
         return None
 
     def get_all_instruments(self):
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT * FROM instruments")
-        return cursor.fetchall()
+        return self.execute_query("SELECT * FROM instruments")
 
     def add_instrument(self, name, model, serial_number, location):
-        cursor = self.conn.cursor()
-        cursor.execute(
+        return self.execute_insert(
             "INSERT INTO instruments (name, model, serial_number, location) VALUES (?, ?, ?, ?)",
             (name, model, serial_number, location)
         )
-        self.conn.commit()
-        self.has_unsaved_changes = True
-        return cursor.lastrowid
 
     def add_maintenance_record(self, instrument_id, maintenance_type_id, user_id, notes):
-        cursor = self.conn.cursor()
-        cursor.execute("""
+        self.execute_insert("""
             INSERT INTO maintenance_records (
                 instrument_id, maintenance_type_id, maintenance_date,
                 performed_by, notes
             )
             VALUES (?, ?, DATE('now'), ?, ?)
         """, (instrument_id, maintenance_type_id, user_id, notes))
-        self.conn.commit()
-        self.has_unsaved_changes = True
         return True
 
     def get_maintenance_history(self, instrument_id):
-        cursor = self.conn.cursor()
-        cursor.execute("""
+        return self.execute_query("""
             SELECT mr.*, u.username, mt.name as maintenance_type
             FROM maintenance_records mr
             JOIN users u ON mr.performed_by = u.id
@@ -182,110 +91,54 @@ class Database:
             WHERE mr.instrument_id = ?
             ORDER BY mr.maintenance_date DESC
         """, (instrument_id,))
-        return cursor.fetchall()
-
-    def save_changes(self):
-        """Save any pending changes to the database"""
-        if self.has_unsaved_changes:
-            self.conn.commit()
-            self.has_unsaved_changes = False
 
     def get_upcoming_maintenance(self, days=28):
-        """Get maintenance operations due in the next specified number of days"""
-        cursor = self.conn.cursor()
-        cursor.execute("""
+        """Get maintenance operations overdue or due in the next specified number of days"""
+        return self.execute_query("""
             SELECT 
                 i.id, i.name, i.model, i.serial_number, i.location,
                 mt.name as maintenance_type,
-                ims.period_days,
-                COALESCE(
-                    (SELECT MAX(maintenance_date)
-                     FROM maintenance_records mr
-                     WHERE mr.instrument_id = i.id
-                     AND mr.maintenance_type_id = mt.id),
-                    'Never'
-                ) as last_maintenance,
-                CASE
-                    WHEN COALESCE(
-                        (SELECT MAX(maintenance_date)
-                         FROM maintenance_records mr
-                         WHERE mr.instrument_id = i.id
-                         AND mr.maintenance_type_id = mt.id),
-                        '2000-01-01'
-                    ) = 'Never' THEN
-                        DATE('now')
-                    ELSE
-                        DATE(
-                            (SELECT MAX(maintenance_date)
-                             FROM maintenance_records mr
-                             WHERE mr.instrument_id = i.id
-                             AND mr.maintenance_type_id = mt.id),
-                            '+' || ims.period_days || ' days'
-                        )
-                END as next_maintenance,
+                ms.period_weeks * 7 as period_days,
+                COALESCE(ms.last_date, 'Never') as last_maintenance,
+                ms.next_due as next_maintenance,
                 u.username as responsible_user
-            FROM instruments i
-            JOIN instrument_maintenance_schedule ims ON i.id = ims.instrument_id
-            JOIN maintenance_types mt ON ims.maintenance_type_id = mt.id
+            FROM maintenance_status ms
+            JOIN instruments i ON i.id = ms.instrument_id
+            JOIN maintenance_types mt ON ms.maintenance_type_id = mt.id
             JOIN users u ON i.responsible_user_id = u.id
-            WHERE DATE(ims.maintenance_date, '+' || ims.period_days || ' days') <= DATE('now', '+' || ? || ' days')
-            ORDER BY next_maintenance ASC
-        """, (days,))
-        return cursor.fetchall()
+            WHERE ms.next_due_day <= ?
+            ORDER BY ms.next_due_day ASC
+        """, (today_day_number() + days,))
 
     def get_instrument_details(self, instrument_id):
         """Get detailed information about an instrument including maintenance schedule"""
-        cursor = self.conn.cursor()
-        
         # Get basic instrument info
-        cursor.execute("""
+        instrument = self.get_single_row("""
             SELECT i.*, u.username as responsible_user
             FROM instruments i
             LEFT JOIN users u ON i.responsible_user_id = u.id
             WHERE i.id = ?
         """, (instrument_id,))
-        instrument = cursor.fetchone()
         
         if not instrument:
             return None
             
         # Get maintenance schedule
-        cursor.execute("""
-            SELECT mt.name, ims.period_days,
-                   COALESCE(
-                       (SELECT MAX(maintenance_date)
-                        FROM maintenance_records mr
-                        WHERE mr.instrument_id = i.id
-                        AND mr.maintenance_type_id = mt.id),
-                       'Never'
-                   ) as last_maintenance,
-                   CASE
-                       WHEN COALESCE(
-                           (SELECT MAX(maintenance_date)
-                            FROM maintenance_records mr
-                            WHERE mr.instrument_id = i.id
-                            AND mr.maintenance_type_id = mt.id),
-                           '2000-01-01'
-                       ) = 'Never' THEN
-                           DATE('now')
-                       ELSE
-                           DATE(
-                               (SELECT MAX(maintenance_date)
-                                FROM maintenance_records mr
-                                WHERE mr.instrument_id = i.id
-                                AND mr.maintenance_type_id = mt.id),
-                               '+' || ims.period_days || ' days'
-                           )
-                   END as next_maintenance
-            FROM instruments i
-            JOIN instrument_maintenance_schedule ims ON i.id = ims.instrument_id
+        maintenance_schedule = self.execute_query("""
+            SELECT mt.name, ims.period_weeks * 7 as period_days,
+                   COALESCE(ms.last_date, 'Never') as last_maintenance,
+                   ms.next_due as next_maintenance
+            FROM instrument_maintenance_schedule ims
             JOIN maintenance_types mt ON ims.maintenance_type_id = mt.id
-            WHERE i.id = ?
+            LEFT JOIN maintenance_status ms
+                ON ms.instrument_id = ims.instrument_id
+                AND ms.maintenance_type_id = ims.maintenance_type_id
+            WHERE ims.instrument_id = ?
+            ORDER BY ims.position
         """, (instrument_id,))
-        maintenance_schedule = cursor.fetchall()
         
         # Get maintenance history
-        cursor.execute("""
+        maintenance_history = self.execute_query("""
             SELECT 
                 mr.maintenance_date,
                 mt.name as maintenance_type,
@@ -297,7 +150,6 @@ class Database:
             WHERE mr.instrument_id = ?
             ORDER BY mr.maintenance_date DESC
         """, (instrument_id,))
-        maintenance_history = cursor.fetchall()
         
         return {
             'instrument': instrument,
@@ -307,25 +159,22 @@ class Database:
 
     def get_user_responsibilities(self, user_id):
         """Get all instruments a user is responsible for"""
-        cursor = self.conn.cursor()
-        cursor.execute("""
+        return self.execute_query("""
             SELECT i.*, 
                    GROUP_CONCAT(mt.name) as maintenance_types,
-                   GROUP_CONCAT(ims.period_days) as maintenance_periods
+                   GROUP_CONCAT(ims.period_weeks * 7) as maintenance_periods
             FROM instruments i
             LEFT JOIN instrument_maintenance_schedule ims ON i.id = ims.instrument_id
             LEFT JOIN maintenance_types mt ON ims.maintenance_type_id = mt.id
             WHERE i.responsible_user_id = ?
             GROUP BY i.id
         """, (user_id,))
-        return cursor.fetchall()
 
     def __del__(self):
         """Cleanup when the database connection is closed"""
+        if not hasattr(self, '_idle'):
+            return
         try:
-            self.save_changes()
-            if hasattr(self, 'conn'):
-                self.conn.close()
-            self.release_lock()
+            self.close()
         except Exception as e:
             print(f"Error during cleanup: {e}") 
\ No newline at end of file
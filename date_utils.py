@@ -1,6 +1,29 @@
-from datetime import datetime, timedelta
+from datetime import datetime, date, time, timedelta
 
-def calculate_next_maintenance(last_maintenance_date, period_weeks, start_date=None):
+try:
+    import numpy as np
+except ImportError:
+    # The packaged application is built without NumPy; the batch functions
+    # below fall back to plain Python lists
+    np = None
+
+# Day numbers count days since 1970-01-01, the same as the *_day columns in the database
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+# Maintenance is due soon when the next date is at most this many days away
+DUE_SOON_DAYS = 10
+
+# Status codes returned by get_maintenance_status_codes, indexing STATUS_VALUES
+STATUS_ON_SCHEDULE = 0
+STATUS_DUE_SOON = 1
+STATUS_OVERDUE = 2
+STATUS_VALUES = (
+    ('on_schedule', None),
+    ('due_soon', 'yellow'),
+    ('overdue', 'red')
+)
+
+def calculate_next_maintenance(last_maintenance_date, period_weeks, start_date=None, now=None):
     """
     Calculate the next maintenance date based on the last maintenance date and period.
     
@@ -8,6 +31,7 @@ def calculate_next_maintenance(last_maintenance_date, period_weeks, start_date=N
         last_maintenance_date (str): Last maintenance date in 'YYYY-MM-DD' format
         period_weeks (int): Period in weeks
         start_date (str, optional): Start date in 'YYYY-MM-DD' format if no maintenance yet
+        now (datetime, optional): Current time, defaults to datetime.now()
         
     Returns:
         str: Next maintenance date in 'YYYY-MM-DD' format
@@ -16,7 +40,7 @@ def calculate_next_maintenance(last_maintenance_date, period_weeks, start_date=N
         if not last_maintenance_date or last_maintenance_date == 'Never':
             if start_date:
                 return start_date
-            return datetime.now().strftime('%Y-%m-%d')
+            return (now or datetime.now()).strftime('%Y-%m-%d')
             
         last_date = datetime.strptime(last_maintenance_date, '%Y-%m-%d')
         next_date = last_date + timedelta(weeks=period_weeks)
@@ -66,12 +90,13 @@ def format_date_for_db(date_str):
         print(f"Error formatting date for DB: {str(e)}")
         return None
 
-def get_maintenance_status(next_maintenance_date):
+def get_maintenance_status(next_maintenance_date, now=None):
     """
     Get the maintenance status based on the next maintenance date.
     
     Args:
         next_maintenance_date (str): Next maintenance date in 'YYYY-MM-DD' format
+        now (datetime, optional): Current time, defaults to datetime.now()
         
     Returns:
         tuple: (status, color) where status is 'overdue', 'due_soon', or 'on_schedule'
@@ -84,14 +109,173 @@ def get_maintenance_status(next_maintenance_date):
         # Parse the date
         next_date = datetime.strptime(next_maintenance_date, '%Y-%m-%d')
         
-        days_until_next = (next_date - datetime.now()).days
+        days_until_next = (next_date - (now or datetime.now())).days
         
         if days_until_next < 0:
             return 'overdue', 'red'
-        elif days_until_next <= 10:
+        elif days_until_next <= DUE_SOON_DAYS:
             return 'due_soon', 'yellow'
         else:
             return 'on_schedule', None
     except Exception as e:
         print(f"Error getting maintenance status: {str(e)}")
-        return 'on_schedule', None 
\ No newline at end of file
+        return 'on_schedule', None
+
+def to_day_number(date_str):
+    """
+    Convert a date to a day number.
+
+    Args:
+        date_str (str): Date in 'YYYY-MM-DD' format
+
+    Returns:
+        int: Days since 1970-01-01, or None if the date is missing or invalid
+    """
+    try:
+        if not date_str or date_str == 'Never':
+            return None
+        return datetime.strptime(date_str, '%Y-%m-%d').toordinal() - EPOCH_ORDINAL
+    except Exception:
+        return None
+
+def from_day_number(day):
+    """
+    Convert a day number to a date.
+
+    Args:
+        day (int): Days since 1970-01-01
+
+    Returns:
+        str: Date in 'YYYY-MM-DD' format, or None if day is None
+    """
+    if day is None:
+        return None
+    return date.fromordinal(int(day) + EPOCH_ORDINAL).strftime('%Y-%m-%d')
+
+def today_day_number():
+    """Get today's local date as a day number"""
+    return date.today().toordinal() - EPOCH_ORDINAL
+
+def _today_and_offset(now):
+    """
+    Split now into today's day number and a whole-day offset.
+
+    The scalar functions compare midnight of a date with the current time,
+    so any time after midnight makes a date one more day closer.
+    """
+    now = now or datetime.now()
+    return now.toordinal() - EPOCH_ORDINAL, 0 if now.time() == time(0) else 1
+
+def _as_day_array(values):
+    """Convert day numbers or datetime64 values to a float array, NaN where missing"""
+    values = np.asarray(values)
+    if values.dtype.kind == 'M':
+        days = values.astype('datetime64[D]')
+        result = days.astype('int64').astype('float64')
+        result[np.isnat(days)] = np.nan
+        return result
+    return values.astype('float64')
+
+def _is_missing(day):
+    return day is None or day != day
+
+def calculate_next_maintenance_days(last_days, period_weeks, start_days=None, now=None):
+    """
+    Calculate next maintenance dates for many schedules at once.
+
+    Gives the same dates as calling calculate_next_maintenance on each row.
+    Dates are day numbers (see to_day_number) or NumPy datetime64 values;
+    None, NaN or NaT mark a missing date or period.
+
+    Args:
+        last_days (sequence): Last maintenance date per schedule
+        period_weeks (sequence): Period in weeks per schedule
+        start_days (sequence, optional): Start date per schedule, used when
+            there is no maintenance yet; today is used when it is missing
+        now (datetime, optional): Current time, defaults to datetime.now()
+
+    Returns:
+        With NumPy, a datetime64[D] array with NaT where there is no next
+        date; otherwise a list of day numbers with None
+    """
+    today, _ = _today_and_offset(now)
+
+    if np is None:
+        if start_days is None:
+            start_days = [None] * len(last_days)
+        result = []
+        for last, period, start in zip(last_days, period_weeks, start_days):
+            if _is_missing(last):
+                result.append(today if _is_missing(start) else int(start))
+            elif _is_missing(period):
+                result.append(None)
+            else:
+                result.append(int(last) + int(period * 7 // 1))
+        return result
+
+    last = _as_day_array(last_days)
+    period = _as_day_array(period_weeks)
+    if start_days is None:
+        start = np.full(last.shape, np.nan)
+    else:
+        start = _as_day_array(start_days)
+
+    # A missing period leaves NaN, like the TypeError in the scalar version
+    next_days = np.where(
+        np.isnan(last),
+        np.where(np.isnan(start), today, start),
+        last + np.floor(period * 7)
+    )
+    result = np.full(next_days.shape, 'NaT', dtype='datetime64[D]')
+    valid = ~np.isnan(next_days)
+    result[valid] = next_days[valid].astype('int64').astype('datetime64[D]')
+    return result
+
+def get_maintenance_status_codes(next_days, now=None):
+    """
+    Get maintenance status codes for many next maintenance dates at once.
+
+    Gives the same status as calling get_maintenance_status on each date.
+    STATUS_VALUES[code] is the (status, color) pair.
+
+    Args:
+        next_days (sequence): Day numbers or datetime64 values, None/NaN/NaT when missing
+        now (datetime, optional): Current time, defaults to datetime.now()
+
+    Returns:
+        With NumPy, an int8 array of status codes; otherwise a list
+    """
+    today, offset = _today_and_offset(now)
+    due_soon_limit = today + offset + DUE_SOON_DAYS
+
+    if np is None:
+        codes = []
+        for day in next_days:
+            if _is_missing(day):
+                codes.append(STATUS_ON_SCHEDULE)
+            elif day < today + offset:
+                codes.append(STATUS_OVERDUE)
+            elif day <= due_soon_limit:
+                codes.append(STATUS_DUE_SOON)
+            else:
+                codes.append(STATUS_ON_SCHEDULE)
+        return codes
+
+    days = _as_day_array(next_days)
+    codes = np.full(days.shape, STATUS_ON_SCHEDULE, dtype='int8')
+    # Comparisons with NaN are False, so missing dates stay on schedule
+    codes[days <= due_soon_limit] = STATUS_DUE_SOON
+    codes[days < today + offset] = STATUS_OVERDUE
+    return codes
+
+def format_day_numbers(days):
+    """
+    Convert the result of calculate_next_maintenance_days to dates.
+
+    Returns:
+        list: Dates in 'YYYY-MM-DD' format, None where missing
+    """
+    if np is not None and isinstance(days, np.ndarray):
+        return [None if text == 'NaT' else str(text) for text in np.datetime_as_string(days, unit='D')]
+    return [from_day_number(day) for day in days]
+
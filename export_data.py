@@ -0,0 +1,44 @@
+"""
+Export the maintenance history to a CSV, JSONL or columnar file.
+
+Usage:
+    python export_data.py FILE [--from YYYY-MM-DD] [--to YYYY-MM-DD] [--instrument SERIAL ...]
+
+The format follows the extension of FILE (.csv, .jsonl or .labcol) unless
+--format is given. Records are written in date order; see BulkExporter.
+"""
+import sys
+import argparse
+import logging
+from src.database import DatabaseConfig, DatabaseManager, BulkExporter, BulkExportError, DatabaseError
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('file', metavar='FILE')
+    parser.add_argument('--format', choices=('csv', 'jsonl', 'columnar'), help='Defaults to the file extension')
+    parser.add_argument('--from', dest='start_date', metavar='DATE', help='First maintenance date to export')
+    parser.add_argument('--to', dest='end_date', metavar='DATE', help='Last maintenance date to export')
+    parser.add_argument('--instrument', dest='serial_numbers', action='append', metavar='SERIAL',
+                        help='Only export this instrument; may be repeated')
+    parser.add_argument('--db', help='Database file, defaults to the application database')
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+
+    def progress(rows_written, total):
+        print(f"\r  {rows_written:,} / {total:,} rows", end='', file=sys.stderr, flush=True)
+
+    manager = DatabaseManager(args.db or DatabaseConfig.get_database_path())
+    try:
+        result = BulkExporter(manager).export_maintenance_records(
+            args.file, args.format, args.start_date, args.end_date, args.serial_numbers, progress=progress
+        )
+    except (BulkExportError, DatabaseError) as e:
+        print(f"\nNothing exported: {e}", file=sys.stderr)
+        return 1
+    finally:
+        manager.close()
+    print(f"\n{result}", file=sys.stderr)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
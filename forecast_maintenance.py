@@ -0,0 +1,72 @@
+"""
+Forecast every maintenance occurrence over the coming months.
+
+Usage:
+    python forecast_maintenance.py [--months 12] [--by week|user|location|type] [--csv FILE]
+
+Prints the number of occurrences per week, or per responsible user,
+location or maintenance type. --csv also writes every occurrence to FILE.
+Overdue maintenance is counted on the first day; see forecast_maintenance.
+"""
+import csv
+import sys
+import argparse
+import logging
+from src.database import DatabaseConfig, DatabaseManager, DatabaseError
+from src.scheduling import forecast_maintenance
+
+def _names(manager, table, column):
+    return {row['id']: row[column] for row in manager.execute_query(f"SELECT id, {column} FROM {table}")}
+
+def write_csv(path, forecast, manager):
+    instruments = {row['id']: row for row in manager.execute_query("SELECT id, name, serial_number FROM instruments")}
+    types = _names(manager, 'maintenance_types', 'name')
+    users = _names(manager, 'users', 'username')
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['date', 'instrument', 'serial_number', 'maintenance_type', 'responsible_user',
+                         'location', 'overdue'])
+        for occurrence in sorted(forecast.occurrences(), key=lambda o: (o['date'], o['instrument_id'])):
+            instrument = instruments[occurrence['instrument_id']]
+            writer.writerow([occurrence['date'], instrument['name'], instrument['serial_number'],
+                             types.get(occurrence['maintenance_type_id'], ''),
+                             users.get(occurrence['responsible_user_id'], ''),
+                             occurrence['location'], int(occurrence['overdue'])])
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--months', type=int, default=12, help='Length of the forecast, default 12')
+    parser.add_argument('--by', choices=('week', 'user', 'location', 'type'), default='week',
+                        help='Grouping of the printed counts, default week')
+    parser.add_argument('--csv', metavar='FILE', help='Also write every occurrence to FILE')
+    parser.add_argument('--db', help='Database file, defaults to the application database')
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+    if args.months < 1:
+        parser.error('--months must be at least 1')
+
+    manager = DatabaseManager(args.db or DatabaseConfig.get_database_path())
+    try:
+        forecast = forecast_maintenance(manager, args.months)
+        if args.by == 'week':
+            rows = zip(forecast.week_starts(), forecast.per_week())
+        else:
+            labels = {'user': _names(manager, 'users', 'username'),
+                      'type': _names(manager, 'maintenance_types', 'name')}.get(args.by, {})
+            totals = forecast.totals(args.by)
+            rows = sorted(((labels.get(key, key) or '(none)', count) for key, count in totals.items()),
+                          key=lambda row: (-row[1], str(row[0])))
+        for label, count in rows:
+            print(f"{label:<24} {count:>7,}")
+        if args.csv:
+            write_csv(args.csv, forecast, manager)
+    except (OSError, DatabaseError) as e:
+        print(f"Forecast failed: {e}", file=sys.stderr)
+        return 1
+    finally:
+        manager.close()
+    print(f"{len(forecast):,} occurrences over {args.months} months", file=sys.stderr)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
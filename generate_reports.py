@@ -0,0 +1,45 @@
+"""
+Generate maintenance report PDFs for many records.
+
+Usage:
+    python generate_reports.py FOLDER [--from YYYY-MM-DD] [--to YYYY-MM-DD] [--record ID ...]
+
+Reports are named like the one saved when a record is added and rendered
+by worker processes; see BatchReportService.
+"""
+import sys
+import argparse
+import logging
+from src.database import DatabaseConfig, DatabaseManager, DatabaseError
+from src.reports import BatchReportService
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('folder', metavar='FOLDER')
+    parser.add_argument('--from', dest='start_date', metavar='DATE', help='First maintenance date to report')
+    parser.add_argument('--to', dest='end_date', metavar='DATE', help='Last maintenance date to report')
+    parser.add_argument('--record', dest='record_ids', type=int, action='append', metavar='ID',
+                        help='Only report this maintenance record; may be repeated')
+    parser.add_argument('--db', help='Database file, defaults to the application database')
+    parser.add_argument('--workers', type=int, help='Rendering processes, defaults to the number of CPUs')
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+
+    def progress(done, total):
+        print(f"\r  {done:,} / {total:,} reports", end='', file=sys.stderr, flush=True)
+
+    manager = DatabaseManager(args.db or DatabaseConfig.get_database_path())
+    try:
+        result = BatchReportService(manager, workers=args.workers).generate_reports(
+            args.folder, args.record_ids, args.start_date, args.end_date, progress=progress
+        )
+    except (OSError, DatabaseError) as e:
+        print(f"\nNo reports generated: {e}", file=sys.stderr)
+        return 1
+    finally:
+        manager.close()
+    print(f"\n{result}", file=sys.stderr)
+    return 1 if result.failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,51 @@
+"""
+Import instruments or maintenance history from CSV or JSONL files.
+
+Usage:
+    python import_data.py instruments FILE [FILE ...]
+    python import_data.py maintenance FILE [FILE ...]
+
+Rejected rows are written to FILE.errors.csv (or .errors.jsonl) with the
+reason; the other rows are imported. See BulkImporter for the columns.
+Exits with status 1 if a file could not be imported or had rejected rows.
+"""
+import sys
+import argparse
+import logging
+from src.database import DatabaseConfig, DatabaseManager, BulkImporter, BulkImportError, DatabaseError
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('kind', choices=('instruments', 'maintenance'))
+    parser.add_argument('files', nargs='+', metavar='FILE')
+    parser.add_argument('--db', help='Database file, defaults to the application database')
+    parser.add_argument('--workers', type=int, help='Validation processes, defaults to the number of CPUs')
+    parser.add_argument('--batch-size', type=int, help=f'Rows per batch, defaults to {BulkImporter.BATCH_SIZE}')
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+
+    manager = DatabaseManager(args.db or DatabaseConfig.get_database_path())
+    importer = BulkImporter(manager, workers=args.workers, batch_size=args.batch_size)
+    run = importer.import_instruments if args.kind == 'instruments' else importer.import_maintenance_records
+
+    def progress(rows_read, total):
+        print(f"\r  {rows_read:,} / ~{total:,} rows", end='', file=sys.stderr, flush=True)
+
+    failed = False
+    try:
+        for path in args.files:
+            print(f"{path}:", file=sys.stderr)
+            try:
+                result = run(path, progress=progress)
+            except (BulkImportError, DatabaseError) as e:
+                print(f"\n  Nothing imported: {e}", file=sys.stderr)
+                failed = True
+                continue
+            print(f"\n  {result}", file=sys.stderr)
+            failed = failed or result.rejected > 0
+    finally:
+        manager.close()
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
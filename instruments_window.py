@@ -15,12 +15,12 @@ from date_utils import (
 )
 
 class InstrumentDetailsDialog(QMainWindow):
-    def __init__(self, instrument_id, user_id, is_admin, parent=None):
+    def __init__(self, instrument_id, user_id, is_admin, parent=None, db=None):
         super().__init__(parent)
         self.instrument_id = instrument_id
         self.user_id = user_id
         self.is_admin = is_admin
-        self.db = Database()
+        self.db = db or getattr(parent, 'db', None) or Database.shared()
         self.init_ui()
 
     def init_ui(self):
@@ -39,8 +39,7 @@ class InstrumentDetailsDialog(QMainWindow):
         layout.setContentsMargins(10, 10, 10, 10)
 
         # Get instrument details
-        cursor = self.db.conn.cursor()
-        cursor.execute("""
+        details = self.db.get_single_row("""
             WITH maintenance_dates AS (
                 SELECT 
                     instrument_id,
@@ -55,6 +54,9 @@ class InstrumentDetailsDialog(QMainWindow):
                 mt1.name as maintenance_type_1,
                 mt2.name as maintenance_type_2,
                 mt3.name as maintenance_type_3,
+                s1.period_weeks as period_1,
+                s2.period_weeks as period_2,
+                s3.period_weeks as period_3,
                 CASE 
                     WHEN md1.last_date IS NULL THEN 'Never'
                     ELSE md1.last_date
@@ -69,15 +71,17 @@ class InstrumentDetailsDialog(QMainWindow):
                 END as last_maintenance_3
             FROM instruments i
             LEFT JOIN users u ON i.responsible_user_id = u.id
-            LEFT JOIN maintenance_types mt1 ON i.maintenance_1 = mt1.id
-            LEFT JOIN maintenance_types mt2 ON i.maintenance_2 = mt2.id
-            LEFT JOIN maintenance_types mt3 ON i.maintenance_3 = mt3.id
-            LEFT JOIN maintenance_dates md1 ON i.id = md1.instrument_id AND i.maintenance_1 = md1.maintenance_type_id
-            LEFT JOIN maintenance_dates md2 ON i.id = md2.instrument_id AND i.maintenance_2 = md2.maintenance_type_id
-            LEFT JOIN maintenance_dates md3 ON i.id = md3.instrument_id AND i.maintenance_3 = md3.maintenance_type_id
+            LEFT JOIN instrument_maintenance_schedule s1 ON s1.instrument_id = i.id AND s1.position = 1
+            LEFT JOIN instrument_maintenance_schedule s2 ON s2.instrument_id = i.id AND s2.position = 2
+            LEFT JOIN instrument_maintenance_schedule s3 ON s3.instrument_id = i.id AND s3.position = 3
+            LEFT JOIN maintenance_types mt1 ON s1.maintenance_type_id = mt1.id
+            LEFT JOIN maintenance_types mt2 ON s2.maintenance_type_id = mt2.id
+            LEFT JOIN maintenance_types mt3 ON s3.maintenance_type_id = mt3.id
+            LEFT JOIN maintenance_dates md1 ON i.id = md1.instrument_id AND s1.maintenance_type_id = md1.maintenance_type_id
+            LEFT JOIN maintenance_dates md2 ON i.id = md2.instrument_id AND s2.maintenance_type_id = md2.maintenance_type_id
+            LEFT JOIN maintenance_dates md3 ON i.id = md3.instrument_id AND s3.maintenance_type_id = md3.maintenance_type_id
             WHERE i.id = ?
         """, (self.instrument_id,))
-        details = cursor.fetchone()
 
         if not details:
             QMessageBox.critical(self, 'Error', 'Could not load instrument details')
@@ -238,11 +242,11 @@ class InstrumentDetailsDialog(QMainWindow):
             self.close()  # Close details window to refresh data
 
 class AddMaintenanceDialog(QDialog):
-    def __init__(self, instrument_id, user_id, parent=None):
+    def __init__(self, instrument_id, user_id, parent=None, db=None):
         super().__init__(parent)
         self.instrument_id = instrument_id
         self.user_id = user_id
-        self.db = Database()
+        self.db = db or getattr(parent, 'db', None) or Database.shared()
         self.init_ui()
 
     def init_ui(self):
@@ -252,18 +256,16 @@ class AddMaintenanceDialog(QDialog):
         layout = QFormLayout(self)
 
         # Get available maintenance types for this instrument
-        cursor = self.db.conn.cursor()
-        cursor.execute("""
+        maintenance_types = self.db.execute_query("""
             SELECT mt.id, mt.name
             FROM maintenance_types mt
             JOIN instrument_maintenance_schedule ims ON mt.id = ims.maintenance_type_id
             WHERE ims.instrument_id = ?
         """, (self.instrument_id,))
-        maintenance_types = cursor.fetchall()
 
         self.maintenance_type = QComboBox()
-        for maint_id, maint_name in maintenance_types:
-            self.maintenance_type.addItem(maint_name, maint_id)
+        for maint_type in maintenance_types:
+            self.maintenance_type.addItem(maint_type['name'], maint_type['id'])
 
         self.notes_input = QTextEdit()
 
@@ -354,11 +356,11 @@ class InstrumentsTableModel(QAbstractTableModel):
 class InstrumentsWindow(QWidget):
     back_signal = pyqtSignal()  # Signal to go back to main menu
 
-    def __init__(self, user_id, is_admin, parent=None):
+    def __init__(self, user_id, is_admin, parent=None, db=None):
         super().__init__(parent)
         self.user_id = user_id
         self.is_admin = is_admin
-        self.db = Database()
+        self.db = db or getattr(parent, 'db', None) or Database.shared()
         self.init_ui()
         self.apply_dark_theme()
         self.load_instruments()
@@ -458,8 +460,7 @@ class InstrumentsWindow(QWidget):
 
     def load_instruments(self):
         try:
-            cursor = self.db.conn.cursor()
-            cursor.execute("""
+            instruments = self.db.execute_query("""
                 WITH maintenance_dates AS (
                     SELECT 
                         instrument_id,
@@ -472,22 +473,22 @@ class InstrumentsWindow(QWidget):
                     i.id, i.name, i.model, i.serial_number, i.location, 
                     i.status, i.brand, u.username as responsible_user,
                     CASE 
-                        WHEN i.maintenance_1 IS NOT NULL AND i.period_1 IS NOT NULL THEN
+                        WHEN s1.period_weeks IS NOT NULL THEN
                             CASE 
                                 WHEN md1.last_date IS NULL THEN
                                     date(i.date_start_operating)
                                 ELSE
-                                    date(md1.last_date, '+' || (i.period_1 * 7) || ' days')
+                                    date(md1.last_date, '+' || (s1.period_weeks * 7) || ' days')
                             END
                         ELSE NULL
                     END as next_maintenance
                 FROM instruments i
                 LEFT JOIN users u ON i.responsible_user_id = u.id
-                LEFT JOIN maintenance_dates md1 ON i.id = md1.instrument_id AND i.maintenance_1 = md1.maintenance_type_id
+                LEFT JOIN instrument_maintenance_schedule s1 ON s1.instrument_id = i.id AND s1.position = 1
+                LEFT JOIN maintenance_dates md1 ON i.id = md1.instrument_id AND s1.maintenance_type_id = md1.maintenance_type_id
                 ORDER BY i.name
             """)
             
-            instruments = cursor.fetchall()
             self.table.setRowCount(len(instruments))
 
             for row, instrument in enumerate(instruments):
@@ -5,14 +5,13 @@ from PyQt6.QtCore import Qt, pyqtSignal
 from PyQt6.QtGui import QFont
 from database import Database
 from main_menu import MainMenu
-import bcrypt
 
 class LoginWindow(QWidget):
     login_successful = pyqtSignal(int, bool)  # Signal with user_id and is_admin
 
     def __init__(self, db=None):
         super().__init__()
-        self.db = db if db else Database()
+        self.db = db if db else Database.shared()
         self.init_ui()
         self.apply_dark_theme()
 
@@ -113,11 +112,9 @@ class LoginWindow(QWidget):
             return
 
         try:
-            cursor = self.db.conn.cursor()
-            cursor.execute("SELECT id, password, is_admin FROM users WHERE username = ?", (username,))
-            user = cursor.fetchone()
+            user = self.db.verify_user(username, password)
 
-            if user and bcrypt.checkpw(password.encode('utf-8'), user['password']):
+            if user:
                 # Clear inputs before emitting signal
                 self.clear_inputs()
                 # Emit signal with user data
@@ -1,4 +1,5 @@
 import sys
+import multiprocessing
 from PyQt6.QtWidgets import QApplication
 from main_window import CentralWindow
 
@@ -16,4 +17,7 @@ def main():
     sys.exit(app.exec())
 
 if __name__ == '__main__':
+    # Bulk imports validate in spawned processes, which must not start the
+    # GUI again in the frozen executable
+    multiprocessing.freeze_support()
     main() 
\ No newline at end of file
@@ -3,6 +3,11 @@ from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout,
 from PyQt6.QtCore import Qt, pyqtSignal
 from PyQt6.QtGui import QFont
 from database import Database
+from src.database import UserRepository
+from src.ui.dialogs.import_dialog import ImportDialog
+from src.ui.dialogs.reports_dialog import ReportsDialog
+from src.ui.dialogs.workload_dialog import WorkloadDialog
+from src.ui.base.due_notifier import DueNotifier
 
 class MainMenu(QWidget):
     show_instruments_signal = pyqtSignal(int, bool)  # user_id, is_admin
@@ -14,9 +19,12 @@ class MainMenu(QWidget):
         super().__init__()
         self.user_id = user_id
         self.is_admin = is_admin
-        self.db = db if db else Database()
+        self.db = db if db else Database.shared()
+        self.due_notifier = DueNotifier(self.db, self)
+        self.due_notifier.changed.connect(self.update_due_label)
         self.init_ui()
         self.apply_dark_theme()
+        self.due_notifier.start()
 
     def apply_dark_theme(self):
         self.setStyleSheet("""
@@ -62,6 +70,12 @@ class MainMenu(QWidget):
         subtitle.setAlignment(Qt.AlignmentFlag.AlignCenter)
         layout.addWidget(subtitle)
 
+        # Due maintenance of the user's instruments, kept current by the notifier
+        self.due_label = QLabel()
+        self.due_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        layout.addWidget(self.due_label)
+        self.update_due_label()
+
         # Buttons
         buttons_layout = QVBoxLayout()
         buttons_layout.setSpacing(15)
@@ -76,12 +90,25 @@ class MainMenu(QWidget):
         maintenance_btn.clicked.connect(lambda: self.show_maintenance_signal.emit(self.user_id, self.is_admin))
         buttons_layout.addWidget(maintenance_btn)
 
+        # Maintenance Reports button
+        reports_btn = QPushButton('Maintenance Reports')
+        reports_btn.clicked.connect(self.show_reports)
+        buttons_layout.addWidget(reports_btn)
+
         # Users button (only for admins)
         if self.is_admin:
             users_btn = QPushButton('Users')
             users_btn.clicked.connect(lambda: self.show_users_signal.emit(self.user_id, self.is_admin))
             buttons_layout.addWidget(users_btn)
 
+            import_btn = QPushButton('Import Data')
+            import_btn.clicked.connect(self.show_import)
+            buttons_layout.addWidget(import_btn)
+
+            workload_btn = QPushButton('Workload Balancing')
+            workload_btn.clicked.connect(self.show_workload)
+            buttons_layout.addWidget(workload_btn)
+
         # Logout button
         logout_btn = QPushButton('Logout')
         logout_btn.clicked.connect(self.logout_signal.emit)
@@ -90,9 +117,7 @@ class MainMenu(QWidget):
         layout.addLayout(buttons_layout)
 
         # User info
-        cursor = self.db.conn.cursor()
-        cursor.execute("SELECT username FROM users WHERE id = ?", (self.user_id,))
-        user = cursor.fetchone()
+        user = UserRepository(self.db).get_user_by_id(self.user_id)
         if user:
             user_info = QLabel(f'Logged in as: {user["username"]} ({self.is_admin and "Admin" or "User"})')
             user_info.setAlignment(Qt.AlignmentFlag.AlignCenter)
@@ -104,18 +129,42 @@ class MainMenu(QWidget):
         self.is_admin = is_admin
         self.init_ui()  # Reinitialize UI to update buttons and user info
 
+    def update_due_label(self):
+        overdue, due_soon = self.due_notifier.counts(self.user_id)
+        if not (overdue or due_soon):
+            self.due_label.setText('No maintenance due on your instruments')
+            self.due_label.setStyleSheet('')
+            return
+        self.due_label.setText(f'Your instruments: {overdue} overdue, {due_soon} due soon')
+        self.due_label.setStyleSheet(f"color: {'#ef5350' if overdue else '#ffca28'};")
+
     def show_instruments(self):
         self.show_instruments_signal.emit(self.user_id, self.is_admin)
 
     def show_maintenance(self):
         self.show_maintenance_signal.emit(self.user_id, self.is_admin)
 
+    def show_reports(self):
+        ReportsDialog(self, self.db).exec()
+
     def show_users(self):
         if self.is_admin:
             self.show_users_signal.emit(self.user_id, self.is_admin)
         else:
             QMessageBox.warning(self, 'Access Denied', 'Only administrators can access user management.')
 
+    def show_import(self):
+        if self.is_admin:
+            ImportDialog(self, self.db).exec()
+        else:
+            QMessageBox.warning(self, 'Access Denied', 'Only administrators can import data.')
+
+    def show_workload(self):
+        if self.is_admin:
+            WorkloadDialog(self, self.db).exec()
+        else:
+            QMessageBox.warning(self, 'Access Denied', 'Only administrators can reassign maintenance.')
+
     def logout(self):
         self.logout_signal.emit()
 
@@ -128,6 +177,7 @@ class MainMenu(QWidget):
         )
 
         if reply == QMessageBox.StandardButton.Yes:
+            self.due_notifier.stop()
             event.accept()
         else:
             event.ignore() 
\ No newline at end of file
@@ -26,7 +26,7 @@ import sys
 class CentralWindow(QMainWindow):
     def __init__(self):
         super().__init__()
-        self.db = Database()
+        self.db = Database.shared()
         
         # Initialize window attributes
         self.instruments_window = None
@@ -195,10 +195,9 @@ class CentralWindow(QMainWindow):
         )
 
         if reply == QMessageBox.StandardButton.Yes:
-            # Close database connection and release lock
+            # Close database connection
             if hasattr(self, 'db') and self.db:
-                self.db.release_lock()  # Release the database lock
-                self.db.conn.close()
+                self.db.close()
             event.accept()
         else:
             event.ignore()
@@ -234,22 +233,19 @@ class CentralWindow(QMainWindow):
             username = self.users_table.item(row, 1).text()
             
             # Check if user is responsible for any instruments
-            cursor = self.db.conn.cursor()
-            cursor.execute("""
+            result = self.db.get_single_row("""
                 SELECT COUNT(*) as count 
                 FROM instruments 
                 WHERE responsible_user_id = ?
             """, (user_id,))
-            result = cursor.fetchone()
             
             if result['count'] > 0:
                 # Get list of instruments where user is responsible
-                cursor.execute("""
+                instruments = self.db.execute_query("""
                     SELECT name 
                     FROM instruments 
                     WHERE responsible_user_id = ?
                 """, (user_id,))
-                instruments = cursor.fetchall()
                 instrument_list = "\n".join([f"- {inst['name']}" for inst in instruments])
                 
                 QMessageBox.warning(
@@ -271,8 +267,7 @@ class CentralWindow(QMainWindow):
             
             if reply == QMessageBox.StandardButton.Yes:
                 # Delete user
-                cursor.execute("DELETE FROM users WHERE id = ?", (user_id,))
-                self.db.conn.commit()
+                self.db.execute_update("DELETE FROM users WHERE id = ?", (user_id,))
                 
                 # Refresh users table
                 self.load_users()
@@ -280,5 +275,4 @@ class CentralWindow(QMainWindow):
                 QMessageBox.information(self, 'Success', f'User {username} deleted successfully')
                 
         except Exception as e:
-            self.db.conn.rollback()
             QMessageBox.warning(self, 'Error', f'Failed to delete user: {str(e)}') 
\ No newline at end of file
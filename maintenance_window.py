@@ -22,7 +22,7 @@ class MaintenanceWindow(QMainWindow):
         super().__init__()
         self.user_id = user_id
         self.is_admin = is_admin
-        self.db = db if db else Database()
+        self.db = db if db else Database.shared()
         self.init_ui()
         self.apply_dark_theme()
         self.load_maintenance_data()
@@ -145,8 +145,7 @@ class MaintenanceWindow(QMainWindow):
 
     def load_maintenance_data(self):
         try:
-            cursor = self.db.conn.cursor()
-            cursor.execute("""
+            records = self.db.execute_query("""
                 SELECT 
                     i.id,
                     i.name,
@@ -163,21 +162,18 @@ class MaintenanceWindow(QMainWindow):
                      FROM maintenance_records 
                      WHERE instrument_id = i.id AND maintenance_type_id = mt.id 
                      ORDER BY maintenance_date DESC LIMIT 1) as notes,
-                    CASE 
-                        WHEN i.maintenance_1 = mt.id THEN i.period_1
-                        WHEN i.maintenance_2 = mt.id THEN i.period_2
-                        WHEN i.maintenance_3 = mt.id THEN i.period_3
-                    END as period_weeks,
+                    ims.period_weeks,
                     i.date_start_operating
                 FROM instruments i
-                JOIN maintenance_types mt ON mt.id IN (i.maintenance_1, i.maintenance_2, i.maintenance_3)
+                JOIN instrument_maintenance_schedule ims ON ims.instrument_id = i.id
+                JOIN maintenance_types mt ON mt.id = ims.maintenance_type_id
                 LEFT JOIN users u ON i.responsible_user_id = u.id
                 WHERE i.status = 'Operational'
                 ORDER BY i.name, mt.name
             """)
             
             self.table.setRowCount(0)
-            for row, data in enumerate(cursor.fetchall()):
+            for row, data in enumerate(records):
                 self.table.insertRow(row)
                 
                 # Calculate next maintenance date using our utility function
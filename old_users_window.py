@@ -10,7 +10,7 @@ class UserDialog(QDialog):
     def __init__(self, user_id=None, parent=None):
         super().__init__(parent)
         self.user_id = user_id
-        self.db = parent.db if parent else Database()  # Use parent's db connection if available
+        self.db = parent.db if parent else Database.shared()  # Use parent's db connection if available
         self.init_ui()
 
     def init_ui(self):
@@ -32,13 +32,11 @@ class UserDialog(QDialog):
 
         if self.user_id:
             # Load existing user data
-            cursor = self.db.conn.cursor()
-            cursor.execute("SELECT username, email, is_admin FROM users WHERE id = ?", (self.user_id,))
-            user = cursor.fetchone()
+            user = self.db.get_single_row("SELECT username, email, is_admin FROM users WHERE id = ?", (self.user_id,))
             if user:
-                self.username_input.setText(user[0])
-                self.email_input.setText(user[1])
-                self.is_admin_checkbox.setChecked(bool(user[2]))
+                self.username_input.setText(user['username'])
+                self.email_input.setText(user['email'])
+                self.is_admin_checkbox.setChecked(bool(user['is_admin']))
                 self.password_input.setPlaceholderText('Leave blank to keep current password')
 
         buttons_layout = QHBoxLayout()
@@ -74,16 +72,14 @@ class UserDialog(QDialog):
                     # Hash new password
                     salt = bcrypt.gensalt()
                     hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
-                    cursor = self.db.conn.cursor()
-                    cursor.execute("""
+                    self.db.execute_update("""
                         UPDATE users
                         SET username = ?, email = ?, password = ?, is_admin = ?
                         WHERE id = ?
                     """, (username, email, hashed, is_admin, self.user_id))
                 else:
                     # Keep existing password
-                    cursor = self.db.conn.cursor()
-                    cursor.execute("""
+                    self.db.execute_update("""
                         UPDATE users
                         SET username = ?, email = ?, is_admin = ?
                         WHERE id = ?
@@ -98,13 +94,11 @@ class UserDialog(QDialog):
                 salt = bcrypt.gensalt()
                 hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
                 
-                cursor = self.db.conn.cursor()
-                cursor.execute("""
+                self.db.execute_insert("""
                     INSERT INTO users (username, email, password, is_admin)
                     VALUES (?, ?, ?, ?)
                 """, (username, email, hashed, is_admin))
 
-            self.db.conn.commit()
             self.accept()
             
             # Force refresh of parent window's table
@@ -113,7 +107,6 @@ class UserDialog(QDialog):
                 
         except Exception as e:
             QMessageBox.warning(self, 'Error', str(e))
-            self.db.conn.rollback()  # Rollback on error
 
 class OldUsersWindow(QWidget):
     back_signal = pyqtSignal()  # Signal to go back to main menu
@@ -122,7 +115,7 @@ class OldUsersWindow(QWidget):
         super().__init__()
         self.user_id = user_id
         self.is_admin = is_admin
-        self.db = db if db else Database()
+        self.db = db if db else Database.shared()
         self.init_ui()
         self.apply_dark_theme()
         self.load_users()
@@ -236,9 +229,7 @@ class OldUsersWindow(QWidget):
         pass
 
     def load_users(self):
-        cursor = self.db.conn.cursor()
-        cursor.execute("SELECT id, username, email, is_admin FROM users")
-        users = cursor.fetchall()
+        users = self.db.execute_query("SELECT id, username, email, is_admin FROM users")
 
         self.table.setRowCount(len(users))
         for row, user in enumerate(users):
@@ -0,0 +1,105 @@
+"""
+Email each responsible user a digest of their due and overdue maintenance.
+
+Usage:
+    python send_reminders.py                  Send the reminders once
+    python send_reminders.py --daemon --at 07:00
+                                              Keep running, sending every day
+    python send_reminders.py --resume         Only send what is left in the
+                                              outbox from an interrupted run
+    python send_reminders.py --dry-run        Print the digests instead
+
+The digests are queued in the email_outbox table before they are sent, so
+each reminder is sent once and failed sends are retried with backoff; the
+daemon also wakes up for the retries, and skips the schedule scan when
+nothing became due or was reassigned since the last run. SMTP settings come from
+email_reminders.env or the environment; see EmailConfig.
+"""
+import sys
+import time
+import argparse
+import logging
+from datetime import datetime, timedelta
+from src.database import DatabaseConfig, DatabaseManager, DatabaseError
+from src.notifications import (EmailConfig, EmailConfigError, EmailOutbox, ReminderService,
+                               ReminderTrigger, collect_digests, build_message)
+
+def seconds_until(at, now=None):
+    """Seconds from now until the next HH:MM"""
+    now = now or datetime.now()
+    hour, minute = (int(part) for part in at.split(':'))
+    next_run = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if next_run <= now:
+        next_run += timedelta(days=1)
+    return (next_run - now).total_seconds()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--db', help='Database file, defaults to the application database')
+    parser.add_argument('--config', help='Settings file, defaults to email_reminders.env')
+    parser.add_argument('--dry-run', action='store_true', help='Print the digests without sending')
+    parser.add_argument('--resume', action='store_true', help='Send the queued emails without queuing new ones')
+    parser.add_argument('--daemon', action='store_true', help='Send every day instead of once')
+    parser.add_argument('--at', default='07:00', metavar='HH:MM', help='Time of the daily run, default 07:00')
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    logger = logging.getLogger('send_reminders')
+
+    try:
+        seconds_until(args.at)
+        config = EmailConfig.load(args.config)
+    except (ValueError, EmailConfigError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    manager = DatabaseManager(args.db or DatabaseConfig.get_database_path())
+    try:
+        if args.dry_run:
+            for digest in collect_digests(manager):
+                message = build_message(digest, config)
+                print(f"To: {message['To']}\nSubject: {message['Subject']}\n\n{message.get_content()}")
+            return 0
+
+        service = ReminderService(manager, config)
+        resume = args.resume
+        # The daemon checks for changes before rescanning the schedule;
+        # its first run always scans, for what was already due
+        trigger = ReminderTrigger(manager) if args.daemon else None
+        scan = True
+        while True:
+            if args.daemon:
+                delay = seconds_until(args.at)
+                retry_at = service.outbox.next_attempt_at()
+                resume = retry_at is not None and retry_at - time.time() < delay
+                if resume:
+                    delay = max(0, retry_at - time.time())
+                    logger.info(f"Next retry in {delay / 60:.1f} min")
+                else:
+                    logger.info(f"Next reminders in {delay / 3600:.1f} h")
+                time.sleep(delay)
+            try:
+                if trigger is not None and not resume:
+                    scan = trigger.changed() or scan
+                    if not scan:
+                        logger.info("Nothing became due or was reassigned since the last run")
+                if scan and not resume:
+                    result = service.send_reminders()
+                    scan = False
+                else:
+                    result = service.outbox.drain()
+            except (OSError, DatabaseError) as e:
+                # smtplib errors are OSErrors; a daemon tries again later
+                logger.error(f"Reminders not sent: {e}")
+                if not args.daemon:
+                    return 1
+                time.sleep(EmailOutbox.RETRY_DELAY)
+                continue
+            if not args.daemon:
+                return 1 if result.failed or result.retrying else 0
+    except KeyboardInterrupt:
+        return 0
+    finally:
+        manager.close()
+
+if __name__ == '__main__':
+    sys.exit(main())
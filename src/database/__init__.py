@@ -1,5 +1,6 @@
-from .database_manager import DatabaseManager, DatabaseError, DatabaseConnectionError, DatabaseQueryError
+from .database_manager import DatabaseManager, DatabaseError, DatabaseConnectionError, DatabaseQueryError, DatabaseLockError
 from .repositories import (
+    RepositoryCache,
     BaseRepository,
     UserRepository,
     InstrumentRepository,
@@ -7,16 +8,31 @@ from .repositories import (
     MaintenanceTypeRepository
 )
 from .config import DatabaseConfig
+from .change_watcher import ChangeWatcher
+from .search import fts_query
+from .bulk_import import BulkImporter, BulkImportError, ImportResult
+from .bulk_export import BulkExporter, BulkExportError, ExportResult, read_columnar
 
 __all__ = [
     'DatabaseManager',
     'DatabaseError',
     'DatabaseConnectionError',
     'DatabaseQueryError',
+    'DatabaseLockError',
+    'RepositoryCache',
     'BaseRepository',
     'UserRepository',
     'InstrumentRepository',
     'MaintenanceRepository',
     'MaintenanceTypeRepository',
-    'DatabaseConfig'
+    'DatabaseConfig',
+    'ChangeWatcher',
+    'fts_query',
+    'BulkImporter',
+    'BulkImportError',
+    'ImportResult',
+    'BulkExporter',
+    'BulkExportError',
+    'ExportResult',
+    'read_columnar'
 ]
@@ -0,0 +1,306 @@
+import os
+import sys
+import csv
+import json
+import time
+import logging
+import struct
+from array import array
+from datetime import date
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from .database_manager import DatabaseManager
+from date_utils import to_day_number, from_day_number
+
+# Exported columns and their type in the columnar format
+EXPORT_COLUMNS = (
+    ('id', 'int'),
+    ('serial_number', 'str'),
+    ('instrument', 'str'),
+    ('maintenance_type', 'str'),
+    ('maintenance_date', 'date'),
+    ('performed_by', 'str'),
+    ('notes', 'str'),
+)
+
+EXPORT_QUERY = """
+    SELECT mr.id, i.serial_number, i.name, mt.name, mr.maintenance_date,
+           u.username, mr.notes
+    FROM maintenance_records mr
+    JOIN instruments i ON mr.instrument_id = i.id
+    LEFT JOIN maintenance_types mt ON mr.maintenance_type_id = mt.id
+    LEFT JOIN users u ON mr.performed_by = u.id
+"""
+
+# File extension of each export format
+FORMATS = {'.csv': 'csv', '.jsonl': 'jsonl', '.ndjson': 'jsonl', '.labcol': 'columnar'}
+
+# Columnar files start with this, followed by a little-endian uint32 length
+# and a JSON header listing the columns, then row groups until one of 0 rows
+COLUMNAR_MAGIC = b'LABCOL1\n'
+
+# Day number stored for a missing date; a null string has this index
+_NULL_DAY = -2**31
+_NULL_INDEX = 2**32 - 1
+
+class BulkExportError(Exception):
+    """Raised when an export cannot be started"""
+    pass
+
+class ExportResult:
+    """Outcome of one export"""
+
+    def __init__(self, path: str, rows: int, seconds: float):
+        self.path = path
+        self.rows = rows
+        self.seconds = seconds
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def __str__(self) -> str:
+        size = os.path.getsize(self.path) / 2**20
+        return (f"Exported {self.rows} maintenance records to {self.path} ({size:.1f} MiB) "
+                f"in {self.seconds:.1f} s ({self.rows_per_second:,.0f} rows/s)")
+
+def _little_endian(values: array) -> bytes:
+    if sys.byteorder == 'big':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+def _from_little_endian(typecode: str, data: bytes) -> array:
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+class CsvExportWriter:
+    """Writes rows as CSV with a header line"""
+
+    def __init__(self, f, columns: Sequence[str]):
+        self._writer = csv.writer(f)
+        self._writer.writerow(columns)
+
+    def write_rows(self, rows: List[tuple]) -> None:
+        self._writer.writerows(rows)
+
+    def close(self) -> None:
+        pass
+
+class JsonlExportWriter:
+    """Writes rows as one JSON object per line"""
+
+    def __init__(self, f, columns: Sequence[str]):
+        self._file = f
+        self._columns = columns
+
+    def write_rows(self, rows: List[tuple]) -> None:
+        columns = self._columns
+        self._file.writelines(
+            json.dumps(dict(zip(columns, row)), ensure_ascii=False) + '\n' for row in rows
+        )
+
+    def close(self) -> None:
+        pass
+
+class ColumnarExportWriter:
+    """
+    Writes rows in a compact column-by-column binary format.
+
+    Rows are written in groups. In each group every column is stored as
+    one stdlib array, little-endian:
+        int: int64 values
+        date: int32 day numbers (see date_utils.to_day_number)
+        str: the distinct values of the group as uint32 offsets into a
+            UTF-8 blob, then one uint32 index per row
+    Instrument, type and user names repeat a lot, so storing each once per
+    group makes the file far smaller than CSV. read_columnar reads it back.
+    """
+
+    def __init__(self, f, columns: Sequence[Tuple[str, str]]):
+        self._file = f
+        self._types = [column_type for name, column_type in columns]
+        header = json.dumps({'columns': [{'name': name, 'type': column_type}
+                                         for name, column_type in columns]}).encode()
+        f.write(COLUMNAR_MAGIC + struct.pack('<I', len(header)) + header)
+
+    def write_rows(self, rows: List[tuple]) -> None:
+        if not rows:
+            return
+        self._file.write(struct.pack('<I', len(rows)))
+        for values, column_type in zip(zip(*rows), self._types):
+            if column_type == 'int':
+                self._file.write(_little_endian(array('q', values)))
+            elif column_type == 'date':
+                # Rows come in date order, so a group holds few distinct dates
+                days = {value: to_day_number(value) for value in set(values)}
+                self._file.write(_little_endian(array('i', (
+                    _NULL_DAY if days[value] is None else days[value] for value in values
+                ))))
+            else:
+                self._write_strings(values)
+
+    def _write_strings(self, values: Sequence[Optional[str]]) -> None:
+        distinct = {}
+        indexes = array('I', (
+            _NULL_INDEX if value is None else distinct.setdefault(value, len(distinct))
+            for value in values
+        ))
+        encoded = [value.encode('utf-8') for value in distinct]
+        offsets = array('I', [0])
+        for data in encoded:
+            offsets.append(offsets[-1] + len(data))
+        self._file.write(struct.pack('<I', len(encoded)))
+        self._file.write(_little_endian(offsets))
+        self._file.write(b''.join(encoded))
+        self._file.write(_little_endian(indexes))
+
+    def close(self) -> None:
+        self._file.write(struct.pack('<I', 0))
+
+def read_columnar(path: str) -> Iterator[Dict[str, list]]:
+    """
+    Read a file written by ColumnarExportWriter.
+
+    Yields:
+        One dictionary of column name to values per row group; dates are
+        YYYY-MM-DD strings and missing values are None
+    """
+    with open(path, 'rb') as f:
+        if f.read(len(COLUMNAR_MAGIC)) != COLUMNAR_MAGIC:
+            raise BulkExportError(f"{path} is not a columnar export")
+        (length,) = struct.unpack('<I', f.read(4))
+        columns = json.loads(f.read(length))['columns']
+
+        def read_array(typecode, count):
+            return _from_little_endian(typecode, f.read(count * array(typecode).itemsize))
+
+        while True:
+            (count,) = struct.unpack('<I', f.read(4))
+            if count == 0:
+                return
+            group = {}
+            for column in columns:
+                if column['type'] == 'int':
+                    group[column['name']] = read_array('q', count).tolist()
+                elif column['type'] == 'date':
+                    group[column['name']] = [None if day == _NULL_DAY else from_day_number(day)
+                                             for day in read_array('i', count)]
+                else:
+                    (distinct,) = struct.unpack('<I', f.read(4))
+                    offsets = read_array('I', distinct + 1)
+                    blob = f.read(offsets[-1])
+                    values = [blob[start:end].decode('utf-8') for start, end in zip(offsets, offsets[1:])]
+                    group[column['name']] = [None if index == _NULL_INDEX else values[index]
+                                             for index in read_array('I', count)]
+            yield group
+
+class BulkExporter:
+    """
+    Exports the maintenance history to CSV, JSONL or columnar files.
+
+    Rows are streamed from the database with iter_query and written as they
+    arrive, so memory use does not depend on the size of the history. The
+    file is written under a temporary name and renamed when complete.
+    """
+
+    # Rows fetched and written together; also the columnar row group size
+    BATCH_SIZE = 10000
+
+    def __init__(self, db_manager: DatabaseManager, batch_size: Optional[int] = None):
+        self.db = db_manager
+        self.batch_size = batch_size or self.BATCH_SIZE
+        self.logger = logging.getLogger(__name__)
+
+    def export_maintenance_records(self, path: str, file_format: Optional[str] = None,
+                                   start_date: Optional[str] = None, end_date: Optional[str] = None,
+                                   serial_numbers: Optional[Iterable[str]] = None,
+                                   progress: Optional[Callable[[int, int], None]] = None) -> ExportResult:
+        """
+        Export maintenance records in date order.
+
+        Args:
+            path: File to write
+            file_format: 'csv', 'jsonl' or 'columnar'; defaults to the one
+                matching the extension of path (.csv, .jsonl, .labcol)
+            start_date: Only records on or after this YYYY-MM-DD date
+            end_date: Only records on or before this YYYY-MM-DD date
+            serial_numbers: Only records of these instruments
+            progress: Called after each batch with the rows written and the
+                rows to export
+
+        Raises:
+            BulkExportError: If the format is unknown or a date is invalid
+            DatabaseQueryError: If reading fails; no file is left behind
+        """
+        file_format = file_format or FORMATS.get(os.path.splitext(path)[1].lower())
+        if file_format not in FORMATS.values():
+            raise BulkExportError(f"Unknown export format for {path}, expected one of "
+                                  f"{', '.join(sorted(FORMATS))}")
+        where, params = self._filters(start_date, end_date, serial_numbers)
+        started = time.perf_counter()
+        total = self.db.get_scalar(
+            f"SELECT COUNT(*) FROM maintenance_records mr JOIN instruments i ON mr.instrument_id = i.id {where}",
+            params
+        )
+
+        rows = 0
+        partial_path = path + '.part'
+        try:
+            with open(partial_path, 'w' if file_format != 'columnar' else 'wb',
+                      **({'newline': '', 'encoding': 'utf-8'} if file_format != 'columnar' else {})) as f:
+                writer = self._writer(file_format, f)
+                batch = []
+                for row in self.db.iter_query(f"{EXPORT_QUERY} {where} ORDER BY mr.maintenance_date, mr.id",
+                                              params, batch_size=self.batch_size):
+                    batch.append(row)
+                    if len(batch) == self.batch_size:
+                        writer.write_rows(batch)
+                        rows += len(batch)
+                        batch = []
+                        if progress:
+                            progress(rows, max(total, rows))
+                writer.write_rows(batch)
+                rows += len(batch)
+                writer.close()
+            os.replace(partial_path, path)
+        except BaseException:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+            raise
+        if progress:
+            progress(rows, rows)
+
+        result = ExportResult(path, rows, time.perf_counter() - started)
+        self.logger.info(str(result))
+        return result
+
+    def _writer(self, file_format: str, f):
+        names = [name for name, column_type in EXPORT_COLUMNS]
+        if file_format == 'csv':
+            return CsvExportWriter(f, names)
+        if file_format == 'jsonl':
+            return JsonlExportWriter(f, names)
+        return ColumnarExportWriter(f, EXPORT_COLUMNS)
+
+    def _filters(self, start_date, end_date, serial_numbers) -> Tuple[str, tuple]:
+        conditions = []
+        params = []
+        for value, condition in ((start_date, 'mr.maintenance_date >= ?'),
+                                 (end_date, 'mr.maintenance_date <= ?')):
+            if value is None:
+                continue
+            try:
+                value = date.fromisoformat(str(value)).isoformat()
+            except ValueError:
+                raise BulkExportError(f"'{value}' is not a YYYY-MM-DD date")
+            conditions.append(condition)
+            params.append(value)
+        if serial_numbers is not None:
+            serial_numbers = list(serial_numbers)
+            conditions.append(f"i.serial_number IN ({', '.join('?' * len(serial_numbers))})")
+            params.extend(serial_numbers)
+        where = ('WHERE ' + ' AND '.join(conditions)) if conditions else ''
+        return where, tuple(params)
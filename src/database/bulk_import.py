@@ -0,0 +1,545 @@
+import os
+import csv
+import json
+import time
+import logging
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from .database_manager import DatabaseManager
+from .migrations import CHANGE_LOG_RETENTION, _status_rebuild_sql
+
+# Accepted instrument statuses, as offered by AddInstrumentDialog
+INSTRUMENT_STATUSES = ('Operational', 'Maintenance', 'Out of Service')
+
+# Accepted date formats; dates are stored as YYYY-MM-DD
+DATE_FORMATS = ('%Y-%m-%d', '%d-%m-%Y', '%d/%m/%Y', '%d.%m.%Y')
+
+# Columns every CSV file of a kind must have
+REQUIRED_COLUMNS = {
+    'instruments': ('name', 'brand', 'model', 'serial_number', 'location', 'date_start_operating'),
+    'maintenance_records': ('serial_number', 'maintenance_type', 'maintenance_date', 'performed_by'),
+}
+
+# Per-row insert triggers of each import. They are dropped for the import
+# and what they write (table_versions, change_log, maintenance_status and
+# the search indexes) is written in bulk before the transaction commits, so
+# no reader ever sees it out of date.
+DEFERRED_TRIGGERS = {
+    'instruments': (
+        'trg_instruments_version_insert',
+        'trg_instruments_change_log_insert',
+        'trg_instruments_fts_insert',
+        'trg_schedule_status_insert',
+    ),
+    'maintenance_records': (
+        'trg_maintenance_records_version_insert',
+        'trg_maintenance_records_change_log_insert',
+        'trg_maintenance_records_status_insert',
+        'trg_maintenance_notes_fts_insert',
+    ),
+}
+
+class BulkImportError(Exception):
+    """Raised when a file cannot be imported at all"""
+    pass
+
+class ImportResult:
+    """Outcome of one file import"""
+
+    def __init__(self, kind: str, imported: int, rejected: int, seconds: float,
+                 error_path: Optional[str]):
+        self.kind = kind
+        self.imported = imported
+        self.rejected = rejected
+        self.seconds = seconds
+        self.error_path = error_path
+
+    @property
+    def rows_per_second(self) -> float:
+        """Rows read per second, rejected ones included"""
+        return (self.imported + self.rejected) / self.seconds if self.seconds else 0.0
+
+    def __str__(self) -> str:
+        summary = (f"Imported {self.imported} {self.kind.replace('_', ' ')} in {self.seconds:.1f} s "
+                   f"({self.rows_per_second:,.0f} rows/s)")
+        if self.rejected:
+            summary += f", rejected {self.rejected} rows, see {self.error_path}"
+        return summary
+
+def _text(row: Dict[str, Any], field: str, required: bool = True) -> Optional[str]:
+    value = row.get(field)
+    value = '' if value is None else str(value).strip()
+    if not value:
+        if required:
+            raise ValueError(f"{field} is required")
+        return None
+    return value
+
+def _date(row: Dict[str, Any], field: str) -> str:
+    value = _text(row, field)
+    try:
+        # The first format, parsed much faster than strptime does it
+        return date.fromisoformat(value).isoformat()
+    except ValueError:
+        pass
+    for date_format in DATE_FORMATS[1:]:
+        try:
+            return datetime.strptime(value, date_format).strftime('%Y-%m-%d')
+        except ValueError:
+            continue
+    raise ValueError(f"{field} '{value}' is not a date")
+
+def _plans(row: Dict[str, Any]) -> List[Tuple[str, Optional[int]]]:
+    # JSONL rows may list their plans; CSV rows use maintenance_N/period_N
+    # column pairs like the old instruments table
+    if isinstance(row.get('plans'), list):
+        plans = [(plan.get('maintenance_type'), plan.get('period_weeks'))
+                 for plan in row['plans'] if isinstance(plan, dict)]
+    else:
+        plans = []
+        slot = 1
+        while f'maintenance_{slot}' in row:
+            plans.append((row[f'maintenance_{slot}'], row.get(f'period_{slot}')))
+            slot += 1
+
+    cleaned = []
+    seen = set()
+    for type_name, period in plans:
+        type_name = '' if type_name is None else str(type_name).strip()
+        if not type_name:
+            continue
+        if type_name.casefold() in seen:
+            raise ValueError(f"Maintenance type '{type_name}' is used in more than one plan")
+        seen.add(type_name.casefold())
+        period = '' if period is None else str(period).strip()
+        try:
+            period_weeks = int(period) if period else None
+        except ValueError:
+            raise ValueError(f"Period '{period}' of maintenance type '{type_name}' is not a whole number")
+        if period_weeks is not None and period_weeks <= 0:
+            raise ValueError(f"Period of maintenance type '{type_name}' must be positive")
+        cleaned.append((type_name, period_weeks))
+    return cleaned
+
+def validate_instrument(row: Dict[str, Any]) -> tuple:
+    """
+    Check and normalize one instrument row.
+
+    Returns:
+        (name, model, serial_number, location, status, brand,
+        responsible username or None, date_start_operating, plans) where
+        plans is a list of (maintenance type name, period in weeks)
+
+    Raises:
+        ValueError: If the row is invalid
+    """
+    status = _text(row, 'status', required=False) or 'Operational'
+    if status not in INSTRUMENT_STATUSES:
+        raise ValueError(f"status '{status}' is not one of {', '.join(INSTRUMENT_STATUSES)}")
+    return (
+        _text(row, 'name'),
+        _text(row, 'model'),
+        _text(row, 'serial_number'),
+        _text(row, 'location'),
+        status,
+        _text(row, 'brand'),
+        _text(row, 'responsible_user', required=False),
+        _date(row, 'date_start_operating'),
+        _plans(row),
+    )
+
+def validate_maintenance_record(row: Dict[str, Any]) -> tuple:
+    """
+    Check and normalize one maintenance record row.
+
+    Returns:
+        (instrument serial_number, maintenance type name, maintenance_date,
+        performed_by username, notes or None)
+
+    Raises:
+        ValueError: If the row is invalid
+    """
+    return (
+        _text(row, 'serial_number'),
+        _text(row, 'maintenance_type'),
+        _date(row, 'maintenance_date'),
+        _text(row, 'performed_by'),
+        _text(row, 'notes', required=False),
+    )
+
+VALIDATORS = {
+    'instruments': validate_instrument,
+    'maintenance_records': validate_maintenance_record,
+}
+
+def _validate_batch(kind: str, batch: List[tuple]) -> List[tuple]:
+    """Validate (line, raw) pairs into (line, row, values, error); runs in a worker process"""
+    validate = VALIDATORS[kind]
+    results = []
+    for line, raw in batch:
+        row = raw
+        try:
+            if isinstance(raw, str):
+                row = json.loads(raw)
+                if not isinstance(row, dict):
+                    raise ValueError('line is not a JSON object')
+            results.append((line, row, validate(row), None))
+        except ValueError as e:
+            # json.JSONDecodeError is a ValueError too
+            results.append((line, row, None, str(e)))
+    return results
+
+def read_rows(path: str) -> Iterator[tuple]:
+    """
+    Stream the rows of a CSV or JSONL file.
+
+    Yields:
+        (line number, row) where row is a dict for CSV files and the raw
+        text of the line for JSONL files, which is parsed while validating
+
+    Raises:
+        BulkImportError: If the file type is not supported
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.csv':
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, row
+    elif extension in ('.jsonl', '.ndjson'):
+        with open(path, encoding='utf-8') as f:
+            for line, text in enumerate(f, start=1):
+                if text.strip():
+                    yield line, text
+    else:
+        raise BulkImportError(f"Unsupported file type '{extension}', expected .csv or .jsonl")
+
+def count_lines(path: str) -> int:
+    """Count the lines of a file quickly, to estimate its rows"""
+    with open(path, 'rb') as f:
+        return sum(chunk.count(b'\n') for chunk in iter(lambda: f.read(1 << 20), b''))
+
+def _check_file(path: str, kind: str) -> None:
+    """Fail early on files that cannot be imported at all"""
+    if not os.path.isfile(path):
+        raise BulkImportError(f"File not found: {path}")
+    extension = os.path.splitext(path)[1].lower()
+    if extension in ('.jsonl', '.ndjson'):
+        return
+    if extension != '.csv':
+        raise BulkImportError(f"Unsupported file type '{extension}', expected .csv or .jsonl")
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        header = next(csv.reader(f), [])
+    missing = [column for column in REQUIRED_COLUMNS[kind] if column not in header]
+    if missing:
+        raise BulkImportError(f"{os.path.basename(path)} is missing the columns: {', '.join(missing)}")
+
+class _ErrorWriter:
+    """Writes rejected rows, with their line and reason, in the input's format"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.count = 0
+        self._file = None
+        self._writer = None
+
+    def write(self, line: int, row: Any, error: str) -> None:
+        self.count += 1
+        if self._file is None:
+            self._file = open(self.path, 'w', newline='', encoding='utf-8')
+        if self.path.lower().endswith('.csv'):
+            if self._writer is None:
+                # Cells beyond the header are keyed None by DictReader
+                columns = [column for column in row if column is not None]
+                self._writer = csv.DictWriter(self._file, ['line', 'error', *columns],
+                                              extrasaction='ignore')
+                self._writer.writeheader()
+            self._writer.writerow({**row, 'line': line, 'error': error})
+        else:
+            record = row if isinstance(row, dict) else {'text': str(row).rstrip('\n')}
+            self._file.write(json.dumps({'line': line, 'error': error, **record}) + '\n')
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+
+class BulkImporter:
+    """
+    Imports instruments and maintenance history from CSV or JSONL files.
+
+    Files are streamed in batches. Each batch is validated in worker
+    processes while the previous one is written, usernames, maintenance
+    type names and serial numbers are resolved through maps loaded once,
+    and rows are inserted with executemany. A whole file is imported in one
+    transaction with the per-row triggers deferred (see DEFERRED_TRIGGERS);
+    the secondary indexes of the table are also dropped and rebuilt once
+    when the file is at least as large as the table. Bad rows do not abort
+    the import: they are written to an error file next to the input and the
+    rest are imported.
+    """
+
+    # Rows validated and inserted together
+    BATCH_SIZE = 5000
+
+    def __init__(self, db_manager: DatabaseManager, workers: Optional[int] = None,
+                 batch_size: Optional[int] = None):
+        """
+        Args:
+            db_manager: Database to import into
+            workers: Validation processes; 1 validates in this process.
+                Defaults to the number of CPUs.
+            batch_size: Rows per batch, defaults to BATCH_SIZE
+        """
+        self.db = db_manager
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size or self.BATCH_SIZE
+        self.logger = logging.getLogger(__name__)
+
+    def import_instruments(self, path: str, error_path: Optional[str] = None,
+                           progress: Optional[Callable[[int, int], None]] = None) -> ImportResult:
+        """
+        Import instruments and their maintenance plans.
+
+        Rows have the columns name, brand, model, serial_number, location,
+        date_start_operating and optionally status (Operational by
+        default), responsible_user (a username) and maintenance_N/period_N
+        pairs naming a maintenance type and its period in weeks. JSONL rows
+        may give a plans list of {maintenance_type, period_weeks} instead.
+        Serial numbers already in the database are rejected.
+
+        Args:
+            path: CSV or JSONL file
+            error_path: Where to write rejected rows; defaults to the input
+                name with .errors before the extension
+            progress: Called after each batch with the number of rows read
+                and an estimate of the rows in the file
+
+        Raises:
+            BulkImportError: If the file cannot be read
+            DatabaseQueryError: If writing fails; nothing is imported
+        """
+        return self._import('instruments', path, error_path, progress)
+
+    def import_maintenance_records(self, path: str, error_path: Optional[str] = None,
+                                   progress: Optional[Callable[[int, int], None]] = None) -> ImportResult:
+        """
+        Import maintenance history.
+
+        Rows have the columns serial_number (of an existing or just imported
+        instrument), maintenance_type (a type name), maintenance_date,
+        performed_by (a username) and optionally notes.
+
+        Args and errors are as for import_instruments.
+        """
+        return self._import('maintenance_records', path, error_path, progress)
+
+    def _import(self, kind, path, error_path, progress):
+        resolve, insert = {
+            'instruments': (self._resolve_instrument, self._insert_instruments),
+            'maintenance_records': (self._resolve_maintenance_record, self._insert_maintenance_records),
+        }[kind]
+        _check_file(path, kind)
+        root, extension = os.path.splitext(path)
+        errors = _ErrorWriter(error_path or f"{root}.errors{extension}")
+        started = time.perf_counter()
+        imported = rows_read = 0
+        total = count_lines(path)
+        if extension.lower() == '.csv':
+            total -= 1  # Header
+
+        try:
+            with self.db.transaction() as conn:
+                lookups = self._load_lookups(conn)
+                last_id, existing = conn.execute(
+                    f"SELECT COALESCE(MAX(id), 0), COUNT(*) FROM {kind}"
+                ).fetchone()
+                # Rebuilding an index costs a sort of the whole table, which
+                # only beats updating it row by row for a large import
+                indexes = self._drop_indexes(conn, kind) if total >= existing else []
+                triggers = self._drop_triggers(conn, DEFERRED_TRIGGERS[kind])
+
+                for results in self._validated_batches(kind, path):
+                    rows = []
+                    for line, row, values, error in results:
+                        if error is None:
+                            values, error = resolve(lookups, values)
+                        if error is None:
+                            rows.append(values)
+                        else:
+                            errors.write(line, row, error)
+                    imported += insert(conn, lookups, rows)
+                    rows_read += len(results)
+                    if progress:
+                        progress(rows_read, max(total, rows_read))
+
+                for sql in indexes:
+                    conn.execute(sql)
+                self._catch_up(conn, kind, last_id)
+                for sql in triggers:
+                    conn.execute(sql)
+        finally:
+            errors.close()
+
+        result = ImportResult(kind, imported, errors.count, time.perf_counter() - started,
+                              errors.path if errors.count else None)
+        self.logger.info(str(result))
+        return result
+
+    def _validated_batches(self, kind: str, path: str) -> Iterator[List[tuple]]:
+        rows = read_rows(path)
+        batches = iter(lambda: list(islice(rows, self.batch_size)), [])
+        if self.workers <= 1:
+            for batch in batches:
+                yield _validate_batch(kind, batch)
+            return
+
+        # Keep a few batches in flight so the workers stay busy while
+        # this process writes, without reading the whole file ahead. Workers
+        # are spawned, not forked, as imports run on a GUI worker thread.
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(self.workers, mp_context=context) as executor:
+            pending = deque()
+            for batch in batches:
+                pending.append(executor.submit(_validate_batch, kind, batch))
+                if len(pending) > self.workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    def _load_lookups(self, conn) -> Dict[str, Dict[str, int]]:
+        return {
+            'users': dict(conn.execute("SELECT username, id FROM users")),
+            'maintenance_types': {
+                name.casefold(): type_id
+                for name, type_id in conn.execute("SELECT name, id FROM maintenance_types")
+            },
+            'instruments': dict(conn.execute("SELECT serial_number, id FROM instruments")),
+        }
+
+    def _drop_indexes(self, conn, table: str) -> List[str]:
+        """Drop the secondary indexes of table, returning the SQL that recreates them"""
+        # Unique indexes stay, as they enforce constraints on the new rows
+        indexes = conn.execute("""
+            SELECT name, sql FROM sqlite_master
+            WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL
+                AND sql NOT LIKE 'CREATE UNIQUE%'
+        """, (table,)).fetchall()
+        for name, sql in indexes:
+            conn.execute(f"DROP INDEX {name}")
+        return [sql for name, sql in indexes]
+
+    def _drop_triggers(self, conn, names: Iterable[str]) -> List[str]:
+        """Drop the named triggers, returning the SQL that recreates them"""
+        placeholders = ', '.join('?' * len(names))
+        triggers = conn.execute(
+            f"SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND name IN ({placeholders})",
+            tuple(names)
+        ).fetchall()
+        for name, sql in triggers:
+            conn.execute(f"DROP TRIGGER {name}")
+        return [sql for name, sql in triggers]
+
+    def _catch_up(self, conn, kind: str, last_id: int) -> None:
+        """Write what the deferred triggers would have written for rows after last_id"""
+        if kind == 'instruments':
+            conn.execute("""
+                INSERT INTO instruments_fts (rowid, name, brand, model, serial_number, location)
+                SELECT id, name, brand, model, serial_number, location
+                FROM instruments WHERE id > ?
+            """, (last_id,))
+            conn.execute(_status_rebuild_sql(f"s.instrument_id > {int(last_id)}"))
+        else:
+            conn.execute("""
+                INSERT INTO maintenance_notes_fts (rowid, notes)
+                SELECT id, notes FROM maintenance_records WHERE id > ?
+            """, (last_id,))
+            conn.execute(_status_rebuild_sql(f"""
+                (s.instrument_id, s.maintenance_type_id) IN (
+                    SELECT DISTINCT instrument_id, maintenance_type_id
+                    FROM maintenance_records WHERE id > {int(last_id)}
+                )
+            """))
+
+        count = conn.execute(f"SELECT COUNT(*) FROM {kind} WHERE id > ?", (last_id,)).fetchone()[0]
+        conn.execute("UPDATE table_versions SET version = version + ? WHERE table_name = ?",
+                     (count, kind))
+        # Clients further behind than CHANGE_LOG_RETENTION entries reload in
+        # full, so only the newest entries are journaled. They are numbered
+        # as if every row had been, and the gap in seq before them is what
+        # tells clients that they missed changes.
+        latest = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM change_log").fetchone()[0]
+        conn.execute(f"""
+            INSERT INTO change_log (seq, table_name, row_id, op)
+            SELECT ? + ROW_NUMBER() OVER (ORDER BY id), ?, id, 'I'
+            FROM (SELECT id FROM {kind} WHERE id > ? ORDER BY id DESC LIMIT ?)
+        """, (latest + max(0, count - CHANGE_LOG_RETENTION), kind, last_id, CHANGE_LOG_RETENTION))
+
+    @staticmethod
+    def _resolve_instrument(lookups, values):
+        (name, model, serial_number, location, status, brand,
+         username, date_start_operating, plans) = values
+        if serial_number in lookups['instruments']:
+            return None, f"serial_number '{serial_number}' already exists"
+        user_id = None
+        if username is not None:
+            user_id = lookups['users'].get(username)
+            if user_id is None:
+                return None, f"Unknown user '{username}'"
+        resolved_plans = []
+        for type_name, period_weeks in plans:
+            type_id = lookups['maintenance_types'].get(type_name.casefold())
+            if type_id is None:
+                return None, f"Unknown maintenance type '{type_name}'"
+            resolved_plans.append((type_id, period_weeks))
+        # Claim the serial number so a duplicate later in the file is rejected
+        lookups['instruments'][serial_number] = None
+        return (name, model, serial_number, location, status, brand,
+                user_id, date_start_operating, resolved_plans), None
+
+    def _insert_instruments(self, conn, lookups, rows) -> int:
+        if not rows:
+            return 0
+        last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM instruments").fetchone()[0]
+        conn.executemany("""
+            INSERT INTO instruments (
+                name, model, serial_number, location, status, brand,
+                responsible_user_id, date_start_operating
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, (row[:8] for row in rows))
+        ids = lookups['instruments']
+        ids.update(conn.execute("SELECT serial_number, id FROM instruments WHERE id > ?", (last_id,)))
+        conn.executemany("""
+            INSERT INTO instrument_maintenance_schedule (
+                instrument_id, maintenance_type_id, period_weeks, position
+            ) VALUES (?, ?, ?, ?)
+        """, [(ids[row[2]], type_id, period_weeks, position)
+              for row in rows
+              for position, (type_id, period_weeks) in enumerate(row[8], start=1)])
+        return len(rows)
+
+    @staticmethod
+    def _resolve_maintenance_record(lookups, values):
+        serial_number, type_name, maintenance_date, username, notes = values
+        instrument_id = lookups['instruments'].get(serial_number)
+        if instrument_id is None:
+            return None, f"Unknown instrument serial_number '{serial_number}'"
+        type_id = lookups['maintenance_types'].get(type_name.casefold())
+        if type_id is None:
+            return None, f"Unknown maintenance type '{type_name}'"
+        user_id = lookups['users'].get(username)
+        if user_id is None:
+            return None, f"Unknown user '{username}'"
+        return (instrument_id, type_id, maintenance_date, user_id, notes), None
+
+    def _insert_maintenance_records(self, conn, lookups, rows) -> int:
+        conn.executemany("""
+            INSERT INTO maintenance_records (
+                instrument_id, maintenance_type_id, maintenance_date,
+                performed_by, notes
+            ) VALUES (?, ?, ?, ?, ?)
+        """, rows)
+        return len(rows)
@@ -0,0 +1,87 @@
+import sqlite3
+import threading
+import logging
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+class ChangeWatcher:
+    """
+    Cheap detection of committed changes, from this or any other client.
+
+    Holds one connection outside the pool that never writes. Its
+    PRAGMA data_version changes whenever any other connection commits, so
+    a poll that finds it unchanged costs a single pragma. Otherwise the
+    poll re-reads table_versions, whose counters are bumped by triggers
+    for every changed row.
+
+    change_log tells which rows changed, so views can update just those.
+    """
+
+    def __init__(self, manager):
+        self.manager = manager
+        self.logger = logging.getLogger(__name__)
+        self._conn = manager._create_connection()
+        self._lock = threading.Lock()
+        self._data_version = None
+        self._versions = {}
+
+    def poll(self) -> Dict[str, int]:
+        """
+        Get the current version of every watched table.
+
+        Returns:
+            Dictionary of table name to version; only re-read from the
+            database when something was committed since the last poll
+        """
+        with self._lock:
+            try:
+                data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+                if data_version != self._data_version:
+                    rows = self._conn.execute("SELECT table_name, version FROM table_versions").fetchall()
+                    self._versions = {row[0]: row[1] for row in rows}
+                    self._data_version = data_version
+            except sqlite3.Error as e:
+                self.logger.error(f"Change poll failed: {str(e)}")
+            return dict(self._versions)
+
+    def versions(self, tables: Iterable[str]) -> Dict[str, Optional[int]]:
+        """Get the current versions of the given tables"""
+        versions = self.poll()
+        return {table: versions.get(table) for table in tables}
+
+    def latest_change(self) -> int:
+        """Get the sequence number of the newest change_log entry"""
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(MAX(seq), 0) FROM change_log").fetchone()[0]
+
+    def changes_since(self, seq: int, tables: Iterable[str]) -> Tuple[int, Optional[Dict[str, Set[int]]]]:
+        """
+        Get the rows of the given tables changed after seq.
+
+        Args:
+            seq: Sequence number the caller is up to date with
+            tables: Table names to report
+
+        Returns:
+            Tuple of the newest sequence number and a dictionary of table
+            name to changed row ids. The dictionary is None when entries
+            after seq were already pruned, so the caller must reload fully.
+        """
+        tables = list(tables)
+        with self._lock:
+            latest, oldest = self._conn.execute("SELECT COALESCE(MAX(seq), 0), MIN(seq) FROM change_log").fetchone()
+            if oldest is not None and oldest > seq + 1:
+                return latest, None
+            placeholders = ', '.join('?' for _ in tables)
+            rows = self._conn.execute(f"""
+                SELECT table_name, row_id FROM change_log
+                WHERE seq > ? AND seq <= ? AND table_name IN ({placeholders})
+            """, [seq, latest] + tables).fetchall()
+        changes = {}
+        for table_name, row_id in rows:
+            changes.setdefault(table_name, set()).add(row_id)
+        return latest, changes
+
+    def close(self) -> None:
+        """Close the watcher connection"""
+        with self._lock:
+            self._conn.close()
@@ -1 +1,40 @@
- 
\ No newline at end of file
+import os
+from typing import Dict, Any
+from src.utils.path_utils import get_database_path
+
+class DatabaseConfig:
+    """Connection settings shared by every DatabaseManager"""
+
+    # Upper bound on open connections per manager
+    POOL_SIZE = 5
+    # Seconds SQLite waits on a locked database file before failing
+    BUSY_TIMEOUT = 30
+    # Seconds a thread waits for a free pooled connection before failing
+    CHECKOUT_TIMEOUT = 10
+    # Rows fetched per round trip by DatabaseManager.iter_query
+    FETCH_BATCH_SIZE = 1000
+
+    @staticmethod
+    def get_database_path() -> str:
+        """
+        Get the database file path.
+
+        LAB_DB_PATH overrides the default location next to the executable.
+        """
+        return os.getenv('LAB_DB_PATH') or get_database_path()
+
+    @classmethod
+    def get_settings(cls) -> Dict[str, Any]:
+        """
+        Get the connection pool settings.
+
+        Returns:
+            Dictionary with pool_size, timeout, checkout_timeout and
+            fetch_batch_size
+        """
+        return {
+            'pool_size': int(os.getenv('LAB_DB_POOL_SIZE', cls.POOL_SIZE)),
+            'timeout': float(os.getenv('LAB_DB_TIMEOUT', cls.BUSY_TIMEOUT)),
+            'checkout_timeout': float(os.getenv('LAB_DB_CHECKOUT_TIMEOUT', cls.CHECKOUT_TIMEOUT)),
+            'fetch_batch_size': int(os.getenv('LAB_DB_FETCH_BATCH_SIZE', cls.FETCH_BATCH_SIZE))
+        }
@@ -1,13 +1,15 @@
 import sqlite3
 from contextlib import contextmanager
-from typing import Optional, List, Dict, Any, Generator, Callable
+from typing import Optional, List, Dict, Any, Generator, Callable, Iterator
+from collections import namedtuple
 import queue
 import threading
-from pathlib import Path
 import logging
 import time
-import uuid
 from .config import DatabaseConfig
+from .migrations import migrate, needs_migration
+from .write_lease import WriteLease, WriteLeaseTimeout
+from .change_watcher import ChangeWatcher
 
 class DatabaseError(Exception):
     """Base exception for database-related errors"""
@@ -26,42 +28,64 @@ class DatabaseLockError(DatabaseError):
     pass
 
 class DatabaseManager:
-    _instance = None
-    _lock = threading.Lock()
-    _connection_pool = []
-    _max_pool_size = 5
-    _timeout = 5
-    _pool_lock = threading.Lock()
-    _transaction_lock = threading.Lock()
-    _active_transactions = set()
-
-    def __new__(cls, *args, **kwargs):
-        if cls._instance is None:
-            with cls._lock:
-                if cls._instance is None:
-                    cls._instance = super(DatabaseManager, cls).__new__(cls)
-        return cls._instance
+    """
+    Bounded pool of SQLite connections to one database file.
+
+    At most pool_size connections are opened, lazily. A thread that needs a
+    connection while all of them are checked out waits up to
+    checkout_timeout seconds and then gets a DatabaseConnectionError.
+
+    A thread keeps the same connection for nested checkouts, so a query run
+    inside transaction() sees the uncommitted changes and cannot deadlock
+    the pool waiting for a second connection.
+    """
+
+    # WAL lets any number of readers work while one writer commits. It needs
+    # every client to see the same shared memory, so on file systems that
+    # cannot provide it SQLite stays in its rollback journal mode, which still
+    # allows concurrent readers.
+    journal_mode = 'WAL'
 
     def __init__(self, db_path: str = None, pool_size: int = None):
-        if not hasattr(self, 'initialized'):
-            self.db_path = db_path or DatabaseConfig.get_database_path()
-            self._max_pool_size = pool_size or DatabaseConfig.get_settings()['pool_size']
-            self._timeout = DatabaseConfig.get_settings()['timeout']
-            self.initialized = True
-            self._initialize_pool()
-            
-            # Configure logging
-            self.logger = logging.getLogger(__name__)
-            
+        settings = DatabaseConfig.get_settings()
+        self.db_path = db_path or DatabaseConfig.get_database_path()
+        self._max_pool_size = pool_size or settings['pool_size']
+        self._timeout = settings['timeout']
+        self._checkout_timeout = settings['checkout_timeout']
+        self._fetch_batch_size = settings['fetch_batch_size']
+        self.logger = logging.getLogger(__name__)
+
+        self._idle = queue.LifoQueue()
+        self._pool_lock = threading.Lock()
+        self._local = threading.local()
+        self._closed = False
+        self._change_watcher = None
+        self._stats = {
+            'opened': 0,
+            'in_use': 0,
+            'high_water': 0,
+            'checkouts': 0,
+            'waits': 0,
+            'timeouts': 0,
+            'total_wait': 0.0,
+            'max_wait': 0.0
+        }
+
+        # Single-writer lease, only held around write transactions
+        self.write_lease = WriteLease.for_path(self.db_path + '.write-lock', timeout=self._timeout)
+
+        self._initialize_pool()
+
     def _initialize_pool(self) -> None:
-        """Initialize the connection pool with the specified number of connections"""
-        try:
-            for _ in range(self._max_pool_size):
-                conn = self._create_connection()
-                self._connection_pool.append(conn)
-        except Exception as e:
-            raise DatabaseConnectionError(f"Failed to initialize connection pool: {str(e)}")
-            
+        """Open the first connection and upgrade the schema if needed"""
+        with self.connection() as conn:
+            try:
+                if needs_migration(conn):
+                    with self.write_lease:
+                        migrate(conn)
+            except WriteLeaseTimeout as e:
+                raise DatabaseLockError(str(e))
+
     def _create_connection(self) -> sqlite3.Connection:
         """Create a new database connection with proper configuration"""
         try:
@@ -71,201 +95,348 @@ class DatabaseManager:
                 check_same_thread=False
             )
             conn.row_factory = sqlite3.Row
+            mode = conn.execute(f"PRAGMA journal_mode = {self.journal_mode}").fetchone()[0]
+            if mode.upper() != self.journal_mode:
+                self.logger.warning(f"Journal mode {self.journal_mode} not available, using {mode}")
+            else:
+                # Safe with WAL: a power loss can only drop the last commits
+                conn.execute("PRAGMA synchronous = NORMAL")
             return conn
         except sqlite3.Error as e:
             raise DatabaseConnectionError(f"Failed to create database connection: {str(e)}")
-            
+
     def _get_connection(self) -> sqlite3.Connection:
-        """Get a connection from the pool"""
+        """
+        Check a connection out of the pool.
+
+        Reuses the connection the calling thread already holds, otherwise
+        takes an idle one, opens a new one while under the size bound, or
+        waits for one to be returned.
+        """
+        local = self._local
+        if getattr(local, 'conn', None) is not None:
+            local.depth += 1
+            return local.conn
+
+        if self._closed:
+            raise DatabaseConnectionError("Connection pool is closed")
+
+        started = time.monotonic()
+        waited = False
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._pool_lock:
+                can_open = self._stats['opened'] < self._max_pool_size
+                if can_open:
+                    self._stats['opened'] += 1
+            if can_open:
+                try:
+                    conn = self._create_connection()
+                except Exception:
+                    with self._pool_lock:
+                        self._stats['opened'] -= 1
+                    raise
+            else:
+                waited = True
+                try:
+                    conn = self._idle.get(timeout=self._checkout_timeout)
+                except queue.Empty:
+                    with self._pool_lock:
+                        self._stats['timeouts'] += 1
+                    raise DatabaseConnectionError(
+                        f"No database connection available after {self._checkout_timeout:g} seconds "
+                        f"(pool size {self._max_pool_size})"
+                    )
+
+        wait_time = time.monotonic() - started
         with self._pool_lock:
-            if not self._connection_pool:
-                # If pool is empty, create a new connection
-                return self._create_connection()
-            return self._connection_pool.pop()
+            stats = self._stats
+            stats['checkouts'] += 1
+            stats['in_use'] += 1
+            stats['high_water'] = max(stats['high_water'], stats['in_use'])
+            if waited:
+                stats['waits'] += 1
+                stats['total_wait'] += wait_time
+                stats['max_wait'] = max(stats['max_wait'], wait_time)
+
+        local.conn = conn
+        local.depth = 1
+        return conn
 
     def _return_connection(self, conn: sqlite3.Connection):
-        """Return a connection to the pool"""
-        with self._pool_lock:
-            if len(self._connection_pool) < self._max_pool_size:
-                self._connection_pool.append(conn)
-            else:
-                conn.close()
+        """Return a connection to the pool once the thread's outermost checkout ends"""
+        local = self._local
+        local.depth -= 1
+        if local.depth > 0:
+            return
+        local.conn = None
+
+        if conn.in_transaction:
+            # Never hand out a connection with a half-finished transaction
+            conn.rollback()
 
-    def _acquire_transaction_lock(self, transaction_id: str, timeout: int = 5) -> bool:
-        """Acquire a lock for a transaction"""
-        start_time = time.time()
-        while time.time() - start_time < timeout:
-            with self._transaction_lock:
-                if transaction_id not in self._active_transactions:
-                    self._active_transactions.add(transaction_id)
-                    return True
-            time.sleep(0.1)
-        return False
-
-    def _release_transaction_lock(self, transaction_id: str):
-        """Release a transaction lock"""
-        with self._transaction_lock:
-            self._active_transactions.discard(transaction_id)
+        with self._pool_lock:
+            self._stats['in_use'] -= 1
+            if self._closed:
+                self._stats['opened'] -= 1
+        if self._closed:
+            conn.close()
+        else:
+            self._idle.put(conn)
 
     @contextmanager
-    def transaction(self, transaction_id: str = None):
-        """Context manager for database transactions with locking"""
-        if transaction_id is None:
-            transaction_id = str(uuid.uuid4())
-            
-        if not self._acquire_transaction_lock(transaction_id):
-            raise DatabaseLockError("Failed to acquire transaction lock")
-            
-        conn = None
+    def connection(self) -> Generator[sqlite3.Connection, None, None]:
+        """Context manager that checks out a pooled connection for the calling thread"""
+        conn = self._get_connection()
         try:
-            conn = self._get_connection()
-            conn.execute("BEGIN IMMEDIATE")
             yield conn
-            conn.commit()
-        except Exception as e:
-            if conn:
-                conn.rollback()
-            raise DatabaseQueryError(f"Transaction failed: {str(e)}")
         finally:
-            if conn:
-                self._return_connection(conn)
-            self._release_transaction_lock(transaction_id)
+            self._return_connection(conn)
+
+    @contextmanager
+    def transaction(self) -> Generator[sqlite3.Connection, None, None]:
+        """
+        Context manager for write transactions.
+
+        Holds the single-writer lease for the duration of the transaction.
+        Nested calls on the same thread join the outer transaction.
+
+        Raises:
+            DatabaseLockError: If another process keeps the write lease for too long
+            DatabaseQueryError: If a statement fails; the transaction is rolled back
+        """
+        try:
+            self.write_lease.acquire()
+        except WriteLeaseTimeout as e:
+            raise DatabaseLockError(str(e))
+
+        try:
+            with self.connection() as conn:
+                if conn.in_transaction:
+                    yield conn
+                    return
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    yield conn
+                    conn.commit()
+                except sqlite3.Error as e:
+                    conn.rollback()
+                    raise DatabaseQueryError(f"Transaction failed: {str(e)}")
+                except BaseException:
+                    conn.rollback()
+                    raise
+        finally:
+            self.write_lease.release()
+
+    def in_transaction(self) -> bool:
+        """Return True if the calling thread has uncommitted changes"""
+        conn = getattr(self._local, 'conn', None)
+        return conn is not None and conn.in_transaction
 
     def execute_query(self, query: str, params: tuple = ()) -> List[Dict[str, Any]]:
         """
         Execute a SELECT query and return the results.
-        
+
         Args:
             query: SQL query string
             params: Query parameters
-            
+
         Returns:
             List of dictionaries containing the query results
         """
-        conn = None
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            cursor.execute(query, params)
-            return [dict(row) for row in cursor.fetchall()]
-        except Exception as e:
+            with self.connection() as conn:
+                cursor = conn.execute(query, params)
+                return [dict(row) for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            self.logger.error(f"Query execution failed: {str(e)}")
+            raise DatabaseQueryError(f"Query execution failed: {str(e)}")
+
+    def iter_query(self, query: str, params: tuple = (), batch_size: int = None,
+                   records: bool = False) -> Iterator[tuple]:
+        """
+        Execute a SELECT query and yield its rows as they are fetched.
+
+        Rows are read batch_size at a time, so memory use does not grow with
+        the size of the result. The calling thread keeps its pooled
+        connection until the iterator is exhausted or closed: iterate on one
+        thread, and wrap an iterator that may be abandoned early in
+        contextlib.closing.
+
+        Args:
+            query: SQL query string
+            params: Query parameters
+            batch_size: Rows per fetch; defaults to the fetch_batch_size setting
+            records: Yield namedtuples named after the result columns instead
+                of plain tuples
+
+        Yields:
+            One tuple per row, in column order
+        """
+        batch_size = batch_size or self._fetch_batch_size
+        try:
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                # Plain tuples are the cheapest row the sqlite3 module builds
+                cursor.row_factory = None
+                try:
+                    cursor.execute(query, params)
+                    make = None
+                    if records:
+                        record = namedtuple('Record', [column[0] for column in cursor.description], rename=True)
+                        make = record._make
+                    while True:
+                        rows = cursor.fetchmany(batch_size)
+                        if not rows:
+                            break
+                        if make:
+                            yield from map(make, rows)
+                        else:
+                            yield from rows
+                finally:
+                    cursor.close()
+        except sqlite3.Error as e:
             self.logger.error(f"Query execution failed: {str(e)}")
             raise DatabaseQueryError(f"Query execution failed: {str(e)}")
-        finally:
-            if conn:
-                self._return_connection(conn)
 
     def execute_update(self, query: str, params: tuple = ()) -> int:
         """
         Execute an UPDATE, INSERT, or DELETE query.
-        
+
         Args:
             query: SQL query string
             params: Query parameters
-            
+
         Returns:
             Number of affected rows
         """
-        conn = None
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            cursor.execute(query, params)
-            conn.commit()
+            with self.transaction() as conn:
+                cursor = conn.execute(query, params)
             return cursor.rowcount
-        except Exception as e:
+        except DatabaseQueryError as e:
             self.logger.error(f"Update execution failed: {str(e)}")
-            raise DatabaseQueryError(f"Update execution failed: {str(e)}")
-        finally:
-            if conn:
-                self._return_connection(conn)
+            raise
+
+    def execute_insert(self, query: str, params: tuple = ()) -> int:
+        """
+        Execute an INSERT query.
+
+        Args:
+            query: SQL query string
+            params: Query parameters
+
+        Returns:
+            The rowid of the inserted row
+        """
+        try:
+            with self.transaction() as conn:
+                cursor = conn.execute(query, params)
+            return cursor.lastrowid
+        except DatabaseQueryError as e:
+            self.logger.error(f"Insert execution failed: {str(e)}")
+            raise
 
     def execute_many(self, query: str, params_list: List[tuple]) -> int:
         """
         Execute multiple INSERT or UPDATE operations in a single transaction.
-        
+
         Args:
             query: SQL query string
             params_list: List of parameter tuples
-            
+
         Returns:
             Number of affected rows
         """
-        conn = None
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            cursor.executemany(query, params_list)
-            conn.commit()
+            with self.transaction() as conn:
+                cursor = conn.executemany(query, params_list)
             return cursor.rowcount
-        except Exception as e:
+        except DatabaseQueryError as e:
             self.logger.error(f"Batch execution failed: {str(e)}")
-            raise DatabaseQueryError(f"Batch execution failed: {str(e)}")
-        finally:
-            if conn:
-                self._return_connection(conn)
+            raise
 
     def get_single_row(self, query: str, params: tuple = ()) -> Optional[Dict[str, Any]]:
         """
         Execute a query and return a single row.
-        
+
         Args:
             query: SQL query string
             params: Query parameters
-            
+
         Returns:
             Dictionary containing the row data or None if no row found
         """
-        conn = None
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            cursor.execute(query, params)
-            row = cursor.fetchone()
-            return dict(row) if row else None
-        except Exception as e:
+            with self.connection() as conn:
+                row = conn.execute(query, params).fetchone()
+                return dict(row) if row else None
+        except sqlite3.Error as e:
             self.logger.error(f"Query execution failed: {str(e)}")
             raise DatabaseQueryError(f"Query execution failed: {str(e)}")
-        finally:
-            if conn:
-                self._return_connection(conn)
 
     def get_scalar(self, query: str, params: tuple = ()) -> Any:
         """
         Execute a query and return a single value.
-        
+
         Args:
             query: SQL query string
             params: Query parameters
-            
+
         Returns:
             The scalar value or None if no value found
         """
-        conn = None
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            cursor.execute(query, params)
-            row = cursor.fetchone()
-            return row[0] if row else None
-        except Exception as e:
+            with self.connection() as conn:
+                row = conn.execute(query, params).fetchone()
+                return row[0] if row else None
+        except sqlite3.Error as e:
             self.logger.error(f"Query execution failed: {str(e)}")
             raise DatabaseQueryError(f"Query execution failed: {str(e)}")
-        finally:
-            if conn:
-                self._return_connection(conn)
 
-    def execute_in_transaction(self, transaction_id: str, operations: List[Callable]):
-        """Execute multiple operations in a single transaction with locking"""
-        with self.transaction(transaction_id) as conn:
+    def execute_in_transaction(self, operations: List[Callable]):
+        """Execute multiple operations in a single transaction"""
+        with self.transaction() as conn:
             for operation in operations:
                 operation(conn)
 
+    def change_watcher(self):
+        """Get this database's ChangeWatcher, creating it on first use"""
+        with self._pool_lock:
+            if self._change_watcher is None:
+                self._change_watcher = ChangeWatcher(self)
+            return self._change_watcher
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get connection pool statistics.
+
+        Returns:
+            Dictionary with the pool size, open/in-use/idle connection counts,
+            the in-use high-water mark, checkout and timeout counts, and the
+            total and maximum time spent waiting for a connection in seconds
+        """
+        with self._pool_lock:
+            stats = dict(self._stats)
+        stats['pool_size'] = self._max_pool_size
+        stats['idle'] = self._idle.qsize()
+        return stats
+
     def close(self) -> None:
         """Close all connections in the pool"""
-        with self._pool_lock:
-            for conn in self._connection_pool:
-                try:
-                    conn.close()
-                except Exception as e:
-                    self.logger.error(f"Error closing connection: {str(e)}") 
\ No newline at end of file
+        self._closed = True
+        if self._change_watcher is not None:
+            self._change_watcher.close()
+            self._change_watcher = None
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                conn.close()
+            except Exception as e:
+                self.logger.error(f"Error closing connection: {str(e)}")
+            with self._pool_lock:
+                self._stats['opened'] -= 1
@@ -0,0 +1,694 @@
+import sqlite3
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class MigrationError(Exception):
+    """Raised when the database schema cannot be brought up to date"""
+    pass
+
+
+def _add_maintenance_record_indexes(conn):
+    """Index maintenance_records for the last/next maintenance lookups"""
+    # Covers MAX(maintenance_date) per (instrument, type) used by the
+    # maintenance list, the details dialog and get_upcoming_maintenance
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_maintenance_records_instrument_type_date
+        ON maintenance_records (instrument_id, maintenance_type_id, maintenance_date)
+    """)
+    # Covers the per-instrument history ordered by date
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_maintenance_records_instrument_date
+        ON maintenance_records (instrument_id, maintenance_date)
+    """)
+
+
+def _add_instrument_indexes(conn):
+    """Index instruments by responsible user and status"""
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_instruments_responsible_user
+        ON instruments (responsible_user_id)
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_instruments_status
+        ON instruments (status)
+    """)
+
+
+def _create_maintenance_status(conn):
+    """Create the trigger-maintained maintenance_status summary table"""
+    conn.execute("""
+        CREATE TABLE maintenance_status (
+            instrument_id INTEGER NOT NULL,
+            maintenance_type_id INTEGER NOT NULL,
+            period_weeks INTEGER,
+            last_date DATE,
+            last_notes TEXT,
+            last_performed_by INTEGER,
+            next_due DATE,
+            PRIMARY KEY (instrument_id, maintenance_type_id),
+            FOREIGN KEY (instrument_id) REFERENCES instruments (id),
+            FOREIGN KEY (maintenance_type_id) REFERENCES maintenance_types (id),
+            FOREIGN KEY (last_performed_by) REFERENCES users (id)
+        )
+    """)
+    conn.execute("""
+        CREATE INDEX idx_maintenance_status_next_due
+        ON maintenance_status (next_due)
+    """)
+
+    # One row per configured (instrument, type). A type listed in several
+    # slots keeps the period of the first slot, like the old CASE expressions.
+    def plans_sql(where):
+        return f"""
+            SELECT id AS instrument_id, maintenance_1 AS maintenance_type_id,
+                   period_1 AS period_weeks, date_start_operating
+            FROM instruments
+            WHERE {where} AND maintenance_1 IS NOT NULL
+            UNION ALL
+            SELECT id, maintenance_2, period_2, date_start_operating
+            FROM instruments
+            WHERE {where} AND maintenance_2 IS NOT NULL
+                AND maintenance_2 IS NOT maintenance_1
+            UNION ALL
+            SELECT id, maintenance_3, period_3, date_start_operating
+            FROM instruments
+            WHERE {where} AND maintenance_3 IS NOT NULL
+                AND maintenance_3 IS NOT maintenance_1
+                AND maintenance_3 IS NOT maintenance_2
+        """
+
+    def rebuild_sql(where):
+        return f"""
+            INSERT OR REPLACE INTO maintenance_status (
+                instrument_id, maintenance_type_id, period_weeks,
+                last_date, last_notes, last_performed_by, next_due
+            )
+            SELECT
+                p.instrument_id,
+                p.maintenance_type_id,
+                p.period_weeks,
+                mr.maintenance_date,
+                mr.notes,
+                mr.performed_by,
+                CASE
+                    WHEN mr.maintenance_date IS NULL THEN date(p.date_start_operating)
+                    ELSE date(mr.maintenance_date, '+' || (p.period_weeks * 7) || ' days')
+                END
+            FROM ({plans_sql(where)}) p
+            LEFT JOIN maintenance_records mr ON mr.id = (
+                SELECT id FROM maintenance_records
+                WHERE instrument_id = p.instrument_id
+                    AND maintenance_type_id = p.maintenance_type_id
+                ORDER BY maintenance_date DESC, id DESC
+                LIMIT 1
+            );
+        """
+
+    def refresh_sql(instrument_id, type_id):
+        return f"""
+            UPDATE maintenance_status
+            SET (last_date, last_notes, last_performed_by) = (
+                SELECT maintenance_date, notes, performed_by
+                FROM maintenance_records
+                WHERE instrument_id = {instrument_id} AND maintenance_type_id = {type_id}
+                ORDER BY maintenance_date DESC, id DESC
+                LIMIT 1
+            )
+            WHERE instrument_id = {instrument_id} AND maintenance_type_id = {type_id};
+            UPDATE maintenance_status
+            SET next_due = CASE
+                WHEN last_date IS NULL THEN (
+                    SELECT date(date_start_operating) FROM instruments WHERE id = {instrument_id}
+                )
+                ELSE date(last_date, '+' || (period_weeks * 7) || ' days')
+            END
+            WHERE instrument_id = {instrument_id} AND maintenance_type_id = {type_id};
+        """
+
+    # Backfill from the existing data
+    conn.execute(rebuild_sql('1'))
+
+    conn.execute(f"""
+        CREATE TRIGGER trg_maintenance_records_status_insert
+        AFTER INSERT ON maintenance_records
+        BEGIN
+            {refresh_sql('NEW.instrument_id', 'NEW.maintenance_type_id')}
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER trg_maintenance_records_status_delete
+        AFTER DELETE ON maintenance_records
+        BEGIN
+            {refresh_sql('OLD.instrument_id', 'OLD.maintenance_type_id')}
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER trg_maintenance_records_status_update
+        AFTER UPDATE OF instrument_id, maintenance_type_id, maintenance_date, notes, performed_by
+        ON maintenance_records
+        BEGIN
+            {refresh_sql('OLD.instrument_id', 'OLD.maintenance_type_id')}
+            {refresh_sql('NEW.instrument_id', 'NEW.maintenance_type_id')}
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER trg_instruments_status_insert
+        AFTER INSERT ON instruments
+        BEGIN
+            {rebuild_sql('id = NEW.id')}
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER trg_instruments_status_update
+        AFTER UPDATE OF date_start_operating, maintenance_1, period_1,
+                        maintenance_2, period_2, maintenance_3, period_3
+        ON instruments
+        BEGIN
+            DELETE FROM maintenance_status WHERE instrument_id = NEW.id;
+            {rebuild_sql('id = NEW.id')}
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER trg_instruments_status_delete
+        AFTER DELETE ON instruments
+        BEGIN
+            DELETE FROM maintenance_status WHERE instrument_id = OLD.id;
+        END
+    """)
+
+
+def _status_rebuild_sql(where):
+    """Recompute maintenance_status for the schedule rows matching where"""
+    return f"""
+        INSERT OR REPLACE INTO maintenance_status (
+            instrument_id, maintenance_type_id, period_weeks,
+            last_date, last_notes, last_performed_by, next_due
+        )
+        SELECT
+            s.instrument_id,
+            s.maintenance_type_id,
+            s.period_weeks,
+            mr.maintenance_date,
+            mr.notes,
+            mr.performed_by,
+            CASE
+                WHEN mr.maintenance_date IS NULL THEN date(i.date_start_operating)
+                ELSE date(mr.maintenance_date, '+' || (s.period_weeks * 7) || ' days')
+            END
+        FROM instrument_maintenance_schedule s
+        JOIN instruments i ON i.id = s.instrument_id
+        LEFT JOIN maintenance_records mr ON mr.id = (
+            SELECT id FROM maintenance_records
+            WHERE instrument_id = s.instrument_id
+                AND maintenance_type_id = s.maintenance_type_id
+            ORDER BY maintenance_date DESC, id DESC
+            LIMIT 1
+        )
+        WHERE {where};
+    """
+
+
+def _create_instrument_maintenance_schedule(conn):
+    """Move the fixed maintenance_N/period_N columns into instrument_maintenance_schedule"""
+    conn.execute("""
+        CREATE TABLE instrument_maintenance_schedule (
+            instrument_id INTEGER NOT NULL,
+            maintenance_type_id INTEGER NOT NULL,
+            period_weeks INTEGER,
+            position INTEGER NOT NULL,
+            PRIMARY KEY (instrument_id, maintenance_type_id),
+            FOREIGN KEY (instrument_id) REFERENCES instruments (id),
+            FOREIGN KEY (maintenance_type_id) REFERENCES maintenance_types (id)
+        )
+    """)
+    conn.execute("""
+        CREATE INDEX idx_instrument_maintenance_schedule_type
+        ON instrument_maintenance_schedule (maintenance_type_id)
+    """)
+
+    # A type listed in several slots keeps the first slot, like maintenance_status
+    conn.execute("""
+        INSERT INTO instrument_maintenance_schedule (
+            instrument_id, maintenance_type_id, period_weeks, position
+        )
+        SELECT instrument_id, maintenance_type_id, period_weeks,
+               ROW_NUMBER() OVER (PARTITION BY instrument_id ORDER BY slot)
+        FROM (
+            SELECT id AS instrument_id, maintenance_1 AS maintenance_type_id,
+                   period_1 AS period_weeks, 1 AS slot
+            FROM instruments
+            WHERE maintenance_1 IS NOT NULL
+            UNION ALL
+            SELECT id, maintenance_2, period_2, 2
+            FROM instruments
+            WHERE maintenance_2 IS NOT NULL
+                AND maintenance_2 IS NOT maintenance_1
+            UNION ALL
+            SELECT id, maintenance_3, period_3, 3
+            FROM instruments
+            WHERE maintenance_3 IS NOT NULL
+                AND maintenance_3 IS NOT maintenance_1
+                AND maintenance_3 IS NOT maintenance_2
+        )
+    """)
+
+    # Rebuild instruments without the slot columns. Their foreign keys rule
+    # out ALTER TABLE DROP COLUMN. Dropping the table also drops its old
+    # maintenance_status triggers, which read the slot columns.
+    conn.execute("""
+        CREATE TABLE instruments_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            model TEXT NOT NULL,
+            serial_number TEXT UNIQUE NOT NULL,
+            location TEXT NOT NULL,
+            status TEXT NOT NULL,
+            brand TEXT NOT NULL,
+            responsible_user_id INTEGER,
+            date_start_operating TEXT NOT NULL,
+            FOREIGN KEY (responsible_user_id) REFERENCES users (id)
+        )
+    """)
+    conn.execute("""
+        INSERT INTO instruments_new (
+            id, name, model, serial_number, location, status, brand,
+            responsible_user_id, date_start_operating
+        )
+        SELECT id, name, model, serial_number, location, status, brand,
+               responsible_user_id, date_start_operating
+        FROM instruments
+    """)
+    conn.execute("DROP TABLE instruments")
+    # Other tables' foreign keys and triggers already name "instruments", so
+    # keep the rename from rewriting or re-checking them
+    conn.execute("PRAGMA legacy_alter_table = ON")
+    try:
+        conn.execute("ALTER TABLE instruments_new RENAME TO instruments")
+    finally:
+        conn.execute("PRAGMA legacy_alter_table = OFF")
+    _add_instrument_indexes(conn)
+
+    conn.execute(f"""
+        CREATE TRIGGER trg_schedule_status_insert
+        AFTER INSERT ON instrument_maintenance_schedule
+        BEGIN
+            {_status_rebuild_sql('s.instrument_id = NEW.instrument_id AND s.maintenance_type_id = NEW.maintenance_type_id')}
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER trg_schedule_status_update
+        AFTER UPDATE ON instrument_maintenance_schedule
+        BEGIN
+            DELETE FROM maintenance_status
+            WHERE instrument_id = OLD.instrument_id AND maintenance_type_id = OLD.maintenance_type_id;
+            {_status_rebuild_sql('s.instrument_id = NEW.instrument_id AND s.maintenance_type_id = NEW.maintenance_type_id')}
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER trg_schedule_status_delete
+        AFTER DELETE ON instrument_maintenance_schedule
+        BEGIN
+            DELETE FROM maintenance_status
+            WHERE instrument_id = OLD.instrument_id AND maintenance_type_id = OLD.maintenance_type_id;
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER trg_instruments_status_update
+        AFTER UPDATE OF date_start_operating ON instruments
+        BEGIN
+            UPDATE maintenance_status
+            SET next_due = date(NEW.date_start_operating)
+            WHERE instrument_id = NEW.id AND last_date IS NULL;
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER trg_instruments_schedule_delete
+        AFTER DELETE ON instruments
+        BEGIN
+            DELETE FROM instrument_maintenance_schedule WHERE instrument_id = OLD.id;
+        END
+    """)
+
+
+# Day numbers count days since 1970-01-01, so they match
+# date_utils.to_day_number. julianday() of a bare date is always N.5.
+def _day_number_sql(column):
+    return f"CAST(julianday({column}) - 2440587.5 AS INTEGER)"
+
+
+def _add_day_number_columns(conn):
+    """Repair DD-MM-YYYY dates and add indexed integer day-number columns"""
+    # Older databases were seeded with DD-MM-YYYY (or DD/MM/YYYY, DD.MM.YYYY)
+    # dates while the dialogs write YYYY-MM-DD. SQLite's date functions only
+    # understand the latter, so rewrite the rest in place. The
+    # maintenance_status triggers pick up the corrected dates.
+    for table, column in (('instruments', 'date_start_operating'),
+                          ('maintenance_records', 'maintenance_date')):
+        conn.execute(f"""
+            UPDATE {table}
+            SET {column} = substr({column}, 7, 4) || '-' || substr({column}, 4, 2) || '-' || substr({column}, 1, 2)
+            WHERE {column} GLOB '[0-3][0-9][-/.][01][0-9][-/.][0-9][0-9][0-9][0-9]'
+        """)
+        bad = conn.execute(f"""
+            SELECT COUNT(*) FROM {table}
+            WHERE {column} IS NOT NULL AND julianday({column}) IS NULL
+        """).fetchone()[0]
+        if bad:
+            logger.warning(f"{bad} rows in {table} have an unreadable {column}")
+
+    # Virtual generated columns are computed from the text dates, so every
+    # writer keeps them right; only their indexes are stored
+    for table, column, day_column in (
+        ('instruments', 'date_start_operating', 'start_day'),
+        ('maintenance_records', 'maintenance_date', 'maintenance_day'),
+        ('maintenance_status', 'last_date', 'last_day'),
+        ('maintenance_status', 'next_due', 'next_due_day'),
+    ):
+        conn.execute(f"""
+            ALTER TABLE {table} ADD COLUMN {day_column} INTEGER
+            GENERATED ALWAYS AS ({_day_number_sql(column)}) VIRTUAL
+        """)
+
+    conn.execute("DROP INDEX IF EXISTS idx_maintenance_status_next_due")
+    conn.execute("""
+        CREATE INDEX idx_maintenance_status_next_due_day
+        ON maintenance_status (next_due_day)
+    """)
+
+
+# Tables whose changes clients can watch through table_versions
+VERSIONED_TABLES = (
+    'users',
+    'maintenance_types',
+    'instruments',
+    'instrument_maintenance_schedule',
+    'maintenance_records',
+    'maintenance_status',
+)
+
+
+def _add_table_versions(conn):
+    """Add table_versions, a per-table change counter bumped by triggers"""
+    conn.execute("""
+        CREATE TABLE table_versions (
+            table_name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    for table in VERSIONED_TABLES:
+        _add_version_triggers(conn, table)
+
+
+def _add_version_triggers(conn, table):
+    """Count changes to table in table_versions"""
+    conn.execute("INSERT INTO table_versions (table_name) VALUES (?)", (table,))
+    for operation in ('INSERT', 'UPDATE', 'DELETE'):
+        conn.execute(f"""
+            CREATE TRIGGER trg_{table}_version_{operation.lower()}
+            AFTER {operation} ON {table}
+            BEGIN
+                UPDATE table_versions SET version = version + 1
+                WHERE table_name = '{table}';
+            END
+        """)
+
+
+# Column logged as change_log.row_id for each journaled table. Plans and
+# status rows are keyed by instrument and type, so they log the instrument.
+CHANGE_LOG_KEYS = {
+    'users': 'id',
+    'maintenance_types': 'id',
+    'instruments': 'id',
+    'instrument_maintenance_schedule': 'instrument_id',
+    'maintenance_records': 'id',
+    'maintenance_status': 'instrument_id',
+}
+
+# Entries kept in change_log; clients further behind reload in full
+CHANGE_LOG_RETENTION = 10000
+
+
+def _add_change_log(conn):
+    """Add change_log, an append-only journal of changed rows written by triggers"""
+    conn.execute("""
+        CREATE TABLE change_log (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT NOT NULL,
+            row_id INTEGER NOT NULL,
+            op TEXT NOT NULL CHECK (op IN ('I', 'U', 'D'))
+        )
+    """)
+    for table, key in CHANGE_LOG_KEYS.items():
+        for operation, op, ref in (('INSERT', 'I', 'NEW'), ('UPDATE', 'U', 'NEW'), ('DELETE', 'D', 'OLD')):
+            conn.execute(f"""
+                CREATE TRIGGER trg_{table}_change_log_{operation.lower()}
+                AFTER {operation} ON {table}
+                BEGIN
+                    INSERT INTO change_log (table_name, row_id, op)
+                    VALUES ('{table}', {ref}.{key}, '{op}');
+                END
+            """)
+    conn.execute(f"""
+        CREATE TRIGGER trg_change_log_prune
+        AFTER INSERT ON change_log
+        BEGIN
+            DELETE FROM change_log WHERE seq <= NEW.seq - {CHANGE_LOG_RETENTION};
+        END
+    """)
+
+
+def _add_pagination_indexes(conn):
+    """Index the sort keys of the paged listings"""
+    # Each index also holds the rowid, so it covers the whole
+    # (sort column, id) key and a page is a range scan from the last key
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_maintenance_records_date
+        ON maintenance_records (maintenance_date)
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_instruments_name
+        ON instruments (name)
+    """)
+
+
+# Columns of each table indexed for full-text search, by FTS5 table name.
+# '-' is part of a token in instrument fields so serial numbers such as
+# OLY-2023-001 stay one token and can be prefix-matched as typed.
+SEARCH_INDEXES = {
+    'instruments_fts': ('instruments', ('name', 'brand', 'model', 'serial_number', 'location'),
+                        "unicode61 tokenchars '-'"),
+    'maintenance_notes_fts': ('maintenance_records', ('notes',), 'unicode61'),
+}
+
+
+def _add_search_indexes(conn):
+    """Add FTS5 indexes over instrument fields and maintenance notes, kept in sync by triggers"""
+    for fts_table, (table, columns, tokenizer) in SEARCH_INDEXES.items():
+        column_list = ', '.join(columns)
+        new_values = ', '.join(f'NEW.{column}' for column in columns)
+        old_values = ', '.join(f'OLD.{column}' for column in columns)
+        # External content: the index stores no copy of the text. Prefixes
+        # of up to 6 characters, what is typed before a word is complete,
+        # get their own index so search-as-you-type skips merging doclists
+        conn.execute(f"""
+            CREATE VIRTUAL TABLE {fts_table} USING fts5(
+                {column_list},
+                content='{table}', content_rowid='id',
+                tokenize="{tokenizer}", prefix='2 3 4 5 6'
+            )
+        """)
+        conn.execute(f"INSERT INTO {fts_table} ({fts_table}) VALUES ('rebuild')")
+        conn.execute(f"""
+            CREATE TRIGGER trg_{fts_table}_insert AFTER INSERT ON {table}
+            BEGIN
+                INSERT INTO {fts_table} (rowid, {column_list}) VALUES (NEW.id, {new_values});
+            END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER trg_{fts_table}_delete AFTER DELETE ON {table}
+            BEGIN
+                INSERT INTO {fts_table} ({fts_table}, rowid, {column_list})
+                VALUES ('delete', OLD.id, {old_values});
+            END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER trg_{fts_table}_update AFTER UPDATE OF {column_list} ON {table}
+            BEGIN
+                INSERT INTO {fts_table} ({fts_table}, rowid, {column_list})
+                VALUES ('delete', OLD.id, {old_values});
+                INSERT INTO {fts_table} (rowid, {column_list}) VALUES (NEW.id, {new_values});
+            END
+        """)
+
+
+def _add_email_outbox(conn):
+    """Add the email_outbox queue of reminder emails and its delivery keys"""
+    # One row per message. Times are epoch seconds: next_attempt_at is
+    # when a pending row may be sent, claimed_until when a 'sending' row
+    # whose worker died may be claimed again
+    conn.execute("""
+        CREATE TABLE email_outbox (
+            id INTEGER PRIMARY KEY,
+            idempotency_key TEXT NOT NULL UNIQUE,
+            recipient TEXT NOT NULL,
+            subject TEXT,
+            content BLOB NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending'
+                CHECK (status IN ('pending', 'sending', 'sent', 'failed')),
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at REAL NOT NULL DEFAULT 0,
+            claimed_until REAL,
+            last_error TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            sent_at TIMESTAMP
+        )
+    """)
+    conn.execute("""
+        CREATE INDEX idx_email_outbox_status_next_attempt
+        ON email_outbox (status, next_attempt_at)
+    """)
+    # What each message reminds about, one key per (instrument, type, due
+    # date, recipient), so a reminder is queued once however often the
+    # schedule is evaluated
+    conn.execute("""
+        CREATE TABLE email_outbox_items (
+            item_key TEXT PRIMARY KEY,
+            outbox_id INTEGER NOT NULL,
+            FOREIGN KEY (outbox_id) REFERENCES email_outbox (id)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("""
+        CREATE INDEX idx_email_outbox_items_outbox
+        ON email_outbox_items (outbox_id)
+    """)
+
+
+def _add_maintenance_assignments(conn):
+    """Add maintenance_assignments, who does one occurrence of a plan and when"""
+    # Keyed by the occurrence's due date, so an assignment only applies
+    # while maintenance_status still expects that date; once the
+    # maintenance is done the next occurrence falls back to the
+    # instrument's responsible user
+    conn.execute("""
+        CREATE TABLE maintenance_assignments (
+            instrument_id INTEGER NOT NULL,
+            maintenance_type_id INTEGER NOT NULL,
+            due_date DATE NOT NULL,
+            scheduled_date DATE NOT NULL,
+            user_id INTEGER NOT NULL,
+            assigned_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (instrument_id, maintenance_type_id, due_date),
+            FOREIGN KEY (instrument_id) REFERENCES instruments (id),
+            FOREIGN KEY (maintenance_type_id) REFERENCES maintenance_types (id),
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("""
+        CREATE INDEX idx_maintenance_assignments_user_scheduled
+        ON maintenance_assignments (user_id, scheduled_date)
+    """)
+    conn.execute("""
+        CREATE TRIGGER trg_instruments_assignments_delete
+        AFTER DELETE ON instruments
+        BEGIN
+            DELETE FROM maintenance_assignments WHERE instrument_id = OLD.id;
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER trg_users_assignments_delete
+        AFTER DELETE ON users
+        BEGIN
+            DELETE FROM maintenance_assignments WHERE user_id = OLD.id;
+        END
+    """)
+    # Reassigning changes who is reminded without changing any status, so
+    # the reminder daemon watches this table's version
+    _add_version_triggers(conn, 'maintenance_assignments')
+
+
+# Ordered list of (version, description, function). Never edit or reorder a
+# released migration: add a new one with the next version number instead.
+MIGRATIONS = [
+    (1, 'Add maintenance_records indexes', _add_maintenance_record_indexes),
+    (2, 'Add instruments indexes', _add_instrument_indexes),
+    (3, 'Add maintenance_status summary table', _create_maintenance_status),
+    (4, 'Move maintenance plans into instrument_maintenance_schedule', _create_instrument_maintenance_schedule),
+    (5, 'Repair dates and add integer day-number columns', _add_day_number_columns),
+    (6, 'Add table_versions change counters', _add_table_versions),
+    (7, 'Add change_log journal', _add_change_log),
+    (8, 'Add pagination indexes', _add_pagination_indexes),
+    (9, 'Add full-text search indexes', _add_search_indexes),
+    (10, 'Add email outbox', _add_email_outbox),
+    (11, 'Add maintenance assignments', _add_maintenance_assignments),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn):
+    """Return the schema version stored in PRAGMA user_version"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def needs_migration(conn):
+    """Return True if the database is older than this application's schema"""
+    return get_schema_version(conn) < LATEST_VERSION
+
+
+def migrate(conn, target_version=None):
+    """
+    Bring the database schema up to date in place.
+
+    Each migration runs in its own transaction together with the
+    user_version bump, so an interrupted upgrade resumes where it stopped.
+
+    Args:
+        conn (sqlite3.Connection): Open database connection
+        target_version (int, optional): Version to stop at, defaults to the latest
+
+    Returns:
+        int: The schema version after migrating
+    """
+    if target_version is None:
+        target_version = LATEST_VERSION
+
+    current_version = get_schema_version(conn)
+    if current_version > LATEST_VERSION:
+        raise MigrationError(
+            f"Database schema version {current_version} is newer than this "
+            f"application supports ({LATEST_VERSION}). Please update the application."
+        )
+
+    pending = [m for m in MIGRATIONS if current_version < m[0] <= target_version]
+    if not pending:
+        return current_version
+
+    if conn.in_transaction:
+        conn.commit()
+
+    for version, description, apply in pending:
+        logger.info(f"Applying migration {version}: {description}")
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            # Another client may have applied it while we waited for the lock
+            if get_schema_version(conn) >= version:
+                conn.rollback()
+                current_version = get_schema_version(conn)
+                continue
+            apply(conn)
+            conn.execute(f"PRAGMA user_version = {int(version)}")
+            conn.commit()
+        except sqlite3.Error as e:
+            conn.rollback()
+            raise MigrationError(f"Migration {version} ({description}) failed: {str(e)}")
+        except BaseException:
+            # Never leave the connection, often a pooled one, inside the transaction
+            conn.rollback()
+            raise
+        current_version = version
+
+    # Refresh planner statistics for the new indexes
+    conn.execute("PRAGMA optimize")
+    return current_version
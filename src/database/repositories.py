@@ -1,20 +1,145 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable, Hashable, Iterable, Iterator
+from collections import OrderedDict
 from datetime import datetime
+import threading
+import weakref
 from .database_manager import DatabaseManager, DatabaseQueryError
+from .search import fts_query
 import bcrypt
 
+class RepositoryCache:
+    """
+    Size-bounded LRU cache of query results read from a few tables.
+
+    One cache per repository class is shared by every repository on the
+    same database, so dialogs that each create their own repository still
+    hit it. The cache empties itself when any of its tables changes:
+    repository write methods call invalidate(), and writes from other
+    connections or processes are seen through the database's ChangeWatcher,
+    whose check costs one PRAGMA while nothing was committed.
+
+    Cached values are shared between callers and must not be modified.
+    """
+
+    _caches = weakref.WeakKeyDictionary()
+    _caches_lock = threading.Lock()
+
+    @classmethod
+    def for_database(cls, db: DatabaseManager, name: str, tables: Iterable[str],
+                     max_size: int) -> 'RepositoryCache':
+        """Get the cache called name for db, creating it on first use"""
+        with cls._caches_lock:
+            caches = cls._caches.setdefault(db, {})
+            if name not in caches:
+                caches[name] = cls(db, tables, max_size)
+            return caches[name]
+
+    def __init__(self, db: DatabaseManager, tables: Iterable[str], max_size: int = 256):
+        # Weak, so the registry entry keyed by db goes away with it
+        self._db = weakref.ref(db)
+        self.tables = tuple(tables)
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._versions = None
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def db(self) -> Optional[DatabaseManager]:
+        """The cached database, None once it has been garbage collected"""
+        return self._db()
+
+    def get(self, key: Hashable, load: Callable[[], Any]) -> Any:
+        """
+        Get the value cached under key, calling load to fill it on a miss.
+
+        Nothing is cached while the calling thread is inside a transaction,
+        since its uncommitted reads could still be rolled back.
+        """
+        db = self.db
+        if db is None or db.in_transaction():
+            return load()
+
+        with self._lock:
+            # Read the versions before loading: a write that lands during
+            # the load changes them and empties the cache on the next get
+            versions = db.change_watcher().versions(self.tables)
+            if versions != self._versions:
+                self._entries.clear()
+                self._versions = versions
+
+            if key in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+            self.misses += 1
+            value = load()
+            self._entries[key] = value
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            return value
+
+    def invalidate(self) -> None:
+        """Drop every cached value"""
+        with self._lock:
+            self._entries.clear()
+            self._versions = None
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dictionary with the hit, miss and eviction counts and the
+            current and maximum number of entries
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._entries),
+                'max_size': self.max_size
+            }
+
 class BaseRepository:
+    # Tables the cached reads depend on; repositories without any are not cached
+    cached_tables = ()
+
+    # Maximum number of cached results
+    cache_size = 256
+
+    # Default number of rows per page for the *_page methods
+    PAGE_SIZE = 100
+
     def __init__(self, db_manager: DatabaseManager):
         self.db = db_manager
+        self.cache = None
+        if self.cached_tables:
+            self.cache = RepositoryCache.for_database(
+                db_manager, type(self).__name__, self.cached_tables, self.cache_size
+            )
+
+    def cache_stats(self) -> Optional[Dict[str, int]]:
+        """Get the statistics of this repository's cache, or None if it has none"""
+        return self.cache.stats() if self.cache else None
 
 class UserRepository(BaseRepository):
+    cached_tables = ('users',)
+
     def get_all_users(self) -> List[Dict[str, Any]]:
-        """Get all users"""
-        return self.db.execute_query("SELECT * FROM users ORDER BY username")
+        """Get all users (cached)"""
+        return self.cache.get('all', lambda: self.db.execute_query("SELECT * FROM users ORDER BY username"))
     
     def get_user_by_id(self, user_id: int) -> Optional[Dict[str, Any]]:
-        """Get user by ID"""
-        return self.db.get_single_row("SELECT * FROM users WHERE id = ?", (user_id,))
+        """Get user by ID (cached)"""
+        return self.cache.get(('id', user_id), lambda: self.db.get_single_row(
+            "SELECT * FROM users WHERE id = ?", (user_id,)
+        ))
     
     def get_user_by_username(self, username: str) -> Optional[Dict[str, Any]]:
         """Get user by username"""
@@ -22,7 +147,7 @@ class UserRepository(BaseRepository):
     
     def verify_password(self, username: str, password: str) -> Optional[Dict[str, Any]]:
         """Verify user password and return user data if valid"""
-        user = self.db.execute_query_one(
+        user = self.db.get_single_row(
             "SELECT id, password, is_admin FROM users WHERE username = ?",
             (username,)
         )
@@ -42,7 +167,9 @@ class UserRepository(BaseRepository):
             INSERT INTO users (username, email, password, is_admin)
             VALUES (?, ?, ?, ?)
         """
-        return self.db.execute_update(query, (username, email, hashed_password, is_admin))
+        user_id = self.db.execute_insert(query, (username, email, hashed_password, is_admin))
+        self.cache.invalidate()
+        return user_id
     
     def update_user(self, user_id: int, username: str, email: str,
                    password: Optional[str], is_admin: bool) -> int:
@@ -62,11 +189,15 @@ class UserRepository(BaseRepository):
                 WHERE id = ?
             """
             params = (username, email, is_admin, user_id)
-        return self.db.execute_update(query, params)
+        count = self.db.execute_update(query, params)
+        self.cache.invalidate()
+        return count
     
     def delete_user(self, user_id: int) -> int:
         """Delete a user"""
-        return self.db.execute_update("DELETE FROM users WHERE id = ?", (user_id,))
+        count = self.db.execute_update("DELETE FROM users WHERE id = ?", (user_id,))
+        self.cache.invalidate()
+        return count
     
     def check_username_exists(self, username: str, exclude_user_id: Optional[int] = None) -> bool:
         """Check if username exists"""
@@ -89,63 +220,149 @@ class UserRepository(BaseRepository):
         return bool(self.db.get_scalar(query, params))
 
 class InstrumentRepository(BaseRepository):
+    # Only the per-instrument lookups are cached
+    cached_tables = ('instruments', 'instrument_maintenance_schedule', 'maintenance_types')
+
     def get_all_instruments(self) -> List[Dict[str, Any]]:
         """Get all instruments"""
         return self.db.execute_query("SELECT * FROM instruments ORDER BY name")
     
+    def get_instruments_page(self, after: Optional[tuple] = None,
+                             limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Get one page of instruments ordered by name.
+
+        Keyset pagination: pass (name, id) of the last row of the previous
+        page as after, so every page costs the same however deep it is.
+
+        Args:
+            after: Key of the last row already shown, None for the first page
+            limit: Rows per page, defaults to PAGE_SIZE
+        """
+        where = "WHERE (name, id) > (?, ?)" if after else ""
+        return self.db.execute_query(f"""
+            SELECT * FROM instruments
+            {where}
+            ORDER BY name, id
+            LIMIT ?
+        """, (*(after or ()), limit or self.PAGE_SIZE))
+    
+    def search_instruments(self, text: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Find instruments by name, brand, model, serial number or location.
+
+        Every word of text must match the start of a word in one of those
+        fields. Best matches come first.
+
+        Args:
+            text: Search box text
+            limit: Maximum number of results, defaults to PAGE_SIZE
+        """
+        query = fts_query(text)
+        if query is None:
+            return []
+        return self.db.execute_query("""
+            SELECT i.*
+            FROM instruments_fts
+            JOIN instruments i ON i.id = instruments_fts.rowid
+            WHERE instruments_fts MATCH ?
+            ORDER BY instruments_fts.rank
+            LIMIT ?
+        """, (query, limit or self.PAGE_SIZE))
+    
     def get_instrument_by_id(self, instrument_id: int) -> Optional[Dict[str, Any]]:
-        """Get instrument by ID"""
-        return self.db.get_single_row("SELECT * FROM instruments WHERE id = ?", (instrument_id,))
+        """Get instrument by ID (cached)"""
+        return self.cache.get(('id', instrument_id), lambda: self.db.get_single_row(
+            "SELECT * FROM instruments WHERE id = ?", (instrument_id,)
+        ))
     
     def create_instrument(self, name: str, model: str, serial_number: str, 
                          location: str, status: str, brand: str, 
                          responsible_user_id: Optional[int], date_start_operating: datetime,
-                         maintenance_1: Optional[int], period_1: Optional[int],
-                         maintenance_2: Optional[int], period_2: Optional[int],
-                         maintenance_3: Optional[int], period_3: Optional[int],
-                         notes: Optional[str]) -> int:
-        """Create a new instrument"""
+                         plans: Optional[List[Dict[str, Any]]] = None) -> int:
+        """Create a new instrument with its maintenance plans"""
         query = """
             INSERT INTO instruments (
                 name, model, serial_number, location, status, brand,
-                responsible_user_id, date_start_operating,
-                maintenance_1, period_1, maintenance_2, period_2,
-                maintenance_3, period_3, notes
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                responsible_user_id, date_start_operating
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
         """
         params = (name, model, serial_number, location, status, brand,
-                 responsible_user_id, date_start_operating,
-                 maintenance_1, period_1, maintenance_2, period_2,
-                 maintenance_3, period_3, notes)
-        return self.db.execute_update(query, params)
+                 responsible_user_id, date_start_operating)
+        with self.db.transaction():
+            instrument_id = self.db.execute_insert(query, params)
+            self.set_maintenance_plans(instrument_id, plans or [])
+        self.cache.invalidate()
+        return instrument_id
     
     def update_instrument(self, instrument_id: int, name: str, model: str, 
                          serial_number: str, location: str, status: str, 
                          brand: str, responsible_user_id: Optional[int],
                          date_start_operating: datetime,
-                         maintenance_1: Optional[int], period_1: Optional[int],
-                         maintenance_2: Optional[int], period_2: Optional[int],
-                         maintenance_3: Optional[int], period_3: Optional[int],
-                         notes: Optional[str]) -> int:
-        """Update instrument details"""
+                         plans: Optional[List[Dict[str, Any]]] = None) -> int:
+        """Update instrument details, and its maintenance plans if given"""
         query = """
             UPDATE instruments SET
                 name = ?, model = ?, serial_number = ?, location = ?,
                 status = ?, brand = ?, responsible_user_id = ?,
-                date_start_operating = ?, maintenance_1 = ?, period_1 = ?,
-                maintenance_2 = ?, period_2 = ?, maintenance_3 = ?,
-                period_3 = ?, notes = ?
+                date_start_operating = ?
             WHERE id = ?
         """
         params = (name, model, serial_number, location, status, brand,
-                 responsible_user_id, date_start_operating,
-                 maintenance_1, period_1, maintenance_2, period_2,
-                 maintenance_3, period_3, notes, instrument_id)
-        return self.db.execute_update(query, params)
+                 responsible_user_id, date_start_operating, instrument_id)
+        with self.db.transaction():
+            count = self.db.execute_update(query, params)
+            if plans is not None:
+                self.set_maintenance_plans(instrument_id, plans)
+        self.cache.invalidate()
+        return count
+    
+    def get_maintenance_plans(self, instrument_id: int) -> List[Dict[str, Any]]:
+        """Get an instrument's maintenance plans in display order (cached)"""
+        return self.cache.get(('plans', instrument_id), lambda: self.db.execute_query("""
+            SELECT s.maintenance_type_id, mt.name as maintenance_type_name,
+                   s.period_weeks, s.position
+            FROM instrument_maintenance_schedule s
+            JOIN maintenance_types mt ON s.maintenance_type_id = mt.id
+            WHERE s.instrument_id = ?
+            ORDER BY s.position
+        """, (instrument_id,)))
+    
+    def set_maintenance_plans(self, instrument_id: int, plans: List[Dict[str, Any]]) -> None:
+        """
+        Replace an instrument's maintenance plans.
+
+        Args:
+            instrument_id: Instrument to update
+            plans: Dictionaries with maintenance_type_id and period_weeks, in display order
+        """
+        type_ids = [plan['maintenance_type_id'] for plan in plans]
+        placeholders = ', '.join('?' * len(type_ids))
+        with self.db.transaction() as conn:
+            # Unchanged plans are left alone so their maintenance_status rows
+            # are not recomputed
+            conn.execute(f"""
+                DELETE FROM instrument_maintenance_schedule
+                WHERE instrument_id = ? AND maintenance_type_id NOT IN ({placeholders})
+            """, (instrument_id, *type_ids))
+            conn.executemany("""
+                INSERT INTO instrument_maintenance_schedule (
+                    instrument_id, maintenance_type_id, period_weeks, position
+                ) VALUES (?, ?, ?, ?)
+                ON CONFLICT (instrument_id, maintenance_type_id) DO UPDATE SET
+                    period_weeks = excluded.period_weeks,
+                    position = excluded.position
+                WHERE period_weeks IS NOT excluded.period_weeks
+                    OR position IS NOT excluded.position
+            """, [(instrument_id, plan['maintenance_type_id'], plan['period_weeks'], position)
+                  for position, plan in enumerate(plans, start=1)])
+        self.cache.invalidate()
     
     def delete_instrument(self, instrument_id: int) -> int:
         """Delete an instrument"""
-        return self.db.execute_update("DELETE FROM instruments WHERE id = ?", (instrument_id,))
+        count = self.db.execute_update("DELETE FROM instruments WHERE id = ?", (instrument_id,))
+        self.cache.invalidate()
+        return count
     
     def get_instruments_by_user(self, user_id: int) -> List[Dict[str, Any]]:
         """Get instruments assigned to a user"""
@@ -155,17 +372,92 @@ class InstrumentRepository(BaseRepository):
         )
 
 class MaintenanceRepository(BaseRepository):
+    ALL_RECORDS_QUERY = """
+        SELECT mr.*, i.name as instrument_name, mt.name as maintenance_type_name,
+               u.username as performed_by_username
+        FROM maintenance_records mr
+        LEFT JOIN instruments i ON mr.instrument_id = i.id
+        LEFT JOIN maintenance_types mt ON mr.maintenance_type_id = mt.id
+        LEFT JOIN users u ON mr.performed_by = u.id
+        ORDER BY mr.maintenance_date DESC
+    """
+
+    # Matching records ranked by search_notes; ranking costs one score per
+    # match, so it is bounded to the most recently entered ones
+    SEARCH_CANDIDATES = 1000
+
     def get_all_maintenance_records(self) -> List[Dict[str, Any]]:
         """Get all maintenance records"""
-        return self.db.execute_query("""
+        return self.db.execute_query(self.ALL_RECORDS_QUERY)
+
+    def iter_maintenance_records(self, batch_size: Optional[int] = None) -> Iterator[tuple]:
+        """
+        Stream all maintenance records, in the order of get_all_maintenance_records.
+
+        Yields namedtuples with the same fields as its dictionaries, fetched
+        in batches, so the whole history never has to fit in memory. See
+        DatabaseManager.iter_query.
+        """
+        return self.db.iter_query(self.ALL_RECORDS_QUERY, batch_size=batch_size, records=True)
+    
+    def get_maintenance_records_page(self, after: Optional[tuple] = None,
+                                     limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Get one page of maintenance records, newest first.
+
+        Keyset pagination: pass (maintenance_date, id) of the last row of
+        the previous page as after, so every page costs the same however
+        deep it is.
+
+        Args:
+            after: Key of the last row already shown, None for the first page
+            limit: Rows per page, defaults to PAGE_SIZE
+        """
+        where = "WHERE (mr.maintenance_date, mr.id) < (?, ?)" if after else ""
+        return self.db.execute_query(f"""
             SELECT mr.*, i.name as instrument_name, mt.name as maintenance_type_name,
                    u.username as performed_by_username
             FROM maintenance_records mr
             LEFT JOIN instruments i ON mr.instrument_id = i.id
             LEFT JOIN maintenance_types mt ON mr.maintenance_type_id = mt.id
             LEFT JOIN users u ON mr.performed_by = u.id
-            ORDER BY mr.maintenance_date DESC
-        """)
+            {where}
+            ORDER BY mr.maintenance_date DESC, mr.id DESC
+            LIMIT ?
+        """, (*(after or ()), limit or self.PAGE_SIZE))
+    
+    def search_notes(self, text: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Find maintenance records by their notes.
+
+        Every word of text must match the start of a word in the notes.
+        The newest SEARCH_CANDIDATES matching records are ranked and the best
+        matches come first, so a common word costs no more than a rare one.
+
+        Args:
+            text: Search box text
+            limit: Maximum number of results, defaults to PAGE_SIZE
+        """
+        query = fts_query(text)
+        if query is None:
+            return []
+        return self.db.execute_query("""
+            SELECT mr.*, i.name as instrument_name, mt.name as maintenance_type_name,
+                   u.username as performed_by_username
+            FROM (
+                SELECT rowid AS id, rank
+                FROM maintenance_notes_fts
+                WHERE maintenance_notes_fts MATCH ?
+                ORDER BY rowid DESC
+                LIMIT ?
+            ) found
+            JOIN maintenance_records mr ON mr.id = found.id
+            LEFT JOIN instruments i ON mr.instrument_id = i.id
+            LEFT JOIN maintenance_types mt ON mr.maintenance_type_id = mt.id
+            LEFT JOIN users u ON mr.performed_by = u.id
+            ORDER BY found.rank, mr.id DESC
+            LIMIT ?
+        """, (query, self.SEARCH_CANDIDATES, limit or self.PAGE_SIZE))
     
     def get_maintenance_by_id(self, maintenance_id: int) -> Optional[Dict[str, Any]]:
         """Get maintenance record by ID"""
@@ -191,7 +483,7 @@ class MaintenanceRepository(BaseRepository):
         """
         params = (instrument_id, maintenance_type_id, maintenance_date,
                  performed_by, notes)
-        return self.db.execute_update(query, params)
+        return self.db.execute_insert(query, params)
     
     def update_maintenance_record(self, maintenance_id: int, instrument_id: int,
                                 maintenance_type_id: int, maintenance_date: datetime,
@@ -226,6 +518,26 @@ class MaintenanceRepository(BaseRepository):
             ORDER BY mr.maintenance_date DESC
         """, (instrument_id,))
     
+    def get_maintenance_page_by_instrument(self, instrument_id: int, after: Optional[tuple] = None,
+                                           limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Get one page of an instrument's maintenance records, newest first.
+
+        Keyset pagination on (maintenance_date, id), like
+        get_maintenance_records_page.
+        """
+        where = "AND (mr.maintenance_date, mr.id) < (?, ?)" if after else ""
+        return self.db.execute_query(f"""
+            SELECT mr.*, mt.name as maintenance_type_name,
+                   u.username as performed_by_username
+            FROM maintenance_records mr
+            LEFT JOIN maintenance_types mt ON mr.maintenance_type_id = mt.id
+            LEFT JOIN users u ON mr.performed_by = u.id
+            WHERE mr.instrument_id = ? {where}
+            ORDER BY mr.maintenance_date DESC, mr.id DESC
+            LIMIT ?
+        """, (instrument_id, *(after or ()), limit or self.PAGE_SIZE))
+    
     def get_maintenance_by_user(self, user_id: int) -> List[Dict[str, Any]]:
         """Get maintenance records performed by a user"""
         return self.db.execute_query("""
@@ -238,34 +550,44 @@ class MaintenanceRepository(BaseRepository):
         """, (user_id,))
 
 class MaintenanceTypeRepository(BaseRepository):
+    cached_tables = ('maintenance_types',)
+
     def get_all_maintenance_types(self) -> List[Dict[str, Any]]:
-        """Get all maintenance types"""
-        return self.db.execute_query("SELECT * FROM maintenance_types ORDER BY name")
+        """Get all maintenance types (cached)"""
+        return self.cache.get('all', lambda: self.db.execute_query(
+            "SELECT * FROM maintenance_types ORDER BY name"
+        ))
     
     def get_maintenance_type_by_id(self, type_id: int) -> Optional[Dict[str, Any]]:
-        """Get maintenance type by ID"""
-        return self.db.get_single_row(
+        """Get maintenance type by ID (cached)"""
+        return self.cache.get(('id', type_id), lambda: self.db.get_single_row(
             "SELECT * FROM maintenance_types WHERE id = ?",
             (type_id,)
-        )
+        ))
     
     def create_maintenance_type(self, name: str) -> int:
         """Create a new maintenance type"""
-        return self.db.execute_update(
+        type_id = self.db.execute_insert(
             "INSERT INTO maintenance_types (name) VALUES (?)",
             (name,)
         )
+        self.cache.invalidate()
+        return type_id
     
     def update_maintenance_type(self, type_id: int, name: str) -> int:
         """Update maintenance type"""
-        return self.db.execute_update(
+        count = self.db.execute_update(
             "UPDATE maintenance_types SET name = ? WHERE id = ?",
             (name, type_id)
         )
+        self.cache.invalidate()
+        return count
     
     def delete_maintenance_type(self, type_id: int) -> int:
         """Delete a maintenance type"""
-        return self.db.execute_update(
+        count = self.db.execute_update(
             "DELETE FROM maintenance_types WHERE id = ?",
             (type_id,)
-        ) 
\ No newline at end of file
+        )
+        self.cache.invalidate()
+        return count 
\ No newline at end of file
@@ -0,0 +1,21 @@
+from typing import Optional
+
+def fts_query(text: str) -> Optional[str]:
+    """
+    Turn text typed in a search box into an FTS5 query.
+
+    Every word must match, and the last token of each word may be the start
+    of a longer one, so results narrow as the user types. Words are quoted,
+    so FTS5 operators and punctuation in the text are searched for literally
+    instead of raising a syntax error.
+
+    Args:
+        text: Search box text
+
+    Returns:
+        The MATCH expression, or None if text has no words
+    """
+    words = text.split()
+    if not words:
+        return None
+    return ' '.join('"' + word.replace('"', '""') + '"*' for word in words)
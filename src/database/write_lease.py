@@ -0,0 +1,150 @@
+import os
+import json
+import socket
+import threading
+import time
+from datetime import datetime
+
+if os.name == 'nt':
+    import msvcrt
+else:
+    import fcntl
+
+
+class WriteLeaseTimeout(Exception):
+    """Raised when the write lease could not be acquired in time"""
+    pass
+
+
+class WriteLease:
+    """
+    Cross-process single-writer lease built on an OS advisory lock.
+
+    The lock is only held for the duration of a write transaction, so any
+    number of readers can use the database at the same time. The operating
+    system drops the lock when the holding process exits, so a crashed
+    workstation can never leave a stale lease behind.
+
+    POSIX record locks belong to the whole process and are released when any
+    descriptor on the file is closed, so there is exactly one WriteLease per
+    lock file per process (see for_path). Threads are serialized with an
+    RLock on top of the OS lock, which also makes the lease re-entrant.
+    """
+
+    _leases = {}
+    _leases_lock = threading.Lock()
+
+    def __init__(self, lock_path, timeout=30.0, poll_interval=0.05):
+        self.lock_path = lock_path
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self._thread_lock = threading.RLock()
+        self._fd = None
+        self._depth = 0
+
+    @classmethod
+    def for_path(cls, lock_path, **kwargs):
+        """Return the process-wide lease for the given lock file"""
+        key = os.path.abspath(lock_path)
+        with cls._leases_lock:
+            lease = cls._leases.get(key)
+            if lease is None:
+                lease = cls(key, **kwargs)
+                cls._leases[key] = lease
+            return lease
+
+    def _try_lock(self):
+        """Try to take the OS lock without blocking"""
+        try:
+            if os.name == 'nt':
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_NBLCK, 1)
+            else:
+                fcntl.lockf(self._fd, fcntl.LOCK_EX | fcntl.LOCK_NB, 1, 0)
+            return True
+        except OSError:
+            return False
+
+    def _unlock(self):
+        if os.name == 'nt':
+            os.lseek(self._fd, 0, os.SEEK_SET)
+            msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+        else:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, 0)
+
+    def _write_holder_info(self):
+        """Record who holds the lease, for the timeout error message"""
+        holder = json.dumps({
+            'username': os.getenv('USERNAME') or os.getenv('USER') or 'Unknown',
+            'hostname': socket.gethostname(),
+            'pid': os.getpid(),
+            'timestamp': datetime.now().isoformat()
+        }).encode('utf-8')
+        # Byte 0 is the lock byte, the holder info starts after it
+        os.lseek(self._fd, 1, os.SEEK_SET)
+        os.write(self._fd, holder)
+        os.ftruncate(self._fd, 1 + len(holder))
+
+    def _read_holder_info(self):
+        try:
+            with open(self.lock_path, 'rb') as f:
+                f.seek(1)
+                return json.loads(f.read().decode('utf-8'))
+        except Exception:
+            return {}
+
+    def acquire(self, timeout=None):
+        """
+        Acquire the lease, waiting up to timeout seconds.
+
+        Raises:
+            WriteLeaseTimeout: If another process keeps the lease for too long
+        """
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+
+        if not self._thread_lock.acquire(timeout=timeout):
+            raise WriteLeaseTimeout("Timed out waiting for another thread's write transaction")
+
+        if self._depth > 0:
+            self._depth += 1
+            return
+
+        try:
+            if self._fd is None:
+                self._fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o666)
+            while not self._try_lock():
+                if time.monotonic() >= deadline:
+                    holder = self._read_holder_info()
+                    raise WriteLeaseTimeout(
+                        f"The database is being modified by {holder.get('username', 'Unknown')} "
+                        f"on {holder.get('hostname', 'Unknown')}.\n\n"
+                        "Please try again in a moment."
+                    )
+                time.sleep(self.poll_interval)
+            self._depth = 1
+            try:
+                self._write_holder_info()
+            except OSError:
+                pass
+        except BaseException:
+            self._thread_lock.release()
+            raise
+
+    def release(self):
+        """Release the lease"""
+        if self._depth == 0:
+            return
+        self._depth -= 1
+        try:
+            if self._depth == 0:
+                self._unlock()
+        finally:
+            self._thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
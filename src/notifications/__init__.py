@@ -0,0 +1,23 @@
+from .config import EmailConfig, EmailConfigError
+from .mailer import SMTPMailer
+from .smtp_sink import SMTPSink
+from .outbox import EmailOutbox, OutboxResult, item_key
+from .reminders import (Digest, ReminderResult, ReminderService, ReminderTrigger, collect_digests, build_message,
+                        digest_keys)
+
+__all__ = [
+    'EmailConfig',
+    'EmailConfigError',
+    'SMTPMailer',
+    'SMTPSink',
+    'EmailOutbox',
+    'OutboxResult',
+    'item_key',
+    'Digest',
+    'ReminderResult',
+    'ReminderService',
+    'ReminderTrigger',
+    'collect_digests',
+    'build_message',
+    'digest_keys'
+]
@@ -0,0 +1,90 @@
+import os
+from typing import Dict, Optional
+from src.utils.path_utils import get_executable_directory
+
+# Settings file next to the executable; see email_reminders.env
+CONFIG_FILENAME = 'email_reminders.env'
+
+class EmailConfigError(Exception):
+    """Raised when the email settings are missing or invalid"""
+    pass
+
+def load_env_file(file_path: str) -> Dict[str, str]:
+    """Read KEY=VALUE lines, skipping blanks and # comments"""
+    config = {}
+    if os.path.exists(file_path):
+        with open(file_path, 'r') as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith('#') and '=' in line:
+                    key, value = line.split('=', 1)
+                    config[key.strip()] = value.strip()
+    return config
+
+class EmailConfig:
+    """
+    SMTP settings for outgoing email.
+
+    Read from email_reminders.env; environment variables of the same name
+    take precedence, so deployments can keep the password out of the file.
+    """
+
+    def __init__(self, server: str, port: int = 587, username: Optional[str] = None,
+                 password: Optional[str] = None, sender: Optional[str] = None,
+                 sender_name: Optional[str] = None, reply_to: Optional[str] = None,
+                 use_tls: bool = True, timeout: float = 30):
+        """
+        Args:
+            server: SMTP host name
+            port: SMTP port; 465 connects with SSL, others use STARTTLS
+                when use_tls is set and the server offers it
+            username, password: Login, skipped when either is empty
+            sender: From address, defaults to username
+            sender_name: Display name of the From address
+            reply_to: Reply-To address
+            use_tls: Encrypt the connection
+            timeout: Socket timeout in seconds
+        """
+        self.server = server
+        self.port = port
+        self.username = username
+        self.password = password
+        self.sender = sender or username
+        self.sender_name = sender_name
+        self.reply_to = reply_to
+        self.use_tls = use_tls
+        self.timeout = timeout
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> 'EmailConfig':
+        """
+        Load the settings from a file and the environment.
+
+        Args:
+            path: Settings file, defaults to email_reminders.env next to
+                the executable
+
+        Raises:
+            EmailConfigError: If SMTP_SERVER is missing or a number is invalid
+        """
+        values = load_env_file(path or os.path.join(get_executable_directory(), CONFIG_FILENAME))
+        values.update({key: value for key, value in os.environ.items()
+                       if key.startswith(('SMTP_', 'SENDER_', 'REPLY_TO'))})
+        if not values.get('SMTP_SERVER'):
+            raise EmailConfigError(f"SMTP_SERVER is not set in {path or CONFIG_FILENAME} or the environment")
+        try:
+            port = int(values.get('SMTP_PORT') or 587)
+            timeout = float(values.get('SMTP_TIMEOUT') or 30)
+        except ValueError as e:
+            raise EmailConfigError(f"Invalid SMTP setting: {e}")
+        return cls(
+            server=values['SMTP_SERVER'],
+            port=port,
+            username=values.get('SMTP_USERNAME') or None,
+            password=values.get('SMTP_PASSWORD') or None,
+            sender=values.get('SMTP_FROM') or None,
+            sender_name=values.get('SENDER_NAME') or None,
+            reply_to=values.get('REPLY_TO') or None,
+            use_tls=values.get('SMTP_TLS', '1').lower() not in ('0', 'false', 'no'),
+            timeout=timeout
+        )
@@ -0,0 +1,239 @@
+import re
+import ssl
+import logging
+import smtplib
+from email.message import EmailMessage
+from email.parser import BytesHeaderParser
+from email.policy import SMTP as SMTP_POLICY, compat32
+from email.utils import getaddresses, parseaddr
+from typing import List, Optional, Sequence, Tuple, Union
+from .config import EmailConfig
+
+CRLF = b'\r\n'
+
+class SMTPMailer:
+    """
+    Sends many messages over one reused SMTP connection.
+
+    The connection is opened on first use and kept for the following
+    messages, so the TCP, TLS and login handshakes happen once instead of
+    once per message. When the server offers PIPELINING (RFC 2920) the
+    envelope commands of a message are written together with the content
+    of the previous one, so each message costs a single round trip instead
+    of four.
+
+    If the connection drops, the messages the server has not answered are
+    sent again on a new connection. A message whose final answer was lost
+    may therefore arrive twice.
+    """
+
+    # Messages sent before the connection is reopened; servers often cap
+    # the messages per session
+    MESSAGES_PER_CONNECTION = 1000
+
+    # New connections tried in a row before the remaining messages fail
+    RECONNECT_ATTEMPTS = 2
+
+    def __init__(self, config: EmailConfig, messages_per_connection: Optional[int] = None,
+                 pipelining: bool = True):
+        """
+        Args:
+            config: SMTP settings
+            messages_per_connection: Defaults to MESSAGES_PER_CONNECTION
+            pipelining: Pipeline commands when the server offers it
+        """
+        self.config = config
+        self.messages_per_connection = messages_per_connection or self.MESSAGES_PER_CONNECTION
+        self.pipelining = pipelining
+        # Connections opened so far
+        self.connections = 0
+        self._conn = None
+        self._sent_on_connection = 0
+        self.logger = logging.getLogger(__name__)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def connect(self) -> None:
+        """Open and authenticate the connection"""
+        config = self.config
+        if config.use_tls and config.port == 465:
+            conn = smtplib.SMTP_SSL(config.server, config.port, timeout=config.timeout,
+                                    context=ssl.create_default_context())
+        else:
+            conn = smtplib.SMTP(config.server, config.port, timeout=config.timeout)
+        try:
+            conn.ehlo()
+            if config.use_tls and config.port != 465:
+                conn.starttls(context=ssl.create_default_context())
+                conn.ehlo()
+            if config.username and config.password:
+                conn.login(config.username, config.password)
+        except BaseException:
+            conn.close()
+            raise
+        self._conn = conn
+        self._sent_on_connection = 0
+        self.connections += 1
+
+    def close(self) -> None:
+        """Say goodbye to the server and close the connection"""
+        if self._conn is None:
+            return
+        try:
+            self._conn.quit()
+        except (smtplib.SMTPException, OSError):
+            self._conn.close()
+        self._conn = None
+
+    def send_messages(self, messages: Sequence[Union[EmailMessage, bytes]]) -> List[Optional[str]]:
+        """
+        Send messages over the reused connection.
+
+        Args:
+            messages: Messages with From and To (and optionally Cc) headers,
+                or such messages already serialized with the SMTP policy
+
+        Returns:
+            list: One entry per message, None if the server accepted it,
+                otherwise the error
+        """
+        errors = [None] * len(messages)
+        todo = list(range(len(messages)))
+        attempts = 0
+        while todo:
+            answered = []
+            try:
+                if self._conn is None:
+                    self.connect()
+                elif self._sent_on_connection >= self.messages_per_connection:
+                    self.close()
+                    continue
+                batch = todo[:self.messages_per_connection - self._sent_on_connection]
+                self._send_batch(messages, batch, errors, answered)
+            except (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, OSError) as e:
+                self._drop()
+                attempts += 1
+                if attempts > self.RECONNECT_ATTEMPTS:
+                    self.logger.error(f"Giving up on {len(todo) - len(answered)} messages: {e}")
+                    answered_set = set(answered)
+                    for index in todo:
+                        if index not in answered_set:
+                            errors[index] = f"Connection failed: {e}"
+                    return errors
+                self.logger.warning(f"SMTP connection lost, reconnecting: {e}")
+            else:
+                attempts = 0
+            answered_set = set(answered)
+            todo = [index for index in todo if index not in answered_set]
+        return errors
+
+    def _drop(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _send_batch(self, messages, indexes, errors, answered) -> None:
+        conn = self._conn
+        if not (self.pipelining and conn.has_extn('pipelining')):
+            for index in indexes:
+                errors[index] = self._send_one(conn, messages[index])
+                answered.append(index)
+                self._sent_on_connection += 1
+            return
+
+        # Content of the message whose DATA was accepted, sent together
+        # with the next message's envelope
+        pending = None
+        for index in indexes:
+            try:
+                sender, recipients, content = self._envelope(messages[index])
+            except ValueError as e:
+                errors[index] = str(e)
+                answered.append(index)
+                continue
+            commands = [b'MAIL FROM:<' + sender + b'>']
+            commands += [b'RCPT TO:<' + recipient + b'>' for recipient in recipients]
+            commands.append(b'DATA')
+            out = b''.join(command + CRLF for command in commands)
+            if pending is not None:
+                out = pending[1] + out
+            conn.send(out)
+            if pending is not None:
+                self._finish(conn, pending[0], errors, answered)
+                pending = None
+
+            replies = [self._reply(conn) for command in commands]
+            if replies[-1][0] == 354:
+                refused = [reply for reply in replies[1:-1] if reply[0] >= 400]
+                if refused:
+                    self.logger.warning(f"Some recipients refused: {refused}")
+                pending = (index, content)
+            else:
+                code, message = next((reply for reply in replies if reply[0] >= 400), replies[-1])
+                errors[index] = f"{code} {message.decode(errors='replace')}"
+                answered.append(index)
+                if replies[0][0] == 250:
+                    conn.rset()
+            self._sent_on_connection += 1
+
+        if pending is not None:
+            conn.send(pending[1])
+            self._finish(conn, pending[0], errors, answered)
+
+    def _finish(self, conn, index, errors, answered) -> None:
+        """Read the answer to a message's content"""
+        code, message = self._reply(conn)
+        errors[index] = None if code == 250 else f"{code} {message.decode(errors='replace')}"
+        answered.append(index)
+
+    @staticmethod
+    def _reply(conn) -> Tuple[int, bytes]:
+        code, message = conn.getreply()
+        if code == 421:
+            # Service closing: the server hangs up after this
+            raise smtplib.SMTPServerDisconnected(message.decode(errors='replace'))
+        return code, message
+
+    def _send_one(self, conn, message: Union[EmailMessage, bytes]) -> Optional[str]:
+        try:
+            if isinstance(message, bytes):
+                headers = BytesHeaderParser(policy=compat32).parsebytes(message)
+                conn.sendmail(self.config.sender or parseaddr(headers['From'])[1],
+                              [address for name, address in _recipients(headers)], message)
+            else:
+                conn.send_message(message, from_addr=self.config.sender)
+        except smtplib.SMTPRecipientsRefused as e:
+            return f"Recipients refused: {', '.join(e.recipients)}"
+        except smtplib.SMTPResponseException as e:
+            if e.smtp_code == 421:
+                raise smtplib.SMTPServerDisconnected(str(e))
+            return f"{e.smtp_code} {e.smtp_error.decode(errors='replace')}"
+        return None
+
+    def _envelope(self, message: Union[EmailMessage, bytes]) -> Tuple[bytes, List[bytes], bytes]:
+        """Return the sender, recipients and dot-stuffed content of a message"""
+        if isinstance(message, bytes):
+            # Only the header block is parsed, into plain strings
+            content = message
+            message = BytesHeaderParser(policy=compat32).parsebytes(content)
+        else:
+            content = message.as_bytes(policy=SMTP_POLICY)
+        sender = self.config.sender or parseaddr(message['From'])[1]
+        recipients = [address for name, address in _recipients(message) if address]
+        if not recipients:
+            raise ValueError("Message has no recipients")
+        try:
+            sender = sender.encode('ascii')
+            recipients = [recipient.encode('ascii') for recipient in recipients]
+        except UnicodeEncodeError:
+            raise ValueError("Addresses must be ASCII")
+        if not content.endswith(CRLF):
+            content += CRLF
+        return sender, recipients, re.sub(br'(?m)^\.', b'..', content) + b'.' + CRLF
+
+def _recipients(message) -> List[Tuple[str, str]]:
+    return getaddresses(message.get_all('To', []) + message.get_all('Cc', []))
@@ -0,0 +1,228 @@
+import re
+import json
+import time
+import email.policy
+import hashlib
+import logging
+import smtplib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from email.message import EmailMessage
+from typing import Dict, Iterable, List, Optional, Set
+from .config import EmailConfig
+from .mailer import SMTPMailer
+
+# Claim the next due messages: pending ones whose retry time has come and
+# 'sending' ones whose worker did not finish before its lease ran out
+CLAIM_QUERY = """
+    UPDATE email_outbox
+    SET status = 'sending', attempts = attempts + 1, claimed_until = ?
+    WHERE id IN (
+        SELECT id FROM email_outbox
+        WHERE (status = 'pending' AND next_attempt_at <= ?)
+           OR (status = 'sending' AND claimed_until <= ?)
+        ORDER BY id
+        LIMIT ?
+    )
+    RETURNING id, recipient, content, attempts
+"""
+
+class OutboxResult:
+    """Outcome of one drain of the outbox"""
+
+    def __init__(self, sent: int, retrying: int, failed: Dict[str, str], seconds: float):
+        self.sent = sent
+        # Messages put back for a later attempt
+        self.retrying = retrying
+        # Address to error of each message given up on
+        self.failed = failed
+        self.seconds = seconds
+
+    def __str__(self) -> str:
+        summary = f"Sent {self.sent} queued emails in {self.seconds:.1f} s"
+        if self.retrying:
+            summary += f", {self.retrying} to retry"
+        if self.failed:
+            summary += f", {len(self.failed)} failed"
+        return summary
+
+def item_key(instrument_id: int, maintenance_type_id: int, next_due: str, recipient: str,
+             status: str) -> str:
+    """Delivery key of one reminder about one due maintenance"""
+    return f"{instrument_id}:{maintenance_type_id}:{next_due}:{recipient.lower()}:{status}"
+
+def is_permanent(error: str) -> bool:
+    """True if retrying cannot help: the server refused with a 5xx code or the message is invalid"""
+    return not (error.startswith('Connection failed') or re.match(r'4\d\d ', error))
+
+class EmailOutbox:
+    """
+    A transactional queue of outgoing email in the email_outbox table.
+
+    Messages are enqueued inside the caller's transaction, together with
+    the keys of what they are about, so an enqueued reminder is never
+    enqueued again and a crash never loses one. drain() sends the queue
+    with a pool of worker threads, each claiming a batch at a time and
+    sending it over its own SMTPMailer connection. Failed messages are
+    retried with exponential backoff and every outcome is recorded, so an
+    interrupted run resumes with the messages still pending.
+
+    Delivery is at least once: a message whose worker died mid-batch is
+    sent again once its claim expires.
+    """
+
+    # Messages claimed and sent per connection at a time
+    BATCH_SIZE = 100
+
+    # Worker threads, each with its own SMTP connection
+    WORKERS = 2
+
+    # Attempts before a message is marked failed
+    MAX_ATTEMPTS = 6
+
+    # Seconds before the first retry, doubled on each further attempt
+    RETRY_DELAY = 60
+    MAX_RETRY_DELAY = 6 * 3600
+
+    # Seconds a claimed batch is reserved for its worker
+    LEASE_SECONDS = 300
+
+    def __init__(self, db_manager, config: EmailConfig, workers: Optional[int] = None,
+                 batch_size: Optional[int] = None):
+        """
+        Args:
+            db_manager: Database holding the outbox
+            config: SMTP settings
+            workers: Defaults to WORKERS
+            batch_size: Defaults to BATCH_SIZE
+        """
+        self.db = db_manager
+        self.config = config
+        self.workers = max(1, workers or self.WORKERS)
+        self.batch_size = batch_size or self.BATCH_SIZE
+        self.logger = logging.getLogger(__name__)
+
+    def queued_keys(self, conn, keys: Iterable[str]) -> Set[str]:
+        """Return the keys that already have a message in the outbox"""
+        rows = conn.execute(
+            "SELECT item_key FROM email_outbox_items WHERE item_key IN (SELECT value FROM json_each(?))",
+            (json.dumps(list(keys)),)
+        ).fetchall()
+        return {row[0] for row in rows}
+
+    def enqueue(self, conn, message: EmailMessage, recipient: str, keys: List[str]) -> Optional[int]:
+        """
+        Queue a message within the caller's transaction.
+
+        Args:
+            conn: Connection of the open transaction
+            message: Message to send
+            recipient: Address the message goes to
+            keys: Delivery keys of what the message is about, see item_key
+
+        Returns:
+            int: Outbox id, or None if a message with the same keys is queued
+        """
+        idempotency_key = hashlib.sha256('\n'.join(sorted(keys)).encode()).hexdigest()
+        row = conn.execute(
+            "INSERT OR IGNORE INTO email_outbox (idempotency_key, recipient, subject, content) "
+            "VALUES (?, ?, ?, ?) RETURNING id",
+            (idempotency_key, recipient, message['Subject'], message.as_bytes(policy=email.policy.SMTP))
+        ).fetchone()
+        if row is None:
+            return None
+        conn.executemany("INSERT OR IGNORE INTO email_outbox_items (item_key, outbox_id) VALUES (?, ?)",
+                         [(key, row[0]) for key in keys])
+        return row[0]
+
+    def counts(self) -> Dict[str, int]:
+        """Number of messages by status"""
+        rows = self.db.execute_query("SELECT status, COUNT(*) AS count FROM email_outbox GROUP BY status")
+        return {row['status']: row['count'] for row in rows}
+
+    def next_attempt_at(self) -> Optional[float]:
+        """Epoch time of the next retry, None if nothing is waiting"""
+        return self.db.get_scalar(
+            "SELECT MIN(CASE status WHEN 'pending' THEN next_attempt_at ELSE claimed_until END) "
+            "FROM email_outbox WHERE status IN ('pending', 'sending')"
+        )
+
+    def retry_delay(self, attempts: int) -> float:
+        """Seconds to wait after a message's attempts-th failed attempt"""
+        return min(self.RETRY_DELAY * 2 ** (attempts - 1), self.MAX_RETRY_DELAY)
+
+    def drain(self, now: Optional[float] = None, stop: Optional[threading.Event] = None) -> OutboxResult:
+        """
+        Send the messages that are due until none are left.
+
+        Args:
+            now: Epoch time to drain as of, defaults to the current time
+            stop: Set to finish the batches in flight and return early;
+                KeyboardInterrupt does the same and is raised again after
+
+        Returns:
+            OutboxResult: What happened to the messages claimed
+        """
+        started = time.perf_counter()
+        stop = stop or threading.Event()
+        result = OutboxResult(0, 0, {}, 0)
+        lock = threading.Lock()
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = [executor.submit(self._work, now, stop, result, lock) for n in range(self.workers)]
+            try:
+                for future in futures:
+                    future.result()
+            except KeyboardInterrupt:
+                stop.set()
+                executor.shutdown(wait=True)
+                raise
+        result.seconds = time.perf_counter() - started
+        self.logger.info(str(result))
+        return result
+
+    def _work(self, now, stop, result, lock) -> None:
+        with SMTPMailer(self.config) as mailer:
+            while not stop.is_set():
+                claimed_at = time.time() if now is None else now
+                rows = self._claim(claimed_at)
+                if not rows:
+                    return
+                try:
+                    errors = mailer.send_messages([bytes(row['content']) for row in rows])
+                except (smtplib.SMTPException, OSError) as e:
+                    # Such as a refused login; the whole batch is retried
+                    mailer.close()
+                    errors = [f"Connection failed: {e}"] * len(rows)
+                self._record(rows, errors, claimed_at, result, lock)
+
+    def _claim(self, now: float) -> List:
+        with self.db.transaction() as conn:
+            rows = conn.execute(CLAIM_QUERY, (now + self.LEASE_SECONDS, now, now, self.batch_size)).fetchall()
+        # RETURNING gives no order
+        return sorted(rows, key=lambda row: row['id'])
+
+    def _record(self, rows, errors, now, result, lock) -> None:
+        sent, retry, failed = [], [], []
+        for row, error in zip(rows, errors):
+            if error is None:
+                sent.append((row['id'],))
+            elif is_permanent(error) or row['attempts'] >= self.MAX_ATTEMPTS:
+                failed.append((error, row['id']))
+                self.logger.warning(f"Email to {row['recipient']} failed: {error}")
+            else:
+                retry.append((now + self.retry_delay(row['attempts']), error, row['id']))
+        with self.db.transaction() as conn:
+            conn.executemany(
+                "UPDATE email_outbox SET status = 'sent', sent_at = CURRENT_TIMESTAMP, "
+                "claimed_until = NULL, last_error = NULL WHERE id = ?", sent)
+            conn.executemany(
+                "UPDATE email_outbox SET status = 'pending', next_attempt_at = ?, "
+                "claimed_until = NULL, last_error = ? WHERE id = ?", retry)
+            conn.executemany(
+                "UPDATE email_outbox SET status = 'failed', claimed_until = NULL, last_error = ? WHERE id = ?",
+                failed)
+        recipients = {row['id']: row['recipient'] for row in rows}
+        with lock:
+            result.sent += len(sent)
+            result.retrying += len(retry)
+            result.failed.update((recipients[outbox_id], error) for error, outbox_id in failed)
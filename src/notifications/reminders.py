@@ -0,0 +1,222 @@
+import logging
+from datetime import datetime
+from email.message import EmailMessage
+from email.utils import formataddr, formatdate, make_msgid
+from typing import Dict, List, Optional
+from date_utils import (
+    DUE_SOON_DAYS,
+    EPOCH_ORDINAL,
+    STATUS_ON_SCHEDULE,
+    STATUS_OVERDUE,
+    get_maintenance_status_codes
+)
+from src.scheduling import DueQueue
+from .config import EmailConfig
+from .outbox import EmailOutbox, OutboxResult, item_key
+
+# Due and overdue maintenance of operational instruments, by the user it
+# is assigned to for its due date, otherwise the responsible user. The day
+# limit is generous; get_maintenance_status_codes decides.
+DUE_QUERY = """
+    SELECT u.id AS user_id, u.username, u.email,
+           i.id AS instrument_id, i.name AS instrument_name, i.serial_number, i.location,
+           ms.maintenance_type_id, mt.name AS maintenance_type,
+           ms.last_date, ms.next_due, ms.next_due_day
+    FROM maintenance_status ms
+    JOIN instruments i ON i.id = ms.instrument_id
+    JOIN maintenance_types mt ON mt.id = ms.maintenance_type_id
+    LEFT JOIN maintenance_assignments ma
+        ON ma.instrument_id = ms.instrument_id AND ma.maintenance_type_id = ms.maintenance_type_id
+        AND ma.due_date = ms.next_due
+    JOIN users u ON u.id = COALESCE(ma.user_id, i.responsible_user_id)
+    WHERE i.status = 'Operational' AND ms.next_due_day <= ?
+    ORDER BY u.id, ms.next_due_day, i.name, mt.name
+"""
+
+class Digest:
+    """The due and overdue maintenance of one responsible user"""
+
+    def __init__(self, user_id: int, username: str, email: str):
+        self.user_id = user_id
+        self.username = username
+        self.email = email
+        # DUE_QUERY rows plus 'overdue', soonest due first
+        self.items: List[Dict] = []
+
+    @property
+    def overdue(self) -> List[Dict]:
+        return [item for item in self.items if item['overdue']]
+
+    @property
+    def due_soon(self) -> List[Dict]:
+        return [item for item in self.items if not item['overdue']]
+
+class ReminderResult:
+    """Outcome of one reminder run"""
+
+    def __init__(self, digests: int, delivery: OutboxResult):
+        # Digests queued by this run
+        self.digests = digests
+        # What happened to the queued emails, including earlier runs' retries
+        self.delivery = delivery
+
+    @property
+    def sent(self) -> int:
+        return self.delivery.sent
+
+    @property
+    def retrying(self) -> int:
+        return self.delivery.retrying
+
+    @property
+    def failed(self) -> Dict[str, str]:
+        return self.delivery.failed
+
+    def __str__(self) -> str:
+        return f"Queued {self.digests} reminder digests. {self.delivery}"
+
+def collect_digests(db_manager, now: Optional[datetime] = None) -> List[Digest]:
+    """
+    Group the due and overdue maintenance by responsible user.
+
+    Maintenance assigned to someone else for its due date, see
+    WorkloadBalancer, goes to the assignee instead. Instruments without a
+    responsible user or assignee get no reminder.
+
+    Args:
+        db_manager: Database to read
+        now: Current time, defaults to datetime.now()
+
+    Returns:
+        list: One digest per user with something due, by user id
+    """
+    now = now or datetime.now()
+    limit = now.toordinal() - EPOCH_ORDINAL + 1 + DUE_SOON_DAYS
+    rows = db_manager.execute_query(DUE_QUERY, (limit,))
+    codes = get_maintenance_status_codes([row['next_due_day'] for row in rows], now)
+
+    digests = {}
+    for row, code in zip(rows, codes):
+        if code == STATUS_ON_SCHEDULE:
+            continue
+        digest = digests.get(row['user_id'])
+        if digest is None:
+            digest = digests[row['user_id']] = Digest(row['user_id'], row['username'], row['email'])
+        row['overdue'] = code == STATUS_OVERDUE
+        digest.items.append(row)
+    return list(digests.values())
+
+def build_message(digest: Digest, config: EmailConfig, now: Optional[datetime] = None) -> EmailMessage:
+    """Write the reminder email of a digest"""
+    now = now or datetime.now()
+    message = EmailMessage()
+    message['From'] = formataddr((config.sender_name or '', config.sender or ''))
+    message['To'] = formataddr((digest.username, digest.email))
+    if config.reply_to:
+        message['Reply-To'] = config.reply_to
+    message['Date'] = formatdate(now.timestamp(), localtime=True)
+    message['Message-ID'] = make_msgid(domain=(config.sender or 'localhost').rpartition('@')[2])
+
+    overdue, due_soon = digest.overdue, digest.due_soon
+    counts = []
+    if overdue:
+        counts.append(f"{len(overdue)} overdue")
+    if due_soon:
+        counts.append(f"{len(due_soon)} due soon")
+    message['Subject'] = f"Maintenance reminder: {' and '.join(counts)}"
+
+    lines = [f"Hello {digest.username},", "",
+             f"These instruments you are responsible for or assigned to need maintenance "
+             f"(as of {now.strftime('%Y-%m-%d')}):"]
+    for title, items in (('Overdue', overdue), (f'Due in the next {DUE_SOON_DAYS} days', due_soon)):
+        if not items:
+            continue
+        lines += ["", f"{title}:"]
+        for item in items:
+            lines.append(f"  - {item['next_due']}  {item['instrument_name']} ({item['serial_number']}, "
+                         f"{item['location']}): {item['maintenance_type']}, "
+                         f"last done {item['last_date'] or 'never'}")
+    lines += ["", "Please record the maintenance in the Lab Instrument Manager once it is done.", "",
+              config.sender_name or "Lab Maintenance System"]
+    message.set_content('\n'.join(lines) + '\n', cte='quoted-printable')
+    return message
+
+def digest_keys(digest: Digest) -> List[str]:
+    """Outbox delivery keys of a digest's items, see item_key"""
+    return [item_key(item['instrument_id'], item['maintenance_type_id'], item['next_due'], digest.email or '',
+                     'overdue' if item['overdue'] else 'due soon')
+            for item in digest.items]
+
+class ReminderService:
+    """
+    Emails each responsible user a digest of their due and overdue maintenance.
+
+    The digests go through the EmailOutbox: each maintenance is reminded of
+    once when it becomes due soon and once when it becomes overdue, however
+    often the reminders run, and an interrupted run resumes from the outbox.
+    """
+
+    def __init__(self, db_manager, config: EmailConfig, outbox: Optional[EmailOutbox] = None):
+        self.db = db_manager
+        self.config = config
+        self.outbox = outbox or EmailOutbox(db_manager, config)
+        self.logger = logging.getLogger(__name__)
+
+    def enqueue_reminders(self, now: Optional[datetime] = None) -> int:
+        """
+        Queue a digest of what each user has not been reminded of yet.
+
+        The schedule is read and the digests queued in one transaction, so
+        two runs at once cannot queue the same reminder.
+
+        Returns:
+            int: Number of digests queued
+        """
+        now = now or datetime.now()
+        queued = 0
+        with self.db.transaction() as conn:
+            digests = collect_digests(self.db, now)
+            keys = [digest_keys(digest) for digest in digests]
+            done = self.outbox.queued_keys(conn, [key for item_keys in keys for key in item_keys])
+            for digest, item_keys in zip(digests, keys):
+                digest.items = [item for item, key in zip(digest.items, item_keys) if key not in done]
+                if not digest.items:
+                    continue
+                new_keys = [key for key in item_keys if key not in done]
+                if self.outbox.enqueue(conn, build_message(digest, self.config, now), digest.email or '', new_keys):
+                    queued += 1
+        return queued
+
+    def send_reminders(self, now: Optional[datetime] = None) -> ReminderResult:
+        """Queue the new digests and send everything due in the outbox"""
+        digests = self.enqueue_reminders(now)
+        result = ReminderResult(digests, self.outbox.drain(now.timestamp() if now else None))
+        self.logger.info(str(result))
+        return result
+
+class ReminderTrigger:
+    """
+    Tells a reminder daemon whether the schedule needs a new scan.
+
+    Something needs reminding when the DueQueue reports maintenance that
+    became due, or when maintenance_assignments changed: a reassignment
+    sends what is already due to a user who was never reminded of it,
+    without changing any status the queue sees.
+    """
+
+    # Tables that change who is reminded, not what is due
+    ROUTING_TABLES = ('maintenance_assignments',)
+
+    def __init__(self, db_manager, now: Optional[datetime] = None):
+        self.watcher = db_manager.change_watcher()
+        self.queue = DueQueue(db_manager, now)
+        self._versions = self.watcher.versions(self.ROUTING_TABLES)
+
+    def changed(self, now: Optional[datetime] = None) -> bool:
+        """Whether anything became due or was reassigned since the last call"""
+        self.queue.refresh(now)
+        became_due = self.queue.pop_changes(now)
+        versions = self.watcher.versions(self.ROUTING_TABLES)
+        reassigned = versions != self._versions
+        self._versions = versions
+        return bool(became_due) or reassigned
@@ -0,0 +1,171 @@
+import time
+import socket
+import threading
+import socketserver
+from typing import List, Optional, Tuple
+
+class SMTPSink:
+    """
+    A local SMTP server that accepts messages and keeps them in memory.
+
+    A stand-in for the real server in tests, benchmarks and dry runs. It
+    speaks enough ESMTP for smtplib (EHLO, MAIL, RCPT, DATA, RSET, NOOP,
+    QUIT), offers PIPELINING and answers pipelined commands together.
+
+    Use as a context manager; SMTPSink().port is the port to connect to.
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency: float = 0,
+                 pipelining: bool = True, reject: Tuple[str, ...] = (),
+                 messages_per_connection: Optional[int] = None):
+        """
+        Args:
+            host, port: Address to listen on; port 0 picks a free one
+            latency: Seconds added to every round trip, to model the
+                network distance to a real server
+            pipelining: Offer PIPELINING in the EHLO reply
+            reject: Recipient addresses answered with 550
+            messages_per_connection: Answer 421 and hang up on the command
+                after this many messages on a connection
+        """
+        self.latency = latency
+        self.pipelining = pipelining
+        self.reject = {address.lower() for address in reject}
+        self.messages_per_connection = messages_per_connection
+        # (sender, recipients, content) of every accepted message
+        self.messages: List[Tuple[str, List[str], bytes]] = []
+        self.connections = 0
+        self.round_trips = 0
+        self._lock = threading.Lock()
+        self._server = socketserver.ThreadingTCPServer((host, port), _SinkHandler, bind_and_activate=True)
+        self._server.daemon_threads = True
+        self._server.sink = self
+        self.host, self.port = self._server.server_address[:2]
+        self._thread = None
+
+    def start(self) -> 'SMTPSink':
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def _accept(self, sender: str, recipients: List[str], content: bytes) -> None:
+        with self._lock:
+            self.messages.append((sender, recipients, content))
+
+class _SinkHandler(socketserver.BaseRequestHandler):
+    def setup(self):
+        self.sink = self.server.sink
+        self.buffer = b''
+        self.replies = []
+        with self.sink._lock:
+            self.sink.connections += 1
+
+    def reply(self, line: str) -> None:
+        self.replies.append(line.encode() + b'\r\n')
+
+    def flush(self) -> None:
+        """Send the queued replies; called when waiting on the client"""
+        if not self.replies:
+            return
+        if self.sink.latency:
+            time.sleep(self.sink.latency)
+        with self.sink._lock:
+            self.sink.round_trips += 1
+        self.request.sendall(b''.join(self.replies))
+        self.replies = []
+
+    def read_until(self, terminator: bytes) -> Optional[bytes]:
+        while terminator not in self.buffer:
+            self.flush()
+            try:
+                chunk = self.request.recv(65536)
+            except OSError:
+                return None
+            if not chunk:
+                return None
+            self.buffer += chunk
+        data, self.buffer = self.buffer.split(terminator, 1)
+        return data
+
+    def handle(self):
+        sink = self.sink
+        self.reply('220 localhost SMTP sink ready')
+        sender = None
+        recipients = []
+        delivered = 0
+        while True:
+            line = self.read_until(b'\r\n')
+            if line is None:
+                return
+            verb, _, argument = line.decode('ascii', 'replace').partition(' ')
+            verb = verb.upper()
+            if sink.messages_per_connection and delivered >= sink.messages_per_connection and verb != 'QUIT':
+                self.reply('421 Too many messages, closing connection')
+                self.flush()
+                return
+            if verb in ('EHLO', 'HELO'):
+                if verb == 'EHLO':
+                    self.reply('250-localhost')
+                    if sink.pipelining:
+                        self.reply('250-PIPELINING')
+                    self.reply('250 8BITMIME')
+                else:
+                    self.reply('250 localhost')
+                sender, recipients = None, []
+            elif verb == 'MAIL':
+                sender, recipients = _address(argument), []
+                self.reply('250 OK')
+            elif verb == 'RCPT':
+                if sender is None:
+                    self.reply('503 Need MAIL first')
+                elif _address(argument).lower() in sink.reject:
+                    self.reply('550 No such user')
+                else:
+                    recipients.append(_address(argument))
+                    self.reply('250 OK')
+            elif verb == 'DATA':
+                if not recipients:
+                    self.reply('554 No valid recipients')
+                    continue
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                # The content may start right away; an empty one is just '.'
+                self.buffer = b'\r\n' + self.buffer
+                content = self.read_until(b'\r\n.\r\n')
+                if content is None:
+                    return
+                sink._accept(sender, recipients, content.replace(b'\r\n..', b'\r\n.')[2:] + b'\r\n')
+                sender, recipients = None, []
+                delivered += 1
+                self.reply('250 OK')
+            elif verb == 'RSET':
+                sender, recipients = None, []
+                self.reply('250 OK')
+            elif verb == 'NOOP':
+                self.reply('250 OK')
+            elif verb == 'QUIT':
+                self.reply('221 Bye')
+                self.flush()
+                return
+            else:
+                self.reply('502 Command not implemented')
+
+    def finish(self):
+        try:
+            self.request.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+def _address(argument: str) -> str:
+    """Address of a 'FROM:<a@b>' or 'TO:<a@b>' argument"""
+    start, end = argument.find('<'), argument.find('>')
+    return argument[start + 1:end] if 0 <= start < end else argument.partition(':')[2].strip()
@@ -1,9 +1,19 @@
 from .pdf_generator import PDFGenerator
 from .maintenance_report import MaintenanceReportGenerator
-from .file_dialog import PDFSaveDialog
- 
+from .batch_reports import BatchReportService, ReportBatchResult
+
 __all__ = [
     'PDFGenerator',
     'MaintenanceReportGenerator',
+    'BatchReportService',
+    'ReportBatchResult',
     'PDFSaveDialog'
-] 
\ No newline at end of file
+]
+
+def __getattr__(name):
+    # PDFSaveDialog needs PyQt6; import it on first use so report workers
+    # and command line tools can render without it
+    if name == 'PDFSaveDialog':
+        from .file_dialog import PDFSaveDialog
+        return PDFSaveDialog
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
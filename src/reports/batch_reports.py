@@ -0,0 +1,222 @@
+import os
+import time
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from .maintenance_report import MaintenanceReportGenerator
+
+# Everything a maintenance report shows, for any number of records. The
+# next maintenance is the instrument's shortest plan counted from the
+# record's date.
+REPORT_QUERY = """
+    WITH next_plan AS (
+        SELECT ims.instrument_id, mt.name AS maintenance_type, ims.period_weeks,
+               ROW_NUMBER() OVER (PARTITION BY ims.instrument_id
+                                  ORDER BY ims.period_weeks, ims.position) AS rank
+        FROM instrument_maintenance_schedule ims
+        JOIN maintenance_types mt ON mt.id = ims.maintenance_type_id
+        WHERE ims.period_weeks IS NOT NULL
+    )
+    SELECT
+        mr.id,
+        mr.maintenance_date,
+        mr.notes,
+        mt.name as maintenance_type,
+        i.name as instrument_name,
+        i.model as instrument_model,
+        i.serial_number,
+        i.location,
+        i.brand,
+        u1.username as performed_by,
+        u2.username as responsible_user,
+        date(mr.maintenance_date, '+' || (np.period_weeks * 7) || ' days') as next_maintenance_date,
+        np.maintenance_type as next_maintenance_type
+    FROM maintenance_records mr
+    JOIN maintenance_types mt ON mr.maintenance_type_id = mt.id
+    JOIN instruments i ON mr.instrument_id = i.id
+    JOIN users u1 ON mr.performed_by = u1.id
+    LEFT JOIN users u2 ON i.responsible_user_id = u2.id
+    LEFT JOIN next_plan np ON np.instrument_id = i.id AND np.rank = 1
+"""
+
+# One generator per worker process; building its styles is not free
+_generator = None
+
+def report_data(record: Dict) -> Dict:
+    """Turn a row of REPORT_QUERY into the data MaintenanceReportGenerator expects"""
+    return {
+        'record_id': record['id'],
+        'maintenance_date': record['maintenance_date'],
+        'report_number': f"MR-{record['id']:06d}",
+        'performed_by': record['performed_by'],
+        'instrument_name': record['instrument_name'],
+        'instrument_model': record['instrument_model'],
+        'serial_number': record['serial_number'],
+        'location': record['location'],
+        'brand': record['brand'],
+        'responsible_user': record['responsible_user'] or 'Not assigned',
+        'maintenance_type': record['maintenance_type'],
+        'notes': record['notes'],
+        'next_maintenance_date': record['next_maintenance_date'],
+        'next_maintenance_type': record['next_maintenance_type']
+    }
+
+def _render_batch(items: List[Tuple[Dict, str]]) -> List[Tuple[int, Optional[str]]]:
+    """Render (data, path) pairs; returns (record_id, path or None on failure)"""
+    global _generator
+    if _generator is None:
+        _generator = MaintenanceReportGenerator()
+    return [(data['record_id'], _generator.generate_maintenance_report(data, path))
+            for data, path in items]
+
+class ReportBatchResult:
+    """Outcome of one batch of reports"""
+
+    def __init__(self, paths: List[str], failed: List[int], seconds: float):
+        self.paths = paths
+        self.failed = failed
+        self.seconds = seconds
+
+    @property
+    def reports_per_second(self) -> float:
+        return len(self.paths) / self.seconds if self.seconds else 0.0
+
+    def __str__(self) -> str:
+        summary = (f"Generated {len(self.paths)} reports in {self.seconds:.1f} s "
+                   f"({self.reports_per_second:,.1f} reports/s)")
+        if self.failed:
+            summary += f", {len(self.failed)} failed"
+        return summary
+
+class BatchReportService:
+    """
+    Generates maintenance report PDFs for many records at once.
+
+    The data of every report is read with one query, then the PDFs are
+    rendered in parallel by worker processes, as reportlab holds the GIL.
+    Reports of single records are rendered in this process.
+    """
+
+    # Reports handed to a worker at a time
+    CHUNK_SIZE = 25
+
+    def __init__(self, db_manager, workers: Optional[int] = None):
+        """
+        Args:
+            db_manager: Database to read the records from
+            workers: Rendering processes; 1 renders in this process.
+                Defaults to the number of CPUs.
+        """
+        self.db = db_manager
+        self.workers = workers or os.cpu_count() or 1
+        self._generator = MaintenanceReportGenerator()
+        self.logger = logging.getLogger(__name__)
+
+    def fetch_report_data(self, record_ids: Optional[Iterable[int]] = None,
+                          start_date: Optional[str] = None, end_date: Optional[str] = None) -> List[Dict]:
+        """
+        Read the report data of maintenance records, in date order.
+
+        Args:
+            record_ids: Only these records
+            start_date: Only records on or after this YYYY-MM-DD date
+            end_date: Only records on or before this YYYY-MM-DD date
+
+        Returns:
+            list: One report data dictionary per record
+        """
+        conditions = []
+        params = []
+        if record_ids is not None:
+            # One parameter however many records there are
+            conditions.append("mr.id IN (SELECT value FROM json_each(?))")
+            params.append('[' + ','.join(str(int(record_id)) for record_id in record_ids) + ']')
+        if start_date:
+            conditions.append("mr.maintenance_date >= ?")
+            params.append(start_date)
+        if end_date:
+            conditions.append("mr.maintenance_date <= ?")
+            params.append(end_date)
+        where = ('WHERE ' + ' AND '.join(conditions)) if conditions else ''
+        records = self.db.execute_query(f"{REPORT_QUERY} {where} ORDER BY mr.maintenance_date, mr.id",
+                                        tuple(params))
+        return [report_data(record) for record in records]
+
+    def default_path(self, data: Dict, output_dir: Optional[str] = None) -> str:
+        """Default file of a report, in output_dir or next to the executable"""
+        path = self._generator._generate_default_filename(data)
+        if output_dir is not None:
+            path = os.path.join(output_dir, os.path.basename(path))
+        return path
+
+    def generate_report(self, data: Dict, save_path: Optional[str] = None) -> Optional[str]:
+        """
+        Render one report in this process.
+
+        Returns:
+            str: Path of the PDF, or None if it could not be written
+        """
+        return self._generator.generate_maintenance_report(data, save_path or self.default_path(data))
+
+    def generate_reports(self, output_dir: str, record_ids: Optional[Iterable[int]] = None,
+                         start_date: Optional[str] = None, end_date: Optional[str] = None,
+                         progress: Optional[Callable[[int, int], None]] = None) -> ReportBatchResult:
+        """
+        Generate the reports of maintenance records into a directory.
+
+        Files are named like the report of a new record; records that would
+        share a name get their report number appended. Existing files are
+        replaced.
+
+        Args:
+            output_dir: Directory for the PDFs, created if missing
+            record_ids, start_date, end_date: Records to report, as for
+                fetch_report_data; all records if none are given
+            progress: Called as reports finish with the number done and
+                the number to generate
+        """
+        started = time.perf_counter()
+        os.makedirs(output_dir, exist_ok=True)
+        items = self._with_paths(self.fetch_report_data(record_ids, start_date, end_date), output_dir)
+        chunks = [items[start:start + self.CHUNK_SIZE] for start in range(0, len(items), self.CHUNK_SIZE)]
+
+        paths = {}
+        failed = []
+        for rendered in self._render(chunks):
+            for record_id, path in rendered:
+                if path:
+                    paths[record_id] = path
+                else:
+                    failed.append(record_id)
+            if progress:
+                progress(len(paths) + len(failed), len(items))
+
+        result = ReportBatchResult([paths[data['record_id']] for data, path in items if data['record_id'] in paths],
+                                   sorted(failed), time.perf_counter() - started)
+        self.logger.info(str(result))
+        return result
+
+    def _with_paths(self, reports: List[Dict], output_dir: str) -> List[Tuple[Dict, str]]:
+        items = []
+        used = set()
+        for data in reports:
+            path = self.default_path(data, output_dir)
+            if path.lower() in used:
+                root, extension = os.path.splitext(path)
+                path = f"{root}_{data['report_number']}{extension}"
+            used.add(path.lower())
+            items.append((data, path))
+        return items
+
+    def _render(self, chunks):
+        if self.workers <= 1 or len(chunks) <= 1:
+            for chunk in chunks:
+                yield _render_batch(chunk)
+            return
+
+        # Spawned, not forked, as batches run on a GUI worker thread
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(min(self.workers, len(chunks)), mp_context=context) as executor:
+            for future in as_completed([executor.submit(_render_batch, chunk) for chunk in chunks]):
+                yield future.result()
@@ -0,0 +1,17 @@
+from .due_queue import DueQueue, effective_day, status_code
+from .forecast import Forecast, NO_USER, add_months, expand_occurrences, forecast_maintenance
+from .workload import Reassignment, WorkloadBalancer, WorkloadPlan
+
+__all__ = [
+    'DueQueue',
+    'effective_day',
+    'status_code',
+    'Forecast',
+    'NO_USER',
+    'add_months',
+    'expand_occurrences',
+    'forecast_maintenance',
+    'Reassignment',
+    'WorkloadBalancer',
+    'WorkloadPlan'
+]
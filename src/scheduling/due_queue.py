@@ -0,0 +1,282 @@
+import json
+import heapq
+import logging
+from collections import Counter, defaultdict
+from datetime import date, datetime, time
+from typing import Dict, List, Optional, Tuple
+from date_utils import (
+    DUE_SOON_DAYS,
+    EPOCH_ORDINAL,
+    STATUS_DUE_SOON,
+    STATUS_ON_SCHEDULE,
+    STATUS_OVERDUE
+)
+
+# Scheduled maintenance of operational instruments. Plans without a next
+# date are never due and stay out of the queue.
+DUE_QUEUE_QUERY = """
+    SELECT ms.instrument_id, ms.maintenance_type_id, ms.next_due_day, i.responsible_user_id
+    FROM maintenance_status ms
+    JOIN instruments i ON i.id = ms.instrument_id
+    WHERE i.status = 'Operational' AND ms.next_due_day IS NOT NULL
+"""
+
+def effective_day(now: Optional[datetime] = None) -> int:
+    """
+    Day number that due dates are compared against at a given time.
+
+    Like get_maintenance_status, any time after midnight counts as the
+    next day: a date is overdue once its day has started and due soon once
+    it is at most DUE_SOON_DAYS away from the effective day.
+    """
+    now = now or datetime.now()
+    return now.toordinal() - EPOCH_ORDINAL + (0 if now.time() == time(0) else 1)
+
+def status_code(next_due_day: int, day: int) -> int:
+    """Status code of a next due day on an effective day, see STATUS_VALUES"""
+    if next_due_day < day:
+        return STATUS_OVERDUE
+    if next_due_day <= day + DUE_SOON_DAYS:
+        return STATUS_DUE_SOON
+    return STATUS_ON_SCHEDULE
+
+def _next_change_day(next_due_day: int, code: int) -> Optional[int]:
+    """Effective day on which an item's status next changes, None once overdue"""
+    if code == STATUS_ON_SCHEDULE:
+        return next_due_day - DUE_SOON_DAYS
+    if code == STATUS_DUE_SOON:
+        return next_due_day + 1
+    return None
+
+class _Item:
+    __slots__ = ('next_due_day', 'user_id', 'code', 'entry')
+
+    def __init__(self, next_due_day, user_id, code):
+        self.next_due_day = next_due_day
+        self.user_id = user_id
+        self.code = code
+        # Id of the item's live heap entry; older entries are skipped
+        self.entry = None
+
+class DueQueue:
+    """
+    The scheduled maintenance ordered by when its status next changes.
+
+    Built once from maintenance_status, then kept current incrementally:
+    refresh() re-reads only the instruments the change_log says were
+    touched (a maintenance record added, a plan edited, an instrument
+    retired or reassigned), and time is handled by a heap of the moments
+    items become due soon or overdue. Finding the next change is O(1) and
+    each change costs O(log n), so a notification timer can sleep until
+    next_change() instead of rescanning the whole fleet.
+
+    Status changes are reported by pop_changes() as
+    (instrument_id, maintenance_type_id, next_due_day, status code) tuples.
+    Only changes towards due are reported: an item that becomes due soon or
+    overdue, or is added or moved already due. What is already due when
+    the queue is loaded is not a change. Per-user counts of due soon
+    and overdue items are kept up to date for status displays.
+
+    Not thread-safe; use a queue from one thread.
+    """
+
+    # Tables whose change_log entries, keyed by instrument, trigger a re-read
+    WATCHED_TABLES = ('maintenance_status', 'instruments')
+
+    def __init__(self, db_manager, now: Optional[datetime] = None):
+        """
+        Args:
+            db_manager: Database to read
+            now: Time the queue is built at, defaults to datetime.now()
+        """
+        self.db = db_manager
+        self.logger = logging.getLogger(__name__)
+        self.day = None
+        self._items: Dict[Tuple[int, int], _Item] = {}
+        self._by_instrument: Dict[int, set] = defaultdict(set)
+        # (effective day, entry id, instrument id, type id)
+        self._heap: List[Tuple[int, int, int, int]] = []
+        self._entries = 0
+        self._counts = Counter()
+        self._changes = []
+        self._versions = None
+        self._seq = None
+        self.load(now)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def load(self, now: Optional[datetime] = None) -> None:
+        """Rebuild the queue from the database"""
+        watcher = self.db.change_watcher()
+        # Read the change position first: a write that lands during the
+        # load is picked up again by the next refresh, never missed
+        self._versions = watcher.versions(self.WATCHED_TABLES)
+        self._seq = watcher.latest_change()
+        self.day = effective_day(now)
+        self._items.clear()
+        self._by_instrument.clear()
+        self._counts.clear()
+        self._changes = []
+        self._heap = []
+        for instrument_id, type_id, next_due_day, user_id in self.db.iter_query(DUE_QUEUE_QUERY):
+            code = status_code(next_due_day, self.day)
+            item = self._items[(instrument_id, type_id)] = _Item(next_due_day, user_id, code)
+            self._by_instrument[instrument_id].add(type_id)
+            self._counts[(user_id, code)] += 1
+            change_day = _next_change_day(next_due_day, code)
+            if change_day is not None:
+                item.entry = self._entries = self._entries + 1
+                self._heap.append((change_day, item.entry, instrument_id, type_id))
+        heapq.heapify(self._heap)
+
+    def refresh(self, now: Optional[datetime] = None) -> bool:
+        """
+        Apply the changes committed since the last load or refresh.
+
+        Costs a single pragma when nothing was committed. Reloads in full
+        when the change_log no longer goes back far enough.
+
+        Returns:
+            bool: True if any item was added, moved or removed
+        """
+        watcher = self.db.change_watcher()
+        versions = watcher.versions(self.WATCHED_TABLES)
+        if versions == self._versions:
+            return False
+        self._versions = versions
+        seq, changes = watcher.changes_since(self._seq, self.WATCHED_TABLES)
+        if changes is None:
+            self.logger.info("Due queue is behind the change log, reloading")
+            self.load(now)
+            return True
+        self._seq = seq
+        instrument_ids = set().union(*changes.values())
+        if not instrument_ids:
+            return False
+
+        self.advance(now)
+        rows = self.db.execute_query(
+            DUE_QUEUE_QUERY + " AND ms.instrument_id IN (SELECT value FROM json_each(?))",
+            (json.dumps(sorted(instrument_ids)),)
+        )
+        current = {(row['instrument_id'], row['maintenance_type_id']): row for row in rows}
+        changed = False
+        for instrument_id in instrument_ids:
+            for type_id in list(self._by_instrument.get(instrument_id, ())):
+                if (instrument_id, type_id) not in current:
+                    self._remove((instrument_id, type_id))
+                    changed = True
+        for key, row in current.items():
+            changed |= self._set(key, row['next_due_day'], row['responsible_user_id'])
+        if len(self._heap) > 2 * len(self._items) + 1024:
+            # Drop the entries superseded by updates
+            self._heap = [entry for entry in self._heap
+                          if getattr(self._items.get((entry[2], entry[3])), 'entry', None) == entry[1]]
+            heapq.heapify(self._heap)
+        return changed
+
+    def advance(self, now: Optional[datetime] = None) -> None:
+        """Move the queue's clock forward, collecting the status changes on the way"""
+        day = effective_day(now)
+        if day < self.day:
+            # Time never goes back for the queue; re-evaluating would undo reported changes
+            return
+        self.day = day
+        heap = self._heap
+        while heap and heap[0][0] <= day:
+            change_day, entry, instrument_id, type_id = heapq.heappop(heap)
+            key = (instrument_id, type_id)
+            item = self._items.get(key)
+            if item is None or item.entry != entry:
+                continue
+            self._update(key, item, item.next_due_day, item.user_id)
+
+    def pop_changes(self, now: Optional[datetime] = None) -> List[Tuple[int, int, int, int]]:
+        """
+        Return the items that became due soon or overdue since the last call.
+
+        Args:
+            now: Current time, defaults to datetime.now()
+
+        Returns:
+            list: (instrument_id, maintenance_type_id, next_due_day, status code)
+                tuples in the order the changes happened
+        """
+        self.advance(now)
+        changes, self._changes = self._changes, []
+        return changes
+
+    def next_change_day(self) -> Optional[int]:
+        """Effective day of the next status change, None if nothing is scheduled to change"""
+        heap = self._heap
+        while heap:
+            change_day, entry, instrument_id, type_id = heap[0]
+            item = self._items.get((instrument_id, type_id))
+            if item is not None and item.entry == entry:
+                return change_day
+            heapq.heappop(heap)
+        return None
+
+    def next_change(self) -> Optional[datetime]:
+        """
+        Time after which the next status change takes effect.
+
+        Changes take effect on the first instant after midnight, so a
+        timer should fire just after this time.
+        """
+        change_day = self.next_change_day()
+        if change_day is None:
+            return None
+        return datetime.combine(date.fromordinal(change_day - 1 + EPOCH_ORDINAL), time(0))
+
+    def counts(self, user_id: Optional[int] = None) -> Tuple[int, int]:
+        """
+        Number of overdue and due soon items.
+
+        Args:
+            user_id: Responsible user to count for, all users when None
+        """
+        if user_id is None:
+            return (sum(count for (user, code), count in self._counts.items() if code == STATUS_OVERDUE),
+                    sum(count for (user, code), count in self._counts.items() if code == STATUS_DUE_SOON))
+        return self._counts[(user_id, STATUS_OVERDUE)], self._counts[(user_id, STATUS_DUE_SOON)]
+
+    def status(self, instrument_id: int, maintenance_type_id: int) -> Optional[int]:
+        """Current status code of an item, None if it is not in the queue"""
+        item = self._items.get((instrument_id, maintenance_type_id))
+        return item.code if item else None
+
+    def _set(self, key, next_due_day, user_id) -> bool:
+        item = self._items.get(key)
+        if item is None:
+            item = self._items[key] = _Item(next_due_day, user_id, STATUS_ON_SCHEDULE)
+            self._by_instrument[key[0]].add(key[1])
+            self._counts[(user_id, STATUS_ON_SCHEDULE)] += 1
+        elif item.next_due_day == next_due_day and item.user_id == user_id:
+            return False
+        self._update(key, item, next_due_day, user_id)
+        return True
+
+    def _update(self, key, item, next_due_day, user_id) -> None:
+        """Re-evaluate an item and schedule its next change"""
+        code = status_code(next_due_day, self.day)
+        self._counts[(item.user_id, item.code)] -= 1
+        self._counts[(user_id, code)] += 1
+        if code != STATUS_ON_SCHEDULE and (code > item.code or next_due_day != item.next_due_day
+                                           or user_id != item.user_id):
+            self._changes.append((key[0], key[1], next_due_day, code))
+        item.next_due_day, item.user_id, item.code = next_due_day, user_id, code
+        change_day = _next_change_day(next_due_day, code)
+        if change_day is None:
+            item.entry = None
+        else:
+            item.entry = self._entries = self._entries + 1
+            heapq.heappush(self._heap, (change_day, item.entry, key[0], key[1]))
+
+    def _remove(self, key) -> None:
+        item = self._items.pop(key)
+        self._by_instrument[key[0]].discard(key[1])
+        if not self._by_instrument[key[0]]:
+            del self._by_instrument[key[0]]
+        self._counts[(item.user_id, item.code)] -= 1
@@ -0,0 +1,249 @@
+import calendar
+from array import array
+from datetime import date, datetime
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from date_utils import EPOCH_ORDINAL, from_day_number
+from .due_queue import effective_day
+
+try:
+    import numpy as np
+except ImportError:
+    # The packaged application is built without NumPy; the forecast falls
+    # back to the array module and plain loops
+    np = None
+
+# Recurring maintenance of operational instruments with its next due day
+FORECAST_QUERY = """
+    SELECT ms.instrument_id, ms.maintenance_type_id, ms.period_weeks, ms.next_due_day,
+           i.responsible_user_id, i.location
+    FROM maintenance_status ms
+    JOIN instruments i ON i.id = ms.instrument_id
+    WHERE i.status = 'Operational' AND ms.next_due_day IS NOT NULL AND ms.period_weeks > 0
+    ORDER BY ms.instrument_id, ms.maintenance_type_id
+"""
+
+# Stands for a missing responsible user in the integer user arrays
+NO_USER = -1
+
+# Groupings accepted by Forecast.totals and Forecast.weekly
+GROUPINGS = ('user', 'location', 'type', 'instrument')
+
+def add_months(day: date, months: int) -> date:
+    """The same day of the month, months later; the last day if the month is shorter"""
+    month = day.month - 1 + months
+    year, month = day.year + month // 12, month % 12 + 1
+    return day.replace(year=year, month=month, day=min(day.day, calendar.monthrange(year, month)[1]))
+
+def expand_occurrences(next_days: Sequence[int], period_days: Sequence[int],
+                       start_day: int, end_day: int, overdue_day: Optional[int] = None):
+    """
+    Expand recurring plans into their occurrences between two days.
+
+    Each plan occurs on its next due day and every period after it. A plan
+    due before start_day is assumed done on start_day, so it occurs on
+    start_day and recurs from there.
+
+    Args:
+        next_days: Next due day number of each plan
+        period_days: Days between occurrences of each plan, at least 1
+        start_day: First day of the horizon
+        end_day: Day after the horizon
+        overdue_day: Plans due before this day are overdue, defaults to
+            start_day; see effective_day
+
+    Returns:
+        tuple: (plans, days, overdue), one entry per occurrence ordered by
+            plan then day: the plan's index, the day number and whether it
+            is the first occurrence of an overdue plan. With NumPy these are int32,
+            int32 and bool arrays; otherwise array('i'), array('i') and array('b')
+    """
+    if overdue_day is None:
+        overdue_day = start_day
+    if np is None:
+        plans, days, overdue = array('i'), array('i'), array('b')
+        for index, (next_day, period) in enumerate(zip(next_days, period_days)):
+            first = max(next_day, start_day)
+            count = len(range(first, end_day, period))
+            plans.extend([index] * count)
+            days.extend(range(first, end_day, period))
+            overdue.extend([next_day < overdue_day] + [False] * (count - 1) if count else [])
+        return plans, days, overdue
+
+    next_days = np.asarray(next_days, dtype='int64')
+    period = np.asarray(period_days, dtype='int64')
+    first = np.maximum(next_days, start_day)
+    counts = np.where(first < end_day, (end_day - 1 - first) // period + 1, 0)
+    plans = np.repeat(np.arange(len(counts), dtype='int32'), counts)
+    # Position of each occurrence within its plan: 0, 1, 2, ... per plan
+    starts = np.cumsum(counts) - counts
+    step = np.arange(len(plans), dtype='int64') - np.repeat(starts, counts)
+    days = (first[plans] + step * period[plans]).astype('int32')
+    overdue = (step == 0) & (next_days[plans] < overdue_day)
+    return plans, days, overdue
+
+class Forecast:
+    """
+    Every maintenance occurrence within a horizon, held in flat arrays.
+
+    Plans are described by the plan arrays (instrument_ids, type_ids,
+    user_ids with NO_USER for none, location_codes indexing locations,
+    next_days with the next due day);
+    occurrences by plans (plan index), days (day numbers) and overdue.
+    Arrays are NumPy arrays when NumPy is available, otherwise array
+    module arrays.
+    """
+
+    def __init__(self, start_day: int, end_day: int, instrument_ids, type_ids, user_ids,
+                 location_codes, locations: List[str], plans, days, overdue, next_days=None):
+        self.start_day = start_day
+        self.end_day = end_day
+        self.instrument_ids = instrument_ids
+        self.type_ids = type_ids
+        self.user_ids = user_ids
+        self.location_codes = location_codes
+        self.locations = locations
+        self.plans = plans
+        self.days = days
+        self.overdue = overdue
+        self.next_days = next_days
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    @property
+    def first_week_day(self) -> int:
+        """Day number of the Monday starting the horizon's first week"""
+        # Day 0, 1970-01-01, was a Thursday
+        return self.start_day - (self.start_day + 3) % 7
+
+    @property
+    def week_count(self) -> int:
+        return (self.end_day - 1 - self.first_week_day) // 7 + 1
+
+    def week_starts(self) -> List[str]:
+        """Monday of each week of the horizon, as 'YYYY-MM-DD'"""
+        return [from_day_number(self.first_week_day + 7 * week) for week in range(self.week_count)]
+
+    def occurrences(self) -> Iterator[Dict]:
+        """Yield each occurrence as a dictionary, ordered by plan then date"""
+        for plan, day, overdue in zip(self.plans, self.days, self.overdue):
+            user_id = int(self.user_ids[plan])
+            yield {
+                'instrument_id': int(self.instrument_ids[plan]),
+                'maintenance_type_id': int(self.type_ids[plan]),
+                'responsible_user_id': None if user_id == NO_USER else user_id,
+                'location': self.locations[self.location_codes[plan]],
+                'date': from_day_number(day),
+                'overdue': bool(overdue)
+            }
+
+    def _groups(self, by: str) -> Tuple[List, Sequence[int]]:
+        """Labels of a grouping and the label index of every plan"""
+        if by == 'location':
+            return list(self.locations), self.location_codes
+        keys = {'user': self.user_ids, 'type': self.type_ids, 'instrument': self.instrument_ids}.get(by)
+        if keys is None:
+            raise ValueError(f"Unknown grouping '{by}', expected one of {', '.join(GROUPINGS)}")
+        if np is not None:
+            labels, codes = np.unique(keys, return_inverse=True)
+            labels = [None if by == 'user' and label == NO_USER else int(label) for label in labels]
+            return labels, codes.astype('int32')
+        labels = sorted(set(keys))
+        index = {label: code for code, label in enumerate(labels)}
+        labels = [None if by == 'user' and label == NO_USER else label for label in labels]
+        return labels, array('i', (index[key] for key in keys))
+
+    def totals(self, by: str) -> Dict:
+        """
+        Number of occurrences per user, location, type or instrument.
+
+        Users are keyed by id, None for instruments without one.
+        """
+        labels, codes = self._groups(by)
+        if np is not None:
+            counts = np.bincount(codes[self.plans], minlength=len(labels))
+            return {label: int(count) for label, count in zip(labels, counts) if count}
+        counts = [0] * len(labels)
+        for plan in self.plans:
+            counts[codes[plan]] += 1
+        return {label: count for label, count in zip(labels, counts) if count}
+
+    def per_week(self) -> List[int]:
+        """Number of occurrences in each week of week_starts()"""
+        if np is not None:
+            weeks = (self.days - self.first_week_day) // 7
+            return np.bincount(weeks, minlength=self.week_count).tolist()
+        counts = [0] * self.week_count
+        first = self.first_week_day
+        for day in self.days:
+            counts[(day - first) // 7] += 1
+        return counts
+
+    def weekly(self, by: str) -> Tuple[List, List[List[int]]]:
+        """
+        Occurrences per week and per user, location, type or instrument.
+
+        Returns:
+            tuple: The group labels, as in totals(), and one row of counts
+                per week of week_starts() with a column per label
+        """
+        labels, codes = self._groups(by)
+        width = len(labels)
+        if np is not None:
+            cells = (self.days - self.first_week_day) // 7 * width + codes[self.plans]
+            counts = np.bincount(cells, minlength=self.week_count * width)
+            return labels, counts.reshape(self.week_count, width).tolist()
+        rows = [[0] * width for _ in range(self.week_count)]
+        first = self.first_week_day
+        for plan, day in zip(self.plans, self.days):
+            rows[(day - first) // 7][codes[plan]] += 1
+        return labels, rows
+
+def forecast_maintenance(db_manager, months: int = 12, now: Optional[datetime] = None,
+                         weeks: Optional[int] = None) -> Forecast:
+    """
+    Forecast every maintenance occurrence over the coming months.
+
+    Starts from the next due date of each plan of an operational
+    instrument, as kept in maintenance_status. Maintenance due before
+    today is counted once on the first day and recurs from there. As in
+    get_maintenance_status, maintenance due today is overdue once the day
+    has started.
+
+    Args:
+        db_manager: Database to read
+        months: Length of the horizon
+        now: Start of the horizon, defaults to datetime.now()
+        weeks: Length of the horizon in weeks, replaces months when given
+
+    Returns:
+        Forecast: The occurrences from today up to, not including, the
+            same day months (or weeks) later
+    """
+    now = now or datetime.now()
+    start_day = now.toordinal() - EPOCH_ORDINAL
+    if weeks is not None:
+        end_day = start_day + 7 * weeks
+    else:
+        end_day = add_months(now.date(), months).toordinal() - EPOCH_ORDINAL
+
+    locations: Dict[str, int] = {}
+    instrument_ids, type_ids, period_days = array('i'), array('i'), array('i')
+    next_days, user_ids, location_codes = array('i'), array('i'), array('i')
+    for instrument_id, type_id, period_weeks, next_day, user_id, location in db_manager.iter_query(
+            FORECAST_QUERY, batch_size=10000):
+        instrument_ids.append(instrument_id)
+        type_ids.append(type_id)
+        period_days.append(period_weeks * 7)
+        next_days.append(next_day)
+        user_ids.append(NO_USER if user_id is None else user_id)
+        location_codes.append(locations.setdefault(location or '', len(locations)))
+
+    if np is not None:
+        instrument_ids, type_ids, period_days, next_days, user_ids, location_codes = (
+            np.frombuffer(values, dtype='int32') if len(values) else np.zeros(0, dtype='int32')
+            for values in (instrument_ids, type_ids, period_days, next_days, user_ids, location_codes)
+        )
+    plans, days, overdue = expand_occurrences(next_days, period_days, start_day, end_day, effective_day(now))
+    return Forecast(start_day, end_day, instrument_ids, type_ids, user_ids, location_codes,
+                    list(locations), plans, days, overdue, next_days)
@@ -0,0 +1,314 @@
+import heapq
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+from date_utils import from_day_number, to_day_number
+from .forecast import NO_USER, forecast_maintenance
+
+logger = logging.getLogger(__name__)
+
+# Who is qualified for each maintenance type: the responsible users of
+# operational instruments with a plan of that type, and whoever performed
+# it recently
+QUALIFIED_QUERY = """
+    SELECT ims.maintenance_type_id, i.responsible_user_id
+    FROM instrument_maintenance_schedule ims
+    JOIN instruments i ON i.id = ims.instrument_id
+    JOIN users u ON u.id = i.responsible_user_id
+    WHERE i.status = 'Operational'
+    UNION
+    SELECT mr.maintenance_type_id, mr.performed_by
+    FROM maintenance_records mr
+    JOIN users u ON u.id = mr.performed_by
+    WHERE mr.maintenance_date >= ?
+"""
+
+ASSIGNMENTS_QUERY = """
+    SELECT instrument_id, maintenance_type_id, due_date, scheduled_date, user_id
+    FROM maintenance_assignments
+"""
+
+UPSERT_ASSIGNMENT = """
+    INSERT INTO maintenance_assignments
+        (instrument_id, maintenance_type_id, due_date, scheduled_date, user_id)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT (instrument_id, maintenance_type_id, due_date) DO UPDATE SET
+        scheduled_date = excluded.scheduled_date,
+        user_id = excluded.user_id,
+        assigned_at = CURRENT_TIMESTAMP
+"""
+
+# Assignments of occurrences that are past and no longer expected
+PRUNE_ASSIGNMENTS = """
+    DELETE FROM maintenance_assignments
+    WHERE due_date < ? AND NOT EXISTS (
+        SELECT 1 FROM maintenance_status ms
+        WHERE ms.instrument_id = maintenance_assignments.instrument_id
+          AND ms.maintenance_type_id = maintenance_assignments.maintenance_type_id
+          AND ms.next_due = maintenance_assignments.due_date
+    )
+"""
+
+class Reassignment:
+    """A suggested change of who does one maintenance occurrence, or when"""
+
+    def __init__(self, instrument_id: int, maintenance_type_id: int, due_date: str,
+                 scheduled_date: str, from_user_id: Optional[int], to_user_id: int):
+        self.instrument_id = instrument_id
+        self.maintenance_type_id = maintenance_type_id
+        # The date maintenance_status expects, earlier than today when overdue
+        self.due_date = due_date
+        self.scheduled_date = scheduled_date
+        # None when the instrument has no responsible user
+        self.from_user_id = from_user_id
+        self.to_user_id = to_user_id
+
+    def __repr__(self):
+        return (f"Reassignment({self.instrument_id}, {self.maintenance_type_id}, {self.due_date!r}, "
+                f"{self.scheduled_date!r}, {self.from_user_id}, {self.to_user_id})")
+
+class WorkloadPlan:
+    """
+    Weekly maintenance load per user before and after balancing.
+
+    before and after hold one row per week of week_starts with a column
+    per user of user_ids. Occurrences nobody is qualified for are counted
+    in unassigned instead.
+    """
+
+    def __init__(self, week_starts: List[str], user_ids: List[int], before: List[List[int]],
+                 after: List[List[int]], reassignments: List[Reassignment],
+                 unassigned_before: int, unassigned: int):
+        self.week_starts = week_starts
+        self.user_ids = user_ids
+        self.before = before
+        self.after = after
+        self.reassignments = reassignments
+        self.unassigned_before = unassigned_before
+        self.unassigned = unassigned
+
+    @staticmethod
+    def _peak(rows: List[List[int]]) -> int:
+        return max((max(row) for row in rows if row), default=0)
+
+    @property
+    def peak_before(self) -> int:
+        """Most occurrences one user had in one week"""
+        return self._peak(self.before)
+
+    @property
+    def peak_after(self) -> int:
+        return self._peak(self.after)
+
+    def user_loads(self) -> List[Dict]:
+        """Total and busiest week of each user, before and after, as dictionaries"""
+        loads = []
+        for column, user_id in enumerate(self.user_ids):
+            before = [row[column] for row in self.before]
+            after = [row[column] for row in self.after]
+            loads.append({
+                'user_id': user_id,
+                'total_before': sum(before),
+                'total_after': sum(after),
+                'peak_before': max(before, default=0),
+                'peak_after': max(after, default=0)
+            })
+        return loads
+
+class WorkloadBalancer:
+    """
+    Spreads forecast maintenance occurrences evenly over qualified users.
+
+    Every occurrence starts with its current assignee: the user it was
+    assigned to for that due date, otherwise the instrument's responsible
+    user. Balancing then repeatedly takes the busiest (week, user) cell
+    from a heap and moves one of its occurrences to a qualified user, or
+    to another week within tolerance_days of the due date, whose load is
+    at least two lower. Every move lowers the sum of squared loads, so
+    balancing ends, and an occurrence is only moved when that strictly
+    evens the load, which keeps reassignments few. Occurrences without an
+    assignee go to the least loaded qualified user first.
+
+    Suggestions are applied with apply(), all in one transaction.
+    """
+
+    WEEKS = 12
+    TOLERANCE_DAYS = 3
+    # How far back performing a maintenance type counts as qualification
+    QUALIFICATION_DAYS = 730
+
+    def __init__(self, db_manager, weeks: Optional[int] = None, tolerance_days: Optional[int] = None):
+        self.db = db_manager
+        self.weeks = weeks or self.WEEKS
+        self.tolerance_days = self.TOLERANCE_DAYS if tolerance_days is None else tolerance_days
+
+    def qualified_users(self, now: Optional[datetime] = None) -> Dict[int, Set[int]]:
+        """Ids of the users qualified for each maintenance type, by type id"""
+        since = ((now or datetime.now()) - timedelta(days=self.QUALIFICATION_DAYS)).strftime('%Y-%m-%d')
+        qualified = defaultdict(set)
+        for type_id, user_id in self.db.iter_query(QUALIFIED_QUERY, (since,)):
+            qualified[type_id].add(user_id)
+        return qualified
+
+    def assignments(self) -> Dict[Tuple[int, int, int], Tuple[int, int]]:
+        """Stored assignments as {(instrument, type, due day): (user id, scheduled day)}"""
+        return {(instrument_id, type_id, to_day_number(due)): (user_id, to_day_number(scheduled))
+                for instrument_id, type_id, due, scheduled, user_id in self.db.iter_query(ASSIGNMENTS_QUERY)}
+
+    def suggest(self, now: Optional[datetime] = None) -> WorkloadPlan:
+        """
+        Suggest reassignments that even out the weekly load per user.
+
+        Args:
+            now: Start of the horizon, defaults to datetime.now()
+
+        Returns:
+            WorkloadPlan: The loads before and after and the reassignments
+        """
+        now = now or datetime.now()
+        forecast = forecast_maintenance(self.db, now=now, weeks=self.weeks)
+        qualified = self.qualified_users(now)
+        stored = self.assignments()
+        first_monday = forecast.first_week_day
+        week_count = forecast.week_count
+        last_day = forecast.end_day - 1
+        tolerance = self.tolerance_days
+
+        # One entry per occurrence: plan, due day, user and scheduled day
+        plans, due_days, users, days = [], [], [], []
+        for plan, day, overdue in zip(forecast.plans, forecast.days, forecast.overdue):
+            plan, day = int(plan), int(day)
+            due_day = int(forecast.next_days[plan]) if overdue else day
+            user_id = int(forecast.user_ids[plan])
+            assigned = stored.get((int(forecast.instrument_ids[plan]), int(forecast.type_ids[plan]), due_day))
+            if assigned is not None:
+                user_id, scheduled = assigned
+                if scheduled is not None and forecast.start_day <= scheduled <= last_day:
+                    day = scheduled
+            plans.append(plan)
+            due_days.append(due_day)
+            users.append(user_id)
+            days.append(day)
+        original = list(zip(users, days))
+
+        user_ids = sorted(set(users).union(*qualified.values()) - {NO_USER})
+        column_of = {user_id: column for column, user_id in enumerate(user_ids)}
+        loads = [[0] * len(user_ids) for _ in range(week_count)]
+        for user_id, day in zip(users, days):
+            if user_id != NO_USER:
+                loads[(day - first_monday) // 7][column_of[user_id]] += 1
+        before = [row[:] for row in loads]
+        type_columns = {type_id: sorted(column_of[user_id] for user_id in type_users)
+                        for type_id, type_users in qualified.items()}
+
+        def window(index):
+            # Weeks the occurrence may move to, and its due (or catch-up) day
+            day = max(due_days[index], forecast.start_day)
+            low, high = max(day - tolerance, forecast.start_day), min(day + tolerance, last_day)
+            return (low - first_monday) // 7, (high - first_monday) // 7, day
+
+        def best_target(index, below):
+            # Least loaded (week, column) the occurrence may move to with a
+            # load under below; same week and lower ids break ties
+            first_week, last_week, day = window(index)
+            home = (day - first_monday) // 7
+            columns = type_columns.get(int(forecast.type_ids[plans[index]]))
+            best = None
+            if columns:
+                for week in range(first_week, last_week + 1):
+                    # Columns are in user id order, so min() picks the lowest id on ties
+                    column = min(columns, key=loads[week].__getitem__)
+                    key = (loads[week][column], week != home, user_ids[column], week)
+                    if key[0] < below and (best is None or key < best[0]):
+                        best = (key, week, column)
+            return best
+
+        def move(index, week, column):
+            # The due day if it falls in the week, otherwise the closest day of it
+            day = window(index)[2]
+            monday = first_monday + 7 * week
+            users[index] = user_ids[column]
+            days[index] = min(max(day, monday), monday + 6)
+            loads[week][column] += 1
+
+        # Occurrences without an assignee go first, earliest first
+        unassigned_before = 0
+        for index in sorted((i for i, user_id in enumerate(users) if user_id == NO_USER), key=due_days.__getitem__):
+            unassigned_before += 1
+            target = best_target(index, float('inf'))
+            if target is not None:
+                move(index, target[1], target[2])
+
+        # Occurrences of each (week, column) cell grouped by type and
+        # weeks they may move to, so a busy cell is searched once per group
+        cells = defaultdict(lambda: defaultdict(list))
+        for index, (user_id, day) in enumerate(zip(users, days)):
+            if user_id != NO_USER:
+                first_week, last_week, due = window(index)
+                group = (int(forecast.type_ids[plans[index]]), first_week, last_week, (due - first_monday) // 7)
+                cells[((day - first_monday) // 7, column_of[user_id])][group].append(index)
+
+        moved = True
+        while moved:
+            # A move can open room for cells that found none earlier, so
+            # repeat until a whole pass moves nothing
+            moved = False
+            heap = [(-loads[week][column], week, column) for week, column in cells if loads[week][column] > 1]
+            heapq.heapify(heap)
+            while heap:
+                load, week, column = heapq.heappop(heap)
+                if -load != loads[week][column]:
+                    continue
+                best = None
+                for group, members in cells[(week, column)].items():
+                    if members:
+                        target = best_target(members[-1], -load - 1)
+                        if target is not None and (best is None or target[0] < best[0][0]):
+                            best = (target, group)
+                if best is None:
+                    continue
+                (_, to_week, to_column), group = best
+                index = cells[(week, column)][group].pop()
+                loads[week][column] -= 1
+                move(index, to_week, to_column)
+                cells[(to_week, to_column)][group].append(index)
+                heapq.heappush(heap, (-loads[week][column], week, column))
+                heapq.heappush(heap, (-loads[to_week][to_column], to_week, to_column))
+                moved = True
+
+        reassignments = []
+        for index, (user_id, day) in enumerate(zip(users, days)):
+            if user_id != NO_USER and (user_id, day) != original[index]:
+                plan = plans[index]
+                from_user = original[index][0]
+                reassignments.append(Reassignment(
+                    int(forecast.instrument_ids[plan]), int(forecast.type_ids[plan]),
+                    from_day_number(due_days[index]), from_day_number(day),
+                    None if from_user == NO_USER else from_user, user_id))
+        reassignments.sort(key=lambda r: (r.scheduled_date, r.instrument_id, r.maintenance_type_id))
+        plan = WorkloadPlan(forecast.week_starts(), user_ids, before, loads, reassignments,
+                            unassigned_before, users.count(NO_USER))
+        logger.info(f"Workload plan: {len(reassignments)} reassignments, "
+                    f"peak weekly load {plan.peak_before} -> {plan.peak_after}")
+        return plan
+
+    def apply(self, reassignments: List[Reassignment], now: Optional[datetime] = None) -> int:
+        """
+        Store reassignments in one transaction.
+
+        Either every reassignment is stored or, on error, none is.
+        Assignments of past occurrences that are no longer due are removed
+        at the same time.
+
+        Returns:
+            int: Number of assignments stored
+        """
+        today = (now or datetime.now()).strftime('%Y-%m-%d')
+        rows = [(r.instrument_id, r.maintenance_type_id, r.due_date, r.scheduled_date, r.to_user_id)
+                for r in reassignments]
+        with self.db.transaction() as conn:
+            conn.executemany(UPSERT_ASSIGNMENT, rows)
+            conn.execute(PRUNE_ASSIGNMENTS, (today,))
+        logger.info(f"Stored {len(rows)} maintenance assignments")
+        return len(rows)
@@ -1,17 +1,64 @@
-from PyQt6.QtWidgets import QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QMessageBox
-from PyQt6.QtCore import Qt, pyqtSignal
+from PyQt6.QtWidgets import QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QLineEdit, QMessageBox, QProgressBar
+from PyQt6.QtCore import Qt, pyqtSignal, QTimer
 from PyQt6.QtGui import QFont
 from database import Database
 from ..base.base_table import BaseTable
+from ..base.data_loader import DataLoader
 
 class BaseDataWindow(QMainWindow):
+    """
+    Window that shows data loaded in the background.
+
+    Subclasses implement fetch_data, which runs on a worker thread and must
+    only query the database, and display_data, which fills the widgets on
+    the GUI thread. load_data starts a load and drops the previous one if
+    it is still running.
+
+    Subclasses list the tables they show in watched_tables. The window then
+    skips the reload on show when none of them changed, and reloads by
+    itself while visible when another window or workstation changes them.
+
+    Subclasses that also implement fetch_changes and display_changes are
+    updated row by row from change_log: load_changes fetches and repaints
+    only the rows changed since the last load.
+
+    Subclasses that call create_search_box reload as the user types; their
+    queries filter on search_text, the stripped box text.
+    """
     back_signal = pyqtSignal()  # Signal to go back to main menu
 
+    # Shown with the error when fetch_data fails
+    load_error_message = 'Failed to load data'
+
+    # Tables whose changes make the shown data stale
+    watched_tables = ()
+
+    # Milliseconds between checks for changes while the window is visible
+    POLL_INTERVAL_MS = 2000
+
+    # Changed rows above which a full reload is cheaper than merging
+    MAX_MERGED_ROWS = 500
+
+    # Milliseconds without typing before the search box reloads
+    SEARCH_DELAY_MS = 250
+
     def __init__(self, user_id, is_admin, db=None):
         super().__init__()
         self.user_id = user_id
         self.is_admin = is_admin
-        self.db = db if db else Database()
+        self.db = db if db else Database.shared()
+        self.watcher = self.db.change_watcher()
+        self.loaded_versions = None
+        self.loaded_seq = None
+        self.search_text = ''
+        self.poll_timer = QTimer(self)
+        self.poll_timer.setInterval(self.POLL_INTERVAL_MS)
+        self.poll_timer.timeout.connect(self.reload_if_changed)
+        self.loader = DataLoader(self)
+        self.loader.loaded.connect(self._on_loaded)
+        self.loader.failed.connect(self.show_load_error)
+        self.loader.busy_changed.connect(self.set_busy)
+        self.init_busy_indicator()
         self.init_ui()
         self.apply_dark_theme()
 
@@ -38,6 +85,13 @@ class BaseDataWindow(QMainWindow):
             QLabel {
                 color: #ffffff;
             }
+            QLineEdit {
+                background-color: #2d2d2d;
+                color: #ffffff;
+                border: 1px solid #3d3d3d;
+                padding: 5px;
+                border-radius: 3px;
+            }
         """)
 
     def init_ui(self):
@@ -49,12 +103,53 @@ class BaseDataWindow(QMainWindow):
         self.main_layout.setSpacing(10)
         self.main_layout.setContentsMargins(10, 10, 10, 10)
 
+    def init_busy_indicator(self):
+        """Create the loading indicator in the status bar"""
+        self.busy_indicator = QProgressBar()
+        self.busy_indicator.setRange(0, 0)  # Indeterminate
+        self.busy_indicator.setMaximumWidth(150)
+        self.busy_indicator.setMaximumHeight(12)
+        self.busy_indicator.setTextVisible(False)
+        self.statusBar().addPermanentWidget(self.busy_indicator)
+        self.statusBar().hide()
+
+    def set_busy(self, busy):
+        """Show or hide the loading indicator"""
+        if busy:
+            self.statusBar().showMessage('Loading...')
+            self.statusBar().show()
+        else:
+            self.statusBar().clearMessage()
+            self.statusBar().hide()
+
     def create_title(self, title_text):
         """Create a title label"""
         title = QLabel(title_text)
         title.setFont(QFont('Arial', 16, QFont.Weight.Bold))
         self.main_layout.addWidget(title)
 
+    def create_search_box(self, placeholder):
+        """Create a search box that reloads the data as the user types"""
+        self.search_box = QLineEdit()
+        self.search_box.setPlaceholderText(placeholder)
+        self.search_box.setClearButtonEnabled(True)
+        # Wait for a pause in typing so each keystroke does not start a query
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(self.SEARCH_DELAY_MS)
+        self.search_timer.timeout.connect(self.apply_search)
+        self.search_box.textChanged.connect(self.search_timer.start)
+        self.search_box.returnPressed.connect(self.apply_search)
+        self.main_layout.addWidget(self.search_box)
+
+    def apply_search(self):
+        """Reload the data for the text in the search box"""
+        self.search_timer.stop()
+        text = self.search_box.text().strip()
+        if text != self.search_text:
+            self.search_text = text
+            self.load_data()
+
     def create_button_layout(self, buttons_config):
         """Create a standardized button layout"""
         button_layout = QHBoxLayout()
@@ -90,7 +185,26 @@ class BaseDataWindow(QMainWindow):
     def showEvent(self, event):
         """Handle window show event"""
         super().showEvent(event)
-        self.load_data()  # Always refresh data when window is shown
+        self.reload_if_changed()  # Refresh data only if it changed while hidden
+        if self.watched_tables:
+            self.poll_timer.start()
+
+    def hideEvent(self, event):
+        """Drop any load in flight when navigating away"""
+        self.poll_timer.stop()
+        self.loader.cancel()
+        super().hideEvent(event)
+
+    def has_changes(self):
+        """Return True if the shown data may be stale"""
+        if self.loaded_versions is None or not self.watched_tables:
+            return True
+        return self.watcher.versions(self.watched_tables) != self.loaded_versions
+
+    def reload_if_changed(self):
+        """Update unless the watched tables are unchanged or a load is running"""
+        if not self.loader.is_busy() and self.has_changes():
+            self.load_changes()
 
     def update_user(self, user_id, is_admin):
         """Update the user information when returning to this view"""
@@ -99,5 +213,69 @@ class BaseDataWindow(QMainWindow):
         self.load_data()  # Force reload when user is updated
 
     def load_data(self):
-        """Load data - to be overridden by subclasses"""
-        pass 
\ No newline at end of file
+        """Start loading data in the background"""
+        self.loader.start(self._fetch_with_versions)
+
+    def load_changes(self):
+        """Start loading just the rows changed since the last load"""
+        if self.loaded_seq is None:
+            self.load_data()
+            return
+        seq = self.loaded_seq
+        self.loader.start(lambda: self._fetch_changes(seq))
+
+    def _fetch_with_versions(self):
+        # Read the versions first: a write that lands during the fetch
+        # leaves them behind, so it triggers another reload, never a miss
+        versions = self.watcher.versions(self.watched_tables)
+        seq = self.watcher.latest_change()
+        return 'full', versions, seq, self.fetch_data()
+
+    def _fetch_changes(self, since):
+        versions = self.watcher.versions(self.watched_tables)
+        seq, changes = self.watcher.changes_since(since, self.watched_tables)
+        if changes is not None and sum(map(len, changes.values())) <= self.MAX_MERGED_ROWS:
+            data = self.fetch_changes(changes)
+            if data is not None:
+                return 'changes', versions, seq, data
+        # Too far behind the journal, or the window cannot merge changes
+        return 'full', versions, seq, self.fetch_data()
+
+    def _on_loaded(self, result):
+        kind, versions, seq, data = result
+        self.loaded_versions = versions
+        self.loaded_seq = seq
+        if kind == 'changes':
+            self.display_changes(data)
+        else:
+            self.display_data(data)
+
+    def fetch_data(self):
+        """Query the data to show - to be overridden by subclasses; runs on a worker thread"""
+        return None
+
+    def display_data(self, data):
+        """Show the fetched data - to be overridden by subclasses"""
+        pass
+
+    def fetch_changes(self, changes):
+        """
+        Query the rows affected by changes - to be overridden by subclasses;
+        runs on a worker thread.
+
+        Args:
+            changes (dict): Table name to the set of changed row ids, as
+                logged in change_log
+
+        Returns:
+            Data for display_changes, or None to reload everything
+        """
+        return None
+
+    def display_changes(self, data):
+        """Apply the data from fetch_changes - to be overridden by subclasses"""
+        pass
+
+    def show_load_error(self, message):
+        """Report a failed load"""
+        QMessageBox.warning(self, 'Error', f'{self.load_error_message}: {message}') 
\ No newline at end of file
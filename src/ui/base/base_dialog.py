@@ -4,9 +4,9 @@ from database import Database
 import logging
 
 class BaseDialog(QDialog):
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, db=None):
         super().__init__(parent)
-        self.db = parent.db if parent else Database()
+        self.db = db or getattr(parent, 'db', None) or Database.shared()
         self.setup_logging()
         self.init_ui()
         self.apply_dark_theme()
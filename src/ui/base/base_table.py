@@ -1,16 +1,36 @@
-from PyQt6.QtWidgets import (QTableWidget, QTableWidgetItem, QHeaderView, 
+from PyQt6.QtWidgets import (QTableView, QAbstractItemView, QHeaderView,
                             QWidget, QLabel, QMessageBox)
-from PyQt6.QtCore import Qt, pyqtSignal
+from PyQt6.QtCore import pyqtSignal
 from PyQt6.QtGui import QColor
+from .table_model import ColumnarTableModel
+from .status_delegate import StatusDelegate
 import logging
 
-class BaseTable(QTableWidget):
+class BaseTable(QTableView):
+    """Table view over a ColumnarTableModel"""
+
+    # Emitted with (row, column) when a cell is clicked
+    cellClicked = pyqtSignal(int, int)
+
+    # Rows measured when fitting column widths to their contents
+    RESIZE_PRECISION = 200
+
+    # Background and text colors for named row colors
+    ROW_COLORS = {
+        'red': ('#ff0000', None),
+        'yellow': ('#ffff00', '#333333'),
+        'green': ('#00ff00', None)
+    }
+
     def __init__(self, parent=None):
         super().__init__(parent)
+        self.table_model = ColumnarTableModel(parent=self)
+        self.setModel(self.table_model)
+        self.user_sorted = False
         self.setup_logging()
         self.init_table()
         self.apply_dark_theme()
-        self.highlighted_rows = set()
+        self.clicked.connect(lambda index: self.cellClicked.emit(index.row(), index.column()))
 
     def setup_logging(self):
         """Setup logging for the table"""
@@ -25,16 +45,17 @@ class BaseTable(QTableWidget):
     def apply_dark_theme(self):
         """Apply dark theme to the table"""
         self.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 background-color: #2d2d2d;
+                alternate-background-color: #252525;
                 color: #ffffff;
                 gridline-color: #3d3d3d;
                 border: 1px solid #3d3d3d;
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 5px;
             }
-            QTableWidget::item:selected {
+            QTableView::item:selected {
                 background-color: #0078d7;
             }
             QHeaderView::section {
@@ -55,14 +76,15 @@ class BaseTable(QTableWidget):
 
     def init_table(self):
         """Initialize table settings"""
-        # Enable sorting
+        # Enable sorting, keeping the query order until a header is clicked
         self.setSortingEnabled(True)
+        self.horizontalHeader().sectionClicked.connect(self._on_header_clicked)
         
         # Enable selection of entire rows
-        self.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        self.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
         
         # Enable single selection
-        self.setSelectionMode(QTableWidget.SelectionMode.SingleSelection)
+        self.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
         
         # Enable grid
         self.setShowGrid(True)
@@ -71,90 +93,92 @@ class BaseTable(QTableWidget):
         self.setWordWrap(True)
         
         # Disable editing
-        self.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
-
-    def highlight_row(self, row, color='red'):
-        """Highlight a specific row with a color"""
-        # Convert color name to hex if needed
-        color_map = {
-            'red': '#ff0000',
-            'yellow': '#ffff00',
-            'green': '#00ff00'
-        }
-        hex_color = color_map.get(color, color)
-        
-        # Add the row to highlighted set
-        self.highlighted_rows.add(row)
-        
-        # Apply highlighting to each cell in the row
-        for col in range(self.columnCount()):
-            item = self.item(row, col)
-            if item:
-                # Create a new item to ensure clean state
-                new_item = QTableWidgetItem(item.text())
-                new_item.setData(Qt.ItemDataRole.UserRole, item.data(Qt.ItemDataRole.UserRole))
-                
-                # Set the background color
-                new_item.setBackground(QColor(hex_color))
-                
-                # Set text color to dark grey if background is yellow
-                if hex_color == '#ffff00':
-                    new_item.setForeground(QColor('#333333'))
-                
-                # Replace the old item
-                self.setItem(row, col, new_item)
-        
-        # Force the row to be visible
-        self.scrollToItem(self.item(row, 0))
-        self.viewport().update()
+        self.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+
+        # Alternate row colors are painted by the view, not stored per cell
+        self.setAlternatingRowColors(True)
+
+        # Fixed row heights, so rows never need measuring
+        self.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.horizontalHeader().setResizeContentsPrecision(self.RESIZE_PRECISION)
+
+    def _on_header_clicked(self, column):
+        self.user_sorted = True
+
+    def set_status_colors(self, colors):
+        """
+        Color rows by their status code.
+
+        Args:
+            colors (dict): Status code to a color name from ROW_COLORS or a
+                hex background color; codes not listed keep the default colors
+        """
+        self.setItemDelegate(StatusDelegate(
+            {status: self.ROW_COLORS.get(color, (color, None)) for status, color in colors.items()},
+            self
+        ))
+
+    def set_row_status(self, row, status):
+        """Set the status code of a row, recoloring it"""
+        self.table_model.set_row_status(row, status)
 
     def clear_table(self):
         """Clear all rows from the table"""
-        self.highlighted_rows.clear()
-        self.setRowCount(0)
+        self.table_model.clear()
+
+    def set_rows(self, rows, row_ids=None, statuses=None):
+        """
+        Replace all rows at once.
+
+        Args:
+            rows (iterable): One sequence of cell values per row
+            row_ids (sequence, optional): One id per row, see get_row_id
+            statuses (sequence, optional): One status code per row, see set_status_colors
+        """
+        self.table_model.set_rows(rows, row_ids, statuses)
+        if self.user_sorted:
+            header = self.horizontalHeader()
+            self.table_model.sort(header.sortIndicatorSection(), header.sortIndicatorOrder())
+        self.resize_columns_to_content()
+
+    def merge_rows(self, rows_by_id, statuses=None, is_affected=None):
+        """
+        Apply changed rows without reloading the table.
+
+        New rows are appended, or placed by the current sort once a header
+        was clicked. See ColumnarTableModel.merge_rows.
+
+        Returns:
+            dict: Row index of every updated or inserted id
+        """
+        changed = self.table_model.merge_rows(rows_by_id, statuses, is_affected)
+        if self.user_sorted and changed:
+            header = self.horizontalHeader()
+            self.table_model.sort(header.sortIndicatorSection(), header.sortIndicatorOrder())
+            changed = {
+                self.get_row_id(row): row for row in range(self.table_model.rowCount())
+                if self.get_row_id(row) in changed
+            }
+        return changed
 
     def add_row(self, data, row_id=None):
         """Add a row to the table"""
-        row = self.rowCount()
-        self.insertRow(row)
-        
-        for col, value in enumerate(data):
-            if isinstance(value, QWidget):
-                # For QWidgets, set the cell widget
-                self.setCellWidget(row, col, value)
-            else:
-                # For regular values, create a QTableWidgetItem
-                item = QTableWidgetItem(str(value))
-                item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsEditable)  # Make read-only
-                
-                # Set alternating row colors
-                if row % 2 == 0:
-                    item.setBackground(QColor("#2d2d2d"))
-                else:
-                    item.setBackground(QColor("#252525"))
-                
-                self.setItem(row, col, item)
-        
-        if row_id is not None:
-            # Store the row_id in the first column's item
-            if isinstance(data[0], QWidget):
-                # If first column is a widget, create a hidden item for the ID
-                item = QTableWidgetItem()
-                item.setData(Qt.ItemDataRole.UserRole, row_id)
-                self.setItem(row, 0, item)
-            else:
-                # If first column is a regular item, just set the data
-                self.item(row, 0).setData(Qt.ItemDataRole.UserRole, row_id)
-        
-        # If this row was previously highlighted, reapply the highlight
-        if row in self.highlighted_rows:
-            self.highlight_row(row, 'yellow')
+        widgets = {col: value for col, value in enumerate(data) if isinstance(value, QWidget)}
+        row = self.table_model.append_row(
+            ['' if col in widgets else value for col, value in enumerate(data)], row_id
+        )
+        for col, widget in widgets.items():
+            # For QWidgets, set the cell widget
+            self.setIndexWidget(self.table_model.index(row, col), widget)
+
+    def set_column_color(self, column, color):
+        """Set the text color of a column"""
+        self.table_model.set_column_foreground(column, QColor(color))
 
     def set_headers(self, headers):
         """Set table headers"""
-        self.setColumnCount(len(headers))
-        self.setHorizontalHeaderLabels(headers)
-        self.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        self.table_model.set_headers(headers)
+        self.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
         self.horizontalHeader().setStretchLastSection(True)
 
     def create_clickable_label(self, text, callback):
@@ -164,14 +188,29 @@ class BaseTable(QTableWidget):
         label.mousePressEvent = callback
         return label
 
+    def get_row_id(self, row):
+        """Get the ID stored for a row"""
+        return self.table_model.row_id(row)
+
+    def get_cell_text(self, row, column):
+        """Get the text shown in a cell"""
+        return self.table_model.cell_text(row, column)
+
+    def get_selected_row(self):
+        """Get the index of the selected row, or None"""
+        rows = self.selectionModel().selectedRows()
+        if rows:
+            return rows[0].row()
+        return None
+
     def get_selected_row_id(self):
         """Get the ID of the selected row"""
-        selected_rows = self.selectedItems()
-        if selected_rows:
-            return self.item(selected_rows[0].row(), 0).data(Qt.ItemDataRole.UserRole)
+        row = self.get_selected_row()
+        if row is not None:
+            return self.get_row_id(row)
         return None
 
     def resize_columns_to_content(self):
         """Resize all columns to fit their content"""
+        # Measures at most RESIZE_PRECISION rows per column
         self.resizeColumnsToContents()
-        self.resizeRowsToContents() 
\ No newline at end of file
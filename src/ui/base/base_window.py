@@ -4,9 +4,9 @@ from database import Database
 import logging
 
 class BaseWindow(QMainWindow):
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, db=None):
         super().__init__(parent)
-        self.db = Database()
+        self.db = db or getattr(parent, 'db', None) or Database.shared()
         self.setup_logging()
         self.init_ui()
         self.apply_dark_theme()
@@ -107,9 +107,6 @@ class BaseWindow(QMainWindow):
 
     def closeEvent(self, event):
         """Handle window close event"""
-        try:
-            self.db.release_lock()
-            event.accept()
-        except Exception as e:
-            self.logger.error(f"Error during window close: {str(e)}")
-            event.accept() 
\ No newline at end of file
+        # The database session is shared with the rest of the application,
+        # so it stays open
+        event.accept() 
\ No newline at end of file
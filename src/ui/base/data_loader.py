@@ -0,0 +1,93 @@
+from PyQt6.QtCore import QObject, QThreadPool, QCoreApplication, QDeadlineTimer, pyqtSignal
+import logging
+
+class _LoadSignals(QObject):
+    """Carries a task's outcome from the worker thread back to the GUI thread"""
+    result = pyqtSignal(int, object)
+    error = pyqtSignal(int, str)
+
+class DataLoader(QObject):
+    """
+    Runs data fetches on a worker thread and delivers results on the GUI thread.
+
+    Only the latest load counts: starting a new one or calling cancel()
+    makes any earlier load stale. A stale load that is still queued returns
+    without fetching; one that is already running finishes, but its result
+    is discarded.
+
+    The fetch function must not touch widgets. Signals:
+        loaded(object): The data returned by the latest fetch
+        failed(str): The error message if the latest fetch raised
+        busy_changed(bool): True while a load is in flight
+    """
+    loaded = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    busy_changed = pyqtSignal(bool)
+
+    def __init__(self, parent=None, pool=None):
+        super().__init__(parent)
+        self.pool = pool or QThreadPool.globalInstance()
+        self._generation = 0
+        self._busy = False
+        self._signals = _LoadSignals()
+        self._signals.result.connect(self._on_result)
+        self._signals.error.connect(self._on_error)
+        self.logger = logging.getLogger(__name__)
+
+    def is_busy(self):
+        """Return True while a load is in flight"""
+        return self._busy
+
+    def start(self, fetch):
+        """Start loading with fetch, cancelling any load in flight"""
+        self._generation += 1
+        generation = self._generation
+        self.pool.start(lambda: self._run(fetch, generation))
+        if not self._busy:
+            self._busy = True
+            self.busy_changed.emit(True)
+
+    def cancel(self):
+        """Make the load in flight stale"""
+        if self._busy:
+            self._generation += 1
+            self._busy = False
+            self.busy_changed.emit(False)
+
+    def _run(self, fetch, generation):
+        """Run fetch on a pool thread"""
+        if generation != self._generation:
+            # Went stale while queued
+            return
+        try:
+            data = fetch()
+        except Exception as e:
+            self.logger.exception("Background load failed")
+            self._signals.error.emit(generation, str(e))
+        else:
+            self._signals.result.emit(generation, data)
+
+    def _finish(self, generation):
+        """Return True if generation is the current load, marking it done"""
+        if generation != self._generation or not self._busy:
+            return False
+        self._busy = False
+        self.busy_changed.emit(False)
+        return True
+
+    def _on_result(self, generation, data):
+        if self._finish(generation):
+            self.loaded.emit(data)
+
+    def _on_error(self, generation, message):
+        if self._finish(generation):
+            self.failed.emit(message)
+
+    def wait(self, timeout_ms=5000):
+        """Process events until the load in flight is delivered; returns False on timeout"""
+        deadline = QDeadlineTimer(timeout_ms)
+        while self.is_busy() and not deadline.hasExpired():
+            QCoreApplication.processEvents()
+            self.pool.waitForDone(10)
+        QCoreApplication.processEvents()
+        return not self.is_busy()
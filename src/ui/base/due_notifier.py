@@ -0,0 +1,83 @@
+from datetime import datetime
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+from src.scheduling import DueQueue
+from .data_loader import DataLoader
+
+class DueNotifier(QObject):
+    """
+    Tells the UI when maintenance becomes due soon or overdue.
+
+    Loads a DueQueue on a worker thread, then keeps it current on the GUI
+    thread: a poll of the change watcher applies new records and edited
+    plans, and a single-shot timer fires just after the next status change
+    instead of rescanning the schedule periodically.
+
+    Signals:
+        changed(): The counts changed; read them with counts()
+        became_due(list): (instrument_id, maintenance_type_id, next_due_day,
+            status code) of each item that just became due soon or overdue
+    """
+    changed = pyqtSignal()
+    became_due = pyqtSignal(list)
+
+    # Milliseconds between checks for committed changes
+    POLL_INTERVAL_MS = 2000
+
+    # Longest timer interval; the timer is re-armed after it
+    MAX_TIMER_MS = 6 * 3600 * 1000
+
+    # Milliseconds after midnight that the timer fires, so the change has taken effect
+    TIMER_MARGIN_MS = 1000
+
+    def __init__(self, db, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self.queue = None
+        self.poll_timer = QTimer(self)
+        self.poll_timer.setInterval(self.POLL_INTERVAL_MS)
+        self.poll_timer.timeout.connect(self.refresh)
+        self.due_timer = QTimer(self)
+        self.due_timer.setSingleShot(True)
+        self.due_timer.timeout.connect(self.refresh)
+        self.loader = DataLoader(self)
+        self.loader.loaded.connect(self._on_loaded)
+
+    def start(self):
+        """Load the queue and start watching"""
+        self.loader.start(lambda: DueQueue(self.db))
+
+    def stop(self):
+        self.loader.cancel()
+        self.poll_timer.stop()
+        self.due_timer.stop()
+
+    def counts(self, user_id=None):
+        """Overdue and due soon counts, (0, 0) until the queue is loaded"""
+        return self.queue.counts(user_id) if self.queue else (0, 0)
+
+    def _on_loaded(self, queue):
+        self.queue = queue
+        self.poll_timer.start()
+        self._arm_timer()
+        self.changed.emit()
+
+    def refresh(self):
+        """Apply committed changes and the passage of time"""
+        if self.queue is None:
+            return
+        now = datetime.now()
+        moved = self.queue.refresh(now)
+        changes = self.queue.pop_changes(now)
+        self._arm_timer()
+        if changes:
+            self.became_due.emit(changes)
+        if moved or changes:
+            self.changed.emit()
+
+    def _arm_timer(self):
+        next_change = self.queue.next_change()
+        if next_change is None:
+            self.due_timer.stop()
+            return
+        delay = (next_change - datetime.now()).total_seconds() * 1000 + self.TIMER_MARGIN_MS
+        self.due_timer.start(int(min(max(delay, 0), self.MAX_TIMER_MS)))
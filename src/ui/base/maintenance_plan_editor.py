@@ -0,0 +1,117 @@
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QComboBox, QLineEdit, QPushButton
+from PyQt6.QtGui import QIntValidator
+
+class MaintenancePlanEditor(QWidget):
+    """Editable list of maintenance plans: one (type, period in weeks) row per plan"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.maintenance_types = []
+        self.rows = []
+        self.editable = True
+        self.init_ui()
+
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(8)
+
+        self.rows_layout = QVBoxLayout()
+        self.rows_layout.setSpacing(8)
+        layout.addLayout(self.rows_layout)
+
+        self.add_button = QPushButton('Add Maintenance Plan')
+        self.add_button.clicked.connect(lambda: self.add_plan())
+        layout.addWidget(self.add_button)
+        layout.addStretch()
+
+    def set_maintenance_types(self, maintenance_types):
+        """Set the selectable types, a list of rows with 'id' and 'name'"""
+        self.maintenance_types = list(maintenance_types)
+        for row in self.rows:
+            self._fill_type_combo(row['type'], row['type'].currentData())
+
+    def _fill_type_combo(self, combo, selected_id=None):
+        combo.clear()
+        for maintenance_type in self.maintenance_types:
+            combo.addItem(maintenance_type['name'], maintenance_type['id'])
+        index = combo.findData(selected_id)
+        if index >= 0:
+            combo.setCurrentIndex(index)
+
+    def add_plan(self, maintenance_type_id=None, period_weeks=None):
+        """Append a plan row"""
+        widget = QWidget()
+        row_layout = QHBoxLayout(widget)
+        row_layout.setContentsMargins(0, 0, 0, 0)
+
+        type_input = QComboBox()
+        self._fill_type_combo(type_input, maintenance_type_id)
+        period_input = QLineEdit('' if period_weeks is None else str(period_weeks))
+        period_input.setPlaceholderText('Period (weeks)')
+        period_input.setValidator(QIntValidator(1, 9999))
+        period_input.setMaximumWidth(120)
+        remove_button = QPushButton('Remove')
+
+        row_layout.addWidget(type_input, 1)
+        row_layout.addWidget(period_input)
+        row_layout.addWidget(remove_button)
+
+        row = {'widget': widget, 'type': type_input, 'period': period_input, 'remove': remove_button}
+        remove_button.clicked.connect(lambda: self.remove_plan(row))
+        self.rows.append(row)
+        self.rows_layout.addWidget(widget)
+        self._apply_editable(row)
+
+    def remove_plan(self, row):
+        """Remove a plan row"""
+        self.rows.remove(row)
+        self.rows_layout.removeWidget(row['widget'])
+        row['widget'].deleteLater()
+
+    def set_plans(self, plans):
+        """Replace the rows with plans, rows with 'maintenance_type_id' and 'period_weeks'"""
+        for row in list(self.rows):
+            self.remove_plan(row)
+        for plan in plans:
+            self.add_plan(plan['maintenance_type_id'], plan['period_weeks'])
+
+    def plans(self):
+        """
+        Get the plans in display order.
+
+        Returns:
+            list: Dictionaries with maintenance_type_id and period_weeks
+
+        Raises:
+            ValueError: If a period is not a whole number or a type is used twice
+        """
+        plans = []
+        seen = set()
+        for row in self.rows:
+            type_id = row['type'].currentData()
+            if type_id is None:
+                continue
+            if type_id in seen:
+                raise ValueError(f"Maintenance type '{row['type'].currentText()}' is used in more than one plan")
+            seen.add(type_id)
+
+            period = row['period'].text().strip()
+            try:
+                period_weeks = int(period) if period else None
+            except ValueError:
+                raise ValueError('Please enter valid numbers for maintenance periods')
+            plans.append({'maintenance_type_id': type_id, 'period_weeks': period_weeks})
+        return plans
+
+    def set_editable(self, editable):
+        """Enable or disable editing of the plans"""
+        self.editable = editable
+        self.add_button.setVisible(editable)
+        for row in self.rows:
+            self._apply_editable(row)
+
+    def _apply_editable(self, row):
+        row['type'].setEnabled(self.editable)
+        row['period'].setReadOnly(not self.editable)
+        row['remove'].setVisible(self.editable)
@@ -0,0 +1,36 @@
+from PyQt6.QtWidgets import QStyledItemDelegate
+from PyQt6.QtGui import QBrush, QColor, QPalette
+from PyQt6.QtCore import Qt
+from .table_model import STATUS_ROLE
+
+class StatusDelegate(QStyledItemDelegate):
+    """
+    Paints each row in the colors of its status code.
+
+    The status is read from STATUS_ROLE while a cell is painted, so setting
+    it costs nothing until the row is on screen. A column text color set on
+    the model wins over the status text color.
+    """
+
+    def __init__(self, colors, parent=None):
+        """
+        Args:
+            colors (dict): Status code to a (background, text) pair of colors;
+                the text color may be None to keep the default
+        """
+        super().__init__(parent)
+        self.colors = {
+            status: (QBrush(QColor(background)), QColor(foreground) if foreground else None)
+            for status, (background, foreground) in colors.items()
+        }
+
+    def initStyleOption(self, option, index):
+        super().initStyleOption(option, index)
+        colors = self.colors.get(index.data(STATUS_ROLE))
+        if colors is None:
+            return
+
+        background, foreground = colors
+        option.backgroundBrush = background
+        if foreground is not None and index.data(Qt.ItemDataRole.ForegroundRole) is None:
+            option.palette.setColor(QPalette.ColorRole.Text, foreground)
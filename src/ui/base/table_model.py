@@ -0,0 +1,290 @@
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex
+
+# Role holding a row's status code, painted by StatusDelegate
+STATUS_ROLE = Qt.ItemDataRole.UserRole + 1
+
+class ColumnarTableModel(QAbstractTableModel):
+    """
+    Table model that stores its cells column by column.
+
+    Each column is one list of display strings and each row has one id, so a
+    load costs a few lists however many cells there are. Qt only asks the
+    model for the cells it paints, which keeps painting proportional to the
+    visible rows.
+
+    The row id is returned for Qt.ItemDataRole.UserRole and the row's status
+    code for STATUS_ROLE, in every column.
+
+    Cells are read-only unless their column is passed to
+    set_editable_columns; edited rows are reported by edited_row_ids.
+    """
+
+    def __init__(self, headers=None, parent=None):
+        super().__init__(parent)
+        self._headers = list(headers or [])
+        self._columns = [[] for _ in self._headers]
+        self._row_ids = []
+        self._row_statuses = []
+        self._column_foregrounds = {}
+        self._editable_columns = set()
+        self._edited_row_ids = set()
+
+    def set_headers(self, headers):
+        """Set the column headers, clearing the rows"""
+        self.beginResetModel()
+        self._headers = list(headers)
+        self._clear()
+        self.endResetModel()
+
+    def _clear(self):
+        self._columns = [[] for _ in self._headers]
+        self._row_ids = []
+        self._row_statuses = []
+        self._edited_row_ids = set()
+
+    def clear(self):
+        """Remove all rows"""
+        self.beginResetModel()
+        self._clear()
+        self.endResetModel()
+
+    def set_rows(self, rows, row_ids=None, statuses=None):
+        """
+        Replace all rows.
+
+        Args:
+            rows (iterable): One sequence of cell values per row
+            row_ids (sequence, optional): One id per row
+            statuses (sequence, optional): One status code per row
+        """
+        rows = list(rows)
+        self.beginResetModel()
+        # Transpose into one list per column
+        self._columns = [
+            ['' if value is None else str(value) for value in column]
+            for column in zip(*rows)
+        ]
+        while len(self._columns) < len(self._headers):
+            self._columns.append([''] * len(rows))
+        self._row_ids = list(row_ids) if row_ids is not None else [None] * len(rows)
+        self._row_statuses = list(statuses) if statuses is not None else [None] * len(rows)
+        self._edited_row_ids = set()
+        self.endResetModel()
+
+    def append_row(self, values, row_id=None, status=None):
+        """Append one row"""
+        row = len(self._row_ids)
+        self.beginInsertRows(QModelIndex(), row, row)
+        values = list(values) + [''] * (len(self._columns) - len(values))
+        for column, value in zip(self._columns, values):
+            column.append('' if value is None else str(value))
+        self._row_ids.append(row_id)
+        self._row_statuses.append(status)
+        self.endInsertRows()
+        return row
+
+    def append_rows(self, rows, row_ids=None):
+        """Append several rows with one insert notification"""
+        rows = list(rows)
+        if not rows:
+            return
+        first = len(self._row_ids)
+        self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        width = len(self._columns)
+        for values in rows:
+            values = list(values) + [''] * (width - len(values))
+            for column, value in zip(self._columns, values):
+                column.append('' if value is None else str(value))
+        self._row_ids.extend(row_ids if row_ids is not None else [None] * len(rows))
+        self._row_statuses.extend([None] * len(rows))
+        self.endInsertRows()
+
+    def merge_rows(self, rows_by_id, statuses=None, is_affected=None):
+        """
+        Update, insert and remove rows by id, notifying views row by row.
+
+        Args:
+            rows_by_id (dict): Current cell values per row id; None removes the row
+            statuses (dict, optional): Status code per row id in rows_by_id
+            is_affected (callable, optional): Called with each existing row id;
+                rows it accepts that are missing from rows_by_id are removed
+
+        Returns:
+            dict: Row index of every updated or inserted id
+        """
+        statuses = statuses or {}
+        removed = [
+            row for row, row_id in enumerate(self._row_ids)
+            if (row_id in rows_by_id and rows_by_id[row_id] is None)
+            or (row_id not in rows_by_id and is_affected is not None and is_affected(row_id))
+        ]
+        for row in reversed(removed):
+            self.beginRemoveRows(QModelIndex(), row, row)
+            for cells in self._columns:
+                del cells[row]
+            del self._row_ids[row]
+            del self._row_statuses[row]
+            self.endRemoveRows()
+
+        rows = {row_id: row for row, row_id in enumerate(self._row_ids)}
+        changed = {}
+        for row_id, values in rows_by_id.items():
+            if values is None:
+                continue
+            row = rows.get(row_id)
+            if row is None:
+                changed[row_id] = self.append_row(values, row_id, statuses.get(row_id))
+                continue
+            values = list(values) + [''] * (len(self._columns) - len(values))
+            for cells, value in zip(self._columns, values):
+                cells[row] = '' if value is None else str(value)
+            self._row_statuses[row] = statuses.get(row_id)
+            self.dataChanged.emit(self.index(row, 0), self.index(row, len(self._columns) - 1))
+            changed[row_id] = row
+        return changed
+
+    def set_column_foreground(self, column, color):
+        """Set the text color of a whole column; it wins over status colors"""
+        self._column_foregrounds[column] = color
+
+    def set_row_status(self, row, status):
+        """Set the status code of a row"""
+        self._row_statuses[row] = status
+        self.dataChanged.emit(self.index(row, 0), self.index(row, len(self._columns) - 1),
+                              [STATUS_ROLE])
+
+    def row_status(self, row):
+        """Get the status code of a row"""
+        return self._row_statuses[row]
+
+    def set_editable_columns(self, columns):
+        """Let the views edit the cells of these columns"""
+        self._editable_columns = set(columns)
+
+    def edited_row_ids(self):
+        """Get the ids of the rows edited since they were loaded"""
+        return set(self._edited_row_ids)
+
+    def row_id(self, row):
+        """Get the id stored for a row"""
+        if 0 <= row < len(self._row_ids):
+            return self._row_ids[row]
+        return None
+
+    def cell_text(self, row, column):
+        """Get the display text of a cell"""
+        return self._columns[column][row]
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._row_ids)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._headers)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+
+        row = index.row()
+        column = index.column()
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+            return self._columns[column][row]
+        if role == Qt.ItemDataRole.UserRole:
+            return self._row_ids[row]
+        if role == STATUS_ROLE:
+            return self._row_statuses[row]
+        if role == Qt.ItemDataRole.ForegroundRole:
+            return self._column_foregrounds.get(column)
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            if 0 <= section < len(self._headers):
+                return self._headers[section]
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemFlag.NoItemFlags
+        flags = Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
+        if index.column() in self._editable_columns:
+            flags |= Qt.ItemFlag.ItemIsEditable
+        return flags
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if (role != Qt.ItemDataRole.EditRole or not index.isValid()
+                or index.column() not in self._editable_columns):
+            return False
+        row = index.row()
+        self._columns[index.column()][row] = '' if value is None else str(value)
+        self._edited_row_ids.add(self._row_ids[row])
+        self.dataChanged.emit(index, index)
+        return True
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        """Sort the rows by the display text of a column"""
+        if not 0 <= column < len(self._columns):
+            return
+
+        self.layoutAboutToBeChanged.emit()
+        values = self._columns[column]
+        ordering = sorted(range(len(values)), key=values.__getitem__,
+                          reverse=order == Qt.SortOrder.DescendingOrder)
+        self._columns = [[cells[i] for i in ordering] for cells in self._columns]
+        self._row_ids = [self._row_ids[i] for i in ordering]
+        self._row_statuses = [self._row_statuses[i] for i in ordering]
+
+        # Keep selections and other persistent indexes on the same rows
+        new_rows = [0] * len(ordering)
+        for new_row, old_row in enumerate(ordering):
+            new_rows[old_row] = new_row
+        old_indexes = self.persistentIndexList()
+        self.changePersistentIndexList(
+            old_indexes,
+            [self.index(new_rows[index.row()], index.column()) for index in old_indexes]
+        )
+        self.layoutChanged.emit()
+
+class PagedTableModel(ColumnarTableModel):
+    """
+    ColumnarTableModel that loads its rows a page at a time.
+
+    Views call fetchMore as they scroll towards the last loaded row, so
+    opening a view costs one page however many rows there are. Pages come
+    from fetch_page(after, limit), which returns (rows, row_ids, key): key
+    identifies the last row returned and is passed back as after to get the
+    next page, as the keyset *_page repository methods expect. A page
+    shorter than limit is the last one.
+
+    The view's own sorting is not supported, since it would only reorder
+    the loaded pages.
+    """
+
+    def __init__(self, headers, fetch_page, page_size=100, parent=None):
+        super().__init__(headers, parent)
+        self.fetch_page = fetch_page
+        self.page_size = page_size
+        self._after = None
+        self._exhausted = True
+
+    def reload(self):
+        """Drop the loaded rows and load the first page"""
+        self.clear()
+        self._after = None
+        self._exhausted = False
+        self.fetchMore()
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self._exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        if not self.canFetchMore(parent):
+            return
+        rows, row_ids, key = self.fetch_page(self._after, self.page_size)
+        rows = list(rows)
+        self._exhausted = len(rows) < self.page_size
+        self._after = key
+        self.append_rows(rows, row_ids)
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        pass
@@ -2,12 +2,14 @@ from PyQt6.QtWidgets import (QFormLayout, QLineEdit, QComboBox,
                              QDateEdit, QSpinBox, QDialog, QVBoxLayout, QHBoxLayout, QGroupBox, QLabel, QPushButton)
 from PyQt6.QtCore import QDate
 from ..base.base_dialog import BaseDialog
+from ..base.maintenance_plan_editor import MaintenancePlanEditor
+from src.database import InstrumentRepository, MaintenanceTypeRepository, UserRepository
 from datetime import datetime
 from PyQt6.QtWidgets import QApplication
 
 class AddInstrumentDialog(BaseDialog):
-    def __init__(self, parent=None):
-        super().__init__(parent)  # This will call init_ui() from BaseDialog
+    def __init__(self, parent=None, db=None):
+        super().__init__(parent, db)  # This will call init_ui() from BaseDialog
         self.setWindowTitle('Add New Instrument')
         self.setMinimumWidth(700)
         
@@ -96,22 +98,12 @@ class AddInstrumentDialog(BaseDialog):
 
         # --- Maintenance Configuration Section ---
         maintenance_group = QGroupBox('Maintenance Configuration')
-        maintenance_form = QFormLayout()
-        maintenance_group.setLayout(maintenance_form)  # Set the layout on the group box
+        maintenance_layout = QVBoxLayout()
+        maintenance_group.setLayout(maintenance_layout)  # Set the layout on the group box
         
-        self.maintenance_type1 = QComboBox()
-        self.maintenance_type2 = QComboBox()
-        self.maintenance_type3 = QComboBox()
-        self.period1_input = QLineEdit()
-        self.period2_input = QLineEdit()
-        self.period3_input = QLineEdit()
+        self.plan_editor = MaintenancePlanEditor()
         self.load_maintenance_types()
-        maintenance_form.addRow('Maintenance Type 1:', self.maintenance_type1)
-        maintenance_form.addRow('Period 1 (weeks):', self.period1_input)
-        maintenance_form.addRow('Maintenance Type 2:', self.maintenance_type2)
-        maintenance_form.addRow('Period 2 (weeks):', self.period2_input)
-        maintenance_form.addRow('Maintenance Type 3:', self.maintenance_type3)
-        maintenance_form.addRow('Period 3 (weeks):', self.period3_input)
+        maintenance_layout.addWidget(self.plan_editor)
 
         # --- Place both sections side by side ---
         top_layout = QHBoxLayout()
@@ -169,14 +161,13 @@ class AddInstrumentDialog(BaseDialog):
             return
 
         try:
-            cursor = self.db.conn.cursor()
-            cursor.execute("""
-                INSERT INTO instruments (
-                    name, model, serial_number, location, status,
-                    brand, responsible_user_id, date_start_operating,
-                    maintenance_1, period_1, maintenance_2, period_2, maintenance_3, period_3
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
+            plans = self.plan_editor.plans()
+        except ValueError as e:
+            self.show_error('Error', str(e))
+            return
+
+        try:
+            InstrumentRepository(self.db).create_instrument(
                 name_text,
                 model_text,
                 serial_text,
@@ -185,23 +176,15 @@ class AddInstrumentDialog(BaseDialog):
                 brand_text,
                 self.responsible_user_input.currentData(),
                 self.date_start_input.date().toPyDate(),
-                self.maintenance_type1.currentData(),
-                self.period1_input.text() or None,
-                self.maintenance_type2.currentData(),
-                self.period2_input.text() or None,
-                self.maintenance_type3.currentData(),
-                self.period3_input.text() or None
-            ))
-            self.db.conn.commit()
+                plans
+            )
             super().accept()
         except Exception as e:
             self.show_error('Error', str(e))
 
     def load_users(self):
         try:
-            cursor = self.db.conn.cursor()
-            cursor.execute("SELECT id, username FROM users ORDER BY username")
-            users = cursor.fetchall()
+            users = UserRepository(self.db).get_all_users()
             self.responsible_user_input.clear()
             self.responsible_user_input.addItem('Not assigned', None)
             for user in users:
@@ -211,13 +194,7 @@ class AddInstrumentDialog(BaseDialog):
 
     def load_maintenance_types(self):
         try:
-            cursor = self.db.conn.cursor()
-            cursor.execute("SELECT id, name FROM maintenance_types ORDER BY name")
-            types = cursor.fetchall()
-            for combo in [self.maintenance_type1, self.maintenance_type2, self.maintenance_type3]:
-                combo.clear()
-                combo.addItem('None', None)
-                for t in types:
-                    combo.addItem(t['name'], t['id'])
+            types = MaintenanceTypeRepository(self.db).get_all_maintenance_types()
+            self.plan_editor.set_maintenance_types(types)
         except Exception as e:
             self.show_error('Error', f'Failed to load maintenance types: {str(e)}') 
\ No newline at end of file
@@ -5,8 +5,8 @@ from ..base.base_dialog import BaseDialog
 import bcrypt
 
 class AddUserDialog(BaseDialog):
-    def __init__(self, parent=None):
-        super().__init__(parent)  # This will call init_ui() from BaseDialog
+    def __init__(self, parent=None, db=None):
+        super().__init__(parent, db)  # This will call init_ui() from BaseDialog
         self.setWindowTitle('Add User')
         self.setMinimumWidth(400)
         
@@ -107,32 +107,30 @@ class AddUserDialog(BaseDialog):
             return
 
         try:
-            cursor = self.db.conn.cursor()
-            
             # Check if username already exists
-            cursor.execute("SELECT id FROM users WHERE username = ?", (self.username_input.text(),))
-            if cursor.fetchone():
+            if self.db.get_single_row("SELECT id FROM users WHERE username = ?", (self.username_input.text(),)):
                 self.show_error('Error', 'Username already exists')
                 return
 
             # Check if email already exists
-            cursor.execute("SELECT id FROM users WHERE email = ?", (self.email_input.text(),))
-            if cursor.fetchone():
+            if self.db.get_single_row("SELECT id FROM users WHERE email = ?", (self.email_input.text(),)):
                 self.show_error('Error', 'Email already exists')
                 return
 
+            # Hash before taking the write lease, bcrypt is slow on purpose
+            hashed_password = self.hash_password(self.password_input.text())
+
             # Create new user
-            cursor.execute("""
+            self.db.execute_insert("""
                 INSERT INTO users (username, email, password, is_admin)
                 VALUES (?, ?, ?, ?)
             """, (
                 self.username_input.text(),
                 self.email_input.text(),
-                self.hash_password(self.password_input.text()),
+                hashed_password,
                 self.is_admin_checkbox.isChecked()
             ))
             
-            self.db.conn.commit()
             super().accept()
             
         except Exception as e:
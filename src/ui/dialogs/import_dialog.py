@@ -0,0 +1,106 @@
+from PyQt6.QtWidgets import (QFormLayout, QComboBox, QLineEdit, QPushButton, QHBoxLayout,
+                             QVBoxLayout, QLabel, QProgressBar, QFileDialog)
+from PyQt6.QtCore import pyqtSignal
+from ..base.base_dialog import BaseDialog
+from ..base.data_loader import DataLoader
+from src.database import BulkImporter
+
+class ImportDialog(BaseDialog):
+    """
+    Imports instruments or maintenance history from a CSV or JSONL file.
+
+    The import runs on a worker thread and reports its progress; rejected
+    rows are listed in an error file next to the input.
+    """
+    # Rows read and estimated total, emitted from the import thread
+    progress_changed = pyqtSignal(int, int)
+
+    # Combo box label to BulkImporter method name
+    KINDS = {
+        'Instruments': 'import_instruments',
+        'Maintenance history': 'import_maintenance_records',
+    }
+
+    def __init__(self, parent=None, db=None):
+        super().__init__(parent, db)
+        self.setWindowTitle('Import Data')
+        self.setMinimumWidth(500)
+        self.loader = DataLoader(self)
+        self.loader.loaded.connect(self.show_result)
+        self.loader.failed.connect(self.show_failure)
+        self.loader.busy_changed.connect(self.set_busy)
+        self.progress_changed.connect(self.show_progress)
+
+    def init_ui(self):
+        main_layout = QVBoxLayout()
+        self.setLayout(main_layout)
+
+        form_layout = QFormLayout()
+        form_layout.setSpacing(10)
+        self.kind_input = QComboBox()
+        self.kind_input.addItems(self.KINDS)
+        self.file_input = QLineEdit()
+        browse_button = QPushButton('Browse...')
+        browse_button.clicked.connect(self.browse)
+        file_layout = QHBoxLayout()
+        file_layout.addWidget(self.file_input)
+        file_layout.addWidget(browse_button)
+        form_layout.addRow('Import:', self.kind_input)
+        form_layout.addRow('File:', file_layout)
+        main_layout.addLayout(form_layout)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.hide()
+        main_layout.addWidget(self.progress_bar)
+        self.result_label = QLabel()
+        self.result_label.setWordWrap(True)
+        main_layout.addWidget(self.result_label)
+
+        button_layout = QHBoxLayout()
+        self.import_button = QPushButton('Import')
+        self.import_button.clicked.connect(self.start_import)
+        self.close_button = QPushButton('Close')
+        self.close_button.clicked.connect(self.reject)
+        button_layout.addWidget(self.import_button)
+        button_layout.addWidget(self.close_button)
+        main_layout.addLayout(button_layout)
+
+    def browse(self):
+        """Pick the file to import"""
+        path, _ = QFileDialog.getOpenFileName(
+            self, 'Select File', '', 'Import files (*.csv *.jsonl *.ndjson);;All files (*)'
+        )
+        if path:
+            self.file_input.setText(path)
+
+    def start_import(self):
+        """Import the selected file on a worker thread"""
+        path = self.file_input.text().strip()
+        if not path:
+            self.show_error('Error', 'Please select a file to import')
+            return
+        method = getattr(BulkImporter(self.db), self.KINDS[self.kind_input.currentText()])
+        self.result_label.clear()
+        self.progress_bar.setRange(0, 0)
+        self.loader.start(lambda: method(path, progress=self.progress_changed.emit))
+
+    def set_busy(self, busy):
+        """Lock the dialog while importing"""
+        self.import_button.setEnabled(not busy)
+        self.close_button.setEnabled(not busy)
+        self.progress_bar.setVisible(busy)
+
+    def show_progress(self, rows_read, total):
+        self.progress_bar.setRange(0, total)
+        self.progress_bar.setValue(rows_read)
+
+    def show_result(self, result):
+        self.result_label.setText(str(result))
+
+    def show_failure(self, message):
+        self.show_error('Import Failed', f'Nothing was imported: {message}')
+
+    def reject(self):
+        # The import holds the write transaction until it finishes
+        if not self.loader.is_busy():
+            super().reject()
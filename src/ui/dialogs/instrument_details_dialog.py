@@ -1,5 +1,6 @@
 from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-                            QLabel, QPushButton, QTableWidget, QTableWidgetItem,
+                            QLabel, QPushButton, QTableWidget, QTableWidgetItem, QTableView,
+                            QAbstractItemView,
                             QDialog, QLineEdit, QComboBox, QTextEdit, QMessageBox,
                             QFormLayout, QGroupBox, QHeaderView, QSizePolicy)
 from PyQt6.QtCore import Qt, QDate
@@ -7,22 +8,31 @@ from PyQt6.QtGui import QFont, QColor
 from database import Database
 from datetime import datetime
 from date_utils import (
-    calculate_next_maintenance,
+    calculate_next_maintenance_days,
+    format_day_numbers,
     format_date_for_display,
     format_date_for_db,
     get_maintenance_status
 )
 from .add_maintenance_dialog import AddMaintenanceDialog
+from ..base.maintenance_plan_editor import MaintenancePlanEditor
+from ..base.table_model import PagedTableModel
+from src.database import InstrumentRepository, MaintenanceRepository, MaintenanceTypeRepository, UserRepository
 
 class InstrumentDetailsDialog(QDialog):
-    def __init__(self, instrument_id, user_id, is_admin, parent=None):
+    def __init__(self, instrument_id, user_id, is_admin, parent=None, db=None):
         super().__init__(parent)
         self.instrument_id = instrument_id
         self.user_id = user_id
         self.is_admin = is_admin
-        self.db = Database()
-        self.init_ui()
+        # Reuse the caller's database session instead of opening a new one
+        self.db = db or getattr(parent, 'db', None) or Database.shared()
+        self.instruments = InstrumentRepository(self.db)
+        self.maintenance = MaintenanceRepository(self.db)
+        # Style the empty dialog first so Qt polishes each widget once as it
+        # is created instead of restyling the whole tree afterwards
         self.apply_dark_theme()
+        self.init_ui()
         self.load_instrument_data()
         self.set_edit_mode(False)  # Start in read-only mode
 
@@ -51,19 +61,19 @@ class InstrumentDetailsDialog(QDialog):
             QPushButton:pressed {
                 background-color: #0a3d91;
             }
-            QTableWidget {
+            QTableView {
                 background-color: #2d2d2d;
                 color: #ffffff;
                 gridline-color: #3d3d3d;
                 border: 1px solid #3d3d3d;
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 5px;
             }
-            QTableWidget::item:selected {
+            QTableView::item:selected {
                 background-color: #0d47a1;
             }
-            QTableWidget::item:alternate {
+            QTableView::item:alternate {
                 background-color: #252525;
             }
             QHeaderView::section {
@@ -150,26 +160,15 @@ class InstrumentDetailsDialog(QDialog):
         # Maintenance Configuration Group
         maintenance_group = QGroupBox("Maintenance Configuration")
         maintenance_group.setFont(QFont('Arial', 11, QFont.Weight.Bold))
-        maintenance_layout = QFormLayout()
+        maintenance_layout = QVBoxLayout()
         
-        # Create maintenance type and period inputs
-        self.maintenance_type1 = QComboBox()
-        self.maintenance_type2 = QComboBox()
-        self.maintenance_type3 = QComboBox()
-        self.period1_input = QLineEdit()
-        self.period2_input = QLineEdit()
-        self.period3_input = QLineEdit()
-
-        # Load maintenance types into dropdowns
+        # One row per maintenance plan
+        self.plan_editor = MaintenancePlanEditor()
+
+        # Load maintenance types into the plan editor
         self.load_maintenance_types()
 
-        # Add maintenance fields
-        maintenance_layout.addRow('Maintenance Type 1:', self.maintenance_type1)
-        maintenance_layout.addRow('Period 1 (weeks):', self.period1_input)
-        maintenance_layout.addRow('Maintenance Type 2:', self.maintenance_type2)
-        maintenance_layout.addRow('Period 2 (weeks):', self.period2_input)
-        maintenance_layout.addRow('Maintenance Type 3:', self.maintenance_type3)
-        maintenance_layout.addRow('Period 3 (weeks):', self.period3_input)
+        maintenance_layout.addWidget(self.plan_editor)
 
         maintenance_group.setLayout(maintenance_layout)
         top_layout.addWidget(maintenance_group)
@@ -205,14 +204,16 @@ class InstrumentDetailsDialog(QDialog):
         history_group.setFont(QFont('Arial', 11, QFont.Weight.Bold))
         history_layout = QVBoxLayout()
 
-        # Create history table
-        self.history_table = QTableWidget()
-        self.history_table.setColumnCount(4)
-        self.history_table.setHorizontalHeaderLabels(['Date', 'Type', 'Performed By', 'Notes'])
+        # Create history table; records are loaded a page at a time as it scrolls
+        self.history_model = PagedTableModel(['Date', 'Type', 'Performed By', 'Notes'], self.fetch_history_page)
+        self.history_model.set_editable_columns([2, 3])  # Performed By, Notes
+        self.history_table = QTableView()
+        self.history_table.setModel(self.history_model)
         self.history_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
-        self.history_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.history_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.history_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
         self.history_table.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
-        self.history_table.setVerticalScrollMode(QTableWidget.ScrollMode.ScrollPerPixel)
+        self.history_table.setVerticalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
         self.history_table.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
 
         # Set fixed height for history table (6 rows)
@@ -275,18 +276,13 @@ class InstrumentDetailsDialog(QDialog):
         self.date_start_input.setReadOnly(not edit_mode)
         
         # Enable/disable maintenance configuration
-        self.maintenance_type1.setEnabled(edit_mode)
-        self.maintenance_type2.setEnabled(edit_mode)
-        self.maintenance_type3.setEnabled(edit_mode)
-        self.period1_input.setReadOnly(not edit_mode)
-        self.period2_input.setReadOnly(not edit_mode)
-        self.period3_input.setReadOnly(not edit_mode)
+        self.plan_editor.set_editable(edit_mode)
 
         # Set history table edit triggers based on edit mode
         if edit_mode:
-            self.history_table.setEditTriggers(QTableWidget.EditTrigger.DoubleClicked)
+            self.history_table.setEditTriggers(QAbstractItemView.EditTrigger.DoubleClicked)
         else:
-            self.history_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+            self.history_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
 
         # Show/hide appropriate buttons
         self.edit_button.setVisible(not edit_mode)
@@ -304,14 +300,7 @@ class InstrumentDetailsDialog(QDialog):
             status = self.status_input.currentText()
             responsible_user_id = self.responsible_user.currentData()
             date_start = self.date_start_input.text().strip()
-            
-            # Get maintenance types and periods
-            maint_type1 = self.maintenance_type1.currentData()
-            maint_type2 = self.maintenance_type2.currentData()
-            maint_type3 = self.maintenance_type3.currentData()
-            period1 = self.period1_input.text().strip()
-            period2 = self.period2_input.text().strip()
-            period3 = self.period3_input.text().strip()
+
 
             # Validate required fields
             if not all([name, model, serial, location, brand, date_start]):
@@ -326,91 +315,77 @@ class InstrumentDetailsDialog(QDialog):
                 QMessageBox.warning(self, 'Error', 'Please enter date in YYYY-MM-DD format')
                 return
 
-            # Validate maintenance periods
+            # Validate maintenance plans
             try:
-                if period1:
-                    period1 = int(period1)
-                if period2:
-                    period2 = int(period2)
-                if period3:
-                    period3 = int(period3)
-            except ValueError:
-                QMessageBox.warning(self, 'Error', 'Please enter valid numbers for maintenance periods')
+                plans = self.plan_editor.plans()
+            except ValueError as e:
+                QMessageBox.warning(self, 'Error', str(e))
                 return
 
             # Start transaction
-            cursor = self.db.conn.cursor()
+            with self.db.transaction() as conn:
+                cursor = conn.cursor()
             
-            # Update instrument
-            cursor.execute("""
-                UPDATE instruments SET
-                    name = ?, model = ?, serial_number = ?, location = ?,
-                    status = ?, brand = ?, responsible_user_id = ?,
-                    date_start_operating = ?, maintenance_1 = ?, period_1 = ?,
-                    maintenance_2 = ?, period_2 = ?, maintenance_3 = ?,
-                    period_3 = ?
-                WHERE id = ?
-            """, (
-                name, model, serial, location, status, brand,
-                responsible_user_id, date_start, maint_type1, period1,
-                maint_type2, period2, maint_type3, period3,
-                self.instrument_id
-            ))
-
-            # Save changes to maintenance history
-            for row in range(self.history_table.rowCount()):
-                date = self.history_table.item(row, 0).text()
-                maint_type = self.history_table.item(row, 1).text()
-                performed_by = self.history_table.item(row, 2).text()
-                notes = self.history_table.item(row, 3).text()
-
-                # Get maintenance type ID
-                cursor.execute("SELECT id FROM maintenance_types WHERE name = ?", (maint_type,))
-                maint_type_result = cursor.fetchone()
-                if not maint_type_result:
-                    continue
-                maint_type_id = maint_type_result['id']
-
-                # Get user ID
-                cursor.execute("SELECT id FROM users WHERE username = ?", (performed_by,))
-                user_result = cursor.fetchone()
-                if not user_result:
-                    continue
-                user_id = user_result['id']
-
-                # Update maintenance record
+                # Update instrument
                 cursor.execute("""
-                    UPDATE maintenance_records 
-                    SET notes = ?, performed_by = ?
-                    WHERE instrument_id = ? 
-                    AND maintenance_date = ?
-                    AND maintenance_type_id = ?
-                """, (notes, user_id, self.instrument_id, date, maint_type_id))
-
-            self.db.conn.commit()
+                    UPDATE instruments SET
+                        name = ?, model = ?, serial_number = ?, location = ?,
+                        status = ?, brand = ?, responsible_user_id = ?,
+                        date_start_operating = ?
+                    WHERE id = ?
+                """, (
+                    name, model, serial, location, status, brand,
+                    responsible_user_id, date_start,
+                    self.instrument_id
+                ))
+
+                # Update maintenance plans (joins this transaction)
+                self.instruments.set_maintenance_plans(self.instrument_id, plans)
+
+                # Save the edited maintenance history rows
+                for row in range(self.history_model.rowCount()):
+                    record_id = self.history_model.row_id(row)
+                    if record_id not in self.history_model.edited_row_ids():
+                        continue
+                    performed_by = self.history_model.cell_text(row, 2)
+                    notes = self.history_model.cell_text(row, 3)
+
+                    # Get user ID
+                    cursor.execute("SELECT id FROM users WHERE username = ?", (performed_by,))
+                    user_result = cursor.fetchone()
+                    if not user_result:
+                        continue
+                    user_id = user_result['id']
+
+                    # Update maintenance record
+                    cursor.execute("""
+                        UPDATE maintenance_records 
+                        SET notes = ?, performed_by = ?
+                        WHERE id = ?
+                    """, (notes, user_id, record_id))
+
             self.set_edit_mode(False)  # Return to read-only mode
             self.load_instrument_data()  # Refresh the data
             
-            # Notify parent to refresh the list
-            if hasattr(self.parent(), 'load_instruments'):
-                self.parent().load_instruments()
+            self.notify_parent()
 
         except Exception as e:
-            self.db.conn.rollback()
             QMessageBox.warning(self, 'Error', f'Failed to save changes: {str(e)}')
 
+    def notify_parent(self):
+        """Let the window that opened the dialog update the changed rows"""
+        if hasattr(self.parent(), 'load_changes'):
+            self.parent().load_changes()
+
     def load_instrument_data(self):
         try:
-            cursor = self.db.conn.cursor()
-            
             # Load General Information
-            cursor.execute("""
+            instrument = self.db.get_single_row("""
                 SELECT i.*, u.username as responsible_username
                 FROM instruments i
                 LEFT JOIN users u ON i.responsible_user_id = u.id
                 WHERE i.id = ?
             """, (self.instrument_id,))
-            instrument = cursor.fetchone()
 
             if instrument:
                 self.name_input.setText(instrument['name'])
@@ -436,98 +411,47 @@ class InstrumentDetailsDialog(QDialog):
                 if index >= 0:
                     self.responsible_user.setCurrentIndex(index)
 
-                # Set maintenance types and periods
-                if instrument['maintenance_1']:
-                    index = self.maintenance_type1.findData(instrument['maintenance_1'])
-                    if index >= 0:
-                        self.maintenance_type1.setCurrentIndex(index)
-                if instrument['maintenance_2']:
-                    index = self.maintenance_type2.findData(instrument['maintenance_2'])
-                    if index >= 0:
-                        self.maintenance_type2.setCurrentIndex(index)
-                if instrument['maintenance_3']:
-                    index = self.maintenance_type3.findData(instrument['maintenance_3'])
-                    if index >= 0:
-                        self.maintenance_type3.setCurrentIndex(index)
-
-                self.period1_input.setText(str(instrument['period_1']) if instrument['period_1'] else '')
-                self.period2_input.setText(str(instrument['period_2']) if instrument['period_2'] else '')
-                self.period3_input.setText(str(instrument['period_3']) if instrument['period_3'] else '')
+                # Set maintenance plans
+                self.plan_editor.set_plans(self.instruments.get_maintenance_plans(self.instrument_id))
 
             # Store current column widths
             schedule_widths = [self.schedule_table.columnWidth(i) for i in range(self.schedule_table.columnCount())]
-            history_widths = [self.history_table.columnWidth(i) for i in range(self.history_table.columnCount())]
+            history_widths = [self.history_table.columnWidth(i) for i in range(self.history_model.columnCount())]
 
             # Load maintenance schedule
-            cursor.execute("""
-                SELECT 
-                    mt1.name as type_name_1,
-                    i.period_1,
-                    (SELECT MAX(maintenance_date) FROM maintenance_records 
-                     WHERE instrument_id = ? AND maintenance_type_id = i.maintenance_1) as last_maintenance_1,
-                    mt2.name as type_name_2,
-                    i.period_2,
-                    (SELECT MAX(maintenance_date) FROM maintenance_records 
-                     WHERE instrument_id = ? AND maintenance_type_id = i.maintenance_2) as last_maintenance_2,
-                    mt3.name as type_name_3,
-                    i.period_3,
-                    (SELECT MAX(maintenance_date) FROM maintenance_records 
-                     WHERE instrument_id = ? AND maintenance_type_id = i.maintenance_3) as last_maintenance_3
-                FROM instruments i
-                LEFT JOIN maintenance_types mt1 ON i.maintenance_1 = mt1.id
-                LEFT JOIN maintenance_types mt2 ON i.maintenance_2 = mt2.id
-                LEFT JOIN maintenance_types mt3 ON i.maintenance_3 = mt3.id
-                WHERE i.id = ?
-            """, (self.instrument_id, self.instrument_id, self.instrument_id, self.instrument_id))
-            schedule = cursor.fetchone()
-
-            if schedule:
-                # Create rows for each maintenance type that exists
-                rows = []
-                if schedule['type_name_1']:
-                    rows.append((schedule['type_name_1'], schedule['period_1'], schedule['last_maintenance_1']))
-                if schedule['type_name_2']:
-                    rows.append((schedule['type_name_2'], schedule['period_2'], schedule['last_maintenance_2']))
-                if schedule['type_name_3']:
-                    rows.append((schedule['type_name_3'], schedule['period_3'], schedule['last_maintenance_3']))
-
-                self.schedule_table.setRowCount(len(rows))
-                for i, (type_name, period, last_maintenance) in enumerate(rows):
-                    # Calculate next maintenance date
-                    next_maintenance = calculate_next_maintenance(last_maintenance, period)
-                    
-                    for col, value in enumerate([
-                        type_name,
-                        str(period),
-                        str(last_maintenance or 'Never'),
-                        str(next_maintenance or 'N/A')
-                    ]):
-                        item = QTableWidgetItem(value)
-                        item.setTextAlignment(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter)
-                        self.schedule_table.setItem(i, col, item)
-
-            # Load maintenance history
-            cursor.execute("""
-                SELECT mr.maintenance_date, mt.name as type_name, u.username as performed_by, mr.notes
-                FROM maintenance_records mr
-                JOIN maintenance_types mt ON mr.maintenance_type_id = mt.id
-                JOIN users u ON mr.performed_by = u.id
-                WHERE mr.instrument_id = ?
-                ORDER BY mr.maintenance_date DESC
+            rows = self.db.execute_query("""
+                SELECT mt.name as type_name, ims.period_weeks, ms.last_date, ms.last_day
+                FROM instrument_maintenance_schedule ims
+                JOIN maintenance_types mt ON ims.maintenance_type_id = mt.id
+                LEFT JOIN maintenance_status ms ON ms.instrument_id = ims.instrument_id
+                    AND ms.maintenance_type_id = ims.maintenance_type_id
+                WHERE ims.instrument_id = ?
+                ORDER BY ims.position
             """, (self.instrument_id,))
-            history = cursor.fetchall()
 
-            self.history_table.setRowCount(len(history))
-            for i, record in enumerate(history):
+            # Calculate next maintenance dates for all plans at once
+            next_dates = format_day_numbers(calculate_next_maintenance_days(
+                [row['last_day'] for row in rows],
+                [row['period_weeks'] for row in rows]
+            ))
+
+            self.schedule_table.setRowCount(len(rows))
+            for i, (row, next_maintenance) in enumerate(zip(rows, next_dates)):
+                period = row['period_weeks']
+                last_maintenance = row['last_date']
+
                 for col, value in enumerate([
-                    format_date_for_display(record['maintenance_date']),
-                    record['type_name'],
-                    record['performed_by'],
-                    record['notes']
+                    row['type_name'],
+                    str(period),
+                    str(last_maintenance or 'Never'),
+                    str(next_maintenance or 'N/A')
                 ]):
-                    item = QTableWidgetItem(str(value))
+                    item = QTableWidgetItem(value)
                     item.setTextAlignment(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter)
-                    self.history_table.setItem(i, col, item)
+                    self.schedule_table.setItem(i, col, item)
+
+            # Load the first page of maintenance history
+            self.history_model.reload()
 
             # Restore column widths
             for i, width in enumerate(schedule_widths):
@@ -538,15 +462,28 @@ class InstrumentDetailsDialog(QDialog):
         except Exception as e:
             QMessageBox.warning(self, 'Error', f'Failed to load instrument data: {str(e)}')
 
+    def fetch_history_page(self, after, limit):
+        """Get one page of maintenance history rows for the history model"""
+        records = self.maintenance.get_maintenance_page_by_instrument(self.instrument_id, after, limit)
+        rows = [
+            [
+                format_date_for_display(record['maintenance_date']),
+                record['maintenance_type_name'],
+                record['performed_by_username'],
+                record['notes']
+            ]
+            for record in records
+        ]
+        key = (records[-1]['maintenance_date'], records[-1]['id']) if records else after
+        return rows, [record['id'] for record in records], key
+
     def is_responsible_user(self):
         try:
-            cursor = self.db.conn.cursor()
-            cursor.execute("""
+            result = self.db.get_single_row("""
                 SELECT responsible_user_id 
                 FROM instruments 
                 WHERE id = ?
             """, (self.instrument_id,))
-            result = cursor.fetchone()
             return result and result['responsible_user_id'] == self.user_id
         except Exception:
             return False
@@ -556,6 +493,7 @@ class InstrumentDetailsDialog(QDialog):
             dialog = AddMaintenanceDialog(self.instrument_id, self.user_id, self)
             if dialog.exec() == QDialog.DialogCode.Accepted:
                 self.load_instrument_data()  # Refresh the data
+                self.notify_parent()
         except Exception as e:
             QMessageBox.critical(self, 'Error', f'Failed to add maintenance record: {str(e)}')
 
@@ -563,7 +501,7 @@ class InstrumentDetailsDialog(QDialog):
         """Delete the selected maintenance record"""
         try:
             # Get selected row
-            selected_rows = self.history_table.selectedItems()
+            selected_rows = self.history_table.selectionModel().selectedRows()
             if not selected_rows:
                 QMessageBox.warning(self, 'Warning', 'Please select a maintenance record to delete')
                 return
@@ -572,8 +510,9 @@ class InstrumentDetailsDialog(QDialog):
             row = selected_rows[0].row()
             
             # Get the maintenance date and type from the selected row
-            date = self.history_table.item(row, 0).text()
-            maint_type = self.history_table.item(row, 1).text()
+            record_id = self.history_model.row_id(row)
+            date = self.history_model.cell_text(row, 0)
+            maint_type = self.history_model.cell_text(row, 1)
             
             # Confirm deletion
             reply = QMessageBox.question(
@@ -585,33 +524,21 @@ class InstrumentDetailsDialog(QDialog):
             )
             
             if reply == QMessageBox.StandardButton.Yes:
-                cursor = self.db.conn.cursor()
-                
                 # Delete the record
-                cursor.execute("""
-                    DELETE FROM maintenance_records 
-                    WHERE instrument_id = ? 
-                    AND maintenance_date = ?
-                    AND maintenance_type_id = (
-                        SELECT id FROM maintenance_types WHERE name = ?
-                    )
-                """, (self.instrument_id, date, maint_type))
+                self.maintenance.delete_maintenance_record(record_id)
                 
-                self.db.conn.commit()
                 self.load_instrument_data()  # Refresh the data
+                self.notify_parent()
                 
                 QMessageBox.information(self, 'Success', 'Maintenance record deleted successfully')
                 
         except Exception as e:
-            self.db.conn.rollback()
             QMessageBox.warning(self, 'Error', f'Failed to delete maintenance record: {str(e)}')
 
     def load_users(self):
         """Load users into the responsible_user dropdown"""
         try:
-            cursor = self.db.conn.cursor()
-            cursor.execute("SELECT id, username FROM users ORDER BY username")
-            users = cursor.fetchall()
+            users = UserRepository(self.db).get_all_users()
             
             self.responsible_user.clear()
             for user in users:
@@ -620,17 +547,10 @@ class InstrumentDetailsDialog(QDialog):
             self.show_error('Error', f'Failed to load users: {str(e)}')
 
     def load_maintenance_types(self):
-        """Load maintenance types into the maintenance type dropdowns"""
+        """Load maintenance types into the maintenance plan editor"""
         try:
-            cursor = self.db.conn.cursor()
-            cursor.execute("SELECT id, name FROM maintenance_types ORDER BY name")
-            types = cursor.fetchall()
+            types = MaintenanceTypeRepository(self.db).get_all_maintenance_types()
             
-            # Clear and populate all three dropdowns
-            for combo in [self.maintenance_type1, self.maintenance_type2, self.maintenance_type3]:
-                combo.clear()
-                combo.addItem("", None)  # Add empty option
-                for type_ in types:
-                    combo.addItem(type_['name'], type_['id'])
+            self.plan_editor.set_maintenance_types(types)
         except Exception as e:
             self.show_error('Error', f'Failed to load maintenance types: {str(e)}') 
\ No newline at end of file
@@ -0,0 +1,112 @@
+from PyQt6.QtWidgets import (QFormLayout, QDateEdit, QLineEdit, QPushButton, QHBoxLayout,
+                             QVBoxLayout, QLabel, QProgressBar, QFileDialog)
+from PyQt6.QtCore import QDate, pyqtSignal
+from ..base.base_dialog import BaseDialog
+from ..base.data_loader import DataLoader
+from src.reports import BatchReportService
+from src.utils.path_utils import get_executable_directory
+
+class ReportsDialog(BaseDialog):
+    """
+    Generates the maintenance reports of a date range into a folder.
+
+    The reports are rendered by worker processes, driven from a worker
+    thread, and the dialog shows their progress.
+    """
+    # Reports done and reports to generate, emitted from the worker thread
+    progress_changed = pyqtSignal(int, int)
+
+    def __init__(self, parent=None, db=None):
+        super().__init__(parent, db)
+        self.setWindowTitle('Generate Reports')
+        self.setMinimumWidth(500)
+        self.loader = DataLoader(self)
+        self.loader.loaded.connect(self.show_result)
+        self.loader.failed.connect(self.show_failure)
+        self.loader.busy_changed.connect(self.set_busy)
+        self.progress_changed.connect(self.show_progress)
+
+    def init_ui(self):
+        main_layout = QVBoxLayout()
+        self.setLayout(main_layout)
+
+        form_layout = QFormLayout()
+        form_layout.setSpacing(10)
+        self.start_input = QDateEdit()
+        self.start_input.setCalendarPopup(True)
+        self.start_input.setDate(QDate.currentDate().addMonths(-3))
+        self.end_input = QDateEdit()
+        self.end_input.setCalendarPopup(True)
+        self.end_input.setDate(QDate.currentDate())
+        self.folder_input = QLineEdit(get_executable_directory())
+        browse_button = QPushButton('Browse...')
+        browse_button.clicked.connect(self.browse)
+        folder_layout = QHBoxLayout()
+        folder_layout.addWidget(self.folder_input)
+        folder_layout.addWidget(browse_button)
+        form_layout.addRow('From:', self.start_input)
+        form_layout.addRow('To:', self.end_input)
+        form_layout.addRow('Folder:', folder_layout)
+        main_layout.addLayout(form_layout)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.hide()
+        main_layout.addWidget(self.progress_bar)
+        self.result_label = QLabel()
+        self.result_label.setWordWrap(True)
+        main_layout.addWidget(self.result_label)
+
+        button_layout = QHBoxLayout()
+        self.generate_button = QPushButton('Generate')
+        self.generate_button.clicked.connect(self.start_generation)
+        self.close_button = QPushButton('Close')
+        self.close_button.clicked.connect(self.reject)
+        button_layout.addWidget(self.generate_button)
+        button_layout.addWidget(self.close_button)
+        main_layout.addLayout(button_layout)
+
+    def browse(self):
+        """Pick the folder for the reports"""
+        folder = QFileDialog.getExistingDirectory(self, 'Select Folder', self.folder_input.text())
+        if folder:
+            self.folder_input.setText(folder)
+
+    def start_generation(self):
+        """Generate the reports on a worker thread"""
+        folder = self.folder_input.text().strip()
+        if not folder:
+            self.show_error('Error', 'Please select a folder for the reports')
+            return
+        start_date = self.start_input.date().toString('yyyy-MM-dd')
+        end_date = self.end_input.date().toString('yyyy-MM-dd')
+        if start_date > end_date:
+            self.show_error('Error', 'The start date is after the end date')
+            return
+        reports = BatchReportService(self.db)
+        self.result_label.clear()
+        self.progress_bar.setRange(0, 0)
+        self.loader.start(lambda: reports.generate_reports(
+            folder, start_date=start_date, end_date=end_date, progress=self.progress_changed.emit
+        ))
+
+    def set_busy(self, busy):
+        """Lock the dialog while generating"""
+        self.generate_button.setEnabled(not busy)
+        self.close_button.setEnabled(not busy)
+        self.progress_bar.setVisible(busy)
+
+    def show_progress(self, done, total):
+        self.progress_bar.setRange(0, total)
+        self.progress_bar.setValue(done)
+
+    def show_result(self, result):
+        self.result_label.setText(str(result) if result.paths or result.failed
+                                  else 'No maintenance records in this date range')
+
+    def show_failure(self, message):
+        self.show_error('Generation Failed', message)
+
+    def reject(self):
+        # The worker processes would be left running
+        if not self.loader.is_busy():
+            super().reject()
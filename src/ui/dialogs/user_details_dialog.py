@@ -3,15 +3,13 @@ from PyQt6.QtWidgets import (QFormLayout, QLineEdit, QComboBox,
                              QCheckBox, QMessageBox, QApplication)
 from ..base.base_dialog import BaseDialog
 import bcrypt
-from database import Database
 
 class UserDetailsDialog(BaseDialog):
-    def __init__(self, user_id, current_user_id, is_admin, parent=None):
+    def __init__(self, user_id, current_user_id, is_admin, parent=None, db=None):
         self.user_id = user_id
         self.current_user_id = current_user_id
         self.is_admin = is_admin
-        self.db = Database()  # Initialize database connection
-        super().__init__(parent)  # This will call init_ui() from BaseDialog
+        super().__init__(parent, db)  # This will call init_ui() from BaseDialog
         self.setWindowTitle('User Details')
         self.setMinimumWidth(400)
         
@@ -99,10 +97,7 @@ class UserDetailsDialog(BaseDialog):
 
     def load_user_data(self):
         try:
-            cursor = self.db.conn.cursor()
-            cursor.execute("SELECT username, email, is_admin FROM users WHERE id = ?", (self.user_id,))
-            
-            user = cursor.fetchone()
+            user = self.db.get_single_row("SELECT username, email, is_admin FROM users WHERE id = ?", (self.user_id,))
             if user:
                 self.username_input.setText(user['username'])
                 self.email_input.setText(user['email'])
@@ -174,48 +169,47 @@ class UserDetailsDialog(BaseDialog):
                 return
 
         try:
-            cursor = self.db.conn.cursor()
-            
             # Check if username already exists (excluding current user)
-            cursor.execute("SELECT id FROM users WHERE username = ? AND id != ?", 
-                         (self.username_input.text(), self.user_id))
-            if cursor.fetchone():
+            if self.db.get_single_row("SELECT id FROM users WHERE username = ? AND id != ?", 
+                                      (self.username_input.text(), self.user_id)):
                 self.show_error('Error', 'Username already exists')
                 return
 
             # Check if email already exists (excluding current user)
-            cursor.execute("SELECT id FROM users WHERE email = ? AND id != ?", 
-                         (self.email_input.text(), self.user_id))
-            if cursor.fetchone():
+            if self.db.get_single_row("SELECT id FROM users WHERE email = ? AND id != ?", 
+                                      (self.email_input.text(), self.user_id)):
                 self.show_error('Error', 'Email already exists')
                 return
 
             # Prepare update query
             if self.password_input.text():
                 # Update with new password
-                cursor.execute("""
+                query = """
                     UPDATE users SET username = ?, email = ?, password = ?, is_admin = ?
                     WHERE id = ?
-                """, (
+                """
+                params = (
                     self.username_input.text(),
                     self.email_input.text(),
                     self.hash_password(self.password_input.text()),
                     self.is_admin_checkbox.isChecked(),
                     self.user_id
-                ))
+                )
             else:
                 # Update without changing password
-                cursor.execute("""
+                query = """
                     UPDATE users SET username = ?, email = ?, is_admin = ?
                     WHERE id = ?
-                """, (
+                """
+                params = (
                     self.username_input.text(),
                     self.email_input.text(),
                     self.is_admin_checkbox.isChecked(),
                     self.user_id
-                ))
+                )
+
+            self.db.execute_update(query, params)
             
-            self.db.conn.commit()
             super().accept()
             
         except Exception as e:
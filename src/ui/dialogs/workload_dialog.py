@@ -0,0 +1,160 @@
+from PyQt6.QtWidgets import (QFormLayout, QSpinBox, QPushButton, QHBoxLayout, QVBoxLayout, QLabel,
+                             QTableWidget, QTableWidgetItem, QHeaderView, QMessageBox)
+from ..base.base_dialog import BaseDialog
+from ..base.data_loader import DataLoader
+from src.database import DatabaseError
+from src.scheduling import WorkloadBalancer
+
+class WorkloadDialog(BaseDialog):
+    """
+    Suggests reassignments that spread the upcoming maintenance evenly over
+    the qualified users, and applies them all at once.
+
+    The plan is computed on a worker thread; applying stores every
+    reassignment in one transaction.
+    """
+
+    def __init__(self, parent=None, db=None):
+        super().__init__(parent, db)
+        self.setWindowTitle('Workload Balancing')
+        self.setMinimumSize(800, 600)
+        self.balancer = None
+        self.plan = None
+        self.loader = DataLoader(self)
+        self.loader.loaded.connect(self.show_plan)
+        self.loader.failed.connect(self.show_failure)
+        self.loader.busy_changed.connect(self.set_busy)
+
+    def init_ui(self):
+        main_layout = QVBoxLayout()
+        self.setLayout(main_layout)
+
+        form_layout = QFormLayout()
+        form_layout.setSpacing(10)
+        self.weeks_input = QSpinBox()
+        self.weeks_input.setRange(1, 52)
+        self.weeks_input.setValue(WorkloadBalancer.WEEKS)
+        self.tolerance_input = QSpinBox()
+        self.tolerance_input.setRange(0, 14)
+        self.tolerance_input.setValue(WorkloadBalancer.TOLERANCE_DAYS)
+        form_layout.addRow('Weeks ahead:', self.weeks_input)
+        form_layout.addRow('Move by up to (days):', self.tolerance_input)
+        main_layout.addLayout(form_layout)
+
+        self.summary_label = QLabel()
+        self.summary_label.setWordWrap(True)
+        main_layout.addWidget(self.summary_label)
+
+        self.loads_table = self._table(['User', 'Tasks before', 'Tasks after',
+                                        'Busiest week before', 'Busiest week after'])
+        main_layout.addWidget(self.loads_table)
+        self.reassignments_table = self._table(['Scheduled', 'Due', 'Instrument', 'Maintenance', 'From', 'To'])
+        main_layout.addWidget(self.reassignments_table)
+
+        button_layout = QHBoxLayout()
+        self.suggest_button = QPushButton('Suggest')
+        self.suggest_button.clicked.connect(self.start_suggestion)
+        self.apply_button = QPushButton('Apply')
+        self.apply_button.setEnabled(False)
+        self.apply_button.clicked.connect(self.apply_plan)
+        self.close_button = QPushButton('Close')
+        self.close_button.clicked.connect(self.reject)
+        button_layout.addWidget(self.suggest_button)
+        button_layout.addWidget(self.apply_button)
+        button_layout.addWidget(self.close_button)
+        main_layout.addLayout(button_layout)
+
+    @staticmethod
+    def _table(headers):
+        table = QTableWidget(0, len(headers))
+        table.setHorizontalHeaderLabels(headers)
+        table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        return table
+
+    @staticmethod
+    def _fill(table, rows):
+        table.setRowCount(len(rows))
+        for row, values in enumerate(rows):
+            for column, value in enumerate(values):
+                table.setItem(row, column, QTableWidgetItem(str(value)))
+
+    def start_suggestion(self):
+        """Compute the plan on a worker thread, with the names to show it"""
+        balancer = WorkloadBalancer(self.db, self.weeks_input.value(), self.tolerance_input.value())
+        self.balancer = None
+        self.plan = None
+        self.summary_label.setText('Balancing...')
+
+        def fetch():
+            plan = balancer.suggest()
+            names = {
+                'users': {row['id']: row['username'] for row in self.db.execute_query(
+                    "SELECT id, username FROM users")},
+                'instruments': {row['id']: f"{row['name']} ({row['serial_number']})" for row in self.db.execute_query(
+                    "SELECT id, name, serial_number FROM instruments")},
+                'types': {row['id']: row['name'] for row in self.db.execute_query(
+                    "SELECT id, name FROM maintenance_types")}
+            }
+            return balancer, plan, names
+
+        self.loader.start(fetch)
+
+    def set_busy(self, busy):
+        """Lock the dialog while balancing"""
+        self.suggest_button.setEnabled(not busy)
+        self.close_button.setEnabled(not busy)
+        self.apply_button.setEnabled(not busy and bool(self.plan and self.plan.reassignments))
+
+    def show_plan(self, result):
+        self.balancer, self.plan, names = result
+        users = names['users']
+        plan = self.plan
+        summary = (f"{len(plan.reassignments)} reassignments suggested. Busiest week of one user: "
+                   f"{plan.peak_before} tasks before, {plan.peak_after} after.")
+        if plan.unassigned:
+            summary += f" {plan.unassigned} tasks have no qualified user."
+        self.summary_label.setText(summary)
+        self._fill(self.loads_table, [
+            (users.get(load['user_id'], load['user_id']), load['total_before'], load['total_after'],
+             load['peak_before'], load['peak_after'])
+            for load in plan.user_loads()
+        ])
+        self._fill(self.reassignments_table, [
+            (r.scheduled_date, r.due_date, names['instruments'].get(r.instrument_id, r.instrument_id),
+             names['types'].get(r.maintenance_type_id, r.maintenance_type_id),
+             users.get(r.from_user_id, '(none)'), users.get(r.to_user_id, r.to_user_id))
+            for r in plan.reassignments
+        ])
+        self.apply_button.setEnabled(bool(plan.reassignments))
+
+    def show_failure(self, message):
+        self.summary_label.clear()
+        self.show_error('Balancing Failed', message)
+
+    def apply_plan(self):
+        """Store every suggested reassignment in one transaction"""
+        if not (self.plan and self.plan.reassignments):
+            return
+        reply = QMessageBox.question(
+            self, 'Confirm Reassignment',
+            f'Apply {len(self.plan.reassignments)} reassignments?',
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+            QMessageBox.StandardButton.No
+        )
+        if reply != QMessageBox.StandardButton.Yes:
+            return
+        try:
+            count = self.balancer.apply(self.plan.reassignments)
+        except DatabaseError as e:
+            self.logger.error(f"Error applying reassignments: {str(e)}")
+            self.show_error('Error', f'The reassignments were not applied: {str(e)}')
+            return
+        self.plan = None
+        self.apply_button.setEnabled(False)
+        self.show_info('Success', f'{count} reassignments applied')
+        self.start_suggestion()
+
+    def reject(self):
+        if not self.loader.is_busy():
+            super().reject()
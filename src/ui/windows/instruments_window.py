@@ -1,9 +1,10 @@
-from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QLineEdit, QComboBox, QTableWidget, QTableWidgetItem, QMessageBox, QHeaderView, QDialog)
+from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QLineEdit, QComboBox, QTableWidget, QMessageBox, QHeaderView, QDialog)
 from PyQt6.QtCore import Qt, pyqtSignal
 from PyQt6.QtGui import QFont
 from ..base.base_data_window import BaseDataWindow
 from ..base.base_table import BaseTable
 from database import Database
+from src.database import fts_query
 from datetime import datetime
 from date_utils import format_date_for_display, get_maintenance_status
 from ..dialogs.instrument_details_dialog import InstrumentDetailsDialog
@@ -11,6 +12,8 @@ from ..dialogs.add_instrument_dialog import AddInstrumentDialog
 
 class InstrumentsWindow(BaseDataWindow):
     back_signal = pyqtSignal()
+    load_error_message = 'Failed to load instruments'
+    watched_tables = ('instruments', 'users', 'instrument_maintenance_schedule', 'maintenance_status')
 
     def __init__(self, user_id, is_admin, db=None):
         super().__init__(user_id, is_admin, db)
@@ -21,6 +24,7 @@ class InstrumentsWindow(BaseDataWindow):
 
         # Create title
         self.create_title('Instruments')
+        self.create_search_box('Search name, brand, model, serial number or location')
 
         # Create table
         self.table = BaseTable()
@@ -28,6 +32,7 @@ class InstrumentsWindow(BaseDataWindow):
             'Instrument', 'Brand', 'Model', 'Serial Number', 'Location', 
             'Status', 'Responsible User', 'Next Maintenance'
         ])
+        self.table.set_column_color(0, Qt.GlobalColor.blue)  # Instrument names in blue
         
         # Connect cell click event
         self.table.cellClicked.connect(self.handle_cell_click)
@@ -57,86 +62,97 @@ class InstrumentsWindow(BaseDataWindow):
     def handle_cell_click(self, row, column):
         """Handle cell click events"""
         if column == 0:  # Only handle clicks on the Instrument column
-            instrument_id = self.table.item(row, 0).data(Qt.ItemDataRole.UserRole)
+            instrument_id = self.table.get_row_id(row)
             if instrument_id:
                 dialog = InstrumentDetailsDialog(instrument_id, self.user_id, self.is_admin, self)
                 dialog.show()
 
-    def load_data(self):
-        """Load instruments data"""
-        try:
-            cursor = self.db.conn.cursor()
-            cursor.execute("""
-                WITH maintenance_dates AS (
-                    SELECT 
-                        instrument_id,
-                        maintenance_type_id,
-                        MAX(maintenance_date) as last_date
-                    FROM maintenance_records
-                    GROUP BY instrument_id, maintenance_type_id
-                )
-                SELECT 
-                    i.id,
-                    i.name,           -- Instrument
-                    i.brand,          -- Brand
-                    i.model,          -- Model
-                    i.serial_number,  -- Serial Number
-                    i.location,       -- Location
-                    i.status,         -- Status
-                    u.username as responsible_user,  -- Responsible User
-                    CASE 
-                        WHEN i.maintenance_1 IS NOT NULL AND i.period_1 IS NOT NULL THEN
-                            CASE 
-                                WHEN md1.last_date IS NULL THEN
-                                    date(i.date_start_operating)
-                                ELSE
-                                    date(md1.last_date, '+' || (i.period_1 * 7) || ' days')
-                            END
-                        ELSE NULL
-                    END as next_maintenance  -- Next Maintenance
-                FROM instruments i
-                LEFT JOIN users u ON i.responsible_user_id = u.id
-                LEFT JOIN maintenance_dates md1 ON i.id = md1.instrument_id AND i.maintenance_1 = md1.maintenance_type_id
-                ORDER BY i.name
-            """)
-            
-            self.table.clear_table()
-            
-            for instrument in cursor.fetchall():
-                # Create items for each column
-                items = []
-                for col, value in enumerate([
-                    instrument['name'],  # Instrument
-                    instrument['brand'],  # Brand
-                    instrument['model'],  # Model
-                    instrument['serial_number'],  # Serial Number
-                    instrument['location'],  # Location
-                    instrument['status'],  # Status
-                    instrument['responsible_user'] or 'Not Assigned',  # Responsible User
-                    format_date_for_display(instrument['next_maintenance']) if instrument['next_maintenance'] else 'Not Scheduled'  # Next Maintenance
-                ]):
-                    item = QTableWidgetItem(str(value))
-                    if col == 0:  # First column (Instrument name)
-                        item.setForeground(Qt.GlobalColor.blue)  # Set text color to blue
-                    item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsEditable)  # Make item read-only
-                    items.append(item)
-                
-                # Add row with items
-                row = self.table.rowCount()
-                self.table.insertRow(row)
-                for col, item in enumerate(items):
-                    self.table.setItem(row, col, item)
-                
-                # Store the instrument ID in the first column
-                self.table.item(row, 0).setData(Qt.ItemDataRole.UserRole, instrument['id'])
-            
-        except Exception as e:
-            QMessageBox.warning(self, 'Error', f'Failed to load instruments: {str(e)}')
+    def fetch_data(self):
+        """Query instruments data; runs on a worker thread"""
+        instruments = self._query_instruments()
+        rows = [self._instrument_row(instrument) for instrument in instruments]
+        # Store the instrument ID with each row
+        return rows, [instrument['id'] for instrument in instruments]
+
+    def display_data(self, data):
+        """Show the instruments"""
+        rows, row_ids = data
+        self.table.set_rows(rows, row_ids)
+
+    def fetch_changes(self, changes):
+        """Query the instruments affected by changes; runs on a worker thread"""
+        # Plans and status rows are logged by instrument id
+        instrument_ids = set()
+        for table in ('instruments', 'instrument_maintenance_schedule', 'maintenance_status'):
+            instrument_ids |= changes.get(table, set())
+        user_ids = list(changes.get('users', ()))
+
+        # Instruments missing from the query were deleted
+        rows_by_id = dict.fromkeys(instrument_ids)
+        if instrument_ids or user_ids:
+            instrument_placeholders = ', '.join('?' * len(instrument_ids))
+            user_placeholders = ', '.join('?' * len(user_ids))
+            instruments = self._query_instruments(
+                f"WHERE i.id IN ({instrument_placeholders}) OR i.responsible_user_id IN ({user_placeholders})",
+                tuple(instrument_ids) + tuple(user_ids)
+            )
+            rows_by_id.update((instrument['id'], self._instrument_row(instrument)) for instrument in instruments)
+        return rows_by_id
+
+    def display_changes(self, rows_by_id):
+        """Apply the changed instruments"""
+        self.table.merge_rows(rows_by_id)
+
+    def _query_instruments(self, where='', params=()):
+        # While searching, only matching instruments are shown, best first
+        query = fts_query(self.search_text)
+        search_join = order = ''
+        if query is not None:
+            search_join = """
+            JOIN (SELECT rowid AS id, rank FROM instruments_fts WHERE instruments_fts MATCH ?) found
+                ON found.id = i.id"""
+            order = 'found.rank, '
+            params = (query,) + tuple(params)
+        return self.db.execute_query(f"""
+            SELECT 
+                i.id,
+                i.name,           -- Instrument
+                i.brand,          -- Brand
+                i.model,          -- Model
+                i.serial_number,  -- Serial Number
+                i.location,       -- Location
+                i.status,         -- Status
+                u.username as responsible_user,  -- Responsible User
+                CASE 
+                    WHEN ims.period_weeks IS NOT NULL THEN ms.next_due
+                    ELSE NULL
+                END as next_maintenance  -- Next Maintenance (first plan)
+            FROM instruments i{search_join}
+            LEFT JOIN users u ON i.responsible_user_id = u.id
+            LEFT JOIN instrument_maintenance_schedule ims ON ims.instrument_id = i.id AND ims.position = 1
+            LEFT JOIN maintenance_status ms
+                ON ms.instrument_id = ims.instrument_id
+                AND ms.maintenance_type_id = ims.maintenance_type_id
+            {where}
+            ORDER BY {order}i.name
+        """, params)
+
+    def _instrument_row(self, instrument):
+        return [
+            instrument['name'],  # Instrument
+            instrument['brand'],  # Brand
+            instrument['model'],  # Model
+            instrument['serial_number'],  # Serial Number
+            instrument['location'],  # Location
+            instrument['status'],  # Status
+            instrument['responsible_user'] or 'Not Assigned',  # Responsible User
+            format_date_for_display(instrument['next_maintenance']) if instrument['next_maintenance'] else 'Not Scheduled'  # Next Maintenance
+        ]
 
     def add_instrument(self):
         try:
             dialog = AddInstrumentDialog(self)
             if dialog.exec() == QDialog.DialogCode.Accepted:
-                self.load_data()
+                self.load_changes()
         except Exception as e:
             QMessageBox.critical(self, 'Error', f'Failed to add instrument: {str(e)}') 
\ No newline at end of file
@@ -1,14 +1,16 @@
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout,
-                            QPushButton, QLabel, QMessageBox, QMainWindow, QTableWidgetItem)
-from PyQt6.QtCore import Qt, pyqtSignal
-from PyQt6.QtGui import QFont, QBrush, QColor
+                            QPushButton, QLabel, QMainWindow)
+from PyQt6.QtCore import pyqtSignal
+from PyQt6.QtGui import QFont
 from database import Database
+from src.database import fts_query
 from datetime import datetime, timedelta
 from date_utils import (
     calculate_next_maintenance,
     format_date_for_display,
     format_date_for_db,
-    get_maintenance_status
+    get_maintenance_status_codes,
+    STATUS_VALUES
 )
 from src.ui.dialogs.instrument_details_dialog import InstrumentDetailsDialog
 from src.ui.base.base_table import BaseTable
@@ -17,6 +19,8 @@ import sys
 
 class MaintenanceWindow(BaseDataWindow):
     back_signal = pyqtSignal()  # Signal to go back to main menu
+    load_error_message = 'Failed to load maintenance data'
+    watched_tables = ('maintenance_status', 'instruments', 'users', 'maintenance_types')
 
     def __init__(self, user_id, is_admin, db=None):
         super().__init__(user_id, is_admin, db)
@@ -27,6 +31,7 @@ class MaintenanceWindow(BaseDataWindow):
 
         # Create title
         self.create_title('Maintenance Operations')
+        self.create_search_box('Search instruments or maintenance notes')
 
         # Create table
         self.table = BaseTable()
@@ -35,6 +40,11 @@ class MaintenanceWindow(BaseDataWindow):
             'Maintenance Type', 'Performed By', 'Last Maintenance', 
             'Next Maintenance', 'Notes'
         ])
+        self.table.set_column_color(0, "#4a9eff")  # Light blue color for hyperlink
+        # Due soon and overdue rows are painted from their status code
+        self.table.set_status_colors({
+            code: color for code, (status, color) in enumerate(STATUS_VALUES) if color
+        })
         
         # Connect cell click event
         self.table.cellClicked.connect(self.handle_cell_click)
@@ -58,97 +68,124 @@ class MaintenanceWindow(BaseDataWindow):
     def handle_cell_click(self, row, column):
         """Handle cell click events"""
         if column == 0:  # Only handle clicks on the Instrument column
-            instrument_id = self.table.item(row, 0).data(Qt.ItemDataRole.UserRole)
-            if instrument_id:
+            row_id = self.table.get_row_id(row)
+            if row_id:
+                instrument_id, maintenance_type_id = row_id
                 dialog = InstrumentDetailsDialog(instrument_id, self.user_id, self.is_admin, self)
                 dialog.show()
 
-    def load_data(self):
-        """Load maintenance data"""
-        try:
-            cursor = self.db.conn.cursor()
-            cursor.execute("""
-                WITH maintenance_dates AS (
-                    SELECT 
-                        instrument_id,
-                        maintenance_type_id,
-                        MAX(maintenance_date) as last_date
-                    FROM maintenance_records
-                    GROUP BY instrument_id, maintenance_type_id
-                )
-                SELECT 
-                    i.id,
-                    i.name,
-                    i.brand,
-                    i.model,
-                    i.serial_number,
-                    i.location,
-                    mt.name as maintenance_type,
-                    u.username as performed_by,
-                    md.last_date as last_maintenance,
-                    CASE 
-                        WHEN md.last_date IS NULL THEN
-                            date(i.date_start_operating)
-                        ELSE
-                            date(md.last_date, '+' || (
-                                CASE 
-                                    WHEN i.maintenance_1 = mt.id THEN i.period_1
-                                    WHEN i.maintenance_2 = mt.id THEN i.period_2
-                                    WHEN i.maintenance_3 = mt.id THEN i.period_3
-                                END * 7
-                            ) || ' days')
-                    END as next_maintenance,
-                    (SELECT notes 
-                     FROM maintenance_records 
-                     WHERE instrument_id = i.id AND maintenance_type_id = mt.id 
-                     ORDER BY maintenance_date DESC LIMIT 1) as notes
-                FROM instruments i
-                JOIN maintenance_types mt ON mt.id IN (i.maintenance_1, i.maintenance_2, i.maintenance_3)
-                LEFT JOIN users u ON i.responsible_user_id = u.id
-                LEFT JOIN maintenance_dates md ON i.id = md.instrument_id AND mt.id = md.maintenance_type_id
-                WHERE i.status = 'Operational'
-                ORDER BY 
-                    CASE 
-                        WHEN next_maintenance IS NULL THEN 1 
-                        ELSE 0 
-                    END,
-                    next_maintenance ASC,
-                    i.name ASC,
-                    mt.name ASC
-            """)
-            
-            self.table.setRowCount(0)
-            for row, data in enumerate(cursor.fetchall()):
-                self.table.insertRow(row)
-                
-                # Get maintenance status using our utility function
-                status, color = get_maintenance_status(data['next_maintenance'])
-                
+    def fetch_data(self):
+        """Query maintenance data and prepare the rows; runs on a worker thread"""
+        return self._prepare_rows(self._query_maintenance())
+
+    def display_data(self, data):
+        """Show the maintenance rows"""
+        rows, row_ids, status_codes = data
+        self.table.set_rows(rows, row_ids, status_codes)
+
+    def fetch_changes(self, changes):
+        """Query the maintenance rows affected by changes; runs on a worker thread"""
+        # Status rows are logged by instrument id
+        instrument_ids = changes.get('instruments', set()) | changes.get('maintenance_status', set())
+        user_ids = list(changes.get('users', ()))
+        if user_ids:
+            placeholders = ', '.join('?' * len(user_ids))
+            instruments = self.db.execute_query(
+                f"SELECT id FROM instruments WHERE responsible_user_id IN ({placeholders})",
+                tuple(user_ids)
+            )
+            instrument_ids |= {instrument['id'] for instrument in instruments}
+        type_ids = changes.get('maintenance_types', set())
+
+        records = []
+        if instrument_ids or type_ids:
+            instrument_placeholders = ', '.join('?' * len(instrument_ids))
+            type_placeholders = ', '.join('?' * len(type_ids))
+            records = self._query_maintenance(
+                f"AND (i.id IN ({instrument_placeholders}) OR ms.maintenance_type_id IN ({type_placeholders}))",
+                tuple(instrument_ids) + tuple(type_ids)
+            )
+        rows, row_ids, status_codes = self._prepare_rows(records)
+
+        # Rows of affected instruments and types missing from the query were
+        # deleted or taken out of operation
+        def is_affected(row_id):
+            return row_id[0] in instrument_ids or row_id[1] in type_ids
+
+        return dict(zip(row_ids, rows)), dict(zip(row_ids, status_codes)), is_affected
+
+    def display_changes(self, data):
+        """Apply the changed maintenance rows"""
+        rows_by_id, statuses, is_affected = data
+        self.table.merge_rows(rows_by_id, statuses, is_affected)
+
+    def _query_maintenance(self, where='', params=()):
+        # While searching, keep the rows of matching instruments and the
+        # rows with a matching note anywhere in their history
+        query = fts_query(self.search_text)
+        if query is not None:
+            where = """
+                AND (i.id IN (SELECT rowid FROM instruments_fts WHERE instruments_fts MATCH ?)
+                     OR (ms.instrument_id, ms.maintenance_type_id) IN (
+                         SELECT mr.instrument_id, mr.maintenance_type_id
+                         FROM maintenance_records mr
+                         WHERE mr.id IN (SELECT rowid FROM maintenance_notes_fts
+                                         WHERE maintenance_notes_fts MATCH ?)))
+            """ + where
+            params = (query, query) + tuple(params)
+
+        # maintenance_status is kept current by triggers, so this is a
+        # single pass over one summary row per (instrument, type)
+        return self.db.execute_query(f"""
+            SELECT 
+                i.id,
+                ms.maintenance_type_id,
+                i.name,
+                i.brand,
+                i.model,
+                i.serial_number,
+                i.location,
+                mt.name as maintenance_type,
+                u.username as performed_by,
+                ms.last_date as last_maintenance,
+                ms.next_due as next_maintenance,
+                ms.next_due_day,
+                ms.last_notes as notes
+            FROM maintenance_status ms
+            JOIN instruments i ON i.id = ms.instrument_id
+            JOIN maintenance_types mt ON mt.id = ms.maintenance_type_id
+            LEFT JOIN users u ON i.responsible_user_id = u.id
+            WHERE i.status = 'Operational' {where}
+            ORDER BY 
+                CASE 
+                    WHEN ms.next_due_day IS NULL THEN 1 
+                    ELSE 0 
+                END,
+                ms.next_due_day ASC,
+                i.name ASC,
+                mt.name ASC
+        """, params)
+
+    def _prepare_rows(self, records):
+        # Get the maintenance status of every row in one pass
+        status_codes = get_maintenance_status_codes([data['next_due_day'] for data in records])
+
+        rows = [
+            [
+                data['name'],
+                data['brand'],
+                data['model'],
+                data['serial_number'],
+                data['location'],
+                data['maintenance_type'],
+                data['performed_by'] or 'Not assigned',
                 # Format dates for display
-                last_maintenance_display = format_date_for_display(data['last_maintenance'])
-                next_maintenance_display = format_date_for_display(data['next_maintenance'])
-                
-                # Add data to table
-                instrument_item = QTableWidgetItem(str(data['name']))
-                instrument_item.setForeground(QBrush(QColor("#4a9eff")))  # Light blue color for hyperlink
-                instrument_item.setData(Qt.ItemDataRole.UserRole, data['id'])
-                self.table.setItem(row, 0, instrument_item)
-                
-                self.table.setItem(row, 1, QTableWidgetItem(str(data['brand'])))
-                self.table.setItem(row, 2, QTableWidgetItem(str(data['model'])))
-                self.table.setItem(row, 3, QTableWidgetItem(str(data['serial_number'])))
-                self.table.setItem(row, 4, QTableWidgetItem(str(data['location'])))
-                self.table.setItem(row, 5, QTableWidgetItem(str(data['maintenance_type'])))
-                self.table.setItem(row, 6, QTableWidgetItem(str(data['performed_by'] or 'Not assigned')))
-                self.table.setItem(row, 7, QTableWidgetItem(last_maintenance_display))
-                self.table.setItem(row, 8, QTableWidgetItem(next_maintenance_display))
-                self.table.setItem(row, 9, QTableWidgetItem(str(data['notes'] or '')))
-                
-                # Apply row highlighting if needed
-                if color:
-                    self.table.highlight_row(row, color)
-                    # Re-apply blue color to instrument name after highlighting
-                    self.table.item(row, 0).setForeground(QBrush(QColor("#4a9eff")))
-            
-        except Exception as e:
-            QMessageBox.warning(self, 'Error', f'Failed to load maintenance data: {str(e)}') 
\ No newline at end of file
+                format_date_for_display(data['last_maintenance']),
+                format_date_for_display(data['next_maintenance']),
+                data['notes'] or ''
+            ]
+            for data in records
+        ]
+        # Rows are identified by (instrument, maintenance type)
+        row_ids = [(data['id'], data['maintenance_type_id']) for data in records]
+        return rows, row_ids, [int(code) for code in status_codes]
@@ -1,5 +1,4 @@
 from PyQt6.QtWidgets import QMessageBox, QDialog
-from PyQt6.QtCore import Qt
 from ..base.base_data_window import BaseDataWindow
 from ..base.base_table import BaseTable
 from database import Database
@@ -7,6 +6,9 @@ from ..dialogs.user_details_dialog import UserDetailsDialog
 from ..dialogs.add_user_dialog import AddUserDialog
 
 class UsersWindow(BaseDataWindow):
+    load_error_message = 'Failed to load users'
+    watched_tables = ('users',)
+
     def init_ui(self):
         super().init_ui()
 
@@ -54,48 +56,61 @@ class UsersWindow(BaseDataWindow):
     def handle_cell_click(self, row, column):
         """Handle cell click events"""
         if column == 0:  # Only handle clicks on the Username column
-            user_id = self.table.item(row, 0).data(Qt.ItemDataRole.UserRole)
+            user_id = self.table.get_row_id(row)
             if user_id:
                 self.edit_user(user_id)
 
-    def load_data(self):
-        """Load users data"""
-        try:
-            cursor = self.db.conn.cursor()
-            cursor.execute("SELECT id, username, email, is_admin FROM users ORDER BY username")
-            
-            self.table.clear_table()
-            
-            for user in cursor.fetchall():
-                self.table.add_row([
-                    user['username'],
-                    user['email'],
-                    'Administrator' if user['is_admin'] else 'User'
-                ], user['id'])
-            
-        except Exception as e:
-            QMessageBox.warning(self, 'Error', f'Failed to load users: {str(e)}')
+    def fetch_data(self):
+        """Query users data; runs on a worker thread"""
+        return self.db.execute_query("SELECT id, username, email, is_admin FROM users ORDER BY username")
+
+    def display_data(self, users):
+        """Show the users"""
+        self.table.set_rows([self._user_row(user) for user in users], [user['id'] for user in users])
+
+    def fetch_changes(self, changes):
+        """Query the changed users; runs on a worker thread"""
+        user_ids = list(changes.get('users', ()))
+        # Users missing from the query were deleted
+        rows_by_id = dict.fromkeys(user_ids)
+        if user_ids:
+            placeholders = ', '.join('?' * len(user_ids))
+            users = self.db.execute_query(
+                f"SELECT id, username, email, is_admin FROM users WHERE id IN ({placeholders})",
+                tuple(user_ids)
+            )
+            rows_by_id.update((user['id'], self._user_row(user)) for user in users)
+        return rows_by_id
+
+    def display_changes(self, rows_by_id):
+        """Apply the changed users"""
+        self.table.merge_rows(rows_by_id)
+
+    def _user_row(self, user):
+        return [
+            user['username'],
+            user['email'],
+            'Administrator' if user['is_admin'] else 'User'
+        ]
 
     def add_user(self):
         dialog = AddUserDialog(self)
         if dialog.exec() == QDialog.DialogCode.Accepted:
-            self.load_data()
+            self.load_changes()
 
     def edit_user(self, user_id):
         """Edit an existing user"""
         dialog = UserDetailsDialog(user_id, self.user_id, self.is_admin, self)
         if dialog.exec() == QDialog.DialogCode.Accepted:
-            self.load_data()
+            self.load_changes()
 
     def edit_selected_user(self):
         """Edit the selected user"""
-        selected_items = self.table.selectedItems()
-        if not selected_items:
+        user_id = self.table.get_selected_row_id()
+        if user_id is None:
             QMessageBox.warning(self, 'Warning', 'Please select a user to edit')
             return
         
-        row = selected_items[0].row()
-        user_id = self.table.item(row, 0).data(Qt.ItemDataRole.UserRole)
         if user_id:
             self.edit_user(user_id)
 
@@ -103,25 +118,20 @@ class UsersWindow(BaseDataWindow):
         """Delete the selected user"""
         try:
             # Get selected row
-            selected_items = self.table.selectedItems()
-            if not selected_items:
+            row = self.table.get_selected_row()
+            if row is None:
                 QMessageBox.warning(self, 'Warning', 'Please select a user to delete')
                 return
             
-            # Get the row index of the first selected item
-            row = selected_items[0].row()
-            user_id = self.table.item(row, 0).data(Qt.ItemDataRole.UserRole)
-            username = self.table.item(row, 0).text()
+            user_id = self.table.get_row_id(row)
+            username = self.table.get_cell_text(row, 0)
             
             # Check if user is responsible for any instruments
-            cursor = self.db.conn.cursor()
-            cursor.execute("SELECT COUNT(*) as count FROM instruments WHERE responsible_user_id = ?", (user_id,))
-            result = cursor.fetchone()
+            result = self.db.get_single_row("SELECT COUNT(*) as count FROM instruments WHERE responsible_user_id = ?", (user_id,))
             
             if result['count'] > 0:
                 # Get list of instruments where user is responsible
-                cursor.execute("SELECT name FROM instruments WHERE responsible_user_id = ?", (user_id,))
-                instruments = cursor.fetchall()
+                instruments = self.db.execute_query("SELECT name FROM instruments WHERE responsible_user_id = ?", (user_id,))
                 instrument_list = "\n".join([f"- {inst['name']}" for inst in instruments])
                 
                 QMessageBox.warning(
@@ -142,12 +152,10 @@ class UsersWindow(BaseDataWindow):
             )
             
             if reply == QMessageBox.StandardButton.Yes:
-                cursor.execute("DELETE FROM users WHERE id = ?", (user_id,))
-                self.db.conn.commit()
-                self.load_data()
+                self.db.execute_update("DELETE FROM users WHERE id = ?", (user_id,))
+                self.load_changes()
                 QMessageBox.information(self, 'Success', f'User {username} deleted successfully')
                 
         except Exception as e:
-            self.db.conn.rollback()
             QMessageBox.warning(self, 'Error', f'Failed to delete user: {str(e)}')
  
\ No newline at end of file
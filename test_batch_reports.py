@@ -0,0 +1,80 @@
+import os
+import sys
+import tempfile
+import unittest
+import subprocess
+from src.database import InstrumentRepository, MaintenanceRepository
+from src.reports import BatchReportService
+from test_support import USERS, make_lab_db
+
+class TestBatchReports(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.manager = make_lab_db(self.tmp_dir.name, [('Microscope', 'OLY-1', 1), ('Centrifuge', 'EPP-2', None)],
+                                   users=USERS[:1], date_start_operating='2020-01-01')
+        InstrumentRepository(self.manager).set_maintenance_plans(1, [
+            {'maintenance_type_id': 1, 'period_weeks': 52},
+            {'maintenance_type_id': 2, 'period_weeks': 4},
+        ])
+        records = MaintenanceRepository(self.manager)
+        records.create_maintenance_record(1, 1, '2025-03-01', 1, 'Battery leak')
+        records.create_maintenance_record(2, 2, '2025-01-15', 1, None)
+        records.create_maintenance_record(1, 1, '2025-03-01', 1, 'Same day, same type')
+
+    def tearDown(self):
+        self.manager.close()
+        self.tmp_dir.cleanup()
+
+    def test_report_data(self):
+        reports = BatchReportService(self.manager, workers=1)
+        data = reports.fetch_report_data()
+        self.assertEqual([report['record_id'] for report in data], [2, 1, 3])
+        microscope = data[1]
+        self.assertEqual(microscope['report_number'], 'MR-000001')
+        self.assertEqual((microscope['instrument_name'], microscope['responsible_user'], microscope['performed_by']),
+                         ('Microscope', 'user1', 'user1'))
+        # The shortest plan, counted from the record's date
+        self.assertEqual((microscope['next_maintenance_date'], microscope['next_maintenance_type']),
+                         ('2025-03-29', 'Calibration'))
+        centrifuge = data[0]
+        self.assertEqual((centrifuge['responsible_user'], centrifuge['next_maintenance_date']), ('Not assigned', None))
+
+        self.assertEqual([report['record_id'] for report in reports.fetch_report_data([3, 2])], [2, 3])
+        self.assertEqual([report['record_id'] for report in reports.fetch_report_data(start_date='2025-02-01')], [1, 3])
+        self.assertEqual(reports.fetch_report_data([]), [])
+
+    def _check_reports(self, workers):
+        folder = os.path.join(self.tmp_dir.name, f'reports_{workers}')
+        progress = []
+        result = BatchReportService(self.manager, workers=workers).generate_reports(
+            folder, progress=lambda done, total: progress.append((done, total))
+        )
+        self.assertEqual(result.failed, [])
+        self.assertEqual([os.path.basename(path) for path in result.paths], [
+            'Maintenance_2025-01-15_Centrifuge_Calibration.pdf',
+            'Maintenance_2025-03-01_Microscope_Cleaning.pdf',
+            'Maintenance_2025-03-01_Microscope_Cleaning_MR-000003.pdf',
+        ])
+        for path in result.paths:
+            with open(path, 'rb') as f:
+                self.assertEqual(f.read(5), b'%PDF-')
+        self.assertEqual(progress[-1], (3, 3))
+
+    def test_generate_reports_in_process(self):
+        self._check_reports(workers=1)
+
+    def test_generate_reports_in_worker_processes(self):
+        BatchReportService.CHUNK_SIZE = 1
+        try:
+            self._check_reports(workers=2)
+        finally:
+            BatchReportService.CHUNK_SIZE = 25
+
+    def test_reports_render_without_qt(self):
+        script = ("import sys, src.reports; sys.exit(3 if 'PyQt6' in sys.modules else 0)")
+        completed = subprocess.run([sys.executable, '-c', script],
+                                   cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True)
+        self.assertEqual(completed.returncode, 0, completed.stderr)
+
+if __name__ == '__main__':
+    unittest.main()
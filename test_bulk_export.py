@@ -0,0 +1,104 @@
+import os
+import csv
+import sys
+import json
+import tempfile
+import unittest
+import subprocess
+from src.database import BulkExporter, BulkExportError, MaintenanceRepository, read_columnar
+from test_support import USERS, make_lab_db
+
+RECORDS = [
+    # instrument_id, maintenance_type_id, maintenance_date, notes
+    (1, 1, '2025-03-01', 'Battery leak, "sealed"'),
+    (2, 2, '2025-01-15', None),
+    (1, 2, '2025-02-01', 'Réglage\nsecond line'),
+    (2, 1, '2024-12-31', ''),
+]
+
+class TestBulkExport(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp_dir.name, 'lab_instruments.db')
+        self.manager = make_lab_db(self.tmp_dir.name, [('Microscope', 'OLY-1', 1), ('Centrifuge', 'EPP-2', 1)],
+                                   users=USERS[:1], date_start_operating='2020-01-01')
+        records = MaintenanceRepository(self.manager)
+        for instrument_id, type_id, maintenance_date, notes in RECORDS:
+            records.create_maintenance_record(instrument_id, type_id, maintenance_date, 1, notes)
+
+    def tearDown(self):
+        self.manager.close()
+        self.tmp_dir.cleanup()
+
+    def _path(self, name):
+        return os.path.join(self.tmp_dir.name, name)
+
+    def _expected(self):
+        return [
+            {'id': 4, 'serial_number': 'EPP-2', 'instrument': 'Centrifuge', 'maintenance_type': 'Cleaning',
+             'maintenance_date': '2024-12-31', 'performed_by': 'user1', 'notes': ''},
+            {'id': 2, 'serial_number': 'EPP-2', 'instrument': 'Centrifuge', 'maintenance_type': 'Calibration',
+             'maintenance_date': '2025-01-15', 'performed_by': 'user1', 'notes': None},
+            {'id': 3, 'serial_number': 'OLY-1', 'instrument': 'Microscope', 'maintenance_type': 'Calibration',
+             'maintenance_date': '2025-02-01', 'performed_by': 'user1', 'notes': 'Réglage\nsecond line'},
+            {'id': 1, 'serial_number': 'OLY-1', 'instrument': 'Microscope', 'maintenance_type': 'Cleaning',
+             'maintenance_date': '2025-03-01', 'performed_by': 'user1', 'notes': 'Battery leak, "sealed"'},
+        ]
+
+    def test_formats_round_trip(self):
+        exporter = BulkExporter(self.manager, batch_size=3)
+        expected = self._expected()
+
+        progress = []
+        result = exporter.export_maintenance_records(self._path('history.jsonl'),
+                                                     progress=lambda done, total: progress.append((done, total)))
+        self.assertEqual(result.rows, 4)
+        self.assertEqual(progress, [(3, 4), (4, 4)])
+        with open(result.path, encoding='utf-8') as f:
+            self.assertEqual([json.loads(line) for line in f], expected)
+
+        result = exporter.export_maintenance_records(self._path('history.csv'))
+        with open(result.path, newline='', encoding='utf-8') as f:
+            rows = list(csv.DictReader(f))
+        # CSV has no null, and every value reads back as text
+        self.assertEqual(rows, [{key: '' if value is None else str(value) for key, value in record.items()}
+                                for record in expected])
+
+        result = exporter.export_maintenance_records(self._path('history.labcol'))
+        groups = list(read_columnar(result.path))
+        self.assertEqual([len(group['id']) for group in groups], [3, 1])
+        rows = [dict(zip(group, values)) for group in groups for values in zip(*group.values())]
+        self.assertEqual(rows, expected)
+        self.assertEqual(os.listdir(self.tmp_dir.name).count('history.labcol.part'), 0)
+
+    def test_filters(self):
+        exporter = BulkExporter(self.manager)
+        result = exporter.export_maintenance_records(self._path('q1.jsonl'), start_date='2025-01-01',
+                                                     end_date='2025-02-01', serial_numbers=['EPP-2', 'OLY-1'])
+        with open(result.path) as f:
+            self.assertEqual([json.loads(line)['id'] for line in f], [2, 3])
+        result = exporter.export_maintenance_records(self._path('oly.jsonl'), serial_numbers=['OLY-1'])
+        self.assertEqual(result.rows, 2)
+        result = exporter.export_maintenance_records(self._path('none.labcol'), serial_numbers=[])
+        self.assertEqual((result.rows, list(read_columnar(result.path))), (0, []))
+
+        with self.assertRaises(BulkExportError):
+            exporter.export_maintenance_records(self._path('history.xlsx'))
+        with self.assertRaises(BulkExportError):
+            exporter.export_maintenance_records(self._path('history.csv'), start_date='01/02/2025')
+        self.assertFalse(os.path.exists(self._path('history.csv')))
+
+    def test_cli_runs_without_qt(self):
+        path = self._path('history.csv')
+        script = ("import sys, export_data; code = export_data.main(sys.argv[1:]); "
+                  "sys.exit(3 if 'PyQt6' in sys.modules else code)")
+        completed = subprocess.run(
+            [sys.executable, '-c', script, path, '--db', self.db_path, '--from', '2025-01-01', '--instrument', 'OLY-1'],
+            cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True
+        )
+        self.assertEqual(completed.returncode, 0, completed.stderr)
+        with open(path, newline='') as f:
+            self.assertEqual([row['id'] for row in csv.DictReader(f)], ['3', '1'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,173 @@
+import os
+import csv
+import json
+import tempfile
+import unittest
+from src.database import (
+    BulkImporter,
+    BulkImportError,
+    InstrumentRepository,
+    MaintenanceRepository
+)
+from src.database.migrations import CHANGE_LOG_RETENTION
+from test_support import USERS, make_lab_db
+
+INSTRUMENT_COLUMNS = ['name', 'brand', 'model', 'serial_number', 'location', 'status',
+                      'responsible_user', 'date_start_operating', 'maintenance_1', 'period_1',
+                      'maintenance_2', 'period_2']
+
+class TestBulkImport(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.managers = []
+        self.manager = self._database('lab_instruments.db')
+
+    def tearDown(self):
+        for manager in self.managers:
+            manager.close()
+        self.tmp_dir.cleanup()
+
+    def _database(self, name):
+        manager = make_lab_db(self.tmp_dir.name, users=USERS[:1], name=name)
+        self.managers.append(manager)
+        return manager
+
+    def _write_csv(self, name, columns, rows):
+        path = os.path.join(self.tmp_dir.name, name)
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            writer.writerows(rows)
+        return path
+
+    def _write_jsonl(self, name, lines):
+        path = os.path.join(self.tmp_dir.name, name)
+        with open(path, 'w') as f:
+            f.writelines(line + '\n' for line in lines)
+        return path
+
+    def _import_instruments(self, importer):
+        path = self._write_csv('instruments.csv', INSTRUMENT_COLUMNS, [
+            ['Microscope', 'Olympus', 'BX53', 'OLY-1', 'Lab 101', 'Operational', 'user1', '2025-01-01', 'Cleaning', '13', '', ''],
+            ['Centrifuge', 'Eppendorf', '5810R', 'EPP-2', 'Lab 102', '', '', '10-01-2025', 'calibration', '4', 'Cleaning', '52'],
+            ['Duplicate', 'Olympus', 'BX53', 'OLY-1', 'Lab 101', 'Operational', '', '2025-01-01', '', '', '', ''],
+            ['Unknown type', 'B', 'M', 'X-3', 'Lab 101', 'Operational', '', '2025-01-01', 'Polishing', '4', '', ''],
+            ['Bad date', 'B', 'M', 'X-4', 'Lab 101', 'Operational', '', '2025-13-01', '', '', '', ''],
+        ])
+        return path, importer.import_instruments(path)
+
+    def test_instruments_import_with_plans_and_rejects_bad_rows(self):
+        path, result = self._import_instruments(BulkImporter(self.manager, workers=1))
+        self.assertEqual((result.imported, result.rejected), (2, 3))
+        self.assertEqual(result.error_path, os.path.join(self.tmp_dir.name, 'instruments.errors.csv'))
+
+        with open(result.error_path, newline='') as f:
+            errors = list(csv.DictReader(f))
+        self.assertEqual([(row['line'], row['name']) for row in errors],
+                         [('4', 'Duplicate'), ('5', 'Unknown type'), ('6', 'Bad date')])
+        self.assertIn("already exists", errors[0]['error'])
+
+        instruments = InstrumentRepository(self.manager)
+        centrifuge = instruments.search_instruments('EPP-2')[0]
+        self.assertEqual((centrifuge['status'], centrifuge['date_start_operating']), ('Operational', '2025-01-10'))
+        self.assertEqual(
+            [(plan['maintenance_type_name'], plan['period_weeks'])
+             for plan in instruments.get_maintenance_plans(centrifuge['id'])],
+            [('Calibration', 4), ('Cleaning', 52)]
+        )
+        status = self.manager.execute_query(
+            "SELECT maintenance_type_id, next_due FROM maintenance_status WHERE instrument_id = ? ORDER BY 1",
+            (centrifuge['id'],)
+        )
+        self.assertEqual([tuple(row.values()) for row in status], [(1, '2025-01-10'), (2, '2025-01-10')])
+
+    def test_history_import_matches_row_by_row_inserts(self):
+        schema = "SELECT type, name, sql FROM sqlite_master WHERE type IN ('index', 'trigger') ORDER BY name"
+        original_schema = self.manager.execute_query(schema)
+        importer = BulkImporter(self.manager, workers=1)
+        self._import_instruments(importer)
+        watcher = self.manager.change_watcher()
+        seq = watcher.latest_change()
+        path = self._write_jsonl('history.jsonl', [
+            json.dumps({'serial_number': 'OLY-1', 'maintenance_type': 'Cleaning',
+                        'maintenance_date': '2025-03-01', 'performed_by': 'user1', 'notes': 'Battery leak'}),
+            json.dumps({'serial_number': 'OLY-1', 'maintenance_type': 'Cleaning',
+                        'maintenance_date': '2025-02-01', 'performed_by': 'user1'}),
+            json.dumps({'serial_number': 'EPP-2', 'maintenance_type': 'Calibration',
+                        'maintenance_date': '01/02/2025', 'performed_by': 'user1', 'notes': 'Rotor'}),
+            '{"serial_number": "EPP-2", ',
+            json.dumps({'serial_number': 'EPP-2', 'maintenance_type': 'Cleaning',
+                        'maintenance_date': '2025-02-01', 'performed_by': 'nobody'}),
+            '',
+            json.dumps(['not', 'an', 'object']),
+        ])
+        result = importer.import_maintenance_records(path)
+        self.assertEqual((result.imported, result.rejected), (3, 3))
+        with open(result.error_path) as f:
+            errors = [json.loads(line) for line in f]
+        self.assertEqual([error['line'] for error in errors], [4, 5, 7])
+        self.assertEqual(errors[1]['error'], "Unknown user 'nobody'")
+
+        # The same records inserted one by one, with every trigger firing
+        reference = self._database('reference.db')
+        self._import_instruments(BulkImporter(reference, workers=1))
+        records = MaintenanceRepository(reference)
+        records.create_maintenance_record(1, 1, '2025-03-01', 1, 'Battery leak')
+        records.create_maintenance_record(1, 1, '2025-02-01', 1, None)
+        records.create_maintenance_record(2, 2, '2025-02-01', 1, 'Rotor')
+        query = "SELECT * FROM maintenance_status ORDER BY instrument_id, maintenance_type_id"
+        self.assertEqual(self.manager.execute_query(query), reference.execute_query(query))
+
+        # Derived data written in bulk: search index, versions and journal
+        found = MaintenanceRepository(self.manager).search_notes('batt')
+        self.assertEqual([record['notes'] for record in found], ['Battery leak'])
+        self.assertEqual(watcher.changes_since(seq, ['maintenance_records'])[1],
+                         {'maintenance_records': {1, 2, 3}})
+        self.assertEqual(watcher.versions(['maintenance_records']), {'maintenance_records': 3})
+
+        # Every dropped trigger and index is back
+        self.assertEqual(self.manager.execute_query(schema), original_schema)
+
+    def test_parallel_validation(self):
+        importer = BulkImporter(self.manager, workers=2, batch_size=2)
+        self._import_instruments(importer)
+        path = self._write_csv(
+            'history.csv', ['serial_number', 'maintenance_type', 'maintenance_date', 'performed_by', 'notes'],
+            [['OLY-1', 'Cleaning', f'2025-02-{day:02d}', 'user1', ''] for day in range(1, 10)]
+            + [['OLY-1', 'Cleaning', 'someday', 'user1', '']]
+        )
+        progress = []
+        result = importer.import_maintenance_records(path, progress=lambda done, total: progress.append(done))
+        self.assertEqual((result.imported, result.rejected), (9, 1))
+        self.assertEqual(progress, [2, 4, 6, 8, 10])
+        dates = self.manager.execute_query("SELECT maintenance_date FROM maintenance_records ORDER BY id")
+        self.assertEqual([row['maintenance_date'] for row in dates], [f'2025-02-{day:02d}' for day in range(1, 10)])
+
+    def test_large_import_makes_watchers_reload(self):
+        importer = BulkImporter(self.manager, workers=1)
+        self._import_instruments(importer)
+        watcher = self.manager.change_watcher()
+        seq = watcher.latest_change()
+        count = CHANGE_LOG_RETENTION + 5
+        path = self._write_csv(
+            'history.csv', ['serial_number', 'maintenance_type', 'maintenance_date', 'performed_by'],
+            [['OLY-1', 'Cleaning', '2025-02-01', 'user1']] * count
+        )
+        importer.import_maintenance_records(path)
+        latest, changes = watcher.changes_since(seq, ['maintenance_records'])
+        self.assertEqual(latest, seq + count + 1)  # And the status row
+        self.assertIsNone(changes)
+
+    def test_unusable_file_imports_nothing(self):
+        path = self._write_csv('history.csv', ['serial_number', 'maintenance_date'], [['OLY-1', '2025-01-01']])
+        importer = BulkImporter(self.manager, workers=1)
+        with self.assertRaises(BulkImportError):
+            importer.import_maintenance_records(path)
+        spreadsheet = os.path.join(self.tmp_dir.name, 'instruments.xlsx')
+        open(spreadsheet, 'wb').close()
+        with self.assertRaises(BulkImportError):
+            importer.import_instruments(spreadsheet)
+        self.assertEqual(self.manager.get_scalar("SELECT COUNT(*) FROM maintenance_records"), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,151 @@
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+import multiprocessing
+from create_database import create_tables
+from src.database.migrations import migrate
+from src.database.write_lease import WriteLease, WriteLeaseTimeout
+
+# Raise these to turn the test into a heavier stress run, e.g.
+# STRESS_READERS=16 STRESS_WRITERS=8 python -m pytest test_concurrency.py
+READERS = int(os.getenv('STRESS_READERS', '4'))
+WRITERS = int(os.getenv('STRESS_WRITERS', '3'))
+WRITES_PER_WRITER = int(os.getenv('STRESS_WRITES', '25'))
+
+MAINTENANCE_QUERY = """
+    SELECT i.name, mt.name, ms.last_date, ms.next_due
+    FROM maintenance_status ms
+    JOIN instruments i ON i.id = ms.instrument_id
+    JOIN maintenance_types mt ON mt.id = ms.maintenance_type_id
+    ORDER BY ms.next_due
+"""
+
+def _writer(db_path, writer_id, start_event, results):
+    from database import Database
+    db = Database(db_path)
+    start_event.wait()
+    try:
+        for n in range(WRITES_PER_WRITER):
+            with db.transaction() as conn:
+                conn.execute("""
+                    INSERT INTO maintenance_records (instrument_id, maintenance_type_id, maintenance_date, performed_by, notes)
+                    VALUES (1, 1, date('2025-01-01', '+' || ? || ' days'), 1, ?)
+                """, (n, f'writer {writer_id} record {n}'))
+        results.put(('writer', writer_id, WRITES_PER_WRITER, None))
+    except Exception as e:
+        results.put(('writer', writer_id, 0, str(e)))
+    finally:
+        db.close()
+
+def _reader(db_path, reader_id, start_event, stop_event, results):
+    from database import Database
+    db = Database(db_path)
+    start_event.wait()
+    reads = 0
+    try:
+        while not stop_event.is_set():
+            db.execute_query(MAINTENANCE_QUERY)
+            reads += 1
+        results.put(('reader', reader_id, reads, None))
+    except Exception as e:
+        results.put(('reader', reader_id, reads, str(e)))
+    finally:
+        db.close()
+
+def _hold_write_transaction(db_path, locked_event, seconds):
+    from database import Database
+    db = Database(db_path)
+    with db.transaction() as conn:
+        conn.execute("UPDATE instruments SET location = 'Lab 102' WHERE id = 1")
+        locked_event.set()
+        time.sleep(seconds)
+    db.close()
+
+class TestConcurrentAccess(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp_dir.name, 'lab_instruments.db')
+        conn = sqlite3.connect(self.db_path)
+        create_tables(conn.cursor())
+        conn.execute("INSERT INTO users (username, email, password, is_admin) VALUES ('user1', 'u1@example.com', 'x', 0)")
+        conn.execute("INSERT INTO maintenance_types (name) VALUES ('Cleaning')")
+        conn.execute("""
+            INSERT INTO instruments (name, model, serial_number, location, status, brand,
+                                     responsible_user_id, date_start_operating, maintenance_1, period_1)
+            VALUES ('Microscope', 'BX53', 'OLY-1', 'Lab 101', 'Operational', 'Olympus', 1, '2025-01-01', 1, 13)
+        """)
+        conn.commit()
+        migrate(conn)
+        conn.close()
+        self.ctx = multiprocessing.get_context('spawn')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_readers_and_writers_run_concurrently(self):
+        start_event = self.ctx.Event()
+        stop_event = self.ctx.Event()
+        results = self.ctx.Queue()
+
+        writers = [self.ctx.Process(target=_writer, args=(self.db_path, n, start_event, results))
+                   for n in range(WRITERS)]
+        readers = [self.ctx.Process(target=_reader, args=(self.db_path, n, start_event, stop_event, results))
+                   for n in range(READERS)]
+        for process in writers + readers:
+            process.start()
+
+        start_event.set()
+        for process in writers:
+            process.join(timeout=120)
+        stop_event.set()
+        for process in readers:
+            process.join(timeout=30)
+
+        outcomes = [results.get(timeout=10) for _ in range(WRITERS + READERS)]
+        errors = [outcome for outcome in outcomes if outcome[3]]
+        self.assertEqual(errors, [])
+        self.assertTrue(all(outcome[2] > 0 for outcome in outcomes if outcome[0] == 'reader'))
+
+        conn = sqlite3.connect(self.db_path)
+        count = conn.execute("SELECT COUNT(*) FROM maintenance_records").fetchone()[0]
+        self.assertEqual(count, WRITERS * WRITES_PER_WRITER)
+        self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], 'wal')
+        conn.close()
+
+    def test_reads_do_not_wait_for_writer(self):
+        locked_event = self.ctx.Event()
+        writer = self.ctx.Process(target=_hold_write_transaction, args=(self.db_path, locked_event, 2))
+        writer.start()
+        self.assertTrue(locked_event.wait(timeout=30))
+
+        from database import Database
+        db = Database(self.db_path)
+        started = time.monotonic()
+        rows = db.execute_query(MAINTENANCE_QUERY)
+        elapsed = time.monotonic() - started
+        self.assertEqual(len(rows), 1)
+        self.assertLess(elapsed, 1.0)
+
+        # A second writer has to wait for the lease instead
+        with self.assertRaises(WriteLeaseTimeout):
+            db.write_lease.acquire(timeout=0.2)
+
+        db.close()
+        writer.join(timeout=30)
+
+class TestWriteLease(unittest.TestCase):
+    def test_lease_is_reentrant_and_shared_per_path(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            lock_path = os.path.join(tmp_dir, 'db.write-lock')
+            lease = WriteLease.for_path(lock_path)
+            self.assertIs(lease, WriteLease.for_path(lock_path))
+            with lease:
+                with lease:
+                    pass
+                lease.acquire(timeout=0)
+                lease.release()
+
+if __name__ == '__main__':
+    unittest.main()
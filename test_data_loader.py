@@ -0,0 +1,97 @@
+import os
+import threading
+import unittest
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt6.QtCore import QThreadPool
+from PyQt6.QtWidgets import QApplication
+from src.ui.base.data_loader import DataLoader
+
+class TestDataLoader(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        self.pool = QThreadPool()
+        self.loader = DataLoader(pool=self.pool)
+        self.loaded = []
+        self.failed = []
+        self.busy = []
+        self.loader.loaded.connect(self.loaded.append)
+        self.loader.failed.connect(self.failed.append)
+        self.loader.busy_changed.connect(self.busy.append)
+
+    def tearDown(self):
+        self.pool.waitForDone(5000)
+
+    def test_result_arrives_on_gui_thread(self):
+        gui_thread = threading.get_ident()
+        threads = []
+
+        def fetch():
+            threads.append(threading.get_ident())
+            return [1, 2, 3]
+
+        self.loader.loaded.connect(lambda data: threads.append(threading.get_ident()))
+        self.loader.start(fetch)
+        self.assertTrue(self.loader.wait())
+        self.assertEqual(self.loaded, [[1, 2, 3]])
+        self.assertNotEqual(threads[0], gui_thread)
+        self.assertEqual(threads[1], gui_thread)
+        self.assertEqual(self.busy, [True, False])
+
+    def test_new_load_makes_running_load_stale(self):
+        release = threading.Event()
+        started = threading.Event()
+
+        def slow_fetch():
+            started.set()
+            release.wait(5)
+            return 'stale'
+
+        self.loader.start(slow_fetch)
+        started.wait(5)
+        self.loader.start(lambda: 'fresh')
+        release.set()
+        self.assertTrue(self.loader.wait())
+        self.pool.waitForDone(5000)
+        self.app.processEvents()
+        self.assertEqual(self.loaded, ['fresh'])
+
+    def test_cancel_drops_result(self):
+        release = threading.Event()
+        self.loader.start(lambda: release.wait(5) and 'data')
+        self.loader.cancel()
+        self.assertFalse(self.loader.is_busy())
+        release.set()
+        self.pool.waitForDone(5000)
+        self.app.processEvents()
+        self.assertEqual(self.loaded, [])
+        self.assertEqual(self.busy, [True, False])
+
+    def test_queued_load_never_runs_after_cancel(self):
+        self.pool.setMaxThreadCount(1)
+        release = threading.Event()
+        ran = []
+        other = DataLoader(pool=self.pool)
+        other.start(lambda: release.wait(5))
+
+        self.loader.start(lambda: ran.append(True))
+        self.loader.cancel()
+        release.set()
+        self.pool.waitForDone(5000)
+        self.assertEqual(ran, [])
+
+    def test_error_is_reported(self):
+        def fetch():
+            raise ValueError('no such table: instruments')
+
+        self.loader.start(fetch)
+        self.assertTrue(self.loader.wait())
+        self.assertEqual(self.failed, ['no such table: instruments'])
+        self.assertEqual(self.loaded, [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,363 @@
+import gc
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+from create_database import create_tables
+from src.database import (
+    DatabaseManager,
+    DatabaseConnectionError,
+    DatabaseQueryError,
+    InstrumentRepository,
+    MaintenanceRepository,
+    MaintenanceTypeRepository,
+    RepositoryCache,
+    UserRepository
+)
+from src.database.config import DatabaseConfig
+from src.database.migrations import LATEST_VERSION, get_schema_version
+
+class TestDatabaseManager(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp_dir.name, 'lab_instruments.db')
+        conn = sqlite3.connect(self.db_path)
+        create_tables(conn.cursor())
+        conn.execute("INSERT INTO maintenance_types (name) VALUES ('Cleaning')")
+        conn.commit()
+        conn.close()
+        self.managers = []
+
+    def tearDown(self):
+        for manager in self.managers:
+            manager.close()
+        self.tmp_dir.cleanup()
+
+    def _manager(self, pool_size=2, checkout_timeout=None):
+        manager = DatabaseManager(self.db_path, pool_size=pool_size)
+        if checkout_timeout is not None:
+            manager._checkout_timeout = checkout_timeout
+        self.managers.append(manager)
+        return manager
+
+    def test_settings_come_from_config(self):
+        settings = DatabaseConfig.get_settings()
+        self.assertEqual(settings['pool_size'], DatabaseConfig.POOL_SIZE)
+        manager = DatabaseManager(self.db_path)
+        self.managers.append(manager)
+        self.assertEqual(manager.get_stats()['pool_size'], settings['pool_size'])
+
+    def test_opening_migrates_schema(self):
+        manager = self._manager()
+        with manager.connection() as conn:
+            self.assertEqual(get_schema_version(conn), LATEST_VERSION)
+            self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], 'wal')
+
+    def test_pools_are_per_instance(self):
+        first = self._manager(pool_size=1)
+        second = self._manager(pool_size=1)
+        with first.connection() as first_conn:
+            with second.connection() as second_conn:
+                self.assertIsNot(first_conn, second_conn)
+        self.assertEqual(first.get_stats()['opened'], 1)
+        self.assertEqual(second.get_stats()['opened'], 1)
+
+    def test_thread_reuses_its_connection(self):
+        manager = self._manager(pool_size=1, checkout_timeout=0.1)
+        with manager.transaction() as conn:
+            conn.execute("INSERT INTO maintenance_types (name) VALUES ('Calibration')")
+            # Nested checkouts on the same thread see the open transaction
+            self.assertEqual(manager.get_scalar("SELECT COUNT(*) FROM maintenance_types"), 2)
+            with manager.transaction() as nested:
+                self.assertIs(nested, conn)
+        stats = manager.get_stats()
+        self.assertEqual(stats['checkouts'], 2)
+        self.assertEqual(stats['in_use'], 0)
+
+    def test_checkout_blocks_then_times_out_at_pool_size(self):
+        manager = self._manager(pool_size=1, checkout_timeout=0.2)
+        holding = threading.Event()
+        release = threading.Event()
+
+        def hold_connection():
+            with manager.connection():
+                holding.set()
+                release.wait(5)
+
+        holder = threading.Thread(target=hold_connection)
+        holder.start()
+        holding.wait(5)
+        with self.assertRaises(DatabaseConnectionError):
+            manager.get_scalar("SELECT 1")
+        release.set()
+        holder.join()
+
+        self.assertEqual(manager.get_scalar("SELECT 1"), 1)
+        stats = manager.get_stats()
+        self.assertEqual(stats['opened'], 1)
+        self.assertEqual(stats['timeouts'], 1)
+        self.assertEqual(stats['high_water'], 1)
+
+    def test_many_threads_share_a_bounded_pool(self):
+        manager = self._manager(pool_size=3)
+        errors = []
+
+        def worker(n):
+            try:
+                for i in range(20):
+                    manager.execute_insert("INSERT INTO maintenance_types (name) VALUES (?)", (f'type {n}-{i}',))
+                    manager.execute_query("SELECT * FROM maintenance_types")
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(manager.get_scalar("SELECT COUNT(*) FROM maintenance_types"), 1 + 8 * 20)
+        stats = manager.get_stats()
+        self.assertLessEqual(stats['opened'], 3)
+        self.assertLessEqual(stats['high_water'], 3)
+        self.assertEqual(stats['in_use'], 0)
+
+    def test_failed_transaction_rolls_back(self):
+        manager = self._manager()
+        with self.assertRaises(DatabaseQueryError):
+            with manager.transaction() as conn:
+                conn.execute("INSERT INTO maintenance_types (name) VALUES ('Calibration')")
+                conn.execute("INSERT INTO no_such_table VALUES (1)")
+        self.assertEqual(manager.get_scalar("SELECT COUNT(*) FROM maintenance_types"), 1)
+
+    def test_user_repository_verifies_password(self):
+        manager = self._manager()
+        users = UserRepository(manager)
+        user_id = users.create_user('user1', 'u1@example.com', 'Secret123', False)
+        self.assertEqual(users.verify_password('user1', 'Secret123')['id'], user_id)
+        self.assertIsNone(users.verify_password('user1', 'wrong'))
+
+    def test_instrument_repository_sets_maintenance_plans(self):
+        manager = self._manager()
+        manager.execute_insert("INSERT INTO maintenance_types (name) VALUES ('Calibration')")
+        instruments = InstrumentRepository(manager)
+        instrument_id = instruments.create_instrument(
+            'Microscope', 'BX53', 'OLY-1', 'Lab 101', 'Operational', 'Olympus', None, '2025-01-01',
+            plans=[{'maintenance_type_id': 1, 'period_weeks': 13}, {'maintenance_type_id': 2, 'period_weeks': 52}]
+        )
+        instruments.set_maintenance_plans(instrument_id, [{'maintenance_type_id': 2, 'period_weeks': 26}])
+        plans = instruments.get_maintenance_plans(instrument_id)
+        self.assertEqual([(p['maintenance_type_id'], p['period_weeks'], p['position']) for p in plans], [(2, 26, 1)])
+        self.assertEqual(manager.get_scalar("SELECT COUNT(*) FROM maintenance_status"), 1)
+
+    def test_change_watcher_sees_commits_from_any_connection(self):
+        manager = self._manager()
+        watcher = manager.change_watcher()
+        before = watcher.poll()
+        self.assertEqual(watcher.poll(), before)
+
+        # A write from another client
+        other = sqlite3.connect(self.db_path)
+        other.execute("INSERT INTO maintenance_types (name) VALUES ('Calibration')")
+        other.commit()
+        other.close()
+        after = watcher.poll()
+        self.assertEqual(after['maintenance_types'], before['maintenance_types'] + 1)
+        self.assertEqual(after['users'], before['users'])
+
+        # A write through the pool
+        manager.execute_insert("INSERT INTO users (username, email, password, is_admin) VALUES ('u', 'u@example.com', 'x', 0)")
+        self.assertEqual(watcher.versions(['users']), {'users': before['users'] + 1})
+
+    def test_change_watcher_reports_changed_rows(self):
+        manager = self._manager()
+        watcher = manager.change_watcher()
+        seq = watcher.latest_change()
+
+        user_id = manager.execute_insert("INSERT INTO users (username, email, password, is_admin) VALUES ('u', 'u@example.com', 'x', 0)")
+        manager.execute_update("UPDATE maintenance_types SET name = 'Cleaning 2' WHERE id = 1")
+        latest, changes = watcher.changes_since(seq, ['users', 'instruments'])
+        self.assertEqual(latest, watcher.latest_change())
+        self.assertEqual(changes, {'users': {user_id}})
+
+        self.assertEqual(watcher.changes_since(latest, ['users']), (latest, {}))
+
+        # Entries after seq are gone, so only a full reload is safe
+        manager.execute_update("DELETE FROM change_log WHERE seq <= ?", (latest,))
+        manager.execute_update("UPDATE users SET email = 'v@example.com'")
+        self.assertIsNone(watcher.changes_since(seq, ['users'])[1])
+
+    def test_iter_query_streams_in_batches(self):
+        manager = self._manager()
+        manager.execute_many(
+            "INSERT INTO maintenance_types (name) VALUES (?)",
+            [(f'Type {n:02d}',) for n in range(25)]
+        )
+        query = "SELECT id, name FROM maintenance_types WHERE name LIKE 'Type%' ORDER BY name"
+        rows = manager.iter_query(query, batch_size=10)
+        self.assertEqual(next(rows), (2, 'Type 00'))
+        # The connection stays checked out while the iterator is open
+        self.assertEqual(manager.get_stats()['in_use'], 1)
+        self.assertEqual(len(list(rows)), 24)
+        self.assertEqual(manager.get_stats()['in_use'], 0)
+
+        records = list(manager.iter_query(query, records=True))
+        self.assertEqual([record.name for record in records], [row['name'] for row in manager.execute_query(query)])
+
+        # Closing an unfinished iterator returns the connection
+        rows = manager.iter_query(query, batch_size=10)
+        next(rows)
+        rows.close()
+        self.assertEqual(manager.get_stats()['in_use'], 0)
+
+        with self.assertRaises(DatabaseQueryError):
+            list(manager.iter_query("SELECT * FROM no_such_table"))
+
+    def test_maintenance_records_stream_like_the_list(self):
+        manager = self._manager()
+        manager.execute_insert("INSERT INTO users (username, email, password, is_admin) VALUES ('u', 'u@example.com', 'x', 0)")
+        manager.execute_insert("""
+            INSERT INTO instruments (name, model, serial_number, location, status, brand,
+                                     responsible_user_id, date_start_operating)
+            VALUES ('Microscope', 'BX53', 'OLY-1', 'Lab 101', 'Operational', 'Olympus', 1, '2025-01-01')
+        """)
+        manager.execute_many("""
+            INSERT INTO maintenance_records (instrument_id, maintenance_type_id, maintenance_date, performed_by, notes)
+            VALUES (1, 1, ?, 1, 'ok')
+        """, [('2025-05-15',), ('2025-06-15',)])
+        repository = MaintenanceRepository(manager)
+        streamed = [record._asdict() for record in repository.iter_maintenance_records(batch_size=1)]
+        self.assertEqual(streamed, repository.get_all_maintenance_records())
+
+    def test_keyset_pages_cover_the_history_in_order(self):
+        manager = self._manager()
+        manager.execute_insert("INSERT INTO users (username, email, password, is_admin) VALUES ('u', 'u@example.com', 'x', 0)")
+        manager.execute_insert("""
+            INSERT INTO instruments (name, model, serial_number, location, status, brand,
+                                     responsible_user_id, date_start_operating)
+            VALUES ('Microscope', 'BX53', 'OLY-1', 'Lab 101', 'Operational', 'Olympus', 1, '2025-01-01')
+        """)
+        # Several records share a date, so the id must break ties
+        manager.execute_many("""
+            INSERT INTO maintenance_records (instrument_id, maintenance_type_id, maintenance_date, performed_by, notes)
+            VALUES (1, 1, date('2025-01-01', ? || ' days'), 1, 'ok')
+        """, [(n // 3,) for n in range(20)])
+        repository = MaintenanceRepository(manager)
+
+        pages = []
+        after = None
+        while True:
+            page = repository.get_maintenance_page_by_instrument(1, after, limit=6)
+            pages.append(page)
+            if len(page) < 6:
+                break
+            after = (page[-1]['maintenance_date'], page[-1]['id'])
+        self.assertEqual([len(page) for page in pages], [6, 6, 6, 2])
+        ids = [record['id'] for page in pages for record in page]
+        expected = manager.execute_query(
+            "SELECT id FROM maintenance_records ORDER BY maintenance_date DESC, id DESC"
+        )
+        self.assertEqual(ids, [row['id'] for row in expected])
+        self.assertEqual(
+            [record['id'] for record in repository.get_maintenance_records_page(limit=20)], ids
+        )
+
+        # A page is a range scan of an index, not a sort of the whole table
+        with manager.connection() as conn:
+            plan = ' '.join(row[3] for row in conn.execute(
+                "EXPLAIN QUERY PLAN SELECT id FROM maintenance_records WHERE (maintenance_date, id) < (?, ?) "
+                "ORDER BY maintenance_date DESC, id DESC LIMIT 10", ('2025-01-05', 9)
+            ))
+        self.assertIn('idx_maintenance_records_date', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_search_ranks_prefix_matches(self):
+        manager = self._manager()
+        manager.execute_insert("INSERT INTO users (username, email, password, is_admin) VALUES ('u', 'u@example.com', 'x', 0)")
+        manager.execute_many("""
+            INSERT INTO instruments (name, model, serial_number, location, status, brand,
+                                     responsible_user_id, date_start_operating)
+            VALUES (?, ?, ?, 'Lab 101', 'Operational', ?, 1, '2025-01-01')
+        """, [
+            ('Microscope', 'BX53', 'OLY-2023-001', 'Olympus'),
+            ('Centrifuge', '5810R', 'EPP-2023-002', 'Eppendorf'),
+            ('Olympus Olympus camera', 'DP74', 'OLY-2023-003', 'Olympus'),
+        ])
+        manager.execute_many("""
+            INSERT INTO maintenance_records (instrument_id, maintenance_type_id, maintenance_date, performed_by, notes)
+            VALUES (?, 1, '2025-05-15', 1, ?)
+        """, [(1, 'Battery leak in the lamp housing'), (2, 'Rotor balanced'), (3, None)])
+
+        instruments = InstrumentRepository(manager)
+        found = instruments.search_instruments('olymp')
+        # The instrument naming Olympus three times ranks first
+        self.assertEqual([instrument['id'] for instrument in found], [3, 1])
+        self.assertEqual([i['id'] for i in instruments.search_instruments('OLY-2023-00')], [1, 3])
+        self.assertEqual([i['id'] for i in instruments.search_instruments('olympus dp7')], [3])
+        self.assertEqual(instruments.search_instruments('   '), [])
+        # Query syntax is searched for literally instead of failing
+        self.assertEqual(instruments.search_instruments('"NEAR( OR *'), [])
+
+        records = MaintenanceRepository(manager).search_notes('batt leak')
+        self.assertEqual([(r['id'], r['instrument_name']) for r in records], [(1, 'Microscope')])
+
+    def test_repository_cache_hits_and_invalidation(self):
+        manager = self._manager()
+        types = MaintenanceTypeRepository(manager)
+        self.assertEqual([t['name'] for t in types.get_all_maintenance_types()], ['Cleaning'])
+        # Repositories on the same database share the cache
+        MaintenanceTypeRepository(manager).get_all_maintenance_types()
+        self.assertEqual(types.cache_stats()['hits'], 1)
+        self.assertEqual(types.cache_stats()['misses'], 1)
+
+        # The repository's own writes invalidate it
+        types.create_maintenance_type('Calibration')
+        self.assertEqual(len(types.get_all_maintenance_types()), 2)
+
+        # So do commits from other processes
+        other = sqlite3.connect(self.db_path)
+        other.execute("INSERT INTO maintenance_types (name) VALUES ('Repair')")
+        other.commit()
+        other.close()
+        self.assertEqual(len(types.get_all_maintenance_types()), 3)
+        self.assertEqual(types.cache_stats()['misses'], 3)
+
+        # Reads inside a transaction are never cached
+        with manager.transaction():
+            manager.execute_insert("INSERT INTO maintenance_types (name) VALUES ('Inspection')")
+            self.assertEqual(len(types.get_all_maintenance_types()), 4)
+        self.assertEqual(types.cache_stats()['misses'], 3)
+        self.assertEqual(len(types.get_all_maintenance_types()), 4)
+        self.assertEqual(types.cache_stats()['misses'], 4)
+
+    def test_repository_cache_evicts_least_recently_used(self):
+        manager = self._manager()
+        users = UserRepository(manager)
+        users.cache.max_size = 2
+        for n in range(3):
+            users.create_user(f'user{n}', f'user{n}@example.com', 'secret', False)
+        users.get_user_by_id(1)
+        users.get_user_by_id(2)
+        users.get_user_by_id(1)
+        users.get_user_by_id(3)
+        stats = users.cache_stats()
+        self.assertEqual((stats['size'], stats['evictions']), (2, 1))
+        # User 2 was the least recently used
+        users.get_user_by_id(1)
+        users.get_user_by_id(2)
+        self.assertEqual(users.cache_stats()['hits'], 2)
+
+    def test_repository_cache_does_not_keep_database_alive(self):
+        before = len(RepositoryCache._caches)
+        for _ in range(3):
+            manager = DatabaseManager(self.db_path)
+            MaintenanceTypeRepository(manager).get_all_maintenance_types()
+            manager.close()
+        del manager
+        gc.collect()
+        self.assertEqual(len(RepositoryCache._caches), before)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,10 +1,19 @@
+import random
 import unittest
 from datetime import datetime, timedelta
+import date_utils
 from date_utils import (
     calculate_next_maintenance,
     format_date_for_display,
     format_date_for_db,
-    get_maintenance_status
+    get_maintenance_status,
+    to_day_number,
+    from_day_number,
+    today_day_number,
+    calculate_next_maintenance_days,
+    get_maintenance_status_codes,
+    format_day_numbers,
+    STATUS_VALUES
 )
 
 class TestDateUtils(unittest.TestCase):
@@ -93,5 +102,79 @@ class TestDateUtils(unittest.TestCase):
         self.assertEqual(status, 'on_schedule')
         self.assertIsNone(color)
 
+    def test_day_numbers(self):
+        self.assertEqual(to_day_number('1970-01-01'), 0)
+        self.assertEqual(to_day_number('2025-05-15'), 20223)
+        self.assertEqual(from_day_number(20223), '2025-05-15')
+        self.assertEqual(from_day_number(to_day_number('1969-12-31')), '1969-12-31')
+        self.assertEqual(from_day_number(today_day_number()), self.today)
+
+        # Missing and invalid dates
+        self.assertIsNone(to_day_number(None))
+        self.assertIsNone(to_day_number('Never'))
+        self.assertIsNone(to_day_number('15-05-2025'))
+        self.assertIsNone(from_day_number(None))
+
+class TestBatchDateUtils(unittest.TestCase):
+    """The batch functions must agree with the scalar ones row for row"""
+
+    def setUp(self):
+        rng = random.Random(42)
+        base = datetime(2025, 6, 1)
+        self.nows = [base, base.replace(hour=14, minute=30), datetime(2024, 2, 29, 0, 0, 1)]
+
+        def random_date():
+            if rng.random() < 0.15:
+                return rng.choice([None, 'Never'])
+            return (base + timedelta(days=rng.randint(-400, 400))).strftime('%Y-%m-%d')
+
+        self.rows = []
+        for _ in range(2000):
+            period = rng.choice([None, 1, 2, 4, 13, 26, 52])
+            start = random_date()
+            self.rows.append((random_date(), period, None if start == 'Never' else start))
+        # Dates right around the due-soon and overdue boundaries
+        for days in range(-2, 14):
+            day = (base + timedelta(days=days)).strftime('%Y-%m-%d')
+            self.rows.append((day, 0, None))
+
+        self.original_np = date_utils.np
+
+    def tearDown(self):
+        date_utils.np = self.original_np
+
+    def _check_equivalence(self):
+        last_days = [to_day_number(last) for last, _, _ in self.rows]
+        periods = [period for _, period, _ in self.rows]
+        start_days = [to_day_number(start) for _, _, start in self.rows]
+
+        for now in self.nows:
+            expected_dates = [calculate_next_maintenance(last, period, start, now=now)
+                              for last, period, start in self.rows]
+            next_days = calculate_next_maintenance_days(last_days, periods, start_days, now=now)
+            self.assertEqual(format_day_numbers(next_days), expected_dates)
+
+            expected_status = [get_maintenance_status(next_date, now=now) for next_date in expected_dates]
+            codes = get_maintenance_status_codes(next_days, now=now)
+            self.assertEqual([STATUS_VALUES[code] for code in codes], expected_status)
+
+    @unittest.skipIf(date_utils.np is None, 'NumPy is not installed')
+    def test_numpy_matches_scalar(self):
+        self._check_equivalence()
+
+    def test_pure_python_matches_scalar(self):
+        date_utils.np = None
+        self._check_equivalence()
+
+    @unittest.skipIf(date_utils.np is None, 'NumPy is not installed')
+    def test_accepts_datetime64(self):
+        np = date_utils.np
+        now = datetime(2025, 6, 1, 9)
+        last = np.array(['2025-05-15', 'NaT'], dtype='datetime64[D]')
+        start = np.array(['NaT', '2025-01-10'], dtype='datetime64[D]')
+        next_days = calculate_next_maintenance_days(last, np.array([13, 4]), start, now=now)
+        self.assertEqual(format_day_numbers(next_days), ['2025-08-14', '2025-01-10'])
+        self.assertEqual(list(get_maintenance_status_codes(next_days, now=now)), [0, 2])
+
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
@@ -0,0 +1,91 @@
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from date_utils import STATUS_DUE_SOON, STATUS_OVERDUE, get_maintenance_status_codes, to_day_number
+from src.database import MaintenanceRepository
+from src.scheduling import DueQueue
+from test_support import LAB_INSTRUMENTS, LAB_PLANS, add_plan, make_lab_db
+
+NOW = datetime(2025, 6, 1, 9, 0)
+
+class TestDueQueue(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.manager = make_lab_db(self.tmp_dir.name, LAB_INSTRUMENTS, LAB_PLANS)
+        self.records = MaintenanceRepository(self.manager)
+
+    def tearDown(self):
+        self.manager.close()
+        self.tmp_dir.cleanup()
+
+    def _scan_counts(self, now):
+        """Overdue and due soon counts by a full scan, as the windows compute them"""
+        rows = self.manager.execute_query(
+            "SELECT ms.next_due_day FROM maintenance_status ms JOIN instruments i ON i.id = ms.instrument_id "
+            "WHERE i.status = 'Operational'"
+        )
+        codes = list(get_maintenance_status_codes([row['next_due_day'] for row in rows], now))
+        return codes.count(STATUS_OVERDUE), codes.count(STATUS_DUE_SOON)
+
+    def test_changes_fire_at_the_thresholds(self):
+        queue = DueQueue(self.manager, NOW)
+        self.assertEqual(len(queue), 6)
+        self.assertEqual(queue.counts(), (3, 1))
+        self.assertEqual(queue.counts(1), (1, 1))
+        self.assertEqual(queue.pop_changes(NOW), [])
+
+        # The Centrifuge, due 06-05, is overdue from just after that midnight
+        self.assertEqual(queue.next_change(), datetime(2025, 6, 5))
+        self.assertEqual(queue.pop_changes(datetime(2025, 6, 5)), [])
+        self.assertEqual(queue.pop_changes(datetime(2025, 6, 5, 0, 0, 1)),
+                         [(2, 2, to_day_number('2025-06-05'), STATUS_OVERDUE)])
+        self.assertEqual(queue.counts(1), (2, 0))
+
+        # The next one is the Microscope's calibration, due soon 10 days ahead
+        self.assertEqual(queue.next_change(), datetime(2026, 4, 19))
+        self.assertEqual(queue.pop_changes(datetime(2026, 4, 19, 7)),
+                         [(1, 2, to_day_number('2026-04-30'), STATUS_DUE_SOON),
+                          (3, 1, to_day_number('2026-04-30'), STATUS_DUE_SOON)])
+        # Then overdue once their day has started
+        self.assertEqual(queue.pop_changes(datetime(2027, 1, 1)),
+                         [(1, 2, to_day_number('2026-04-30'), STATUS_OVERDUE),
+                          (3, 1, to_day_number('2026-04-30'), STATUS_OVERDUE)])
+        self.assertIsNone(queue.next_change())
+
+    def test_refresh_applies_database_changes(self):
+        queue = DueQueue(self.manager, NOW)
+        self.assertFalse(queue.refresh(NOW))
+
+        # Maintenance done: back on schedule, nothing to report
+        self.records.create_maintenance_record(1, 1, '2025-06-01', 1, None)
+        self.assertTrue(queue.refresh(NOW))
+        self.assertEqual(queue.pop_changes(NOW), [])
+        self.assertEqual(queue.counts(1), (0, 1))
+
+        # A shorter period makes the Balance overdue right away
+        add_plan(self.manager, 3, 1, 4)
+        # The Freezer is retired and the orphan gets a responsible user
+        with self.manager.transaction() as conn:
+            conn.execute("UPDATE instruments SET status = 'Out of Service' WHERE id = 6")
+            conn.execute("UPDATE instruments SET responsible_user_id = 2 WHERE id = 5")
+        self.assertTrue(queue.refresh(NOW))
+        self.assertEqual(sorted(queue.pop_changes(NOW)),
+                         [(3, 1, to_day_number('2025-05-29'), STATUS_OVERDUE),
+                          (5, 1, to_day_number('2025-01-29'), STATUS_OVERDUE)])
+        self.assertEqual(queue.counts(2), (2, 0))
+        self.assertEqual(queue.counts(3), (0, 0))
+        self.assertIsNone(queue.status(6, 1))
+
+    def test_counts_match_a_full_scan(self):
+        queue = DueQueue(self.manager, NOW)
+        for days in range(0, 400, 3):
+            now = NOW + timedelta(days=days)
+            if days == 90:
+                self.records.create_maintenance_record(2, 2, (now - timedelta(days=1)).strftime('%Y-%m-%d'), 1, None)
+                add_plan(self.manager, 4, 2, 1)
+                queue.refresh(now)
+            queue.pop_changes(now)
+            self.assertEqual(queue.counts(), self._scan_counts(now), now)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,144 @@
+import os
+import csv
+import random
+import tempfile
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from datetime import date, datetime
+from io import StringIO
+from date_utils import get_maintenance_status
+import src.scheduling.forecast as forecast_module
+from src.scheduling import add_months, expand_occurrences, forecast_maintenance
+import forecast_maintenance as forecast_cli
+from test_support import USERS, make_lab_db
+
+NOW = datetime(2025, 6, 1, 9, 0)
+
+class TestExpandOccurrences(unittest.TestCase):
+    def setUp(self):
+        self.original_np = forecast_module.np
+
+    def tearDown(self):
+        forecast_module.np = self.original_np
+
+    def _check(self):
+        rng = random.Random(24)
+        start, end = 20000, 20365
+        next_days = [start + rng.randint(-400, 400) for _ in range(500)]
+        periods = [7 * rng.choice([1, 4, 13, 26, 52]) for _ in range(500)]
+        expected = []
+        for plan, (next_day, period) in enumerate(zip(next_days, periods)):
+            day = max(next_day, start)
+            while day < end:
+                expected.append((plan, day, day == start and next_day < start))
+                day += period
+        plans, days, overdue = expand_occurrences(next_days, periods, start, end)
+        self.assertEqual(list(zip(map(int, plans), map(int, days), map(bool, overdue))), expected)
+
+    @unittest.skipIf(forecast_module.np is None, 'NumPy is not installed')
+    def test_numpy_matches_loop(self):
+        self._check()
+
+    def test_pure_python_matches_loop(self):
+        forecast_module.np = None
+        self._check()
+
+    def test_overdue_day(self):
+        for np in {None, self.original_np}:
+            forecast_module.np = np
+            plans, days, overdue = expand_occurrences([20000, 20000], [7, 7], 20000, 20014, 20001)
+            self.assertEqual(list(map(bool, overdue)), [True, False, True, False])
+            plans, days, overdue = expand_occurrences([20000], [7], 20000, 20014)
+            self.assertEqual(list(map(bool, overdue)), [False, False])
+
+    def test_add_months(self):
+        self.assertEqual(add_months(date(2025, 6, 1), 12), date(2026, 6, 1))
+        self.assertEqual(add_months(date(2025, 1, 31), 1), date(2025, 2, 28))
+        self.assertEqual(add_months(date(2025, 11, 15), 3), date(2026, 2, 15))
+
+class TestForecast(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp_dir.name, 'lab_instruments.db')
+        self.original_np = forecast_module.np
+        self.manager = make_lab_db(
+            self.tmp_dir.name,
+            [('Microscope', 'A-1', 1, 'Operational', 'Lab 101'),
+             ('Centrifuge', 'B-2', 2, 'Operational', 'Lab 102'),
+             ('Broken pump', 'D-4', 2, 'Out of Service', 'Lab 101'),
+             ('Orphan', 'E-5', None, 'Operational', 'Lab 102')],
+            # (instrument, type, period in weeks, last maintenance)
+            [(1, 1, 4, '2025-04-01'),   # Due 04-29, overdue
+             (1, 2, 52, '2025-05-01'),  # Due 2026-04-30
+             (2, 2, 13, '2025-05-08'),  # Due 08-07
+             (3, 1, 4, '2025-01-01'),
+             (4, 1, 26, '2025-01-01')],  # Due 07-02
+            users=USERS[:2]
+        )
+
+    def tearDown(self):
+        forecast_module.np = self.original_np
+        self.manager.close()
+        self.tmp_dir.cleanup()
+
+    def _check_forecast(self):
+        forecast = forecast_maintenance(self.manager, 12, NOW)
+        occurrences = list(forecast.occurrences())
+        # Overdue cleaning caught up today then every 4 weeks until 2026-05-31
+        cleaning = [o['date'] for o in occurrences if o['instrument_id'] == 1 and o['maintenance_type_id'] == 1]
+        self.assertEqual(cleaning[:2], ['2025-06-01', '2025-06-29'])
+        self.assertEqual(len(cleaning), 14)
+        self.assertTrue(occurrences[0]['overdue'])
+        self.assertEqual(sum(o['overdue'] for o in occurrences), 1)
+        self.assertEqual([o['date'] for o in occurrences if o['instrument_id'] == 2],
+                         ['2025-08-07', '2025-11-06', '2026-02-05', '2026-05-07'])
+        self.assertEqual(len(forecast), 14 + 1 + 4 + 2)
+
+        self.assertEqual(forecast.totals('user'), {1: 15, 2: 4, None: 2})
+        self.assertEqual(forecast.totals('location'), {'Lab 101': 15, 'Lab 102': 6})
+        self.assertEqual(forecast.totals('type'), {1: 16, 2: 5})
+
+        week_starts = forecast.week_starts()
+        self.assertEqual((week_starts[0], week_starts[-1]), ('2025-05-26', '2026-05-25'))
+        per_week = forecast.per_week()
+        self.assertEqual((len(per_week), sum(per_week)), (len(week_starts), len(forecast)))
+        # Calibration on 2026-04-30 and cleaning on 2026-05-03
+        self.assertEqual(per_week[week_starts.index('2026-04-27')], 2)
+        labels, weekly = forecast.weekly('user')
+        self.assertEqual(labels, [None, 1, 2])
+        self.assertEqual([sum(row[column] for row in weekly) for column in range(3)], [2, 15, 4])
+        self.assertEqual([sum(row) for row in weekly], per_week)
+
+    @unittest.skipIf(forecast_module.np is None, 'NumPy is not installed')
+    def test_numpy_forecast(self):
+        self._check_forecast()
+
+    def test_pure_python_forecast(self):
+        forecast_module.np = None
+        self._check_forecast()
+
+    def test_due_today_is_overdue_once_the_day_started(self):
+        # The centrifuge is due 2025-08-07
+        for np in {None, self.original_np}:
+            forecast_module.np = np
+            for now, expected in ((datetime(2025, 8, 7, 9, 0), True), (datetime(2025, 8, 7), False)):
+                forecast = forecast_maintenance(self.manager, 1, now)
+                first = next(o for o in forecast.occurrences() if o['instrument_id'] == 2)
+                self.assertEqual((first['date'], first['overdue']), ('2025-08-07', expected))
+                self.assertEqual(get_maintenance_status('2025-08-07', now)[0] == 'overdue', expected)
+
+    def test_command_line(self):
+        csv_path = os.path.join(self.tmp_dir.name, 'forecast.csv')
+        out = StringIO()
+        with redirect_stdout(out), redirect_stderr(StringIO()):
+            self.assertEqual(forecast_cli.main(['--db', self.db_path, '--by', 'user', '--csv', csv_path]), 0)
+        # Counted from today, so only the grouping is fixed
+        self.assertEqual({line.split()[0] for line in out.getvalue().splitlines()}, {'user1', 'user2', '(none)'})
+        with open(csv_path, newline='', encoding='utf-8') as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual(rows[0].keys(), {'date', 'instrument', 'serial_number', 'maintenance_type',
+                                          'responsible_user', 'location', 'overdue'})
+        self.assertEqual(sorted(rows, key=lambda row: row['date']), rows)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,292 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+from create_database import create_tables
+from date_utils import to_day_number
+from src.database.migrations import (
+    CHANGE_LOG_RETENTION,
+    LATEST_VERSION,
+    MIGRATIONS,
+    MigrationError,
+    get_schema_version,
+    migrate
+)
+
+class MigrationTestCase(unittest.TestCase):
+    def setUp(self):
+        # Build a version 0 database like the ones already deployed
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp_dir.name, 'lab_instruments.db')
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.row_factory = sqlite3.Row
+        create_tables(self.conn.cursor())
+        self.conn.execute("INSERT INTO users (username, email, password, is_admin) VALUES ('user1', 'u1@example.com', 'x', 0)")
+        self.conn.execute("INSERT INTO maintenance_types (name) VALUES ('Cleaning')")
+        self.conn.execute("""
+            INSERT INTO instruments (name, model, serial_number, location, status, brand,
+                                     responsible_user_id, date_start_operating, maintenance_1, period_1)
+            VALUES ('Microscope', 'BX53', 'OLY-1', 'Lab 101', 'Operational', 'Olympus', 1, '2025-01-01', 1, 13)
+        """)
+        self.conn.execute("""
+            INSERT INTO maintenance_records (instrument_id, maintenance_type_id, maintenance_date, performed_by, notes)
+            VALUES (1, 1, '2025-05-15', 1, 'ok')
+        """)
+        self.conn.commit()
+
+    def tearDown(self):
+        self.conn.close()
+        self.tmp_dir.cleanup()
+
+    def _index_names(self):
+        rows = self.conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'").fetchall()
+        return {row['name'] for row in rows}
+
+class TestMigrations(MigrationTestCase):
+    def test_migrate_upgrades_in_place(self):
+        self.assertEqual(get_schema_version(self.conn), 0)
+        self.assertEqual(migrate(self.conn), LATEST_VERSION)
+        self.assertEqual(get_schema_version(self.conn), LATEST_VERSION)
+
+        indexes = self._index_names()
+        self.assertIn('idx_maintenance_records_instrument_type_date', indexes)
+        self.assertIn('idx_maintenance_records_instrument_date', indexes)
+        self.assertIn('idx_instruments_responsible_user', indexes)
+        self.assertIn('idx_instruments_status', indexes)
+
+        # Existing data survives the upgrade
+        count = self.conn.execute("SELECT COUNT(*) FROM maintenance_records").fetchone()[0]
+        self.assertEqual(count, 1)
+
+    def test_migrate_is_idempotent(self):
+        migrate(self.conn)
+        self.assertEqual(migrate(self.conn), LATEST_VERSION)
+
+    def test_last_maintenance_lookup_uses_index(self):
+        migrate(self.conn)
+        plan = self.conn.execute("""
+            EXPLAIN QUERY PLAN
+            SELECT MAX(maintenance_date) FROM maintenance_records
+            WHERE instrument_id = ? AND maintenance_type_id = ?
+        """, (1, 1)).fetchall()
+        details = ' '.join(row['detail'] for row in plan)
+        self.assertIn('idx_maintenance_records_instrument_type_date', details)
+
+    def test_newer_schema_is_rejected(self):
+        self.conn.execute(f"PRAGMA user_version = {LATEST_VERSION + 1}")
+        with self.assertRaises(MigrationError):
+            migrate(self.conn)
+
+    def test_python_error_rolls_back(self):
+        version, description, _ = MIGRATIONS[0]
+
+        def fail(conn):
+            conn.execute("CREATE TABLE half_done (id INTEGER)")
+            raise ValueError('bad date')
+
+        with mock.patch('src.database.migrations.MIGRATIONS', [(version, description, fail)]):
+            with self.assertRaises(ValueError):
+                migrate(self.conn, version)
+        self.assertFalse(self.conn.in_transaction)
+        self.assertEqual(get_schema_version(self.conn), 0)
+        self.assertNotIn('half_done', {row['name'] for row in self.conn.execute("SELECT name FROM sqlite_master")})
+
+class TestMaintenanceStatus(MigrationTestCase):
+    def _status(self, instrument_id=1, type_id=1):
+        return self.conn.execute(
+            "SELECT * FROM maintenance_status WHERE instrument_id = ? AND maintenance_type_id = ?",
+            (instrument_id, type_id)
+        ).fetchone()
+
+    def test_backfill_from_existing_records(self):
+        migrate(self.conn)
+        status = self._status()
+        self.assertEqual(status['last_date'], '2025-05-15')
+        self.assertEqual(status['last_notes'], 'ok')
+        self.assertEqual(status['next_due'], '2025-08-14')
+
+    def test_triggers_follow_maintenance_records(self):
+        migrate(self.conn)
+        self.conn.execute("""
+            INSERT INTO maintenance_records (instrument_id, maintenance_type_id, maintenance_date, performed_by, notes)
+            VALUES (1, 1, '2025-06-01', 1, 'newer')
+        """)
+        status = self._status()
+        self.assertEqual(status['last_date'], '2025-06-01')
+        self.assertEqual(status['last_notes'], 'newer')
+        self.assertEqual(status['next_due'], '2025-08-31')
+
+        self.conn.execute("DELETE FROM maintenance_records")
+        status = self._status()
+        self.assertIsNone(status['last_date'])
+        self.assertEqual(status['next_due'], '2025-01-01')
+
+    def test_triggers_follow_instrument_schedule(self):
+        migrate(self.conn)
+        self.conn.execute("UPDATE instrument_maintenance_schedule SET period_weeks = 4 WHERE instrument_id = 1")
+        self.assertEqual(self._status()['next_due'], '2025-06-12')
+
+        self.conn.execute("DELETE FROM instrument_maintenance_schedule WHERE instrument_id = 1")
+        self.assertIsNone(self._status())
+
+        self.conn.execute("""
+            INSERT INTO instrument_maintenance_schedule (instrument_id, maintenance_type_id, period_weeks, position)
+            VALUES (1, 1, 2, 1)
+        """)
+        self.assertEqual(self._status()['next_due'], '2025-05-29')
+
+class TestMaintenanceSchedule(MigrationTestCase):
+    def test_slots_move_to_schedule_table(self):
+        migrate(self.conn)
+        plans = self.conn.execute("SELECT * FROM instrument_maintenance_schedule").fetchall()
+        self.assertEqual([tuple(plan) for plan in plans], [(1, 1, 13, 1)])
+
+        columns = {row['name'] for row in self.conn.execute("PRAGMA table_info(instruments)")}
+        self.assertNotIn('maintenance_1', columns)
+        self.assertNotIn('period_3', columns)
+        self.assertIn('idx_instrument_maintenance_schedule_type', self._index_names())
+        self.assertEqual(self.conn.execute("PRAGMA foreign_key_check").fetchall(), [])
+
+    def test_instrument_delete_removes_plans(self):
+        migrate(self.conn)
+        self.conn.execute("DELETE FROM maintenance_records")
+        self.conn.execute("DELETE FROM instruments WHERE id = 1")
+        count = self.conn.execute("SELECT COUNT(*) FROM instrument_maintenance_schedule").fetchone()[0]
+        self.assertEqual(count, 0)
+
+class TestDayNumbers(MigrationTestCase):
+    def test_mixed_format_dates_are_repaired(self):
+        self.conn.execute("UPDATE instruments SET date_start_operating = '10-01-2025' WHERE id = 1")
+        self.conn.execute("UPDATE maintenance_records SET maintenance_date = '15/05/2025'")
+        self.conn.commit()
+        migrate(self.conn)
+        instrument = self.conn.execute("SELECT date_start_operating, start_day FROM instruments").fetchone()
+        self.assertEqual(tuple(instrument), ('2025-01-10', to_day_number('2025-01-10')))
+        record = self.conn.execute("SELECT maintenance_date, maintenance_day FROM maintenance_records").fetchone()
+        self.assertEqual(tuple(record), ('2025-05-15', to_day_number('2025-05-15')))
+        status = self.conn.execute("SELECT next_due, next_due_day FROM maintenance_status").fetchone()
+        self.assertEqual(tuple(status), ('2025-08-14', to_day_number('2025-08-14')))
+
+    def test_day_columns_follow_writes(self):
+        migrate(self.conn)
+        self.conn.execute("""
+            INSERT INTO maintenance_records (instrument_id, maintenance_type_id, maintenance_date, performed_by, notes)
+            VALUES (1, 1, '2025-06-01', 1, 'newer')
+        """)
+        status = self.conn.execute("SELECT last_day, next_due_day FROM maintenance_status").fetchone()
+        self.assertEqual(tuple(status), (to_day_number('2025-06-01'), to_day_number('2025-08-31')))
+
+    def test_due_range_uses_index(self):
+        migrate(self.conn)
+        plan = self.conn.execute("""
+            EXPLAIN QUERY PLAN
+            SELECT instrument_id FROM maintenance_status
+            WHERE next_due_day BETWEEN ? AND ?
+        """, (20000, 20100)).fetchall()
+        details = ' '.join(row['detail'] for row in plan)
+        self.assertIn('idx_maintenance_status_next_due_day', details)
+
+class TestTableVersions(MigrationTestCase):
+    def _versions(self):
+        rows = self.conn.execute("SELECT table_name, version FROM table_versions").fetchall()
+        return {row['table_name']: row['version'] for row in rows}
+
+    def test_triggers_count_changes_per_table(self):
+        migrate(self.conn)
+        before = self._versions()
+        self.conn.execute("""
+            INSERT INTO maintenance_records (instrument_id, maintenance_type_id, maintenance_date, performed_by, notes)
+            VALUES (1, 1, '2025-06-01', 1, 'newer')
+        """)
+        self.conn.execute("UPDATE instruments SET location = 'Lab 102'")
+        after = self._versions()
+        self.assertEqual(after['maintenance_records'], before['maintenance_records'] + 1)
+        self.assertEqual(after['instruments'], before['instruments'] + 1)
+        # The summary row is rewritten by its own trigger
+        self.assertGreater(after['maintenance_status'], before['maintenance_status'])
+        self.assertEqual(after['users'], before['users'])
+
+class TestChangeLog(MigrationTestCase):
+    def _log(self, since=0):
+        rows = self.conn.execute(
+            "SELECT table_name, row_id, op FROM change_log WHERE seq > ? ORDER BY seq", (since,)
+        ).fetchall()
+        return [tuple(row) for row in rows]
+
+    def test_triggers_journal_changed_rows(self):
+        migrate(self.conn)
+        seq = self.conn.execute("SELECT MAX(seq) FROM change_log").fetchone()[0] or 0
+        self.conn.execute("UPDATE instruments SET location = 'Lab 102' WHERE id = 1")
+        self.conn.execute("INSERT INTO users (username, email, password, is_admin) VALUES ('user2', 'u2@example.com', 'x', 0)")
+        self.conn.execute("DELETE FROM users WHERE id = 2")
+        self.assertEqual(self._log(seq), [
+            ('instruments', 1, 'U'),
+            ('users', 2, 'I'),
+            ('users', 2, 'D'),
+        ])
+
+        # Status rows are journaled under their instrument
+        seq = self.conn.execute("SELECT MAX(seq) FROM change_log").fetchone()[0]
+        self.conn.execute("""
+            INSERT INTO maintenance_records (instrument_id, maintenance_type_id, maintenance_date, performed_by, notes)
+            VALUES (1, 1, '2025-06-01', 1, 'newer')
+        """)
+        self.assertIn(('maintenance_status', 1, 'U'), self._log(seq))
+
+    def test_old_entries_are_pruned(self):
+        migrate(self.conn)
+        for n in range(CHANGE_LOG_RETENTION // 1000 + 1):
+            self.conn.executemany(
+                "UPDATE instruments SET location = ? WHERE id = 1",
+                [(f'Lab {n}{i}',) for i in range(1000)]
+            )
+        count, oldest, latest = self.conn.execute("SELECT COUNT(*), MIN(seq), MAX(seq) FROM change_log").fetchone()
+        self.assertEqual(count, CHANGE_LOG_RETENTION)
+        self.assertEqual(oldest, latest - CHANGE_LOG_RETENTION + 1)
+
+class TestSearchIndexes(MigrationTestCase):
+    def _instruments(self, query):
+        rows = self.conn.execute(
+            "SELECT rowid FROM instruments_fts WHERE instruments_fts MATCH ?", (query,)
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def _records(self, query):
+        rows = self.conn.execute(
+            "SELECT rowid FROM maintenance_notes_fts WHERE maintenance_notes_fts MATCH ?", (query,)
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def test_existing_rows_are_indexed(self):
+        migrate(self.conn)
+        self.assertEqual(self._instruments('micro*'), [1])
+        self.assertEqual(self._instruments('"OLY-1"'), [1])
+        self.assertEqual(self._records('ok'), [1])
+
+    def test_triggers_keep_indexes_in_sync(self):
+        migrate(self.conn)
+        self.conn.execute("UPDATE instruments SET location = 'Cold room' WHERE id = 1")
+        self.assertEqual(self._instruments('cold'), [1])
+        self.assertEqual(self._instruments('"Lab"'), [])
+        # Updating an unindexed column leaves the index alone
+        self.conn.execute("UPDATE instruments SET status = 'Out of service' WHERE id = 1")
+        self.assertEqual(self._instruments('cold'), [1])
+
+        self.conn.execute("""
+            INSERT INTO maintenance_records (instrument_id, maintenance_type_id, maintenance_date, performed_by, notes)
+            VALUES (1, 1, '2025-06-01', 1, 'Battery leak found')
+        """)
+        self.assertEqual(self._records('batt* leak'), [2])
+        self.conn.execute("UPDATE maintenance_records SET notes = 'Battery replaced' WHERE id = 2")
+        self.assertEqual(self._records('leak'), [])
+        self.assertEqual(self._records('replaced'), [2])
+        self.conn.execute("DELETE FROM maintenance_records WHERE id = 2")
+        self.assertEqual(self._records('battery'), [])
+
+        # The external content index still agrees with its table
+        self.conn.execute("INSERT INTO maintenance_notes_fts (maintenance_notes_fts) VALUES ('integrity-check')")
+        self.conn.execute("INSERT INTO instruments_fts (instruments_fts) VALUES ('integrity-check')")
+
+if __name__ == '__main__':
+    unittest.main()
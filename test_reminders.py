@@ -0,0 +1,143 @@
+import os
+import sys
+import email
+import email.policy
+import tempfile
+import unittest
+import subprocess
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+from src.notifications import EmailConfig, EmailOutbox, ReminderService, SMTPMailer, SMTPSink, collect_digests
+from test_support import LAB_INSTRUMENTS, LAB_PLANS, make_lab_db
+
+NOW = datetime(2025, 6, 1, 9, 0)
+
+class TestReminders(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.manager = make_lab_db(self.tmp_dir.name, LAB_INSTRUMENTS, LAB_PLANS)
+
+    def tearDown(self):
+        self.manager.close()
+        self.tmp_dir.cleanup()
+
+    def _config(self, sink):
+        return EmailConfig(sink.host, sink.port, sender='lab@example.com', sender_name='Lab Maintenance System',
+                           use_tls=False, timeout=5)
+
+    def test_digests_group_by_responsible_user(self):
+        digests = collect_digests(self.manager, NOW)
+        self.assertEqual(
+            [(digest.username, [(item['instrument_name'], item['next_due'], item['overdue']) for item in digest.items])
+             for digest in digests],
+            [('user1', [('Microscope', '2025-04-29', True), ('Centrifuge', '2025-06-05', False)]),
+             ('user3', [('Freezer', '2025-01-29', True)])]
+        )
+
+    def test_reminders_share_one_connection(self):
+        with SMTPSink(reject=('u3@example.com',)) as sink:
+            result = ReminderService(self.manager, self._config(sink)).send_reminders(NOW)
+        self.assertEqual((result.digests, result.sent), (2, 1))
+        self.assertEqual(list(result.failed), ['u3@example.com'])
+        self.assertEqual(sink.connections, 1)
+
+        sender, recipients, content = sink.messages[0]
+        self.assertEqual((sender, recipients), ('lab@example.com', ['u1@example.com']))
+        message = email.message_from_bytes(content, policy=email.policy.default)
+        self.assertEqual(message['Subject'], 'Maintenance reminder: 1 overdue and 1 due soon')
+        body = message.get_content()
+        self.assertIn('2025-04-29  Microscope (A-1, Lab 101): Cleaning, last done 2025-04-01', body)
+        self.assertLess(body.index('Overdue:'), body.index('Centrifuge'))
+
+    def test_reminders_are_queued_once(self):
+        with SMTPSink(reject=('u3@example.com',)) as sink:
+            service = ReminderService(self.manager, self._config(sink))
+            service.send_reminders(NOW)
+            result = service.send_reminders(NOW + timedelta(hours=1))
+            self.assertEqual((result.digests, result.sent, result.failed), (0, 0, {}))
+            self.assertEqual(len(sink.messages), 1)
+
+            # The Centrifuge became overdue; the Microscope was already reminded of
+            result = service.send_reminders(NOW + timedelta(days=5))
+        self.assertEqual((result.digests, result.sent), (1, 1))
+        message = email.message_from_bytes(sink.messages[-1][2], policy=email.policy.default)
+        self.assertEqual(message['Subject'], 'Maintenance reminder: 1 overdue')
+        self.assertNotIn('Microscope', message.get_content())
+        self.assertEqual(service.outbox.counts(), {'sent': 2, 'failed': 1})
+
+    def test_failed_sends_are_retried_with_backoff(self):
+        with SMTPSink() as sink:
+            config = self._config(sink)
+        # Nothing listens on the port any more
+        outbox = EmailOutbox(self.manager, config)
+        outbox.MAX_ATTEMPTS = 3
+        result = ReminderService(self.manager, config, outbox).send_reminders(NOW)
+        self.assertEqual((result.digests, result.sent, result.retrying), (2, 0, 2))
+        start = NOW.timestamp()
+        self.assertEqual(outbox.next_attempt_at(), start + outbox.RETRY_DELAY)
+        self.assertEqual(outbox.drain(start + 59).retrying, 0)
+
+        self.assertEqual(outbox.drain(start + 60).retrying, 2)
+        self.assertEqual(outbox.next_attempt_at(), start + 60 + 2 * outbox.RETRY_DELAY)
+        result = outbox.drain(start + 180)
+        self.assertEqual((result.retrying, sorted(result.failed)), (0, ['u1@example.com', 'u3@example.com']))
+        self.assertIsNone(outbox.next_attempt_at())
+
+    def test_interrupted_run_resumes(self):
+        with SMTPSink() as sink:
+            outbox = EmailOutbox(self.manager, self._config(sink), workers=1, batch_size=1)
+            service = ReminderService(self.manager, self._config(sink), outbox)
+            self.assertEqual(service.enqueue_reminders(NOW), 2)
+            # A worker claims the first message and dies
+            start = NOW.timestamp()
+            self.assertEqual([row['recipient'] for row in outbox._claim(start)], ['u1@example.com'])
+
+            result = outbox.drain(start)
+            self.assertEqual(result.sent, 1)
+            self.assertEqual(sink.messages[0][1], ['u3@example.com'])
+            self.assertEqual(outbox.next_attempt_at(), start + outbox.LEASE_SECONDS)
+
+            # Resuming sends only what is left, once the claim expires
+            self.assertEqual(service.send_reminders(NOW + timedelta(seconds=outbox.LEASE_SECONDS)).sent, 1)
+        self.assertEqual([recipients for sender, recipients, content in sink.messages],
+                         [['u3@example.com'], ['u1@example.com']])
+        self.assertEqual(outbox.counts(), {'sent': 2})
+
+    def _messages(self, count):
+        messages = []
+        for n in range(count):
+            message = EmailMessage()
+            message['From'] = 'lab@example.com'
+            message['To'] = f'user{n}@example.com'
+            message['Subject'] = f'Message {n}'
+            message.set_content(f'.leading dot\nbody {n}\n')
+            messages.append(message)
+        return messages
+
+    def test_pipelining_and_reconnects(self):
+        messages = self._messages(50)
+        with SMTPSink(messages_per_connection=20) as sink:
+            with SMTPMailer(self._config(sink)) as mailer:
+                self.assertEqual(mailer.send_messages(messages), [None] * 50)
+        # Each message once, in order, despite the server hanging up twice
+        self.assertEqual([recipients for sender, recipients, content in sink.messages],
+                         [[f'user{n}@example.com'] for n in range(50)])
+        self.assertIn(b'\r\n.leading dot\r\nbody 49\r\n', sink.messages[-1][2])
+        self.assertEqual(sink.connections, 3)
+        # Greeting and EHLO, then one round trip per message
+        self.assertLessEqual(sink.round_trips, 3 * 3 + 50 + 3)
+
+        with SMTPSink() as sink:
+            with SMTPMailer(self._config(sink), pipelining=False) as mailer:
+                self.assertEqual(mailer.send_messages(messages), [None] * 50)
+        self.assertEqual(len(sink.messages), 50)
+        self.assertGreaterEqual(sink.round_trips, 4 * 50)
+
+    def test_runs_without_qt(self):
+        script = "import sys, send_reminders; sys.exit(3 if 'PyQt6' in sys.modules else 0)"
+        completed = subprocess.run([sys.executable, '-c', script],
+                                   cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True)
+        self.assertEqual(completed.returncode, 0, completed.stderr)
+
+if __name__ == '__main__':
+    unittest.main()
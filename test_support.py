@@ -0,0 +1,88 @@
+"""Small lab databases shared by the tests, built in a temporary directory"""
+import os
+import sqlite3
+from create_database import create_tables
+from src.database import DatabaseManager, InstrumentRepository, MaintenanceRepository
+
+USERS = [('user1', 'u1@example.com'), ('user2', 'u2@example.com'), ('user3', 'u3@example.com')]
+
+MAINTENANCE_TYPES = ['Cleaning', 'Calibration']
+
+# A fleet with something in every status on 2025-06-01:
+# (name, serial number, responsible user, status)
+LAB_INSTRUMENTS = [
+    ('Microscope', 'A-1', 1),
+    ('Centrifuge', 'B-2', 1),
+    ('Balance', 'C-3', 2),
+    ('Broken pump', 'D-4', 2, 'Out of Service'),
+    ('Orphan', 'E-5', None),
+    ('Freezer', 'F-6', 3)
+]
+
+# (instrument, type, period in weeks, last maintenance)
+LAB_PLANS = [
+    (1, 1, 4, '2025-04-01'),   # Due 04-29, overdue
+    (1, 2, 52, '2025-05-01'),  # Due 2026-04-30, on schedule
+    (2, 2, 4, '2025-05-08'),   # Due 06-05, due soon
+    (3, 1, 52, '2025-05-01'),
+    (4, 1, 4, '2025-01-01'),
+    (5, 1, 4, '2025-01-01'),
+    (6, 1, 4, '2025-01-01')
+]
+
+def make_lab_db(tmp_dir, instruments=(), plans=(), users=USERS, name='lab_instruments.db',
+                date_start_operating='2025-01-01'):
+    """
+    Create a lab database and open it.
+
+    Args:
+        tmp_dir: Directory of the database file
+        instruments: (name, serial number, responsible user id[, status[, location]])
+            per instrument, by default 'Operational' in 'Lab 101'
+        plans: Maintenance plans with their last maintenance, see add_plans
+        users: (username, email) per user, none of them admin
+        name: Database file name
+        date_start_operating: Start date of every instrument
+
+    Returns:
+        DatabaseManager: The open database; close it in tearDown
+    """
+    db_path = os.path.join(tmp_dir, name)
+    conn = sqlite3.connect(db_path)
+    create_tables(conn.cursor())
+    conn.executemany("INSERT INTO users (username, email, password, is_admin) VALUES (?, ?, 'x', 0)", users)
+    conn.executemany("INSERT INTO maintenance_types (name) VALUES (?)", [(name,) for name in MAINTENANCE_TYPES])
+    conn.executemany(
+        "INSERT INTO instruments (name, model, serial_number, location, status, brand, responsible_user_id, date_start_operating) "
+        "VALUES (?, 'M', ?, ?, ?, 'B', ?, ?)",
+        [(instrument[0], instrument[1],
+          instrument[4] if len(instrument) > 4 else 'Lab 101',
+          instrument[3] if len(instrument) > 3 else 'Operational',
+          instrument[2], date_start_operating) for instrument in instruments]
+    )
+    conn.commit()
+    conn.close()
+    manager = DatabaseManager(db_path)
+    add_plans(manager, plans)
+    return manager
+
+def add_plan(manager, instrument_id, type_id, period):
+    """Add a maintenance plan to an instrument, replacing its plan of the same type"""
+    instruments = InstrumentRepository(manager)
+    plans = [plan for plan in instruments.get_maintenance_plans(instrument_id)
+             if plan['maintenance_type_id'] != type_id]
+    instruments.set_maintenance_plans(instrument_id, plans + [{'maintenance_type_id': type_id,
+                                                               'period_weeks': period}])
+
+def add_plans(manager, plans):
+    """
+    Add maintenance plans, each with a record of its last maintenance.
+
+    Args:
+        plans: (instrument id, type id, period in weeks, last maintenance
+            date[, performed by, user 1 by default]) per plan
+    """
+    records = MaintenanceRepository(manager)
+    for instrument_id, type_id, period, last, *performed_by in plans:
+        add_plan(manager, instrument_id, type_id, period)
+        records.create_maintenance_record(instrument_id, type_id, last, (performed_by or [1])[0], None)
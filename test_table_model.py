@@ -0,0 +1,163 @@
+import os
+import unittest
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QColor
+from PyQt6.QtWidgets import QApplication
+from PyQt6.QtWidgets import QStyleOptionViewItem
+from src.ui.base.table_model import ColumnarTableModel, PagedTableModel, STATUS_ROLE
+from src.ui.base.base_table import BaseTable
+
+class TestColumnarTableModel(unittest.TestCase):
+    def setUp(self):
+        self.model = ColumnarTableModel(['Name', 'Location', 'Next'])
+        self.model.set_rows([
+            ['pH Meter', 'Lab 101', '2025-08-14'],
+            ['Autoclave', 'Lab 103', None],
+            ['Centrifuge', 'Lab 101', '2025-06-12']
+        ], [5, 4, 2])
+
+    def _column(self, column):
+        return [self.model.index(row, column).data() for row in range(self.model.rowCount())]
+
+    def test_rows_are_stored_by_column(self):
+        self.assertEqual(self.model.rowCount(), 3)
+        self.assertEqual(self.model.columnCount(), 3)
+        self.assertEqual(self._column(0), ['pH Meter', 'Autoclave', 'Centrifuge'])
+        self.assertEqual(self.model.cell_text(1, 2), '')
+        self.assertEqual(self.model.index(2, 1).data(Qt.ItemDataRole.UserRole), 2)
+        self.assertEqual(self.model.row_id(0), 5)
+        self.assertEqual(self.model.headerData(1, Qt.Orientation.Horizontal), 'Location')
+
+    def test_status_and_column_color_roles(self):
+        blue = QColor('#4a9eff')
+        self.model.set_column_foreground(0, blue)
+        self.model.set_row_status(1, 2)
+
+        self.assertEqual(self.model.index(1, 1).data(STATUS_ROLE), 2)
+        self.assertIsNone(self.model.index(0, 1).data(STATUS_ROLE))
+        self.assertEqual(self.model.index(1, 0).data(Qt.ItemDataRole.ForegroundRole), blue)
+        self.assertIsNone(self.model.index(1, 1).data(Qt.ItemDataRole.ForegroundRole))
+
+    def test_sort_moves_ids_and_statuses_with_rows(self):
+        self.model.set_row_status(1, 2)
+        self.model.sort(0, Qt.SortOrder.AscendingOrder)
+        self.assertEqual(self._column(0), ['Autoclave', 'Centrifuge', 'pH Meter'])
+        self.assertEqual([self.model.row_id(row) for row in range(3)], [4, 2, 5])
+        self.assertEqual(self.model.index(0, 0).data(STATUS_ROLE), 2)
+
+        self.model.sort(0, Qt.SortOrder.DescendingOrder)
+        self.assertEqual(self._column(0), ['pH Meter', 'Centrifuge', 'Autoclave'])
+
+    def test_append_and_clear(self):
+        row = self.model.append_row(['Incubator'], 7)
+        self.assertEqual(row, 3)
+        self.assertEqual(self.model.cell_text(3, 1), '')
+        self.model.clear()
+        self.assertEqual(self.model.rowCount(), 0)
+
+    def test_merge_rows_updates_inserts_and_removes(self):
+        events = []
+        self.model.dataChanged.connect(lambda top, bottom: events.append(('changed', top.row())))
+        self.model.rowsInserted.connect(lambda parent, first, last: events.append(('inserted', first)))
+        self.model.rowsRemoved.connect(lambda parent, first, last: events.append(('removed', first)))
+        self.model.set_row_status(1, 2)
+        events.clear()
+
+        changed = self.model.merge_rows(
+            {5: ['pH Meter', 'Lab 102', '2025-08-14'], 4: None, 7: ['Incubator', 'Lab 104']},
+            {7: 1}
+        )
+        self.assertEqual(events, [('removed', 1), ('changed', 0), ('inserted', 2)])
+        self.assertEqual(changed, {5: 0, 7: 2})
+        self.assertEqual(self._column(0), ['pH Meter', 'Centrifuge', 'Incubator'])
+        self.assertEqual(self.model.cell_text(0, 1), 'Lab 102')
+        self.assertEqual(self.model.row_status(2), 1)
+
+        # Rows that are affected but no longer returned are removed
+        self.model.merge_rows({}, is_affected=lambda row_id: row_id == 2)
+        self.assertEqual([self.model.row_id(row) for row in range(self.model.rowCount())], [5, 7])
+
+    def test_editable_columns_track_edited_rows(self):
+        self.model.set_editable_columns([1])
+        self.assertFalse(self.model.flags(self.model.index(0, 0)) & Qt.ItemFlag.ItemIsEditable)
+        self.assertFalse(self.model.setData(self.model.index(0, 0), 'x'))
+        self.assertTrue(self.model.setData(self.model.index(2, 1), 'Lab 102'))
+        self.assertEqual(self.model.cell_text(2, 1), 'Lab 102')
+        self.assertEqual(self.model.edited_row_ids(), {2})
+
+class TestPagedTableModel(unittest.TestCase):
+    def setUp(self):
+        self.requests = []
+        self.model = PagedTableModel(['Value'], self._fetch_page, page_size=10)
+
+    def _fetch_page(self, after, limit):
+        self.requests.append(after)
+        start = 0 if after is None else after + 1
+        values = list(range(start, min(start + limit, 25)))
+        return [[value] for value in values], values, values[-1] if values else after
+
+    def test_pages_load_on_demand(self):
+        self.assertFalse(self.model.canFetchMore())
+        self.model.reload()
+        self.assertEqual(self.model.rowCount(), 10)
+        self.assertTrue(self.model.canFetchMore())
+
+        self.model.fetchMore()
+        self.model.fetchMore()
+        self.assertEqual(self.model.rowCount(), 25)
+        self.assertFalse(self.model.canFetchMore())
+        self.assertEqual(self.requests, [None, 9, 19])
+        self.assertEqual(self.model.row_id(24), 24)
+
+        self.model.reload()
+        self.assertEqual(self.model.rowCount(), 10)
+
+class TestBaseTable(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+
+    def test_selection_and_ids(self):
+        table = BaseTable()
+        table.set_headers(['Username', 'Email'])
+        table.set_rows([['admin1', 'a@example.com'], ['user1', 'u@example.com']], [1, 3])
+        self.assertIsNone(table.get_selected_row_id())
+
+        table.selectRow(1)
+        self.assertEqual(table.get_selected_row(), 1)
+        self.assertEqual(table.get_selected_row_id(), 3)
+        self.assertEqual(table.get_cell_text(1, 0), 'user1')
+
+        clicks = []
+        table.cellClicked.connect(lambda row, column: clicks.append((row, column)))
+        table.clicked.emit(table.model().index(0, 1))
+        self.assertEqual(clicks, [(0, 1)])
+
+    def _style_option(self, table, row, column):
+        option = QStyleOptionViewItem()
+        table.itemDelegate().initStyleOption(option, table.model().index(row, column))
+        return option
+
+    def test_status_colors_are_painted_by_delegate(self):
+        table = BaseTable()
+        table.set_headers(['Instrument', 'Next'])
+        table.set_column_color(0, '#4a9eff')
+        table.set_status_colors({1: 'yellow', 2: 'red'})
+        table.set_rows([['pH Meter', ''], ['Autoclave', ''], ['Centrifuge', '']], [5, 4, 2], [0, 1, 2])
+
+        self.assertEqual(self._style_option(table, 2, 1).backgroundBrush.color(), QColor('#ff0000'))
+        yellow = self._style_option(table, 1, 1)
+        self.assertEqual(yellow.backgroundBrush.color(), QColor('#ffff00'))
+        self.assertEqual(yellow.palette.text().color(), QColor('#333333'))
+        # The column color wins over the status text color
+        self.assertEqual(self._style_option(table, 1, 0).palette.text().color(), QColor('#4a9eff'))
+        self.assertEqual(self._style_option(table, 0, 1).backgroundBrush.style(), Qt.BrushStyle.NoBrush)
+
+        table.set_row_status(0, 2)
+        self.assertEqual(self._style_option(table, 0, 1).backgroundBrush.color(), QColor('#ff0000'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import tempfile
+import unittest
+from datetime import datetime
+from src.database import DatabaseError, MaintenanceRepository
+from src.notifications import EmailConfig, ReminderService, ReminderTrigger, collect_digests
+from src.scheduling import Reassignment, WorkloadBalancer
+from test_support import add_plans, make_lab_db
+
+NOW = datetime(2025, 6, 2, 9, 0)  # A Monday
+
+class TestWorkloadBalancer(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.manager = make_lab_db(self.tmp_dir.name, [
+            ('Microscope', 'A-1', 1), ('Centrifuge', 'B-2', 1), ('Balance', 'C-3', 1), ('Scope', 'D-4', 1),
+            ('Freezer', 'E-5', 2), ('Spectrometer', 'F-6', 3), ('Orphan', 'G-7', None)
+        ])
+        self.records = MaintenanceRepository(self.manager)
+
+    def tearDown(self):
+        self.manager.close()
+        self.tmp_dir.cleanup()
+
+    def _add_fleet(self):
+        # user1's four cleanings are all due on Wednesday 06-04
+        add_plans(self.manager, [(instrument_id, 1, 4, '2025-05-07', 1) for instrument_id in range(1, 5)] +
+                  [(5, 1, 4, '2025-05-14', 2),    # Due 06-11
+                   (6, 2, 52, '2025-01-01', 3),   # Due 2025-12-31, only calibrates
+                   (7, 1, 4, '2025-05-08', 3)])   # Due 06-05, no responsible user
+
+    def test_spreads_load_over_qualified_users(self):
+        self._add_fleet()
+        plan = WorkloadBalancer(self.manager, weeks=4, tolerance_days=3).suggest(NOW)
+        self.assertEqual(plan.week_starts, ['2025-06-02', '2025-06-09', '2025-06-16', '2025-06-23'])
+        self.assertEqual(plan.user_ids, [1, 2, 3])
+        self.assertEqual(plan.before[0], [4, 0, 0])
+        self.assertEqual((plan.unassigned_before, plan.unassigned), (1, 0))
+        # The orphan goes to user2 first; user3 performed a cleaning, so counts as qualified
+        self.assertEqual(plan.after[0], [2, 2, 1])
+        self.assertEqual((plan.peak_before, plan.peak_after), (4, 2))
+        moves = {(r.instrument_id, r.from_user_id, r.to_user_id, r.due_date, r.scheduled_date)
+                 for r in plan.reassignments}
+        self.assertEqual({move[1:] for move in moves},
+                         {(None, 2, '2025-06-05', '2025-06-05'), (1, 2, '2025-06-04', '2025-06-04'),
+                          (1, 3, '2025-06-04', '2025-06-04')})
+        loads = {load['user_id']: load for load in plan.user_loads()}
+        self.assertEqual((loads[1]['total_before'], loads[1]['total_after']), (4, 2))
+        self.assertEqual((loads[2]['peak_before'], loads[2]['peak_after']), (1, 2))
+
+    def test_tolerance_moves_between_weeks(self):
+        # Only user1 cleans; four cleanings due Sunday 06-08, one of them 06-11
+        add_plans(self.manager, [(instrument_id, 1, 4, '2025-05-11', 1) for instrument_id in range(1, 4)] +
+                  [(4, 1, 4, '2025-05-14', 1)])
+        plan = WorkloadBalancer(self.manager, weeks=3, tolerance_days=0).suggest(NOW)
+        self.assertEqual((plan.before[0], plan.before[1]), ([3], [1]))
+        self.assertEqual(plan.reassignments, [])
+
+        plan = WorkloadBalancer(self.manager, weeks=3, tolerance_days=3).suggest(NOW)
+        self.assertEqual((plan.after[0], plan.after[1]), ([2], [2]))
+        [move] = plan.reassignments
+        # Brought forward into the next week, the closest day within tolerance
+        self.assertEqual((move.due_date, move.scheduled_date, move.from_user_id, move.to_user_id),
+                         ('2025-06-08', '2025-06-09', 1, 1))
+
+    def test_apply_routes_reminders_to_assignees(self):
+        self._add_fleet()
+        balancer = WorkloadBalancer(self.manager, weeks=4, tolerance_days=3)
+        plan = balancer.suggest(NOW)
+        # One bad row rolls the whole batch back
+        bad = Reassignment(1, 1, '2025-06-04', '2025-06-04', 1, None)
+        with self.assertRaises(DatabaseError):
+            balancer.apply(plan.reassignments + [bad], NOW)
+        self.assertEqual(self.manager.get_scalar("SELECT COUNT(*) FROM maintenance_assignments"), 0)
+
+        self.assertEqual(balancer.apply(plan.reassignments, NOW), 3)
+        again = balancer.suggest(NOW)
+        self.assertEqual((again.before, again.reassignments), (plan.after, []))
+
+        items = {digest.username: sorted(item['instrument_id'] for item in digest.items)
+                 for digest in collect_digests(self.manager, NOW)}
+        moved = {r.to_user_id: r.instrument_id for r in plan.reassignments if r.from_user_id == 1}
+        self.assertEqual(len(items['user1']), 2)
+        self.assertEqual(items['user2'], sorted([moved[2], 5, 7]))
+        self.assertEqual(items['user3'], [moved[3]])
+
+        # Once done, the next occurrence is the responsible user's again
+        self.records.create_maintenance_record(moved[2], 1, '2025-06-04', 2, None)
+        self.assertNotIn(moved[2], [item['instrument_id'] for digest in collect_digests(self.manager, NOW)
+                                    if digest.username == 'user2' for item in digest.items])
+
+    def test_reassignment_triggers_reminder(self):
+        self._add_fleet()
+        service = ReminderService(self.manager, EmailConfig('localhost', 25, sender='lab@example.com'))
+        self.assertEqual(service.enqueue_reminders(NOW), 2)
+        trigger = ReminderTrigger(self.manager, NOW)
+        self.assertFalse(trigger.changed(NOW))
+
+        # Nothing changes status, but user2 was never reminded of the Microscope
+        WorkloadBalancer(self.manager).apply([Reassignment(1, 1, '2025-06-04', '2025-06-04', 1, 2)], NOW)
+        self.assertTrue(trigger.changed(NOW))
+        self.assertFalse(trigger.changed(NOW))
+        self.assertEqual(service.enqueue_reminders(NOW), 1)
+        self.assertEqual(self.manager.get_scalar("SELECT recipient FROM email_outbox ORDER BY id DESC LIMIT 1"),
+                         'u2@example.com')
+
+if __name__ == '__main__':
+    unittest.main()